@@ -4,6 +4,7 @@ import re
 
 class Cliente(Model):
     __tablename__ = 'tbl_clientes'
+    __cache_by_pk__ = True
     
     id = Column(Integer, primary_key=True)
     nome = Column(String(100), nullable=False)
@@ -14,6 +14,16 @@ class ContaBancaria(Model):
     banco = relationship('Banco', back_populates='contas_bancarias')
     lancamentos = relationship('Lancamento', back_populates='conta_bancaria')
     
+    def saldo_em(self, data):
+        """Saldo da conta no fim do dia `data` (uma linha de tbl_saldos_diarios)"""
+        from app.models.lancamento import saldos
+        return saldos.balance_at(self.id, data)
+    
+    def conciliar(self, extrato, tolerancia=None):
+        """Concilia um extrato (arquivo CSV/OFX ou linhas) com os lançamentos da conta"""
+        from app.models.lancamento import conciliacao
+        return conciliacao.reconcile(self, extrato, tolerance=tolerancia)
+    
     @validates('agencia')
     def validar_agencia(self, key, value):
         """Valida o número da agência"""
@@ -4,6 +4,12 @@ from datetime import datetime
 class ContaPagar(Model):
     __tablename__ = 'tbl_contas_pagar'
     
+    # Contas por situação e vencimento; o índice parcial atende só às pendentes
+    __indexes__ = [
+        ('status', 'data_vencimento'),
+        {'columns': ['data_vencimento'], 'where': "status = 'pendente'", 'include': ['valor']},
+    ]
+    
     id = Column(Integer, primary_key=True)
     fornecedor_id = Column(Integer, ForeignKey('tbl_fornecedores.id'), nullable=False)
     descricao = Column(String(200), nullable=False)
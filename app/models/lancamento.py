@@ -1,9 +1,17 @@
 from pyquent import Model, Column, relationship, validates
 from datetime import datetime
+from quentorm.ledger import Ledger
+from quentorm.reconciliation import Reconciler
 
 class Lancamento(Model):
     __tablename__ = 'tbl_lancamentos'
     
+    # Extratos por usuário, dos lançamentos mais recentes para os mais antigos
+    __indexes__ = [('user_id', '-data')]
+
+    # Uma partição por mês: extratos e relatórios mensais leem só os meses filtrados
+    __partition_by__ = ('range', 'data', 'month')
+    
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     tipo = Column(String(20), nullable=False)
@@ -41,4 +49,12 @@ class Lancamento(Model):
         tipos_validos = ['entrada', 'saida']
         if value not in tipos_validos:
             raise ValueError(f'Tipo inválido. Use um dos seguintes: {", ".join(tipos_validos)}')
-        return value 
\ No newline at end of file
+        return value
+
+# Saldo de cada conta bancária no fim de cada dia, mantido a cada lançamento salvo
+saldos = Ledger(Lancamento, account='conta_bancaria_id', date='data', amount='valor', kind='tipo',
+                table='tbl_saldos_diarios')
+
+# Conciliação dos extratos bancários (CSV/OFX) com os lançamentos de cada conta
+conciliacao = Reconciler(Lancamento, account='conta_bancaria_id', date='data', amount='valor', kind='tipo',
+                         table='tbl_conciliacoes')
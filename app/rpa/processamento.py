@@ -5,8 +5,11 @@ Este módulo demonstra como usar os modelos base
 em um processo de automação.
 """
 
-from app.models.base import Cliente, ContaBancaria
+from app.models.base import ContaBancaria
+from app.models.cliente import Cliente
 from pyquent.utils.validators import validar_cpf, validar_agencia, validar_conta
+from quentorm.dedup import deduplicate, normalize_document
+from sqlalchemy.exc import IntegrityError
 import pandas as pd
 from datetime import datetime
 
@@ -19,25 +22,42 @@ class ProcessadorClientes:
         
     def processar_clientes(self):
         """Processa dados de clientes."""
-        df = pd.read_excel(self.arquivo_clientes)
+        # CPF como texto, para não perder os zeros à esquerda
+        df = pd.read_excel(self.arquivo_clientes, dtype={'cpf': str})
         
-        for _, linha in df.iterrows():
+        # Separar novos, já cadastrados e repetidos antes de gravar
+        grupos = deduplicate(df.to_dict('records'), Cliente, 'cpf_cnpj', key='cpf')
+        for _, linha in grupos.invalid:
+            print(f"CPF inválido: {linha['cpf']}")
+        for cpf, linha in grupos.duplicates:
+            print(f"CPF repetido na planilha: {cpf} ({linha['nome']})")
+        for cpf, linha in grupos.existing:
+            print(f"Cliente já cadastrado: {cpf} ({linha['nome']})")
+        
+        for cpf, linha in grupos.new:
             # Validar CPF
-            if not validar_cpf(linha['cpf']):
+            if not validar_cpf(cpf):
                 print(f"CPF inválido: {linha['cpf']}")
                 continue
                 
-            # Criar cliente
-            cliente = Cliente.create(
-                nome=linha['nome'],
-                cpf=linha['cpf'],
-                email=linha['email'],
-                telefone=linha['telefone']
-            )
-            
-            # Salvar no banco
-            cliente.save()
+            # Criar cliente; outro processo pode ter gravado o mesmo CPF depois da separação
+            try:
+                cliente = Cliente.create(
+                    nome=linha['nome'],
+                    cpf_cnpj=cpf,
+                    email=linha['email'],
+                    telefone=linha['telefone']
+                )
+                
+                # Salvar no banco
+                cliente.save()
+            except IntegrityError:
+                Cliente.session().rollback()
+                print(f"Cliente já cadastrado: {cpf} ({linha['nome']})")
+                continue
             print(f"Cliente criado: {cliente.nome}")
+        
+        print(f"Resumo: {grupos.summary()}")
             
     def processar_contas(self):
         """Processa dados de contas bancárias."""
@@ -54,7 +74,7 @@ class ProcessadorClientes:
                 continue
                 
             # Buscar cliente
-            cliente = Cliente.where('cpf', linha['cpf_cliente']).first()
+            cliente = Cliente.where('cpf_cnpj', normalize_document(linha['cpf_cliente'])).first()
             if not cliente:
                 print(f"Cliente não encontrado: {linha['cpf_cliente']}")
                 continue
@@ -68,7 +68,12 @@ db.cache_config({
         'port': 6379,
         'database': 0,
         'prefix': 'quentorm_',
-        'ttl': timedelta(hours=1)
+        'ttl': timedelta(hours=1),
+        # Cache em memória de cada worker (L1) na frente do Redis (L2)
+        'l1': {
+            'max_size': 10000,
+            'ttl': timedelta(seconds=30)
+        }
     },
     'secondary': {
         'driver': 'memcached',
@@ -85,7 +90,13 @@ db.logging_config({
         'enabled': True,
         'slow_query_threshold': 1000,
         'log_file': 'logs/queries.log',
-        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        # Parâmetros mascarados no log (True mascara todos)
+        'redact_params': ['password', 'cpf', 'cnpj'],
+        # Plano (EXPLAIN) das consultas lentas, no máximo uma vez por hora por consulta
+        'explain': True,
+        'explain_interval': 3600,
+        'large_tables': ['tbl_lancamentos']
     },
     'secondary': {
         'enabled': True,
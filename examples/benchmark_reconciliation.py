@@ -0,0 +1,86 @@
+"""
+Benchmark da conciliação de extratos (quentorm.reconciliation)
+
+Gera N lançamentos de uma conta em um SQLite temporário e um extrato com N
+linhas: a maioria corresponde a um lançamento com até 2 dias de diferença e
+o restante são tarifas sem lançamento. Mede a leitura dos candidatos, o
+casamento e a gravação dos resultados:
+
+    python examples/benchmark_reconciliation.py              # 1.000.000 linhas
+    python examples/benchmark_reconciliation.py 100000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import Column, Date, Integer, String, create_engine, insert
+from sqlalchemy.orm import DeclarativeBase
+
+from quentorm.reconciliation import Reconciler, StatementLine
+from quentorm.utils.money import Amount, Money
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Lancamento(Base):
+    __tablename__ = 'tbl_lancamentos'
+
+    id = Column(Integer, primary_key=True)
+    conta_bancaria_id = Column(Integer, nullable=False, index=True)
+    tipo = Column(String(20), nullable=False)
+    valor = Column(Money, nullable=False)
+    data = Column(Date, nullable=False)
+
+
+conciliacao = Reconciler(Lancamento, account='conta_bancaria_id', date='data', amount='valor', kind='tipo',
+                         table='tbl_conciliacoes')
+
+
+def generate(total):
+    random.seed(42)
+    start = date.today() - timedelta(days=365)
+    entries, lines = [], []
+    for index in range(total):
+        day = start + timedelta(days=random.randint(0, 364))
+        cents = random.randint(100, 500_000)
+        kind = 'entrada' if random.random() < 0.4 else 'saida'
+        entries.append({'id': index + 1, 'conta_bancaria_id': 1, 'tipo': kind,
+                        'valor': Amount.from_cents(cents), 'data': day})
+        if random.random() < 0.95:
+            posted = day + timedelta(days=random.choice((0, 0, 0, 1, 2)))
+            lines.append(StatementLine(f"T{index}", posted, cents if kind == 'entrada' else -cents, 'PIX'))
+        else:
+            lines.append(StatementLine(f"T{index}", day, -random.randint(100, 5000), 'TARIFA'))
+    return entries, lines
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    path = os.path.join(tempfile.mkdtemp(), 'conciliacao.db')
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    entries, lines = generate(total)
+    began = time.perf_counter()
+    with engine.begin() as conn:
+        for start in range(0, total, 50_000):
+            conn.execute(insert(Lancamento.__table__), entries[start:start + 50_000])
+    print(f"{total} lançamentos carregados em {time.perf_counter() - began:.1f}s ({path})")
+
+    began = time.perf_counter()
+    with engine.begin() as conn:
+        summary = conciliacao.reconcile(1, lines, conn=conn)
+    print(f"  conciliação de {total} linhas {time.perf_counter() - began:8.2f}s  {summary}")
+
+    began = time.perf_counter()
+    with engine.begin() as conn:
+        summary = conciliacao.reconcile(1, lines, conn=conn)
+    print(f"  reimportação do mesmo extrato  {time.perf_counter() - began:8.2f}s  {summary}")
+
+
+if __name__ == '__main__':
+    main()
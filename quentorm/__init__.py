@@ -1,28 +1,68 @@
 """
 QuentORM - ORM para Python
+
+Os nomes do pacote são importados sob demanda (PEP 562): `import quentorm`
+não carrega o SQLAlchemy, e `from quentorm import BaseModel` só carrega o
+módulo de modelos.
 """
 
-from .utils.models import BaseModel, Column, String, Integer, Float, Boolean, DateTime, ForeignKey, relationship
-from .utils.validators import validar_cpf, validar_cnpj, validar_cpf_cnpj, validar_agencia, validar_conta, validar_digito
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
 
 __version__ = '1.0.0'
 __author__ = 'QuentORM Team'
 __license__ = 'MIT'
 
-__all__ = [
-    'BaseModel',
-    'Column',
-    'String',
-    'Integer',
-    'Float',
-    'Boolean',
-    'DateTime',
-    'ForeignKey',
-    'relationship',
-    'validar_cpf',
-    'validar_cnpj',
-    'validar_cpf_cnpj',
-    'validar_agencia',
-    'validar_conta',
-    'validar_digito'
-] 
\ No newline at end of file
+# Nome exportado -> módulo que o define
+_EXPORTS = {
+    'BaseModel': '.utils.models',
+    'Column': '.utils.models',
+    'String': '.utils.models',
+    'Integer': '.utils.models',
+    'Float': '.utils.models',
+    'Boolean': '.utils.models',
+    'DateTime': '.utils.models',
+    'ForeignKey': '.utils.models',
+    'relationship': '.utils.models',
+    'Money': '.utils.money',
+    'Amount': '.utils.money',
+    'cache': '.caching',
+    'cache_query': '.caching',
+    'invalidate_cache': '.caching',
+    'log_query': '.monitoring',
+    'Database': '.database',
+    'AsyncDatabase': '.database',
+    'Migration': '.database',
+    'Seeder': '.database',
+    'validar_cpf': '.utils.validators',
+    'validar_cnpj': '.utils.validators',
+    'validar_cpf_cnpj': '.utils.validators',
+    'validar_agencia': '.utils.validators',
+    'validar_conta': '.utils.validators',
+    'validar_digito': '.utils.validators',
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .caching import cache, cache_query, invalidate_cache
+    from .database import AsyncDatabase, Database, Migration, Seeder
+    from .monitoring import log_query
+    from .utils.models import BaseModel, Boolean, Column, DateTime, Float, ForeignKey, Integer, String, relationship
+    from .utils.money import Amount, Money
+    from .utils.validators import (validar_agencia, validar_cnpj, validar_conta, validar_cpf, validar_cpf_cnpj,
+                                   validar_digito)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # Guardado no módulo: os próximos acessos não passam por aqui
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(__all__) | {'__version__', '__author__', '__license__'})
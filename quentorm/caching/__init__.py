@@ -0,0 +1,26 @@
+"""
+Módulo de cache do QuentORM
+"""
+
+from .backends import MemoryCache, RedisCache, MemcachedCache, build_cache, get_cache, set_cache
+from .layered import LayeredCache
+from .bus import RedisBus, UnixSocketBus
+from .decorators import cache, cache_query, invalidate_cache, forget, cache_stats, reset_cache_stats
+
+__all__ = [
+    'MemoryCache',
+    'RedisCache',
+    'MemcachedCache',
+    'LayeredCache',
+    'RedisBus',
+    'UnixSocketBus',
+    'build_cache',
+    'get_cache',
+    'set_cache',
+    'cache',
+    'cache_query',
+    'invalidate_cache',
+    'forget',
+    'cache_stats',
+    'reset_cache_stats'
+]
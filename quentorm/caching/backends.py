@@ -0,0 +1,422 @@
+"""
+Backends de cache do QuentORM
+
+Os backends guardam apenas valores serializáveis (tuplas, números, strings),
+nunca objetos ORM vivos, para que possam ser compartilhados entre sessões.
+"""
+
+import hashlib
+import pickle
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+TTL = Optional[Union[int, float, timedelta]]
+
+_MISSING = object()
+
+
+def ttl_seconds(ttl: TTL) -> Optional[float]:
+    """Converte um TTL (segundos ou timedelta) para segundos"""
+    if ttl is None:
+        return None
+    if isinstance(ttl, timedelta):
+        return ttl.total_seconds()
+    return float(ttl)
+
+
+class MemoryCache:
+    """Cache em memória do processo, com expiração por TTL e descarte LRU"""
+
+    def __init__(self, max_size: int = 10000, ttl: TTL = None, prefix: str = ''):
+        """Inicializa o cache com tamanho máximo, TTL padrão e prefixo de chaves"""
+        self.max_size = max_size
+        self.ttl = ttl_seconds(ttl)
+        self.prefix = prefix
+        self._data: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expires_at(self, ttl: TTL) -> Optional[float]:
+        seconds = ttl_seconds(ttl) if ttl is not None else self.ttl
+        return time.monotonic() + seconds if seconds else None
+
+    def _lookup(self, key: str, now: float) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Obtém um valor do cache ou `default` se ausente/expirado"""
+        with self._lock:
+            value = self._lookup(self.prefix + key, time.monotonic())
+        return default if value is _MISSING else value
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Obtém vários valores de uma vez; chaves ausentes não aparecem no resultado"""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                value = self._lookup(self.prefix + key, now)
+                if value is not _MISSING:
+                    found[key] = value
+        return found
+
+    def get_many_with_ttl(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, Optional[float]]]:
+        """Como `get_many`, com os segundos que restam a cada valor (None: sem expiração)"""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                value = self._lookup(self.prefix + key, now)
+                if value is not _MISSING:
+                    expires_at = self._data[self.prefix + key][1]
+                    found[key] = (value, None if expires_at is None else expires_at - now)
+        return found
+
+    def set(self, key: str, value: Any, ttl: TTL = None) -> None:
+        """Armazena um valor no cache"""
+        expires_at = self._expires_at(ttl)
+        with self._lock:
+            self._store(self.prefix + key, value, expires_at)
+
+    def set_many(self, mapping: Dict[str, Any], ttl: TTL = None) -> None:
+        """Armazena vários valores de uma vez"""
+        expires_at = self._expires_at(ttl)
+        with self._lock:
+            for key, value in mapping.items():
+                self._store(self.prefix + key, value, expires_at)
+
+    def add(self, key: str, value: Any, ttl: TTL = None) -> bool:
+        """Armazena o valor apenas se a chave não existir; retorna True se armazenou"""
+        expires_at = self._expires_at(ttl)
+        with self._lock:
+            if self._lookup(self.prefix + key, time.monotonic()) is not _MISSING:
+                return False
+            self._store(self.prefix + key, value, expires_at)
+            return True
+
+    def delete(self, key: str) -> None:
+        """Remove uma chave do cache"""
+        with self._lock:
+            self._data.pop(self.prefix + key, None)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Remove várias chaves do cache"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(self.prefix + key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """Remove todas as chaves que começam com o prefixo informado"""
+        full = self.prefix + prefix
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(full)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        """Remove todas as chaves do cache"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _escape_glob(text: str) -> str:
+    return re.sub(r'([*?\[\]\\])', r'\\\1', text)
+
+
+class RedisCache:
+    """Cache compartilhado em um servidor Redis (requer o pacote `redis`)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 6379, database: int = 0,
+                 password: Optional[str] = None, prefix: str = '', ttl: TTL = None,
+                 client: Any = None, serializer: Any = pickle):
+        """Inicializa o cache a partir dos dados de conexão ou de um cliente existente"""
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("O driver de cache 'redis' requer o pacote redis: pip install redis") from e
+            client = redis.Redis(host=host, port=port, db=database, password=password)
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl_seconds(ttl)
+        self.serializer = serializer
+
+    def _px(self, ttl: TTL) -> Optional[int]:
+        seconds = ttl_seconds(ttl) if ttl is not None else self.ttl
+        return int(seconds * 1000) if seconds else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return default if raw is None else self.serializer.loads(raw)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        raws = self.client.mget([self.prefix + key for key in keys])
+        return {key: self.serializer.loads(raw) for key, raw in zip(keys, raws) if raw is not None}
+
+    def get_many_with_ttl(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, Optional[float]]]:
+        """Como `get_many`, com os segundos que restam a cada valor (GET e PTTL na mesma ida ao servidor)"""
+        keys = list(keys)
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(self.prefix + key)
+            pipe.pttl(self.prefix + key)
+        replies = pipe.execute()
+        found = {}
+        for key, raw, pttl in zip(keys, replies[::2], replies[1::2]):
+            if raw is not None:
+                # -1: sem expiração; -2: a chave expirou entre o GET e o PTTL
+                found[key] = (self.serializer.loads(raw), None if pttl == -1 else max(pttl, 0) / 1000.0)
+        return found
+
+    def set(self, key: str, value: Any, ttl: TTL = None) -> None:
+        self.client.set(self.prefix + key, self.serializer.dumps(value), px=self._px(ttl))
+
+    def set_many(self, mapping: Dict[str, Any], ttl: TTL = None) -> None:
+        px = self._px(ttl)
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(self.prefix + key, self.serializer.dumps(value), px=px)
+        pipe.execute()
+
+    def add(self, key: str, value: Any, ttl: TTL = None) -> bool:
+        return bool(self.client.set(self.prefix + key, self.serializer.dumps(value), px=self._px(ttl), nx=True))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = [self.prefix + key for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def delete_prefix(self, prefix: str) -> None:
+        batch = []
+        for key in self.client.scan_iter(match=_escape_glob(self.prefix + prefix) + '*', count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
+
+    def clear(self) -> None:
+        self.delete_prefix('')
+
+
+class MemcachedCache:
+    """
+    Cache compartilhado em um servidor memcached (requer o pacote `pymemcache`)
+
+    O memcached não permite listar chaves; por isso `delete_prefix` funciona
+    por namespaces versionados: o namespace de uma chave vai até o segundo
+    `:` (ex.: `pk:tbl_clientes:`) e removê-lo apenas incrementa sua geração.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 11211, prefix: str = '',
+                 ttl: TTL = None, client: Any = None, serializer: Any = pickle):
+        """Inicializa o cache a partir dos dados de conexão ou de um cliente existente"""
+        if client is None:
+            try:
+                from pymemcache.client.base import PooledClient
+            except ImportError as e:
+                raise ImportError("O driver de cache 'memcached' requer o pacote pymemcache: pip install pymemcache") from e
+            client = PooledClient((host, port))
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl_seconds(ttl)
+        self.serializer = serializer
+
+    @staticmethod
+    def _namespace(key: str) -> str:
+        parts = key.split(':', 2)
+        return ':'.join(parts[:2]) + ':' if len(parts) == 3 else ''
+
+    def _expire(self, ttl: TTL) -> int:
+        seconds = ttl_seconds(ttl) if ttl is not None else self.ttl
+        return int(seconds) if seconds else 0
+
+    def _generations(self, namespaces: Iterable[str]) -> Dict[str, bytes]:
+        namespaces = [ns for ns in set(namespaces) if ns]
+        if not namespaces:
+            return {}
+        names = {ns: self._safe(f"gen:{ns}") for ns in namespaces}
+        found = self.client.get_many(list(names.values()))
+        missing = [name for name in names.values() if name not in found]
+        if missing:
+            # Geração nova (e não zero) para não ressuscitar entradas após um despejo
+            for name in missing:
+                self.client.add(name, str(time.time_ns()).encode(), noreply=False)
+            found.update(self.client.get_many(missing))
+        return {ns: found.get(name, b'0') for ns, name in names.items()}
+
+    def _safe(self, key: str) -> str:
+        full = self.prefix + key
+        if len(full) > 200 or re.search(r'\s', full):
+            return self.prefix + 'h:' + hashlib.sha1(full.encode('utf-8')).hexdigest()
+        return full
+
+    def _versioned(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        generations = self._generations(self._namespace(key) for key in keys)
+        versioned = {}
+        for key in keys:
+            generation = generations.get(self._namespace(key))
+            name = f"{key}@{generation.decode() if isinstance(generation, bytes) else generation}" if generation else key
+            versioned[key] = self._safe(name)
+        return versioned
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        versioned = self._versioned(keys)
+        if not versioned:
+            return {}
+        raws = self.client.get_many(list(versioned.values()))
+        return {
+            key: self.serializer.loads(raws[name])
+            for key, name in versioned.items() if name in raws
+        }
+
+    def set(self, key: str, value: Any, ttl: TTL = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, mapping: Dict[str, Any], ttl: TTL = None) -> None:
+        versioned = self._versioned(mapping)
+        self.client.set_many(
+            {versioned[key]: self.serializer.dumps(value) for key, value in mapping.items()},
+            expire=self._expire(ttl)
+        )
+
+    def add(self, key: str, value: Any, ttl: TTL = None) -> bool:
+        name = self._versioned([key])[key]
+        return bool(self.client.add(name, self.serializer.dumps(value), expire=self._expire(ttl), noreply=False))
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        names = list(self._versioned(keys).values())
+        if names:
+            self.client.delete_many(names)
+
+    def delete_prefix(self, prefix: str) -> None:
+        if not prefix:
+            self.clear()
+            return
+        if self._namespace(prefix + 'x') != prefix:
+            raise NotImplementedError(f"memcached só remove namespaces completos (ex.: 'pk:tabela:'), não '{prefix}'")
+        gen_key = self._safe(f"gen:{prefix}")
+        if self.client.incr(gen_key, 1) is None:
+            self.client.add(gen_key, str(time.time_ns()).encode(), noreply=False)
+            self.client.incr(gen_key, 1)
+
+    def clear(self) -> None:
+        self.client.flush_all()
+
+
+def build_cache(config: Dict[str, Any]) -> Any:
+    """
+    Cria o backend de cache a partir da configuração de uma conexão
+
+    Para os drivers `redis` e `memcached` o backend compartilhado (L2) fica
+    atrás de um cache em memória do processo (L1), configurável pela chave
+    `l1` (`{'max_size': ..., 'ttl': ...}` ou `False` para desabilitar).
+    """
+    driver = config.get('driver', 'memory')
+    prefix = config.get('prefix', '')
+    ttl = config.get('ttl')
+
+    if driver == 'memory':
+        return MemoryCache(max_size=config.get('max_size', 10000), ttl=ttl, prefix=prefix)
+    if driver == 'redis':
+        shared = RedisCache(
+            host=config.get('host', '127.0.0.1'),
+            port=config.get('port', 6379),
+            database=config.get('database', 0),
+            password=config.get('password'),
+            prefix=prefix,
+            ttl=ttl
+        )
+    elif driver == 'memcached':
+        shared = MemcachedCache(
+            host=config.get('host', '127.0.0.1'),
+            port=config.get('port', 11211),
+            prefix=prefix,
+            ttl=ttl
+        )
+    else:
+        raise ValueError(f"Driver de cache não suportado: {driver}")
+
+    l1 = config.get('l1', {})
+    if l1 is False:
+        return shared
+
+    from .bus import RedisBus, UnixSocketBus
+    from .layered import LayeredCache
+
+    bus = config.get('bus')
+    if bus is None:
+        if driver == 'redis':
+            bus = RedisBus(shared.client, channel=f"{prefix}invalidate")
+        elif hasattr(socket, 'AF_UNIX'):
+            bus = UnixSocketBus(config.get('bus_directory'), channel=f"{prefix}invalidate")
+    local = MemoryCache(max_size=l1.get('max_size', 10000), ttl=l1.get('ttl', 60))
+    return LayeredCache(local, shared, bus)
+
+
+# Limites do MemoryCache criado para conexões sem `cache_config`: ele é só do
+# processo e não recebe as invalidações dos outros workers
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_TTL = 60
+
+_caches: Dict[str, Any] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(connection: str = 'default') -> Any:
+    """Retorna o backend de cache da conexão, criando um MemoryCache limitado se necessário"""
+    cache = _caches.get(connection)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(connection, MemoryCache(max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL))
+    return cache
+
+
+def is_shared(cache: Any) -> bool:
+    """Indica se o backend é visto por todos os workers (Redis/memcached, com ou sem L1)"""
+    return not isinstance(cache, MemoryCache)
+
+
+def cache_backends() -> Dict[str, Any]:
+    """Backends de cache já criados, por conexão"""
+    return dict(_caches)
+
+
+def set_cache(connection: str, backend: Any) -> None:
+    """Define o backend de cache usado por uma conexão"""
+    with _caches_lock:
+        _caches[connection] = backend
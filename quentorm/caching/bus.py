@@ -0,0 +1,206 @@
+"""
+Barramentos de invalidação entre processos
+
+Propagam as remoções feitas no cache compartilhado (L2) para o cache em
+memória (L1) de todos os workers. Com Redis disponível usa-se pub/sub; sem
+Redis, os workers da mesma máquina trocam datagramas por sockets UNIX.
+
+Cada mensagem leva o canal do barramento (derivado do prefixo das chaves) e
+só é aplicada pelos workers do mesmo canal.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], None]
+
+
+class InvalidationBus:
+    """Interface dos barramentos de invalidação"""
+
+    def __init__(self, channel: str = 'quentorm:invalidate'):
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._handler: Optional[Handler] = None
+        self._pid = os.getpid()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def start(self, handler: Handler) -> None:
+        """Começa a entregar as mensagens de outros processos ao handler"""
+        self._handler = handler
+        self._listen()
+
+    def publish(self, message: dict) -> None:
+        """Envia uma mensagem de invalidação para os demais processos"""
+        if self._pid != os.getpid():
+            self._after_fork()
+        self._send(json.dumps(dict(message, origin=self.origin, channel=self.channel)).encode('utf-8'))
+
+    def _deliver(self, payload: bytes) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Mensagem de invalidação inválida descartada")
+            return
+        if not isinstance(message, dict) or message.get('channel') != self.channel:
+            return
+        if message.get('origin') != self.origin and self._handler is not None:
+            self._handler(message)
+
+    def _after_fork(self) -> None:
+        # As threads não sobrevivem ao fork: o processo filho escuta por conta própria
+        self.origin = uuid.uuid4().hex
+        self._pid = os.getpid()
+        self._reset()
+        if self._handler is not None:
+            self._listen()
+
+    def _listen(self) -> None:
+        raise NotImplementedError
+
+    def _send(self, payload: bytes) -> None:
+        raise NotImplementedError
+
+    def _reset(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class RedisBus(InvalidationBus):
+    """Barramento de invalidação via pub/sub do Redis"""
+
+    def __init__(self, client: Any, channel: str = 'quentorm:invalidate'):
+        self.client = client
+        self._pubsub = None
+        super().__init__(channel)
+
+    def _listen(self) -> None:
+        threading.Thread(target=self._run, name='quentorm-redis-bus', daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(self.channel)
+                for message in self._pubsub.listen():
+                    if message.get('type') == 'message':
+                        self._deliver(message['data'])
+            except Exception:
+                logger.exception("Conexão do barramento Redis perdida; reconectando")
+                time.sleep(1)
+
+    def _send(self, payload: bytes) -> None:
+        self.client.publish(self.channel, payload)
+
+    def _reset(self) -> None:
+        self._pubsub = None
+
+
+class UnixSocketBus(InvalidationBus):
+    """
+    Barramento de invalidação local por sockets UNIX
+
+    Cada processo cria um socket de datagrama no diretório do barramento e a
+    publicação envia a mensagem para todos os sockets encontrados, removendo
+    os de processos que já terminaram. O diretório padrão é do usuário (modo
+    0700) e separado por canal; o envio não bloqueia: um worker parado, com a
+    fila cheia, perde a mensagem e fica com o L1 atrasado até o TTL do L1.
+    """
+
+    def __init__(self, directory: Optional[str] = None, channel: str = 'quentorm:invalidate'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError('Sockets UNIX não estão disponíveis nesta plataforma')
+        if directory is None:
+            base = os.path.join(tempfile.gettempdir(), f"quentorm-bus-{os.getuid()}")
+            _private_directory(base)
+            directory = os.path.join(base, _channel_directory(channel))
+        self.directory = directory
+        _private_directory(self.directory)
+        self._sock: Optional[socket.socket] = None
+        self._path: Optional[str] = None
+        self._sender = self._new_sender()
+        super().__init__(channel)
+
+    @staticmethod
+    def _new_sender() -> socket.socket:
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sender.setblocking(False)
+        return sender
+
+    def _listen(self) -> None:
+        self._path = os.path.join(self.directory, f"{os.getpid()}-{self.origin[:8]}.sock")
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self._path)
+        atexit.register(self.close)
+        threading.Thread(target=self._run, args=(self._sock,), name='quentorm-unix-bus', daemon=True).start()
+
+    def _run(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                payload = sock.recv(65536)
+            except OSError:
+                return
+            self._deliver(payload)
+
+    def _send(self, payload: bytes) -> None:
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path == self._path or not name.endswith('.sock'):
+                continue
+            try:
+                self._sender.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                self._unlink(path)
+            except BlockingIOError:
+                logger.warning("Fila de %s cheia; invalidação descartada para esse worker", path)
+            except OSError:
+                logger.warning("Falha ao enviar invalidação para %s", path)
+
+    def _reset(self) -> None:
+        # O socket herdado pertence ao processo pai; o filho cria os seus
+        self._sock = None
+        self._path = None
+        self._sender = self._new_sender()
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._unlink(self._path)
+            self._sock = None
+
+
+def _channel_directory(channel: str) -> str:
+    """Nome de diretório seguro e curto para o canal (caminhos de socket têm cerca de 100 bytes)"""
+    digest = hashlib.sha1(channel.encode('utf-8')).hexdigest()[:8]
+    return f"{re.sub(r'[^A-Za-z0-9_.-]', '_', channel)[:32]}-{digest}"
+
+
+def _private_directory(path: str) -> None:
+    """Cria o diretório com modo 0700 e recusa um diretório de outro usuário ou aberto a outros"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    status = os.stat(path)
+    if status.st_uid != os.getuid() or status.st_mode & 0o077:
+        raise RuntimeError(f"Diretório do barramento de invalidação inseguro: {path} "
+                           "(deve pertencer ao usuário e ter modo 0700)")
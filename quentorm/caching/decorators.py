@@ -0,0 +1,352 @@
+"""
+Decoradores de cache de métodos do QuentORM
+
+`@cache` e `@cache_query` protegem o recálculo de chaves quentes contra o
+efeito manada (cache stampede):
+
+1. Single-flight: dentro do processo, apenas uma thread recalcula cada chave;
+   as demais aguardam e reutilizam o resultado.
+2. Lock distribuído opcional (`lock=True`): entre processos, o backend de
+   cache garante que apenas um worker recalcule a chave (via `add`).
+3. Renovação antecipada probabilística (XFetch): perto do vencimento, uma
+   chamada pode recalcular o valor antes que ele expire para todos.
+4. Stale-while-revalidate (`stale_ttl`): após o vencimento, o valor antigo
+   continua sendo servido enquanto uma thread de fundo o renova.
+
+Listas de instâncias de um modelo são guardadas no formato compacto de
+`serializer` e devolvidas como instâncias destacadas, sem passar por sessão.
+"""
+
+import contextvars
+import functools
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from sqlalchemy import inspect
+
+from ..context import current_tenant
+from .backends import TTL, get_cache, ttl_seconds
+from .serializer import CachedResult, pack_result, unpack_result
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de espera enquanto outro processo detém o lock distribuído
+LOCK_POLL_INTERVAL = 0.05
+
+
+class CacheMetrics:
+    """Contadores de uso de um cache nomeado"""
+
+    __slots__ = (
+        'hits', 'misses', 'computations', 'coalesced', 'lock_waits',
+        'stale_served', 'early_refreshes', 'background_refreshes', 'errors'
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    @property
+    def recomputations_avoided(self) -> int:
+        """Recálculos evitados por coalescência, lock distribuído ou valor antigo"""
+        return self.coalesced + self.lock_waits + self.stale_served
+
+    def as_dict(self) -> Dict[str, int]:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['recomputations_avoided'] = self.recomputations_avoided
+        return data
+
+
+_metrics: Dict[str, CacheMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def _metrics_for(name: str) -> CacheMetrics:
+    metrics = _metrics.get(name)
+    if metrics is None:
+        with _metrics_lock:
+            metrics = _metrics.setdefault(name, CacheMetrics())
+    return metrics
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Retorna as métricas de todos os caches nomeados"""
+    return {name: metrics.as_dict() for name, metrics in list(_metrics.items())}
+
+
+def reset_cache_stats() -> None:
+    """Zera as métricas de todos os caches nomeados"""
+    # Zera os contadores no lugar: as funções decoradas guardam a referência às métricas
+    with _metrics_lock:
+        for metrics in _metrics.values():
+            for name in metrics.__slots__:
+                setattr(metrics, name, 0)
+
+
+class _Flight:
+    """Cálculo em andamento de uma chave, compartilhado entre threads"""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+_refreshing: set = set()
+_refresher: Optional[ThreadPoolExecutor] = None
+_refresher_lock = threading.Lock()
+
+
+def _background(fn: Callable, *args) -> None:
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix='quentorm-cache')
+    # A renovação roda no contexto de quem a disparou (ex.: o tenant corrente)
+    _refresher.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _identity_part(obj: Any) -> Optional[str]:
+    """
+    Identifica a classe ou instância mapeada que recebe a chamada do método
+
+    Retorna '' se `obj` não for mapeado (é só um argumento) e None para uma
+    instância ainda sem chave primária, que não tem como ser cacheada.
+    """
+    if getattr(obj, '__mapper__', None) is None:
+        return ''
+    if isinstance(obj, type):
+        return obj.__name__
+    identity = inspect(obj).identity
+    if identity is None:
+        return None
+    return f"{type(obj).__name__}:{'-'.join(map(str, identity))}"
+
+
+def _argument_part(obj: Any) -> str:
+    """Representação estável de um argumento"""
+    if type(obj).__repr__ is object.__repr__:
+        # O repr padrão traz o endereço do objeto: vale só o tipo (ex.: o `self` de um serviço)
+        return f"{type(obj).__module__}.{type(obj).__qualname__}"
+    return repr(obj)
+
+
+def make_key(name: str, args: tuple, kwargs: dict) -> Optional[str]:
+    """Monta a chave de cache de uma chamada (None se ela não puder ser cacheada)"""
+    parts = []
+    if args:
+        receiver = _identity_part(args[0])
+        if receiver is None:
+            return None
+        parts.append(receiver or _argument_part(args[0]))
+        parts.extend(_argument_part(arg) for arg in args[1:])
+    parts.extend(f"{k}={_argument_part(v)}" for k, v in sorted(kwargs.items()))
+    tenant = current_tenant.get()
+    if tenant:
+        parts.insert(0, f"@{tenant}")
+    return f"method:{name}:" + ':'.join(parts)
+
+
+class CachedCall:
+    """Executa uma função com cache protegido contra efeito manada"""
+
+    def __init__(self, func: Callable, name: str, ttl: TTL, connection: str,
+                 stale_ttl: TTL, beta: float, lock: bool, lock_timeout: TTL):
+        self.func = func
+        self.name = name
+        self.ttl = ttl_seconds(ttl) or 0
+        self.stale_ttl = ttl_seconds(stale_ttl) or 0
+        self.connection = connection
+        self.beta = beta
+        self.lock = lock
+        self.lock_timeout = ttl_seconds(lock_timeout) or 30
+        self.metrics = _metrics_for(name)
+
+    @property
+    def backend(self):
+        return get_cache(self.connection)
+
+    def __call__(self, args: tuple, kwargs: dict) -> Any:
+        key = make_key(self.name, args, kwargs)
+        if key is None:
+            return self.func(*args, **kwargs)
+        entry = self.backend.get(key)
+        if entry is None:
+            self.metrics.misses += 1
+            return self._single_flight(key, args, kwargs)
+
+        packed, delta, expires_at = entry
+        value = unpack_result(packed)
+        if value is None and isinstance(packed, CachedResult):
+            # O esquema do modelo mudou desde que o valor foi guardado
+            self.metrics.misses += 1
+            return self._single_flight(key, args, kwargs)
+
+        now = time.time()
+        if now < expires_at:
+            # XFetch: a chance de renovar cresce à medida que o vencimento se aproxima
+            if self.beta > 0 and now - delta * self.beta * math.log(random.random() or 1e-12) >= expires_at:
+                self.metrics.early_refreshes += 1
+                if self.stale_ttl:
+                    self._refresh_in_background(key, args, kwargs)
+                    return value
+                return self._single_flight(key, args, kwargs)
+            self.metrics.hits += 1
+            return value
+
+        if self.stale_ttl:
+            self.metrics.stale_served += 1
+            self._refresh_in_background(key, args, kwargs)
+            return value
+
+        self.metrics.misses += 1
+        return self._single_flight(key, args, kwargs)
+
+    def _single_flight(self, key: str, args: tuple, kwargs: dict) -> Any:
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = _Flight()
+
+        if not leader:
+            self.metrics.coalesced += 1
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            # Cada thread recebe sua própria cópia, nunca os objetos do líder
+            return unpack_result(flight.value)
+
+        try:
+            value, flight.value = self._compute(key, args, kwargs)
+            return value
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with _flights_lock:
+                _flights.pop(key, None)
+            flight.event.set()
+
+    def _compute(self, key: str, args: tuple, kwargs: dict) -> Tuple[Any, Any]:
+        if not self.lock:
+            return self._compute_and_store(key, args, kwargs)
+
+        backend = self.backend
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while not backend.add(lock_key, token, ttl=self.lock_timeout):
+            entry = backend.get(key)
+            if entry is not None and time.time() < entry[2]:
+                value = unpack_result(entry[0])
+                if value is not None or not isinstance(entry[0], CachedResult):
+                    self.metrics.lock_waits += 1
+                    return value, entry[0]
+            if time.monotonic() >= deadline:
+                logger.warning("Lock de cache expirado para %s; recalculando sem lock", key)
+                return self._compute_and_store(key, args, kwargs)
+            time.sleep(LOCK_POLL_INTERVAL)
+
+        try:
+            return self._compute_and_store(key, args, kwargs)
+        finally:
+            if backend.get(lock_key) == token:
+                backend.delete(lock_key)
+
+    def _compute_and_store(self, key: str, args: tuple, kwargs: dict) -> Tuple[Any, Any]:
+        started = time.time()
+        value = self.func(*args, **kwargs)
+        finished = time.time()
+        self.metrics.computations += 1
+        packed = pack_result(value)
+        if self.ttl:
+            entry = (packed, finished - started, finished + self.ttl)
+            self.backend.set(key, entry, ttl=self.ttl + self.stale_ttl)
+        return value, packed
+
+    def _refresh_in_background(self, key: str, args: tuple, kwargs: dict) -> None:
+        with _flights_lock:
+            if key in _refreshing or key in _flights:
+                return
+            _refreshing.add(key)
+        _background(self._refresh, key, args, kwargs)
+
+    def _refresh(self, key: str, args: tuple, kwargs: dict) -> None:
+        try:
+            self.metrics.background_refreshes += 1
+            self._single_flight(key, args, kwargs)
+        except Exception:
+            self.metrics.errors += 1
+            logger.exception("Falha ao renovar a chave de cache %s", key)
+        finally:
+            with _flights_lock:
+                _refreshing.discard(key)
+
+
+def cache(key: str, ttl: TTL = 3600, connection: str = 'default', stale_ttl: TTL = None,
+          beta: float = 1.0, lock: bool = False, lock_timeout: TTL = 30) -> Callable:
+    """
+    Decorador de cache para métodos
+
+    Args:
+        key: Nome do cache; compõe a chave junto com a instância e os argumentos
+        ttl: Tempo de vida do valor (segundos ou timedelta)
+        connection: Conexão cujo backend de cache será usado
+        stale_ttl: Janela após o vencimento em que o valor antigo é servido
+            enquanto é renovado em segundo plano (a função deve poder ser
+            chamada a partir de outra thread)
+        beta: Agressividade da renovação antecipada (0 desabilita)
+        lock: Usa o backend como lock distribuído entre processos
+        lock_timeout: Tempo máximo de espera pelo lock distribuído
+    """
+    def decorator(func: Callable) -> Callable:
+        call = CachedCall(func, key, ttl, connection, stale_ttl, beta, lock, lock_timeout)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return call(args, kwargs)
+
+        wrapper.cache_call = call
+        return wrapper
+    return decorator
+
+
+def cache_query(ttl: TTL = 300, key: Optional[str] = None, **options) -> Callable:
+    """Decorador de cache para métodos de classe que executam consultas"""
+    def decorator(func: Callable) -> Callable:
+        return cache(key or f"query:{func.__qualname__}", ttl=ttl, **options)(func)
+    return decorator
+
+
+def invalidate_cache(keys: Union[str, Iterable[str]], connection: str = 'default') -> Callable:
+    """Decorador que invalida os caches nomeados após a execução do método"""
+    names = [keys] if isinstance(keys, str) else list(keys)
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            forget(names, connection)
+            return result
+        return wrapper
+    return decorator
+
+
+def forget(names: Iterable[str], connection: str = 'default') -> None:
+    """Remove todas as entradas dos caches nomeados"""
+    backend = get_cache(connection)
+    for name in names:
+        backend.delete_prefix(f"method:{name}:")
@@ -0,0 +1,254 @@
+"""
+Cache de identidade por chave primária (cache de segundo nível)
+
+Modelos com `__cache_by_pk__ = True` têm suas linhas guardadas no backend de
+cache da conexão no formato compacto de `serializer`, fora de qualquer
+sessão. `find` e `find_many` consultam, nesta ordem, o identity map da
+sessão, o cache e o banco de dados; os registros alterados ou removidos são invalidados no flush
+e novamente no commit. Sessões de um tenant (`Database.tenant()`) usam chaves
+separadas por schema.
+
+Com réplicas, as faltas do cache são lidas no primário: uma linha atrasada de
+uma réplica nunca entra no cache. Em um backend só do processo (`MemoryCache`,
+sem invalidação entre workers) as entradas valem no máximo `LOCAL_TTL`
+segundos.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Mapper, Session
+
+from .backends import get_cache, is_shared, ttl_seconds
+from .decorators import _metrics_for
+from .serializer import row_layout
+
+# Limite de parâmetros por consulta IN (SQLite aceita no mínimo 999)
+IN_CHUNK_SIZE = 500
+
+# Chave em Session.info com as entradas invalidadas na transação corrente
+_INVALIDATED = 'quentorm_pk_invalidated'
+
+# Chave em Session.info com o tenant (schema) da sessão
+TENANT = 'quentorm_tenant'
+
+# TTL máximo (segundos) das entradas em um backend que não é compartilhado entre workers
+LOCAL_TTL = 60
+
+logger = logging.getLogger(__name__)
+
+# Conexões já avisadas de que o cache por chave primária está em um backend local
+_warned: Set[str] = set()
+
+
+def is_cached(mapper: Mapper) -> bool:
+    """Indica se o modelo usa o cache por chave primária"""
+    return bool(getattr(mapper.class_, '__cache_by_pk__', False)) and len(mapper.primary_key) == 1
+
+
+def _table(mapper: Mapper, tenant: Optional[str]) -> str:
+    table = mapper.local_table.fullname
+    return f"{table}@{tenant}" if tenant else table
+
+
+def cache_key(mapper: Mapper, pk: Any, tenant: Optional[str] = None) -> str:
+    """Chave de cache de um registro (inclui o hash do esquema do modelo)"""
+    return f"pk:{_table(mapper, tenant)}:{row_layout(mapper).schema_hash}:{pk}"
+
+
+def _namespace(mapper: Mapper, tenant: Optional[str] = None) -> str:
+    return f"pk:{_table(mapper, tenant)}:*"
+
+
+def _cache_for(mapper: Mapper):
+    return get_cache(getattr(mapper.class_, '__connection__', 'default'))
+
+
+def _ttl_for(mapper: Mapper, cache: Any) -> Any:
+    ttl = getattr(mapper.class_, '__cache_ttl__', None)
+    if is_shared(cache):
+        return ttl
+    connection = getattr(mapper.class_, '__connection__', 'default')
+    if connection not in _warned:
+        _warned.add(connection)
+        logger.warning("Cache por chave primária da conexão '%s' sem backend compartilhado (cache_config): "
+                       "as entradas expiram em %ss e não são invalidadas entre workers", connection, LOCAL_TTL)
+    seconds = ttl_seconds(ttl)
+    return LOCAL_TTL if seconds is None else min(seconds, LOCAL_TTL)
+
+
+def _primary(session: Session) -> Optional[Dict[str, Any]]:
+    """bind_arguments que leem do primário de uma RoutingSession (sem marcar uma escrita)"""
+    router = getattr(session, 'router', None)
+    return {'bind': router.primary} if router is not None else None
+
+
+def dump_row(mapper: Mapper, obj: Any) -> Optional[bytes]:
+    """Serializa uma instância carregada no layout compacto (ou None se incompleta)"""
+    state = inspect(obj)
+    layout = row_layout(mapper)
+    if state.unloaded.intersection(layout.keys):
+        return None
+    values = state.dict
+    return layout.encode([values.get(key) for key in layout.keys])
+
+
+def load_row(session: Session, mapper: Mapper, data: bytes) -> Any:
+    """Reconstrói uma instância persistente na sessão a partir de uma linha do cache"""
+    layout = row_layout(mapper)
+    obj = layout.to_instance(layout.decode(data))
+    session.add(obj)
+    return obj
+
+
+def _remember(session: Session, mapper: Mapper, objs: Iterable[Any]) -> None:
+    """Guarda no cache as instâncias que refletem o estado já confirmado no banco"""
+    invalidated = session.info.get(_INVALIDATED, ())
+    connection = getattr(mapper.class_, '__connection__', 'default')
+    tenant = session.info.get(TENANT)
+    if (connection, _namespace(mapper, tenant)) in invalidated:
+        return
+    rows = {}
+    for obj in objs:
+        if obj in session.dirty or obj in session.deleted:
+            continue
+        pk = mapper.primary_key_from_instance(obj)[0]
+        key = cache_key(mapper, pk, tenant)
+        if (connection, key) in invalidated:
+            continue
+        row = dump_row(mapper, obj)
+        if row is not None:
+            rows[key] = row
+    if rows:
+        cache = _cache_for(mapper)
+        cache.set_many(rows, ttl=_ttl_for(mapper, cache))
+
+
+def find(session: Session, model: type, pk: Any) -> Any:
+    """Busca um registro pela chave primária usando o cache quando habilitado"""
+    mapper = inspect(model)
+    if not is_cached(mapper):
+        return session.get(model, pk)
+
+    ident = mapper.identity_key_from_primary_key([pk])
+    if ident in session.identity_map:
+        return session.get(model, pk)
+
+    metrics = _metrics_for(f"pk:{model.__name__}")
+    row = _cache_for(mapper).get(cache_key(mapper, pk, session.info.get(TENANT)))
+    if row is not None:
+        metrics.hits += 1
+        return load_row(session, mapper, row)
+    metrics.misses += 1
+
+    obj = session.get(model, pk, bind_arguments=_primary(session))
+    if obj is not None:
+        _remember(session, mapper, [obj])
+    return obj
+
+
+def find_many(session: Session, model: type, ids: Iterable[Any]) -> List[Any]:
+    """
+    Busca vários registros pela chave primária
+
+    Responde o que puder a partir da sessão e do cache e busca o restante com
+    uma única consulta IN (dividida em lotes de IN_CHUNK_SIZE). Os registros
+    são retornados na ordem dos ids informados; ids inexistentes são omitidos.
+    """
+    mapper = inspect(model)
+    if len(mapper.primary_key) != 1:
+        raise ValueError(f"find_many exige chave primária simples em {model.__name__}")
+
+    ids = list(dict.fromkeys(ids))
+    found: Dict[Any, Any] = {}
+    missing = ids
+    cached = is_cached(mapper)
+
+    if cached:
+        identity_map = session.identity_map
+        pending = []
+        for pk in ids:
+            obj = identity_map.get(mapper.identity_key_from_primary_key([pk]))
+            if obj is not None:
+                found[pk] = obj
+            else:
+                pending.append(pk)
+
+        tenant = session.info.get(TENANT)
+        keys = {cache_key(mapper, pk, tenant): pk for pk in pending}
+        for key, row in _cache_for(mapper).get_many(keys).items():
+            found[keys[key]] = load_row(session, mapper, row)
+        missing = [pk for pk in pending if pk not in found]
+        metrics = _metrics_for(f"pk:{model.__name__}")
+        metrics.hits += len(pending) - len(missing)
+        metrics.misses += len(missing)
+
+    pk_column = mapper.primary_key[0]
+    bind_arguments = _primary(session) if cached else None
+    for start in range(0, len(missing), IN_CHUNK_SIZE):
+        chunk = missing[start:start + IN_CHUNK_SIZE]
+        objs = session.scalars(select(model).where(pk_column.in_(chunk)), bind_arguments=bind_arguments).all()
+        for obj in objs:
+            found[mapper.primary_key_from_instance(obj)[0]] = obj
+        if cached:
+            _remember(session, mapper, objs)
+
+    return [found[pk] for pk in ids if pk in found]
+
+
+def _invalidate(entries: Iterable[Tuple[str, str]]) -> None:
+    by_connection: Dict[str, List[str]] = {}
+    for connection, key in entries:
+        by_connection.setdefault(connection, []).append(key)
+    for connection, keys in by_connection.items():
+        cache = get_cache(connection)
+        prefixes = [key[:-1] for key in keys if key.endswith('*')]
+        cache.delete_many([key for key in keys if not key.endswith('*')])
+        for prefix in prefixes:
+            cache.delete_prefix(prefix)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session: Session, flush_context: Any) -> None:
+    """Invalida os registros alterados ou removidos pelo flush"""
+    entries = set()
+    tenant = session.info.get(TENANT)
+    for obj in list(session.dirty) + list(session.deleted):
+        state = inspect(obj)
+        if state.identity is None or not is_cached(state.mapper):
+            continue
+        connection = getattr(state.mapper.class_, '__connection__', 'default')
+        for mapper in state.mapper.iterate_to_root():
+            entries.add((connection, cache_key(mapper, state.identity[0], tenant)))
+    if entries:
+        _invalidate(entries)
+        session.info.setdefault(_INVALIDATED, set()).update(entries)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_write(orm_execute_state: Any) -> None:
+    """UPDATE/DELETE em massa invalidam todas as entradas do modelo"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or not is_cached(mapper):
+        return
+    connection = getattr(mapper.class_, '__connection__', 'default')
+    tenant = orm_execute_state.session.info.get(TENANT)
+    entries = {(connection, _namespace(m, tenant)) for m in mapper.iterate_to_root()}
+    _invalidate(entries)
+    orm_execute_state.session.info.setdefault(_INVALIDATED, set()).update(entries)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session: Session) -> None:
+    """Repete a invalidação após o commit para descartar leituras concorrentes antigas"""
+    entries = session.info.pop(_INVALIDATED, None)
+    if entries:
+        _invalidate(entries)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_INVALIDATED, None)
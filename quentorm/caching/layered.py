@@ -0,0 +1,134 @@
+"""
+Cache em duas camadas: L1 em memória do processo e L2 compartilhado
+
+As leituras consultam primeiro o L1 e só vão à rede (L2) quando necessário.
+As remoções são aplicadas nas duas camadas e publicadas no barramento de
+invalidação, para que os demais workers descartem seus L1. Valores
+sobrescritos em outro processo ficam visíveis no L1 local no máximo após o
+TTL do L1. Um valor trazido do L2 fica no L1 no máximo pelo tempo que ainda
+lhe resta no L2 (nos backends que o informam: memória e Redis).
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from .backends import TTL, MemoryCache, ttl_seconds
+from .bus import InvalidationBus
+
+logger = logging.getLogger(__name__)
+
+# Chaves por mensagem de invalidação (mantém os datagramas pequenos)
+PUBLISH_BATCH = 200
+
+
+class LayeredCache:
+    """Cache L1 (memória do processo) na frente de um cache L2 compartilhado"""
+
+    def __init__(self, local: MemoryCache, shared: Any, bus: Optional[InvalidationBus] = None):
+        """Inicializa o cache com as duas camadas e o barramento de invalidação"""
+        self.local = local
+        self.shared = shared
+        self.bus = bus
+        # Leituras respondidas por camada (aproximadas: sem lock no caminho de leitura)
+        self.stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0}
+        if bus is not None:
+            bus.start(self._on_message)
+
+    def _local_ttl(self, ttl: TTL) -> Optional[float]:
+        seconds = ttl_seconds(ttl)
+        if seconds and self.local.ttl:
+            return min(seconds, self.local.ttl)
+        return seconds or self.local.ttl
+
+    def _fetch(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Lê as chaves do L2 e as copia para o L1, sem passar do tempo que resta
+        a cada valor no L2 (quando o backend o informa)
+        """
+        with_ttl = getattr(self.shared, 'get_many_with_ttl', None)
+        if with_ttl is None:
+            remote = self.shared.get_many(keys)
+            if remote:
+                self.local.set_many(remote)
+            return remote
+        remote = {}
+        for key, (value, remaining) in with_ttl(keys).items():
+            remote[key] = value
+            if remaining is None:
+                self.local.set(key, value)
+            elif remaining > 0:
+                self.local.set(key, value, ttl=self._local_ttl(remaining))
+        return remote
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key)
+        if value is not None:
+            self.stats['l1_hits'] += 1
+            return value
+        value = self._fetch([key]).get(key)
+        if value is None:
+            self.stats['misses'] += 1
+            return default
+        self.stats['l2_hits'] += 1
+        return value
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        found = self.local.get_many(keys)
+        self.stats['l1_hits'] += len(found)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            remote = self._fetch(missing)
+            found.update(remote)
+            self.stats['l2_hits'] += len(remote)
+            self.stats['misses'] += len(missing) - len(remote)
+        return found
+
+    def set(self, key: str, value: Any, ttl: TTL = None) -> None:
+        self.shared.set(key, value, ttl=ttl)
+        self.local.set(key, value, ttl=self._local_ttl(ttl))
+
+    def set_many(self, mapping: Dict[str, Any], ttl: TTL = None) -> None:
+        self.shared.set_many(mapping, ttl=ttl)
+        self.local.set_many(mapping, ttl=self._local_ttl(ttl))
+
+    def add(self, key: str, value: Any, ttl: TTL = None) -> bool:
+        # Usado como lock distribuído: decidido apenas pelo L2
+        return self.shared.add(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        self.shared.delete_many(keys)
+        self.local.delete_many(keys)
+        for start in range(0, len(keys), PUBLISH_BATCH):
+            self._publish({'op': 'delete', 'keys': keys[start:start + PUBLISH_BATCH]})
+
+    def delete_prefix(self, prefix: str) -> None:
+        self.shared.delete_prefix(prefix)
+        self.local.delete_prefix(prefix)
+        self._publish({'op': 'delete_prefix', 'prefix': prefix})
+
+    def clear(self) -> None:
+        self.shared.clear()
+        self.local.clear()
+        self._publish({'op': 'clear'})
+
+    def _publish(self, message: dict) -> None:
+        if self.bus is None:
+            return
+        try:
+            self.bus.publish(message)
+        except Exception:
+            logger.exception("Falha ao publicar invalidação de cache")
+
+    def _on_message(self, message: dict) -> None:
+        op = message.get('op')
+        if op == 'delete':
+            self.local.delete_many(message.get('keys', []))
+        elif op == 'delete_prefix':
+            self.local.delete_prefix(message.get('prefix', ''))
+        elif op == 'clear':
+            self.local.clear()
@@ -0,0 +1,346 @@
+"""
+Serialização compacta de linhas e resultados para o cache
+
+Em vez de serializar instâncias ORM com pickle, o cache guarda apenas os
+valores das colunas em um layout binário definido pelo esquema do modelo:
+
+- um bitmap de nulos;
+- as colunas de tamanho fixo (inteiros, floats, booleanos, datas, valores
+  `Money` em centavos) em um único `struct` pré-compilado;
+- as colunas de tamanho variável (textos, bytes, decimais) prefixadas pelo
+  tamanho.
+
+Cada layout é identificado por um hash do esquema (tabela, colunas e tipos)
+que entra na chave de cache: quando o conjunto de colunas muda entre deploys,
+as entradas antigas simplesmente deixam de ser encontradas. Resultados grandes
+podem ser comprimidos com zstd ou lz4 quando esses pacotes estão instalados.
+"""
+
+import hashlib
+import pickle
+import struct
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, inspect
+from sqlalchemy.orm import Mapper
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+
+from ..utils.money import Amount
+
+try:
+    import zstandard as _zstd
+except ImportError:
+    _zstd = None
+
+try:
+    import lz4.frame as _lz4
+except ImportError:
+    _lz4 = None
+
+# Resultados acima deste tamanho (bytes) são comprimidos, se possível
+COMPRESS_THRESHOLD = 64 * 1024
+
+_ROW_COMPACT = 1
+_ROW_GENERIC = 2
+
+_RESULT_MAGIC = b'QR'
+_COMPRESS_NONE = 0
+_COMPRESS_ZSTD = 1
+_COMPRESS_LZ4 = 2
+
+_EPOCH = datetime(1970, 1, 1)
+_LENGTH = struct.Struct('<I')
+_RESULT_HEADER = struct.Struct('<2sB8sI')
+
+
+class _Unsupported(Exception):
+    """Valor que não cabe no layout compacto da coluna"""
+
+
+def _encode_datetime(value: datetime) -> int:
+    if type(value) is not datetime or value.tzinfo is not None:
+        raise _Unsupported
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _decode_datetime(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _encode_date(value: date) -> int:
+    if type(value) is not date:
+        raise _Unsupported
+    return value.toordinal()
+
+
+def _encode_time(value: time) -> int:
+    if type(value) is not time or value.tzinfo is not None:
+        raise _Unsupported
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 + value.microsecond
+
+
+def _decode_time(value: int) -> time:
+    seconds, micro = divmod(value, 1000000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return time(hour, minute, second, micro)
+
+
+def _checked(kind: type):
+    def encode(value: Any) -> Any:
+        if type(value) is not kind:
+            raise _Unsupported
+        return value
+    return encode
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+# python_type -> (formato struct ou None para tamanho variável, codificador, decodificador)
+_FIXED = {
+    bool: ('?', _checked(bool), _identity),
+    int: ('q', _checked(int), _identity),
+    float: ('d', _checked(float), _identity),
+    datetime: ('q', _encode_datetime, _decode_datetime),
+    date: ('i', _encode_date, date.fromordinal),
+    time: ('q', _encode_time, _decode_time),
+    Amount: ('q', lambda v: _checked(Amount)(v).cents, Amount.from_cents),
+}
+
+_VARIABLE = {
+    str: (lambda v: _checked(str)(v).encode('utf-8'), lambda b: b.decode('utf-8')),
+    bytes: (_checked(bytes), bytes),
+    Decimal: (lambda v: str(_checked(Decimal)(v)).encode('ascii'), lambda b: Decimal(b.decode('ascii'))),
+}
+
+
+def _python_type(column: Column) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+class RowLayout:
+    """Layout binário das colunas de um modelo"""
+
+    def __init__(self, mapper: Mapper, keys: Sequence[str]):
+        self.mapper = mapper
+        self.keys = tuple(keys)
+        columns = [mapper.column_attrs[key].columns[0] for key in self.keys]
+        self.schema_hash = self._hash(mapper, columns)
+        self.record = namedtuple(f"{mapper.class_.__name__}Row", self.keys, rename=True)
+
+        fixed_format = '<'
+        self.fixed: List[Tuple[int, Any, Any]] = []
+        self.variable: List[Tuple[int, Any, Any]] = []
+        self.generic_only = False
+        for index, column in enumerate(columns):
+            kind = _python_type(column)
+            if kind in _FIXED:
+                fmt, encode, decode = _FIXED[kind]
+                fixed_format += fmt
+                self.fixed.append((index, encode, decode))
+            elif kind in _VARIABLE:
+                encode, decode = _VARIABLE[kind]
+                self.variable.append((index, encode, decode))
+            else:
+                self.generic_only = True
+        self.struct = struct.Struct(fixed_format)
+        self.bitmap_size = (len(self.keys) + 7) // 8
+
+    @staticmethod
+    def _hash(mapper: Mapper, columns: Sequence[Column]) -> str:
+        signature = '|'.join(
+            f"{col.key}:{type(col.type).__name__}:{col.nullable}" for col in columns
+        )
+        signature = f"{mapper.local_table.fullname}|{signature}"
+        return hashlib.sha1(signature.encode('utf-8')).hexdigest()[:16]
+
+    def encode(self, row: Sequence[Any]) -> bytes:
+        """Codifica uma tupla de valores (na ordem de `keys`) em bytes"""
+        if not self.generic_only:
+            try:
+                return self._encode_compact(row)
+            except (_Unsupported, struct.error, OverflowError):
+                pass
+        return bytes((_ROW_GENERIC,)) + pickle.dumps(tuple(row), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _encode_compact(self, row: Sequence[Any]) -> bytes:
+        bitmap = bytearray(self.bitmap_size)
+        fixed = []
+        for index, encode, _ in self.fixed:
+            value = row[index]
+            if value is None:
+                bitmap[index >> 3] |= 1 << (index & 7)
+                fixed.append(0)
+            else:
+                fixed.append(encode(value))
+        parts = [bytes((_ROW_COMPACT,)), bytes(bitmap), self.struct.pack(*fixed)]
+        for index, encode, _ in self.variable:
+            value = row[index]
+            if value is None:
+                bitmap[index >> 3] |= 1 << (index & 7)
+                continue
+            data = encode(value)
+            parts.append(_LENGTH.pack(len(data)))
+            parts.append(data)
+        parts[1] = bytes(bitmap)
+        return b''.join(parts)
+
+    def decode(self, data: bytes) -> tuple:
+        """Decodifica bytes gerados por `encode` em uma tupla de valores"""
+        if data[0] == _ROW_GENERIC:
+            return pickle.loads(data[1:])
+        bitmap = data[1:1 + self.bitmap_size]
+        offset = 1 + self.bitmap_size
+        values: List[Any] = [None] * len(self.keys)
+        packed = self.struct.unpack_from(data, offset)
+        offset += self.struct.size
+        for (index, _, decode), value in zip(self.fixed, packed):
+            if not bitmap[index >> 3] & (1 << (index & 7)):
+                values[index] = decode(value)
+        for index, _, decode in self.variable:
+            if bitmap[index >> 3] & (1 << (index & 7)):
+                continue
+            (size,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            values[index] = decode(data[offset:offset + size])
+            offset += size
+        return tuple(values)
+
+    def to_instance(self, row: Sequence[Any]) -> Any:
+        """Cria uma instância destacada (sem sessão) a partir dos valores"""
+        obj = self.mapper.class_manager.new_instance()
+        for key, value in zip(self.keys, row):
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        return obj
+
+    def to_record(self, row: Sequence[Any]) -> tuple:
+        """Cria um registro imutável (namedtuple) a partir dos valores"""
+        return self.record(*row)
+
+
+_layouts: Dict[Mapper, RowLayout] = {}
+
+
+def row_layout(mapper: Mapper) -> RowLayout:
+    """Retorna o layout binário das colunas de um modelo"""
+    layout = _layouts.get(mapper)
+    if layout is None:
+        keys = [
+            prop.key for prop in mapper.column_attrs
+            if not prop.deferred and all(isinstance(col, Column) for col in prop.columns)
+        ]
+        layout = _layouts[mapper] = RowLayout(mapper, keys)
+    return layout
+
+
+def _compress(payload: bytes) -> Tuple[int, bytes]:
+    if len(payload) < COMPRESS_THRESHOLD:
+        return _COMPRESS_NONE, payload
+    if _zstd is not None:
+        return _COMPRESS_ZSTD, _zstd.ZstdCompressor(level=3).compress(payload)
+    if _lz4 is not None:
+        return _COMPRESS_LZ4, _lz4.compress(payload)
+    return _COMPRESS_NONE, payload
+
+
+def _decompress(method: int, payload: bytes) -> bytes:
+    if method == _COMPRESS_ZSTD:
+        if _zstd is None:
+            raise RuntimeError('Resultado em cache comprimido com zstd, mas o pacote zstandard não está instalado')
+        return _zstd.ZstdDecompressor().decompress(payload)
+    if method == _COMPRESS_LZ4:
+        if _lz4 is None:
+            raise RuntimeError('Resultado em cache comprimido com lz4, mas o pacote lz4 não está instalado')
+        return _lz4.decompress(payload)
+    return payload
+
+
+def dumps_rows(mapper: Mapper, rows: Sequence[Sequence[Any]]) -> bytes:
+    """Codifica um conjunto de linhas de um modelo, comprimindo se for grande"""
+    layout = row_layout(mapper)
+    body = b''.join(
+        _LENGTH.pack(len(data)) + data for data in map(layout.encode, rows)
+    )
+    method, body = _compress(body)
+    header = _RESULT_HEADER.pack(_RESULT_MAGIC, method, bytes.fromhex(layout.schema_hash), len(rows))
+    return header + body
+
+
+def loads_rows(mapper: Mapper, data: bytes) -> Optional[List[tuple]]:
+    """Decodifica um conjunto de linhas; retorna None se o esquema mudou"""
+    layout = row_layout(mapper)
+    magic, method, schema, count = _RESULT_HEADER.unpack_from(data)
+    if magic != _RESULT_MAGIC or schema.hex() != layout.schema_hash:
+        return None
+    body = _decompress(method, data[_RESULT_HEADER.size:])
+    rows = []
+    offset = 0
+    for _ in range(count):
+        (size,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        rows.append(layout.decode(body[offset:offset + size]))
+        offset += size
+    return rows
+
+
+class CachedResult:
+    """Lista de instâncias de um modelo guardada no cache em formato compacto"""
+
+    __slots__ = ('model', 'data')
+
+    def __init__(self, model: type, data: bytes):
+        self.model = model
+        self.data = data
+
+    def __reduce__(self):
+        return (CachedResult, (self.model, self.data))
+
+
+def pack_result(value: Any) -> Any:
+    """Converte listas de instâncias de um mesmo modelo para o formato compacto"""
+    if not isinstance(value, list) or not value:
+        return value
+    model = type(value[0])
+    try:
+        mapper = inspect(model)
+    except Exception:
+        return value
+    if not isinstance(mapper, Mapper) or any(type(obj) is not model for obj in value):
+        return value
+    layout = row_layout(mapper)
+    rows = []
+    for obj in value:
+        state = inspect(obj)
+        if state.unloaded.intersection(layout.keys):
+            return value
+        rows.append(tuple(state.dict.get(key) for key in layout.keys))
+    return CachedResult(model, dumps_rows(mapper, rows))
+
+
+def unpack_result(value: Any, as_records: bool = False) -> Any:
+    """
+    Reconstrói um resultado guardado por `pack_result`
+
+    Retorna instâncias destacadas (sem sessão) ou, com `as_records=True`,
+    registros imutáveis. Retorna None se o esquema do modelo mudou.
+    """
+    if not isinstance(value, CachedResult):
+        return value
+    mapper = inspect(value.model)
+    rows = loads_rows(mapper, value.data)
+    if rows is None:
+        return None
+    layout = row_layout(mapper)
+    build = layout.to_record if as_records else layout.to_instance
+    return [build(row) for row in rows]
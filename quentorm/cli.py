@@ -1,19 +1,77 @@
 """
 CLI principal do QuentORM.
 Implementa os comandos de linha de comando.
+
+Cada comando só é importado quando executado: `quentorm --help` lista os
+comandos a partir das descrições abaixo, sem carregar o SQLAlchemy.
 """
 
+from importlib import import_module
+
 import click
+from click.utils import make_default_short_help
 from quentorm import __version__
-from .commands import new_command, make_command
 
-@click.group()
+# Comando -> (módulo:objeto, descrição curta exibida no --help)
+COMMANDS = {
+    'new': ('quentorm.commands.new:new_command', 'Cria um novo projeto QuentORM de forma interativa'),
+    'make': ('quentorm.commands.make:make_command', 'Comandos para criar arquivos do projeto'),
+    'stats': ('quentorm.commands.stats:stats_command', 'Exibe as métricas agregadas de todos os processos'),
+    'db:advise': ('quentorm.commands.db:advise_command',
+                  'Sugere índices ausentes e aponta redundantes a partir das consultas observadas'),
+    'db:partitions': ('quentorm.commands.db:partitions_command',
+                      'Cria as partições que faltam das tabelas com __partition_by__'),
+    'db:seed': ('quentorm.commands.db:seed_command',
+                'Executa os seeders em ordem de dependência, em paralelo quando possível'),
+    'ledger:rebuild': ('quentorm.commands.ledger:rebuild_command',
+                       'Recalcula os saldos diários a partir dos lançamentos'),
+    'migrate': ('quentorm.commands.migrate:migrate_command', 'Executa as migrações pendentes'),
+    'migrate:rollback': ('quentorm.commands.migrate:rollback_command', 'Reverte o último lote de migrações'),
+    'migrate:status': ('quentorm.commands.migrate:status_command',
+                       'Lista as migrações aplicadas e pendentes e o andamento dos backfills'),
+}
+
+
+class LazyGroup(click.Group):
+    """Grupo que importa o módulo de um comando só quando ele é usado"""
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        command = super().get_command(ctx, cmd_name)
+        if command is None and cmd_name in self.lazy_commands:
+            module, _, attribute = self.lazy_commands[cmd_name][0].partition(':')
+            command = getattr(import_module(module), attribute)
+            self.add_command(command, cmd_name)
+        return command
+
+    def format_commands(self, ctx, formatter):
+        names = self.list_commands(ctx)
+        limit = formatter.width - 6 - max((len(name) for name in names), default=0)
+        rows = []
+        for name in names:
+            if name in self.commands:
+                command = self.commands[name]
+                if command.hidden:
+                    continue
+                help_text = command.get_short_help_str(limit)
+            else:
+                help_text = make_default_short_help(self.lazy_commands[name][1], limit)
+            rows.append((name, help_text))
+        if rows:
+            with formatter.section('Commands'):
+                formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
 def cli():
     """QuentORM CLI - Ferramenta de linha de comando para o QuentORM ORM"""
     pass
 
-cli.add_command(new_command)
-cli.add_command(make_command)
-
 if __name__ == '__main__':
-    cli() 
\ No newline at end of file
+    cli()
@@ -1,11 +1,29 @@
 """
 Módulo de comandos do QuentORM CLI
+
+Cada comando fica em seu módulo e é importado sob demanda.
 """
 
-from .new import new_command
-from .make import make_command
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    'new_command': '.new',
+    'make_command': '.make',
+    'stats_command': '.stats',
+    'advise_command': '.db',
+    'seed_command': '.db',
+    'migrate_command': '.migrate',
+    'rollback_command': '.migrate',
+    'status_command': '.migrate',
+    'rebuild_command': '.ledger',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'new_command',
-    'make_command'
-] 
\ No newline at end of file
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module, __name__), name)
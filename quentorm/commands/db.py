@@ -0,0 +1,98 @@
+"""
+Comandos de análise e carga do banco de dados
+"""
+
+import os
+import time
+
+import click
+
+from quentorm.database.seeder import SEEDERS_PATH, SeederRunner, load_seeders
+from quentorm.monitoring.advisor import advise, observed_fingerprints, write_migration
+from quentorm.monitoring.metrics import ENV_DIRECTORY
+from quentorm.utils.partitions import PARTITIONS_AHEAD, partitioned
+
+from .loader import DEFAULT_CONFIG, DEFAULT_MODELS, import_models, load_database
+
+
+@click.command('db:advise')
+@click.option('--dir', 'directory', default=lambda: os.environ.get(ENV_DIRECTORY),
+              help=f'Diretório das métricas multiprocesso com os fingerprints (padrão: ${ENV_DIRECTORY})')
+@click.option('--config', 'config_path', default=DEFAULT_CONFIG, help='Arquivo de configuração do projeto')
+@click.option('--models', default=DEFAULT_MODELS, help='Pacote dos modelos')
+@click.option('--no-reflect', is_flag=True, help='Não consultar os índices existentes no banco')
+@click.option('--min-count', default=1, help='Ignorar consultas executadas menos vezes')
+@click.option('--migration', is_flag=True, help='Gerar a migração com os índices sugeridos')
+@click.option('--drop-redundant', is_flag=True, help='Na migração, remover (e não só comentar) os redundantes')
+def advise_command(directory, config_path, models, no_reflect, min_count, migration, drop_redundant):
+    """Sugere índices ausentes e aponta redundantes a partir das consultas observadas"""
+    if not directory or not os.path.isdir(directory):
+        raise click.UsageError(f"Informe --dir ou defina {ENV_DIRECTORY} com o diretório das métricas")
+    db = load_database(config_path)
+    import_models(models)
+    fingerprints = observed_fingerprints(directory)
+    engines = {} if no_reflect else {name: db.engine(name) for name in db.connections
+                                     if any(entry['connection'] == name for entry in fingerprints)}
+    advices = advise(fingerprints, engines=engines, min_count=min_count)
+    if not advices:
+        click.echo("Nenhuma sugestão: as consultas observadas já têm índices.")
+        return
+    labels = {'missing': 'AUSENTE', 'pending': 'PENDENTE', 'redundant': 'REDUNDANTE'}
+    for number, advice in enumerate(advices, 1):
+        click.echo(f"{number:>3}. [{labels[advice.kind]}] {advice.connection}: {advice.statement}")
+        click.echo(f"     {advice.reason}")
+    if migration:
+        for path in write_migration(advices, drop_redundant=drop_redundant):
+            click.echo(f"✓ Migração criada: {path}")
+
+
+@click.command('db:seed')
+@click.option('--config', 'config_path', default=DEFAULT_CONFIG, help='Arquivo de configuração do projeto')
+@click.option('--path', default=SEEDERS_PATH, help='Diretório dos seeders')
+@click.option('--class', 'names', multiple=True, help='Executar só este seeder (pode repetir)')
+@click.option('--workers', default=4, help='Seeders executados em paralelo')
+def seed_command(config_path, path, names, workers):
+    """Executa os seeders em ordem de dependência, em paralelo quando possível"""
+    db = load_database(config_path)
+    seeders = load_seeders(path)
+    if names:
+        unknown = set(names) - {seeder.__name__ for seeder in seeders}
+        if unknown:
+            raise click.UsageError(f"Seeders não encontrados em {path}: {', '.join(sorted(unknown))}")
+        seeders = [seeder for seeder in seeders if seeder.__name__ in names]
+    if not seeders:
+        click.echo(f"Nenhum seeder em {path}.")
+        return
+
+    def done(result):
+        click.echo(f"✓ {result.name}: {result.rows} linhas em {result.seconds:.2f}s ({result.rate:,.0f} linhas/s)")
+
+    began = time.perf_counter()
+    try:
+        runner = SeederRunner(db, seeders, workers=workers, on_done=done)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    results = runner.run()
+    click.echo(f"{len(results)} seeder(s), {sum(r.rows for r in results)} linhas em {time.perf_counter() - began:.2f}s")
+
+
+@click.command('db:partitions')
+@click.option('--config', 'config_path', default=DEFAULT_CONFIG, help='Arquivo de configuração do projeto')
+@click.option('--models', default=DEFAULT_MODELS, help='Pacote dos modelos')
+@click.option('--table', 'tables', multiple=True, help='Tabela particionada (padrão: todas)')
+@click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Criar também as partições desde esta data (AAAA-MM-DD)')
+@click.option('--ahead', default=PARTITIONS_AHEAD, help='Períodos futuros a manter criados')
+def partitions_command(config_path, models, tables, start, ahead):
+    """Cria as partições que faltam das tabelas com __partition_by__"""
+    db = load_database(config_path)
+    import_models(models)
+    selected = [partitioning for name, partitioning in sorted(partitioned.items()) if not tables or name in tables]
+    if not selected:
+        raise click.UsageError("Nenhum modelo com __partition_by__" if not tables else
+                               f"Tabelas particionadas não encontradas: {', '.join(tables)}")
+    for partitioning in selected:
+        engine = db.engine(getattr(partitioning.model, '__connection__', 'default'))
+        created = partitioning.ensure(engine, start=start.date() if start else None, ahead=ahead)
+        names = f": {', '.join(created)}" if created else ''
+        click.echo(f"✓ {partitioning.table.name}: {len(created)} partição(ões) criada(s){names}")
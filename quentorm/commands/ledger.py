@@ -0,0 +1,33 @@
+"""
+Comandos dos saldos diários (ledger)
+"""
+
+import time
+
+import click
+
+from quentorm.ledger import ledgers
+
+from .loader import DEFAULT_CONFIG, DEFAULT_MODELS, import_models, load_database
+
+
+@click.command('ledger:rebuild')
+@click.option('--config', 'config_path', default=DEFAULT_CONFIG, help='Arquivo de configuração do projeto')
+@click.option('--models', default=DEFAULT_MODELS, help='Pacote dos modelos')
+@click.option('--table', 'tables', multiple=True, help='Tabela de saldos a recalcular (padrão: todas)')
+@click.option('--account', 'accounts', multiple=True, type=int, help='Recalcular só esta conta (pode repetir)')
+@click.option('--batch-size', default=100, help='Contas por lote (cada lote em uma transação)')
+@click.option('--workers', default=4, help='Lotes executados em paralelo')
+def rebuild_command(config_path, models, tables, accounts, batch_size, workers):
+    """Recalcula os saldos diários a partir dos lançamentos"""
+    db = load_database(config_path)
+    import_models(models)
+    selected = [ledger for name, ledger in sorted(ledgers.items()) if not tables or name in tables]
+    if not selected:
+        raise click.UsageError("Nenhum Ledger declarado nos modelos" if not tables else
+                               f"Tabelas de saldos não encontradas: {', '.join(tables)}")
+    for ledger in selected:
+        began = time.perf_counter()
+        engine = db.engine(getattr(ledger.model, '__connection__', 'default'))
+        rows = ledger.rebuild(engine, accounts=list(accounts) or None, batch_size=batch_size, workers=workers)
+        click.echo(f"✓ {ledger.table.name}: {rows} saldos diários em {time.perf_counter() - began:.2f}s")
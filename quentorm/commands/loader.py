@@ -0,0 +1,55 @@
+"""
+Carregamento do projeto pelos comandos que acessam o banco
+
+Os comandos `db:*`, `migrate:*` e `ledger:*` precisam do `Database` configurado
+pelo projeto (por padrão a variável `db` de `config.py`) e dos modelos (por
+padrão o pacote `app.models`).
+"""
+
+import importlib
+import importlib.util
+import os
+import pkgutil
+import sys
+
+import click
+
+from quentorm.database import Database
+
+DEFAULT_CONFIG = 'config.py'
+DEFAULT_MODELS = 'app.models'
+
+
+def load_database(path: str = DEFAULT_CONFIG) -> Database:
+    """Importa o arquivo de configuração do projeto e retorna o seu `Database`"""
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        raise click.UsageError(f"Arquivo de configuração não encontrado: {path}")
+    project = os.path.dirname(path)
+    if project not in sys.path:
+        sys.path.insert(0, project)
+    spec = importlib.util.spec_from_file_location('config', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules.setdefault('config', module)
+    spec.loader.exec_module(module)
+    db = getattr(module, 'db', None)
+    if not isinstance(db, Database):
+        db = next((value for value in vars(module).values() if isinstance(value, Database)), None)
+    if db is None:
+        raise click.UsageError(f"Nenhum Database encontrado em {path}")
+    return db
+
+
+def import_models(package: str = DEFAULT_MODELS) -> None:
+    """Importa o pacote de modelos e todos os seus módulos (registrando os modelos)"""
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    try:
+        module = importlib.import_module(package)
+    except ImportError as e:
+        raise click.UsageError(f"Não foi possível importar os modelos de {package}: {e}")
+    for info in pkgutil.walk_packages(getattr(module, '__path__', []), prefix=f"{package}."):
+        try:
+            importlib.import_module(info.name)
+        except Exception as e:
+            click.echo(f"Aviso: {info.name} não importado ({e})", err=True)
@@ -3,10 +3,15 @@ Comandos para criar arquivos do projeto
 """
 
 import os
+import re
+import sys
 import click
+import importlib
 from datetime import datetime
 from pathlib import Path
 
+from quentorm.utils.indexes import index_name, normalize_index
+
 @click.group('make')
 def make_command():
     """Comandos para criar arquivos do projeto"""
@@ -73,13 +78,18 @@ def create_migration(name):
     # Criar diretório se não existir
     os.makedirs(os.path.dirname(migration_path), exist_ok=True)
     
+    # Índices declarados em __indexes__, se o modelo já existir
+    model = load_model(name)
+    indexes = index_lines(model)[0] if model is not None else ''
+    table = getattr(model, '__tablename__', None) or f"{name.lower()}s"
+    
     # Criar arquivo de migração
     with open(migration_path, 'w') as f:
         f.write(f"""from quentorm import Migration
 
 class Create{name}sTable(Migration):
     def up(self):
-        self.create_table('{name.lower()}s', [
+        self.create_table('{table}', [
             'id SERIAL PRIMARY KEY',
             'name VARCHAR(100) NOT NULL',
             'email VARCHAR(255) NOT NULL UNIQUE',
@@ -88,11 +98,65 @@ class Create{name}sTable(Migration):
             'created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP',
             'updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP'
         ])
-
+{indexes}
     def down(self):
-        self.drop_table('{name.lower()}s')
+        self.drop_table('{table}')
 """)
 
+def load_model(name):
+    """Importa app.models.<nome> e retorna a classe do modelo (None se não existir)"""
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    try:
+        module = importlib.import_module(f"app.models.{name.lower()}")
+    except Exception:
+        return None
+    return getattr(module, name, None)
+
+def index_lines(model, online=False):
+    """Linhas de up() e down() que criam e removem os índices de `__indexes__` do modelo"""
+    table = getattr(model, '__tablename__', None)
+    if not table or not model.__dict__.get('__indexes__'):
+        return '', ''
+    up, down = [], []
+    for spec in model.__indexes__:
+        spec = normalize_index(spec)
+        name = spec.get('name') or index_name(table, spec['columns'])
+        options = ''.join(f", {key}={spec[key]!r}" for key in ('unique', 'where', 'include', 'using') if spec.get(key))
+        online_option = ', online=True' if online else ''
+        up.append(f"        self.create_index({table!r}, {list(spec['columns'])!r}, name={name!r}{options}{online_option})")
+        down.insert(0, f"        self.drop_index({name!r}, table={table!r}{online_option})")
+    return '\n'.join(up) + '\n', '\n'.join(down) + '\n'
+
+@make_command.command('migration')
+@click.argument('name')
+@click.option('--model', help='Gerar os índices declarados em __indexes__ do modelo')
+def make_migration(name, model):
+    """Cria uma nova migração"""
+    up, down = '        pass\n', '        pass\n'
+    if model:
+        model_class = load_model(model)
+        if model_class is None:
+            raise click.UsageError(f"Modelo {model} não encontrado em app/models/{model.lower()}.py")
+        # A tabela já existe: os índices são construídos sem bloquear as escritas
+        up, down = index_lines(model_class, online=True)
+        if not up:
+            raise click.UsageError(f"O modelo {model} não declara __indexes__")
+    snake = re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+    class_name = ''.join(part.capitalize() for part in snake.split('_'))
+    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    migration_path = os.path.join('database', 'migrations', f"{timestamp}_{snake}.py")
+    os.makedirs(os.path.dirname(migration_path), exist_ok=True)
+    with open(migration_path, 'w') as f:
+        f.write(f"""from quentorm import Migration
+
+class {class_name}(Migration):
+    def up(self):
+{up}
+    def down(self):
+{down}""")
+    click.echo(f"✓ Migração {migration_path} criada com sucesso!")
+
 def create_seeder(name):
     """Cria o arquivo de seeder"""
     seeder_path = os.path.join('database', 'seeders', f"{name}Seeder.py")
@@ -106,14 +170,13 @@ def create_seeder(name):
 from app.models.{name.lower()} import {name}
 
 class {name}Seeder(Seeder):
+    model = {name}
+
     def run(self):
-        # Adicione seus dados de seed aqui
-        {name}.create({{
-            'name': 'Admin',
-            'email': 'admin@example.com',
-            'password': 'password123',
-            'active': True
-        }})
+        # Cada lote (lista de dicionários) é gravado com um único INSERT
+        yield [
+            {{'name': 'Admin', 'email': 'admin@example.com', 'password': 'password123', 'active': True}},
+        ]
 """)
 
 def create_controller(name):
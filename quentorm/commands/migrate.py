@@ -0,0 +1,73 @@
+"""
+Comandos de execução das migrações
+"""
+
+import click
+
+from quentorm.database.migrator import MIGRATIONS_PATH, Migrator
+
+from .loader import DEFAULT_CONFIG, load_database
+
+
+def echo_progress(index, progress):
+    percent = '?' if progress.get('percent') is None else f"{progress['percent']:.1f}%"
+    click.echo(f"    … índice {index}: {percent} ({progress.get('phase')})")
+
+
+def migrator(config_path, path):
+    return Migrator(load_database(config_path), path=path, progress=echo_progress)
+
+
+@click.command('migrate')
+@click.option('--config', 'config_path', default=DEFAULT_CONFIG, help='Arquivo de configuração do projeto')
+@click.option('--path', default=MIGRATIONS_PATH, help='Diretório das migrações')
+def migrate_command(config_path, path):
+    """Executa as migrações pendentes"""
+    runner = migrator(config_path, path)
+    pending = runner.pending()
+    if not pending:
+        click.echo("Nenhuma migração pendente.")
+        return
+    for name in pending:
+        click.echo(f"→ Migrando {name}")
+    runner.run()
+    click.echo(f"✓ {len(pending)} migração(ões) aplicada(s)")
+
+
+@click.command('migrate:rollback')
+@click.option('--config', 'config_path', default=DEFAULT_CONFIG, help='Arquivo de configuração do projeto')
+@click.option('--path', default=MIGRATIONS_PATH, help='Diretório das migrações')
+@click.option('--step', default=1, help='Número de lotes a reverter')
+def rollback_command(config_path, path, step):
+    """Reverte o último lote de migrações"""
+    names = migrator(config_path, path).rollback(step)
+    for name in names:
+        click.echo(f"✓ Revertida {name}")
+    if not names:
+        click.echo("Nenhuma migração para reverter.")
+
+
+@click.command('migrate:status')
+@click.option('--config', 'config_path', default=DEFAULT_CONFIG, help='Arquivo de configuração do projeto')
+@click.option('--path', default=MIGRATIONS_PATH, help='Diretório das migrações')
+def status_command(config_path, path):
+    """Lista as migrações aplicadas e pendentes e o andamento dos backfills"""
+    status = Migrator(load_database(config_path), path=path).status()
+    if not status['migrations']:
+        click.echo(f"Nenhuma migração em {path}.")
+    for entry in status['migrations']:
+        if entry['batch'] is None:
+            click.echo(f"  [pendente]   {entry['migration']}")
+        else:
+            applied_at = entry['applied_at'].strftime('%Y-%m-%d %H:%M:%S')
+            click.echo(f"  [lote {entry['batch']:>3}] {entry['migration']} ({applied_at})")
+    if status['backfills']:
+        click.echo("\nBackfills:")
+    labels = {'running': 'EM EXECUÇÃO', 'done': 'CONCLUÍDO', 'failed': 'FALHOU'}
+    for backfill in status['backfills']:
+        updated_at = backfill['updated_at'].strftime('%Y-%m-%d %H:%M:%S')
+        click.echo(f"  [{labels.get(backfill['status'], backfill['status'])}] {backfill['name']} "
+                   f"({backfill['connection']}: {backfill['table_name']})")
+        click.echo(f"     {backfill['percent']:.1f}% · {backfill['rows']} linhas em {backfill['batches']} lotes · "
+                   f"id {backfill['last_pk']} de {backfill['max_pk']} · lote atual {backfill['batch_size']} · "
+                   f"atualizado em {updated_at}")
@@ -0,0 +1,39 @@
+"""
+Comando para exibir as métricas gravadas pelos processos da aplicação
+"""
+
+import os
+
+import click
+
+from quentorm.monitoring.metrics import ENV_DIRECTORY, aggregate, render
+
+
+def _table(families):
+    """Resumo legível: uma linha por amostra (sem os buckets dos histogramas)"""
+    lines = []
+    for family in sorted(families, key=lambda family: family.name):
+        for name, labels, value in sorted(family.samples, key=lambda sample: (sample[0], sorted(sample[1].items()))):
+            if name.endswith('_bucket') or family.name == 'quentorm_query_info':
+                continue
+            text = ', '.join(f"{key}={val}" for key, val in labels.items())
+            lines.append(f"{name:<45} {value:>14.6g}  {text}")
+    return '\n'.join(lines)
+
+
+@click.command('stats')
+@click.option('--dir', 'directory', default=lambda: os.environ.get(ENV_DIRECTORY),
+              help=f'Diretório das métricas multiprocesso (padrão: ${ENV_DIRECTORY})')
+@click.option('--format', 'output', type=click.Choice(['prometheus', 'table']), default='prometheus',
+              help='Formato de saída')
+def stats_command(directory, output):
+    """Exibe as métricas agregadas de todos os processos"""
+    if not directory:
+        raise click.UsageError(f"Informe --dir ou defina {ENV_DIRECTORY}")
+    if not os.path.isdir(directory):
+        raise click.UsageError(f"Diretório de métricas não encontrado: {directory}")
+    families = aggregate(directory)
+    if output == 'prometheus':
+        click.echo(render(families), nl=False)
+    else:
+        click.echo(_table(families))
@@ -0,0 +1,11 @@
+"""
+Contexto de execução do QuentORM
+
+Guarda o tenant (schema) corrente em uma ContextVar, válida por thread e por
+tarefa asyncio. É definido por `Database.tenant()`.
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+
+current_tenant: ContextVar[Optional[str]] = ContextVar('quentorm_tenant', default=None)
@@ -0,0 +1,25 @@
+"""
+Módulo de conexões do QuentORM
+"""
+
+from .async_manager import AsyncDatabase
+from .fanout import FanOutResults, TargetResult
+from .manager import Database
+from .migration import Migration
+from .migrator import Migrator
+from .seeder import Seeder, SeederRunner
+from .pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, PoolStats
+
+__all__ = [
+    'AsyncDatabase',
+    'Database',
+    'FanOutResults',
+    'TargetResult',
+    'Migration',
+    'Migrator',
+    'Seeder',
+    'SeederRunner',
+    'InstrumentedAsyncQueuePool',
+    'InstrumentedQueuePool',
+    'PoolStats'
+]
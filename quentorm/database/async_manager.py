@@ -0,0 +1,243 @@
+"""
+Gerenciador de conexões asyncio do QuentORM
+
+Contraparte do `Database` sobre a extensão asyncio do SQLAlchemy. Usa os
+mesmos modelos e a mesma configuração de `db.config({...})`, com engines e
+pools próprios; a chave `async` de uma conexão sobrescreve o que for
+diferente no modo asyncio (ex.: tamanho do pool ou driver):
+
+    adb = AsyncDatabase.from_database(db)
+
+    cliente = await Cliente.afind(1)
+    async for lancamento in Lancamento.where('valor', '>', 100).astream():
+        ...
+
+Requer `sqlalchemy[asyncio]` e o driver asyncio do banco (aiosqlite,
+asyncpg ou aiomysql).
+"""
+
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy.engine import make_url
+
+from ..caching.identity import TENANT
+from ..context import current_tenant
+from ..monitoring import QueryProfile, instrument, profile, register_database
+from ..utils.models import BaseModel
+from .manager import build_url, engine_options
+from .pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_status
+from .routing import ReplicaRouter, RoutingSession
+
+# Backend do SQLAlchemy -> dialeto+driver asyncio
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def build_async_url(config: Dict[str, Any]) -> Any:
+    """Monta a URL asyncio a partir da configuração de uma conexão"""
+    url = make_url(build_url(config))
+    if config.get('async_driver'):
+        return url.set(drivername=config['async_driver'])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Sem driver asyncio conhecido para '{backend}'. Informe 'async_driver'.")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def async_engine_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte a configuração de uma conexão em argumentos do create_async_engine"""
+    kwargs = engine_options(config)
+    if kwargs.get('poolclass') is InstrumentedQueuePool:
+        kwargs['poolclass'] = InstrumentedAsyncQueuePool
+    connect_args = kwargs.get('connect_args', {})
+    # O asyncpg recebe o search_path como server_settings, não como options
+    if build_async_url(config).drivername == 'postgresql+asyncpg' and 'options' in connect_args:
+        connect_args.pop('options')
+        if config.get('schema'):
+            connect_args.setdefault('server_settings', {})['search_path'] = config['schema']
+        if not connect_args:
+            kwargs.pop('connect_args')
+    return kwargs
+
+
+def async_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Configuração efetiva de uma conexão no modo asyncio (aplica a chave `async`)"""
+    merged = {k: v for k, v in config.items() if k != 'async'}
+    overrides = config.get('async') or {}
+    for key, value in overrides.items():
+        if key == 'options':
+            merged['options'] = {**merged.get('options', {}), **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+class AsyncDatabase:
+    """Gerenciador das conexões asyncio, suas engines e sessões"""
+
+    def __init__(self):
+        self.connections: Dict[str, Dict[str, Any]] = {}
+        self._engines: Dict[str, Any] = {}
+        self._tenant_engines: Dict[Tuple[str, str], Any] = {}
+        self._sessions: Dict[str, Any] = {}
+        self._routers: Dict[str, ReplicaRouter] = {}
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+        register_database(self)
+
+    @classmethod
+    def from_database(cls, db: Any) -> 'AsyncDatabase':
+        """Cria o gerenciador asyncio com as conexões de um `Database`"""
+        return cls().config(db.connections)
+
+    def config(self, connections: Dict[str, Dict[str, Any]]) -> 'AsyncDatabase':
+        """Registra as conexões nomeadas e habilita os métodos assíncronos dos modelos"""
+        with self._lock:
+            for name, config in connections.items():
+                for key in [k for k in self._engines if k == name or k.startswith(f"{name}:")]:
+                    self._engines.pop(key).sync_engine.dispose()
+                for key in [k for k in self._sessions if k == name or k.startswith(f"{name}@")]:
+                    self._sessions.pop(key)
+                for key in [k for k in self._tenant_engines if k[0] == name]:
+                    self._tenant_engines.pop(key)
+                self._routers.pop(name, None)
+                self.connections[name] = async_config(config)
+        BaseModel.set_async_connection_resolver(self.session)
+        return self
+
+    def _check_pid(self) -> None:
+        """Após um fork, descarta sem fechar as conexões herdadas do processo pai"""
+        if self._pid != os.getpid():
+            self._lock = threading.RLock()
+            self._pid = os.getpid()
+            for engine in self._engines.values():
+                engine.sync_engine.dispose(close=False)
+            self._sessions = {}
+
+    def _connection_config(self, name: str) -> Dict[str, Any]:
+        try:
+            return self.connections[name]
+        except KeyError:
+            raise KeyError(f"Conexão '{name}' não configurada. Use adb.config().") from None
+
+    def _create_engine(self, name: str, config: Dict[str, Any]) -> Any:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        engine = create_async_engine(build_async_url(config), **async_engine_options(config))
+        # Mesmas estatísticas e mesmo log de consultas lentas da conexão síncrona
+        instrument(engine.sync_engine, name)
+        return engine
+
+    def _engine(self, name: str) -> Any:
+        self._check_pid()
+        engine = self._engines.get(name)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(name)
+                if engine is None:
+                    engine = self._engines[name] = self._create_engine(name, self._connection_config(name))
+        return engine
+
+    def engine(self, name: str = 'default') -> Any:
+        """Retorna a AsyncEngine da conexão (do tenant corrente, se houver)"""
+        tenant = current_tenant.get()
+        if tenant is None:
+            return self._engine(name)
+        engine = self._tenant_engines.get((name, tenant))
+        if engine is None:
+            engine = self._engine(name).execution_options(schema_translate_map={None: tenant})
+            self._tenant_engines[(name, tenant)] = engine
+        return engine
+
+    def router(self, name: str = 'default') -> Optional[ReplicaRouter]:
+        """Roteador de réplicas sobre as engines síncronas subjacentes (None se não houver réplicas)"""
+        config = self._connection_config(name)
+        if not config.get('replicas'):
+            return None
+        router = self._routers.get(name)
+        if router is None:
+            with self._lock:
+                router = self._routers.get(name)
+                if router is None:
+                    replicas = []
+                    for index, overrides in enumerate(config['replicas']):
+                        key = f"{name}:replica{index}"
+                        if key not in self._engines:
+                            replica = {k: v for k, v in config.items() if k != 'replicas'}
+                            replica.update(overrides)
+                            self._engines[key] = self._create_engine(name, replica)
+                        replicas.append(self._engines[key].sync_engine)
+                    router = self._routers[name] = ReplicaRouter(
+                        self._engine(name).sync_engine,
+                        replicas,
+                        strategy=config.get('read_strategy', 'round_robin'),
+                        sticky_window=config.get('sticky_window', 5.0),
+                        retry_after=config.get('replica_retry_after', 30.0),
+                    )
+        return router
+
+    def sessionmaker(self, name: str = 'default') -> Any:
+        """Retorna o registro de sessões (uma por tarefa asyncio) da conexão"""
+        from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker
+
+        self._check_pid()
+        tenant = current_tenant.get()
+        key = f"{name}@{tenant}" if tenant else name
+        registry = self._sessions.get(key)
+        if registry is None:
+            with self._lock:
+                registry = self._sessions.get(key)
+                if registry is None:
+                    info = {TENANT: tenant} if tenant else {}
+                    router = self.router(name)
+                    if router is not None and tenant:
+                        router = router.with_execution_options(schema_translate_map={None: tenant})
+                    # Sem expire_on_commit: atributos expirados exigiriam I/O implícito
+                    if router is None:
+                        factory = async_sessionmaker(bind=self.engine(name), expire_on_commit=False, info=info)
+                    else:
+                        factory = async_sessionmaker(bind=self.engine(name), expire_on_commit=False, info=info,
+                                                     sync_session_class=RoutingSession, router=router)
+                    registry = async_scoped_session(factory, scopefunc=asyncio.current_task)
+                    self._sessions[key] = registry
+        return registry
+
+    def session(self, name: str = 'default') -> Any:
+        """Retorna a AsyncSession da tarefa corrente na conexão"""
+        return self.sessionmaker(name)()
+
+    async def remove_sessions(self) -> None:
+        """Fecha as sessões da tarefa corrente (ex.: ao final de uma requisição)"""
+        for registry in list(self._sessions.values()):
+            await registry.remove()
+
+    @contextmanager
+    def profile(self, name: Optional[str] = None) -> Iterator[QueryProfile]:
+        """Registra as instruções executadas no bloco (também dentro de `async with`/`await`)"""
+        with profile([name] if name else list(self.connections)) as result:
+            yield result
+
+    def pool_stats(self, name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Estatísticas dos pools asyncio das conexões já abertas (ou de uma conexão)"""
+        names = [name] if name else list(self._engines)
+        return {
+            conn: pool_status(self._engines[conn].sync_engine.pool)
+            for conn in names if conn in self._engines
+        }
+
+    async def dispose(self) -> None:
+        """Fecha todas as sessões e conexões abertas"""
+        for registry in list(self._sessions.values()):
+            await registry.remove()
+        for engine in list(self._engines.values()):
+            await engine.dispose()
+        self._sessions = {}
+        self._engines = {}
+        self._tenant_engines = {}
+        self._routers = {}
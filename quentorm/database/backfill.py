@@ -0,0 +1,222 @@
+"""
+Preenchimento de dados em lotes (backfill)
+
+Em vez de um único `UPDATE` que trava a tabela e gera um pico de WAL/binlog,
+o backfill percorre a chave primária em faixas e confirma cada lote:
+
+    class PreencheValorCentavos(Migration):
+        def up(self):
+            self.backfill(Lancamento, set={'valor_centavos': 'ROUND(valor * 100)'},
+                          where='valor_centavos IS NULL', batch_size=5000, sleep_ms=50,
+                          max_replication_lag=5)
+
+Em `set`, strings são expressões SQL e os demais valores são parâmetros.
+O tamanho do lote se ajusta para que cada `UPDATE` leve cerca de
+`target_ms`. O último id de cada lote é gravado na tabela
+`quentorm_backfills` na mesma transação do lote, e uma execução interrompida
+continua do ponto em que parou. Com `max_replication_lag` (segundos), o
+próximo lote espera enquanto alguma réplica estiver mais atrasada que isso
+ou com o atraso desconhecido.
+"""
+
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import (BigInteger, Column, DateTime, Integer, MetaData, String, Table, and_, func, inspect,
+                        select, text)
+from sqlalchemy.engine import Connection, Engine
+
+from .routing import primary_lag
+
+logger = logging.getLogger('quentorm.migrations')
+
+_metadata = MetaData()
+backfills_table = Table(
+    'quentorm_backfills', _metadata,
+    Column('name', String(255), primary_key=True),
+    Column('table_name', String(255), nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('min_pk', BigInteger),
+    Column('max_pk', BigInteger),
+    Column('last_pk', BigInteger),
+    Column('rows', BigInteger, nullable=False, default=0),
+    Column('batches', Integer, nullable=False, default=0),
+    Column('batch_size', Integer, nullable=False),
+    Column('started_at', DateTime, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+    Column('finished_at', DateTime),
+)
+
+RUNNING, DONE, FAILED = 'running', 'done', 'failed'
+
+
+def _table(target: Any, engine: Engine) -> Table:
+    if isinstance(target, Table):
+        return target
+    if isinstance(target, str):
+        schema, _, name = target.rpartition('.')
+        return Table(name, MetaData(), autoload_with=engine, schema=schema or None)
+    return target.__table__
+
+
+def _values(table: Table, values: Dict[str, Any]) -> Dict[str, Any]:
+    unknown = set(values) - set(table.c.keys())
+    if unknown:
+        raise ValueError(f"Colunas desconhecidas em {table.name}: {', '.join(sorted(unknown))}")
+    return {name: text(value) if isinstance(value, str) else value for name, value in values.items()}
+
+
+class Backfill:
+    """Executa um backfill retomável sobre uma tabela com chave primária inteira"""
+
+    def __init__(self, engine: Engine, target: Any, values: Dict[str, Any], name: str,
+                 where: Union[str, Any, None] = None, batch_size: int = 1000, sleep_ms: int = 0,
+                 max_replication_lag: Optional[float] = None, target_ms: float = 200.0,
+                 router: Any = None):
+        self.engine = engine
+        self.table = _table(target, engine)
+        pk = list(self.table.primary_key.columns)
+        if len(pk) != 1:
+            raise ValueError(f"O backfill exige uma chave primária de uma coluna em {self.table.name}")
+        self.pk = pk[0]
+        self.values = _values(self.table, values)
+        self.where = text(where) if isinstance(where, str) else where
+        self.name = name
+        self.batch_size = batch_size
+        self.min_batch = max(1, batch_size // 10)
+        self.max_batch = batch_size * 10
+        self.sleep = sleep_ms / 1000.0
+        self.max_replication_lag = max_replication_lag
+        self.target = target_ms / 1000.0
+        self.router = router
+
+    def state(self, conn: Connection) -> Optional[Dict[str, Any]]:
+        row = conn.execute(select(backfills_table).where(backfills_table.c.name == self.name)).mappings().first()
+        return dict(row) if row else None
+
+    def replication_lag(self) -> Optional[float]:
+        """
+        Maior atraso das réplicas em segundos: `inf` se algum não puder ser
+        medido (replicação parada, erro na consulta) e None se não houver
+        réplicas para observar (sem réplicas na conexão, fora do PostgreSQL)
+        """
+        if self.router is not None and self.router.replicas:
+            lags = list(self.router.lag().values())
+            return math.inf if None in lags else max(lags)
+        try:
+            return primary_lag(self.engine)
+        except Exception as e:
+            logger.debug("Atraso de replicação indisponível: %s", e)
+            return math.inf
+
+    def throttle(self) -> None:
+        """Espera as réplicas alcançarem o primário antes do próximo lote (atraso desconhecido também espera)"""
+        while True:
+            lag = self.replication_lag()
+            if lag is None or lag <= self.max_replication_lag:
+                return
+            if math.isinf(lag):
+                logger.warning("Backfill %s aguardando réplicas (atraso desconhecido)", self.name)
+            else:
+                logger.info("Backfill %s aguardando réplicas (atraso de %.1fs)", self.name, lag)
+            time.sleep(min(lag, 5.0))
+
+    def adjust(self, size: int, elapsed: float) -> int:
+        """Aproxima a duração do próximo lote de `target_ms`, no máximo dobrando ou reduzindo à metade"""
+        factor = min(2.0, max(0.5, self.target / elapsed)) if elapsed > 0 else 2.0
+        return int(min(self.max_batch, max(self.min_batch, size * factor)))
+
+    def start(self) -> Optional[Dict[str, Any]]:
+        """Cria ou retoma o registro do backfill (None se ele já foi concluído)"""
+        _metadata.create_all(self.engine, tables=[backfills_table])
+        now = datetime.now()
+        with self.engine.begin() as conn:
+            state = self.state(conn)
+            if state is not None and state['status'] == DONE:
+                return None
+            if state is not None:
+                conn.execute(backfills_table.update().where(backfills_table.c.name == self.name)
+                             .values(status=RUNNING, updated_at=now))
+                logger.info("Backfill %s retomado após o id %s", self.name, state['last_pk'])
+                state['status'] = RUNNING
+                return state
+            # O limite superior é fixado no início: linhas novas já são gravadas pela aplicação
+            low, high = conn.execute(select(func.min(self.pk), func.max(self.pk))).one()
+            state = {'name': self.name, 'table_name': self.table.fullname, 'status': RUNNING,
+                     'min_pk': low, 'max_pk': high, 'last_pk': None if low is None else low - 1,
+                     'rows': 0, 'batches': 0, 'batch_size': self.batch_size,
+                     'started_at': now, 'updated_at': now, 'finished_at': None}
+            conn.execute(backfills_table.insert().values(**state))
+        return state
+
+    def run(self) -> int:
+        """Executa os lotes restantes e retorna o total de linhas atualizadas"""
+        state = self.start()
+        if state is None:
+            logger.info("Backfill %s já concluído", self.name)
+            return 0
+        size, last, high = state['batch_size'], state['last_pk'], state['max_pk']
+        if self.max_replication_lag is not None and self.replication_lag() is None:
+            logger.warning("Backfill %s: sem réplicas para medir o atraso, max_replication_lag ignorado", self.name)
+        try:
+            while last is not None and last < high:
+                if self.max_replication_lag is not None:
+                    self.throttle()
+                began = time.perf_counter()
+                with self.engine.begin() as conn:
+                    # Id do último registro do lote: faixas com o mesmo número de linhas, mesmo com lacunas
+                    upper = conn.execute(select(self.pk).where(self.pk > last).order_by(self.pk)
+                                         .offset(size - 1).limit(1)).scalar()
+                    upper = high if upper is None or upper > high else upper
+                    condition = and_(self.pk > last, self.pk <= upper)
+                    if self.where is not None:
+                        condition = and_(condition, self.where)
+                    rows = conn.execute(self.table.update().where(condition).values(self.values)).rowcount
+                    state['rows'] += max(rows, 0)
+                    state['batches'] += 1
+                    last = upper
+                    conn.execute(backfills_table.update().where(backfills_table.c.name == self.name).values(
+                        last_pk=last, rows=state['rows'], batches=state['batches'], batch_size=size,
+                        updated_at=datetime.now()))
+                size = self.adjust(size, time.perf_counter() - began)
+                if self.sleep and last < high:
+                    time.sleep(self.sleep)
+        except BaseException:
+            with self.engine.begin() as conn:
+                conn.execute(backfills_table.update().where(backfills_table.c.name == self.name)
+                             .values(status=FAILED, updated_at=datetime.now()))
+            raise
+        with self.engine.begin() as conn:
+            now = datetime.now()
+            conn.execute(backfills_table.update().where(backfills_table.c.name == self.name)
+                         .values(status=DONE, updated_at=now, finished_at=now))
+        logger.info("Backfill %s concluído: %s linhas em %s lotes", self.name, state['rows'], state['batches'])
+        return state['rows']
+
+
+def backfills(engine: Engine) -> List[Dict[str, Any]]:
+    """Estado dos backfills registrados na conexão, com o percentual percorrido"""
+    if not inspect(engine).has_table(backfills_table.name):
+        return []
+    with engine.connect() as conn:
+        rows = conn.execute(select(backfills_table).order_by(backfills_table.c.started_at)).mappings().all()
+    result = []
+    for row in rows:
+        row = dict(row)
+        span = (row['max_pk'] or 0) - (row['min_pk'] or 0) + 1
+        done = (row['last_pk'] or 0) - (row['min_pk'] or 0) + 1
+        row['percent'] = 100.0 if row['status'] == DONE or row['max_pk'] is None else \
+            round(100.0 * max(0, done) / span, 1)
+        result.append(row)
+    return result
+
+
+def clear_backfills(engine: Engine, prefix: str) -> None:
+    """Apaga o estado dos backfills de uma migração (ao desfazê-la)"""
+    if not inspect(engine).has_table(backfills_table.name):
+        return
+    with engine.begin() as conn:
+        conn.execute(backfills_table.delete().where(backfills_table.c.name.startswith(f"{prefix}:")))
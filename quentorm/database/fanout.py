@@ -0,0 +1,162 @@
+"""
+Escritas paralelas em várias conexões e schemas (fan-out)
+
+    resultados = db.fan_out({
+        'default': lambda session: session.bulk_save_objects(clientes),
+        'secondary@third': lambda session: session.bulk_save_objects(users),
+    })
+
+Cada alvo ('conexão' ou 'conexão@schema') roda em uma thread de um pool
+limitado, com sessão e transação próprias. Com `two_phase=True` nenhum alvo é
+confirmado antes que todos tenham executado: os que suportam transações em
+duas fases (PostgreSQL, MySQL) fazem PREPARE, e uma falha em qualquer alvo
+desfaz todos. É um 2PC de melhor esforço: uma falha já na fase de commit não
+desfaz os alvos confirmados antes dela e fica registrada no resultado.
+"""
+
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import DefaultDialect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Limite padrão de threads simultâneas
+DEFAULT_MAX_WORKERS = 8
+
+Work = Callable[[Session], Any]
+
+
+class TargetResult:
+    """Resultado da escrita em um alvo"""
+
+    __slots__ = ('target', 'status', 'value', 'error', 'elapsed')
+
+    def __init__(self, target: str):
+        self.target = target
+        self.status = 'pending'
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'committed'
+
+    def __repr__(self):
+        error = f", error={self.error!r}" if self.error is not None else ''
+        return f"<TargetResult({self.target!r}, {self.status}, {self.elapsed:.3f}s{error})>"
+
+
+class FanOutResults(dict):
+    """Resultados por alvo, com o tempo total (wall-clock) da operação"""
+
+    elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.values())
+
+    @property
+    def errors(self) -> Dict[str, BaseException]:
+        return {target: result.error for target, result in self.items() if result.error is not None}
+
+
+def parse_target(target: str) -> Tuple[str, Optional[str]]:
+    """Separa 'conexão@schema' em (conexão, schema)"""
+    name, _, schema = target.partition('@')
+    return name, schema or None
+
+
+def supports_two_phase(engine: Engine) -> bool:
+    """Indica se o dialeto implementa PREPARE TRANSACTION / XA"""
+    return type(engine.dialect).do_prepare_twophase is not DefaultDialect.do_prepare_twophase
+
+
+def _execute(db: Any, target: str, work: Work, result: TargetResult, two_phase: bool) -> Optional[Session]:
+    """Executa o trabalho de um alvo; no modo duas fases devolve a sessão ainda aberta"""
+    name, schema = parse_target(target)
+    started = time.perf_counter()
+    session = None
+    try:
+        with db.tenant(schema) if schema else nullcontext():
+            prepare = two_phase and supports_two_phase(db.engine(name))
+            session = db.sessionmaker(name).session_factory(twophase=prepare)
+            result.value = work(session)
+            if not two_phase:
+                session.commit()
+                result.status = 'committed'
+                return None
+            session.flush()
+            if prepare:
+                session.prepare()
+            result.status = 'prepared'
+            return session
+    except Exception as e:
+        logger.warning("Falha no fan-out para '%s': %s", target, e)
+        result.status, result.error = 'failed', e
+        if session is not None:
+            session.rollback()
+        return None
+    finally:
+        result.elapsed += time.perf_counter() - started
+        if session is not None and result.status != 'prepared':
+            session.close()
+
+
+def _finish(session: Session, result: TargetResult, commit: bool) -> None:
+    """Segunda fase: confirma ou desfaz um alvo preparado"""
+    started = time.perf_counter()
+    try:
+        if commit:
+            session.commit()
+            result.status = 'committed'
+        else:
+            session.rollback()
+            result.status = 'rolled_back'
+    except Exception as e:
+        logger.error("Falha na fase de commit do fan-out para '%s': %s", result.target, e)
+        result.status, result.error = 'failed', e
+    finally:
+        session.close()
+        result.elapsed += time.perf_counter() - started
+
+
+def fan_out(db: Any, targets: Mapping[str, Work], max_workers: Optional[int] = None,
+            two_phase: bool = False) -> FanOutResults:
+    """
+    Executa escritas independentes em paralelo, uma transação por alvo
+
+    `targets` mapeia 'conexão' ou 'conexão@schema' para uma função que
+    recebe a sessão do alvo. Erros não são propagados: ficam em cada
+    `TargetResult`, junto com o status e o tempo gasto.
+    """
+    results = FanOutResults((target, TargetResult(target)) for target in targets)
+    if not targets:
+        return results
+    started = time.perf_counter()
+    workers = max_workers or min(len(targets), DEFAULT_MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quentorm-fanout') as pool:
+        # Cada tarefa roda em uma cópia do contexto de quem chamou (ex.: o tenant corrente)
+        futures = {
+            target: pool.submit(contextvars.copy_context().run, _execute, db, target, work,
+                                results[target], two_phase)
+            for target, work in targets.items()
+        }
+        sessions = {target: future.result() for target, future in futures.items()}
+        if two_phase:
+            commit = all(result.status == 'prepared' for result in results.values())
+            finishing = [
+                pool.submit(_finish, session, results[target], commit)
+                for target, session in sessions.items() if session is not None
+            ]
+            for future in finishing:
+                future.result()
+    results.elapsed = time.perf_counter() - started
+    return results
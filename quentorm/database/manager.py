@@ -0,0 +1,318 @@
+"""
+Gerenciador de conexões do QuentORM
+
+O `Database` é o único dono das engines do SQLAlchemy. Cada conexão nomeada
+em `db.config({...})` só ganha engine e pool no primeiro uso. Conexões com
+`replicas` têm as leituras distribuídas entre as réplicas (ver `routing`).
+Dentro de `with db.tenant('schema'):` os mesmos modelos operam sobre outro
+schema pelo `schema_translate_map`, usando o pool único da conexão. Após um
+`os.fork()` (gunicorn com preload, pools de processos) os pools herdados são
+descartados sem fechar os sockets do processo pai e recriados no filho.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+
+from ..caching import build_cache, set_cache
+from ..caching.identity import TENANT
+from ..context import current_tenant
+from ..monitoring import QueryProfile, configure_query_log, instrument, profile, register_database
+from ..utils.models import BaseModel
+from .fanout import FanOutResults, Work, fan_out
+from .pool import InstrumentedQueuePool, pool_status
+from .routing import ReplicaRouter, RoutingSession
+
+# Nome do driver na configuração -> dialeto+driver do SQLAlchemy
+DRIVERS = {
+    'mysql': 'mysql+pymysql',
+    'pgsql': 'postgresql+psycopg2',
+    'postgres': 'postgresql+psycopg2',
+    'postgresql': 'postgresql+psycopg2',
+    'sqlite': 'sqlite',
+}
+
+# Opções de `options` repassadas ao create_engine (as demais vão para connect_args)
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping', 'pool_use_lifo')
+ENGINE_OPTIONS = POOL_OPTIONS + ('echo', 'isolation_level', 'execution_options')
+
+
+def build_url(config: Dict[str, Any]) -> Any:
+    """Monta a URL de conexão a partir da configuração de uma conexão"""
+    if config.get('url'):
+        return config['url']
+    driver = config.get('driver', 'sqlite')
+    dialect = DRIVERS.get(driver, driver)
+    if dialect == 'sqlite':
+        database = config.get('database') or ':memory:'
+        return 'sqlite://' if database == ':memory:' else f"sqlite:///{database}"
+    query = {}
+    if config.get('charset') and dialect.startswith('mysql'):
+        query['charset'] = config['charset']
+    return URL.create(
+        dialect,
+        username=config.get('username'),
+        password=config.get('password') or None,
+        host=config.get('host'),
+        port=config.get('port'),
+        database=config.get('database'),
+        query=query,
+    )
+
+
+def engine_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte a configuração de uma conexão em argumentos do create_engine"""
+    options = dict(config.get('options', {}))
+    kwargs: Dict[str, Any] = {}
+    connect_args: Dict[str, Any] = dict(options.pop('connect_args', {}))
+    for name in list(options):
+        if name in ENGINE_OPTIONS:
+            kwargs[name] = options.pop(name)
+    connect_args.update(options)
+
+    url = build_url(config)
+    in_memory = isinstance(url, str) and url in ('sqlite://', 'sqlite:///:memory:')
+    if in_memory:
+        # SQLite em memória usa um pool próprio; as opções de tamanho não se aplicam
+        for name in POOL_OPTIONS:
+            kwargs.pop(name, None)
+    else:
+        kwargs['poolclass'] = InstrumentedQueuePool
+
+    schema = config.get('schema')
+    if schema and str(url).startswith('postgresql'):
+        connect_args.setdefault('options', f"-csearch_path={schema}")
+    if connect_args:
+        kwargs['connect_args'] = connect_args
+    return kwargs
+
+
+class Database:
+    """Gerenciador das conexões nomeadas, suas engines e sessões"""
+
+    def __init__(self):
+        self.connections: Dict[str, Dict[str, Any]] = {}
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self.logging: Dict[str, Dict[str, Any]] = {}
+        self._engines: Dict[str, Engine] = {}
+        self._sessions: Dict[str, scoped_session] = {}
+        self._routers: Dict[str, ReplicaRouter] = {}
+        # Engines e roteadores de tenant: visões por (conexão, schema) sobre os mesmos pools
+        self._tenant_engines: Dict[Tuple[str, str], Engine] = {}
+        self._tenant_routers: Dict[Tuple[str, str], ReplicaRouter] = {}
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        register_database(self)
+
+    def config(self, connections: Dict[str, Dict[str, Any]]) -> 'Database':
+        """Registra as conexões nomeadas e torna este gerenciador o padrão dos modelos"""
+        with self._lock:
+            for name, config in connections.items():
+                for key in [k for k in self._engines if k == name or k.startswith(f"{name}:")]:
+                    self._engines.pop(key).dispose()
+                for key in [k for k in self._sessions if k == name or k.startswith(f"{name}@")]:
+                    self._sessions.pop(key).remove()
+                self._routers.pop(name, None)
+                for key in [k for k in self._tenant_engines if k[0] == name]:
+                    self._tenant_engines.pop(key)
+                    self._tenant_routers.pop(key, None)
+                self.connections[name] = dict(config)
+        BaseModel.set_connection_resolver(self.session)
+        return self
+
+    def cache_config(self, caches: Dict[str, Dict[str, Any]]) -> 'Database':
+        """Configura o backend de cache de cada conexão"""
+        for name, config in caches.items():
+            self.caches[name] = dict(config)
+            set_cache(name, build_cache(config))
+        return self
+
+    def logging_config(self, logging: Dict[str, Dict[str, Any]]) -> 'Database':
+        """Configura o log de consultas lentas de cada conexão (ver `monitoring`)"""
+        for name, config in logging.items():
+            self.logging[name] = dict(config)
+            configure_query_log(name, config)
+        return self
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    def _after_fork(self) -> None:
+        """Descarta, sem fechar, as conexões herdadas do processo pai"""
+        # O lock pode ter sido herdado travado por uma thread que não existe no filho
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+        for engine in self._engines.values():
+            engine.dispose(close=False)
+        # As sessões herdadas seguram conexões do pai: apenas as esquecemos
+        self._sessions = {}
+
+    def _connection_config(self, name: str) -> Dict[str, Any]:
+        try:
+            return self.connections[name]
+        except KeyError:
+            raise KeyError(f"Conexão '{name}' não configurada. Use db.config().") from None
+
+    @contextmanager
+    def tenant(self, schema: str) -> Iterator['Database']:
+        """
+        Executa o bloco no schema do tenant
+
+            with db.tenant('secondary'):
+                Cliente.where('ativo', True).get()
+
+        Tabelas sem schema explícito são traduzidas para `schema` em todas as
+        instruções (inclusive DDL), sem abrir engine ou pool novos. Vale para a
+        thread ou tarefa asyncio corrente e pode ser aninhado.
+        """
+        token = current_tenant.set(schema)
+        try:
+            yield self
+        finally:
+            current_tenant.reset(token)
+
+    def engine(self, name: str = 'default') -> Engine:
+        """Retorna a engine da conexão (do tenant corrente, se houver)"""
+        tenant = current_tenant.get()
+        if tenant is None:
+            return self._engine(name)
+        engine = self._tenant_engines.get((name, tenant))
+        if engine is None:
+            # Visões de execution_options compartilham o pool da engine base
+            engine = self._engine(name).execution_options(schema_translate_map={None: tenant})
+            self._tenant_engines[(name, tenant)] = engine
+        return engine
+
+    def _engine(self, name: str) -> Engine:
+        self._check_pid()
+        engine = self._engines.get(name)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(name)
+                if engine is None:
+                    config = self._connection_config(name)
+                    engine = create_engine(build_url(config), **engine_options(config))
+                    self._engines[name] = instrument(engine, name)
+        return engine
+
+    def _replica_engine(self, name: str, index: int) -> Engine:
+        key = f"{name}:replica{index}"
+        engine = self._engines.get(key)
+        if engine is None:
+            config = self._connection_config(name)
+            replica = {k: v for k, v in config.items() if k != 'replicas'}
+            replica.update(config['replicas'][index])
+            engine = create_engine(build_url(replica), **engine_options(replica))
+            self._engines[key] = instrument(engine, name)
+        return engine
+
+    def router(self, name: str = 'default') -> Optional[ReplicaRouter]:
+        """Retorna o roteador de réplicas da conexão (None se não houver réplicas)"""
+        self._check_pid()
+        config = self._connection_config(name)
+        if not config.get('replicas'):
+            return None
+        router = self._routers.get(name)
+        if router is None:
+            with self._lock:
+                router = self._routers.get(name)
+                if router is None:
+                    router = ReplicaRouter(
+                        self._engine(name),
+                        [self._replica_engine(name, i) for i in range(len(config['replicas']))],
+                        strategy=config.get('read_strategy', 'round_robin'),
+                        sticky_window=config.get('sticky_window', 5.0),
+                        retry_after=config.get('replica_retry_after', 30.0),
+                    )
+                    self._routers[name] = router
+        return router
+
+    def check_replicas(self, name: str = 'default') -> Dict[str, bool]:
+        """Testa as réplicas da conexão e atualiza quais estão em rotação"""
+        router = self.router(name)
+        return router.check() if router is not None else {}
+
+    def _tenant_router(self, name: str, tenant: Optional[str]) -> Optional[ReplicaRouter]:
+        router = self.router(name)
+        if router is None or tenant is None:
+            return router
+        view = self._tenant_routers.get((name, tenant))
+        if view is None:
+            view = router.with_execution_options(schema_translate_map={None: tenant})
+            self._tenant_routers[(name, tenant)] = view
+        return view
+
+    def sessionmaker(self, name: str = 'default') -> scoped_session:
+        """
+        Retorna o registro de sessões (uma por thread) da conexão
+
+        Cada tenant tem o seu registro, para que o identity map de um schema
+        não se misture com o de outro.
+        """
+        self._check_pid()
+        tenant = current_tenant.get()
+        key = f"{name}@{tenant}" if tenant else name
+        registry = self._sessions.get(key)
+        if registry is None:
+            with self._lock:
+                registry = self._sessions.get(key)
+                if registry is None:
+                    router = self._tenant_router(name, tenant)
+                    info = {TENANT: tenant} if tenant else {}
+                    if router is None:
+                        factory = sessionmaker(bind=self.engine(name), info=info)
+                    else:
+                        factory = sessionmaker(bind=router.primary, class_=RoutingSession,
+                                               router=router, info=info)
+                    registry = scoped_session(factory)
+                    self._sessions[key] = registry
+        return registry
+
+    def session(self, name: str = 'default') -> Session:
+        """Retorna a sessão da thread corrente na conexão"""
+        return self.sessionmaker(name)()
+
+    def remove_sessions(self) -> None:
+        """Fecha as sessões da thread corrente (ex.: ao final de uma requisição)"""
+        for registry in list(self._sessions.values()):
+            registry.remove()
+
+    def fan_out(self, targets: Mapping[str, Work], max_workers: Optional[int] = None,
+                two_phase: bool = False) -> FanOutResults:
+        """Executa escritas independentes em paralelo em várias conexões/schemas (ver `fanout`)"""
+        return fan_out(self, targets, max_workers=max_workers, two_phase=two_phase)
+
+    @contextmanager
+    def profile(self, name: Optional[str] = None) -> Iterator[QueryProfile]:
+        """Registra as instruções executadas no bloco nas conexões deste gerenciador (ou em uma)"""
+        with profile([name] if name else list(self.connections)) as result:
+            yield result
+
+    def pool_stats(self, name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Estatísticas dos pools das conexões já abertas (ou de uma conexão)"""
+        names = [name] if name else list(self._engines)
+        return {
+            conn: pool_status(self._engines[conn].pool)
+            for conn in names if conn in self._engines
+        }
+
+    def dispose(self) -> None:
+        """Fecha todas as sessões e conexões abertas"""
+        with self._lock:
+            for registry in self._sessions.values():
+                registry.remove()
+            for engine in self._engines.values():
+                engine.dispose()
+            self._sessions = {}
+            self._engines = {}
+            self._routers = {}
+            self._tenant_engines = {}
+            self._tenant_routers = {}
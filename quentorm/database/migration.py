@@ -0,0 +1,338 @@
+"""
+Migrações do QuentORM
+
+Cada arquivo em `database/migrations/` define uma subclasse de `Migration`
+com `up()` e `down()`. As operações executam DDL na conexão da migração
+(`connection`), com os nomes citados conforme o dialeto:
+
+    from quentorm import Migration
+
+    class AddClientesCpfIndex(Migration):
+        def up(self):
+            self.create_index('tbl_clientes', ['cpf'], online=True)
+
+        def down(self):
+            self.drop_index('ix_tbl_clientes_cpf', table='tbl_clientes', online=True)
+
+Com `online=True` o índice é criado sem bloquear as escritas na tabela:
+`CREATE INDEX CONCURRENTLY` fora de transação no PostgreSQL e
+`ALGORITHM=INPLACE LOCK=NONE` no MySQL. O andamento é informado a cada
+`progress_interval` segundos. Uma construção concorrente interrompida deixa
+no PostgreSQL um índice inválido; ao executar a migração de novo ele é
+removido e reconstruído, e um índice válido com o mesmo nome é mantido.
+
+`backfill()` preenche colunas em lotes confirmados um a um, retomáveis e
+com pausa para as réplicas (ver `backfill`). `convert_to_money()` usa o
+backfill para passar uma coluna `Numeric` para centavos (`Money`):
+
+    class ValoresEmCentavos(Migration):
+        def up(self):
+            self.convert_to_money('tbl_contas_pagar', 'valor')
+
+        def down(self):
+            self.convert_from_money('tbl_contas_pagar', 'valor', precision=10, scale=2)
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import BigInteger, MetaData, Numeric, Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from ..utils.indexes import PARTIAL_DIALECTS, standalone_index
+from .backfill import Backfill
+
+logger = logging.getLogger('quentorm.migrations')
+
+# Intervalo padrão entre dois relatórios de andamento de um índice (segundos)
+PROGRESS_INTERVAL = 5.0
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+# Andamento da construção de um índice no PostgreSQL 12+
+_PG_PROGRESS = text(
+    "SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total "
+    "FROM pg_stat_progress_create_index WHERE relid = to_regclass(:table)"
+)
+# Índices deixados inválidos por um CREATE INDEX CONCURRENTLY interrompido
+_PG_INVALID = text(
+    "SELECT n.nspname, c.relname FROM pg_index i "
+    "JOIN pg_class c ON c.oid = i.indexrelid "
+    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+    "WHERE NOT i.indisvalid AND (CAST(:table AS text) IS NULL OR i.indrelid = to_regclass(:table))"
+)
+_PG_INDEX_VALID = text(
+    "SELECT i.indisvalid FROM pg_index i WHERE i.indexrelid = to_regclass(:name)"
+)
+# Andamento de um CREATE INDEX no InnoDB (com os instrumentos stage/innodb/alter% habilitados)
+_MYSQL_PROGRESS = text(
+    "SELECT EVENT_NAME, WORK_COMPLETED, WORK_ESTIMATED FROM performance_schema.events_stages_current "
+    "WHERE EVENT_NAME LIKE 'stage/innodb/alter%'"
+)
+
+
+class IndexProgress(threading.Thread):
+    """Consulta periodicamente, em outra conexão, o andamento da construção de um índice"""
+
+    def __init__(self, engine: Engine, table: str, index: str, callback: ProgressCallback,
+                 interval: float = PROGRESS_INTERVAL):
+        super().__init__(name='quentorm-index-progress', daemon=True)
+        self.engine = engine
+        self.table = table
+        self.index = index
+        self.callback = callback
+        self.interval = interval
+        self._done = threading.Event()
+
+    def poll(self, conn: Connection) -> Optional[Dict[str, Any]]:
+        if self.engine.dialect.name == 'postgresql':
+            row = conn.execute(_PG_PROGRESS, {'table': self.table}).mappings().first()
+            if row is None:
+                return None
+            phase = row['phase']
+            done, total = ((row['blocks_done'], row['blocks_total']) if row['blocks_total']
+                           else (row['tuples_done'], row['tuples_total']))
+        else:
+            row = conn.execute(_MYSQL_PROGRESS).mappings().first()
+            if row is None:
+                return None
+            phase = row['EVENT_NAME'].rsplit('/', 1)[-1]
+            done, total = row['WORK_COMPLETED'], row['WORK_ESTIMATED']
+        return {'phase': phase, 'done': done, 'total': total,
+                'percent': round(100.0 * done / total, 1) if total else None}
+
+    def run(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                while not self._done.wait(self.interval):
+                    progress = self.poll(conn)
+                    conn.rollback()
+                    if progress is not None:
+                        self.callback(self.index, progress)
+        except Exception as e:
+            # Sem permissão ou sem a view de andamento: a construção segue sem relatórios
+            logger.debug("Andamento do índice %s indisponível: %s", self.index, e)
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+class Migration:
+    """Base das migrações"""
+
+    # Conexão em que a migração é executada
+    connection = 'default'
+
+    def __init__(self, db: Any, progress: Optional[ProgressCallback] = None,
+                 progress_interval: float = PROGRESS_INTERVAL):
+        self.db = db
+        self.progress = progress or self.report_progress
+        self.progress_interval = progress_interval
+
+    @property
+    def engine(self) -> Engine:
+        return self.db.engine(self.connection)
+
+    @property
+    def dialect(self) -> str:
+        return self.engine.dialect.name
+
+    def quote(self, name: str) -> str:
+        """Cita um identificador (`schema.tabela` é citado por partes)"""
+        preparer = self.engine.dialect.identifier_preparer
+        return '.'.join(preparer.quote(part) for part in name.split('.'))
+
+    def execute(self, sql: str, parameters: Any = None) -> None:
+        """Executa uma instrução em uma transação própria"""
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(sql, parameters) if parameters else conn.exec_driver_sql(sql)
+
+    def execute_autocommit(self, sql: str) -> None:
+        """Executa uma instrução fora de transação (ex.: CREATE INDEX CONCURRENTLY)"""
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql(sql)
+
+    def report_progress(self, index: str, progress: Dict[str, Any]) -> None:
+        """Destino padrão do andamento dos índices: o logger `quentorm.migrations`"""
+        percent = '?' if progress.get('percent') is None else f"{progress['percent']}%"
+        logger.info("Índice %s: %s (%s)", index, percent, progress.get('phase'))
+
+    def create_table(self, name: str, columns: List[Any]) -> None:
+        """Cria a tabela a partir de `Column`s do SQLAlchemy ou de definições em SQL"""
+        if all(isinstance(column, str) for column in columns):
+            self.execute(f"CREATE TABLE {self.quote(name)} ({', '.join(columns)})")
+            return
+        schema, _, table = name.rpartition('.')
+        Table(table, MetaData(), *columns, schema=schema or None).create(self.engine)
+
+    def drop_table(self, name: str) -> None:
+        self.execute(f"DROP TABLE IF EXISTS {self.quote(name)}")
+
+    @staticmethod
+    def _qualified(name: str, table: Optional[str]) -> str:
+        if table is not None and '.' in table and '.' not in name:
+            # No PostgreSQL o índice fica no schema da tabela
+            return f"{table.rsplit('.', 1)[0]}.{name}"
+        return name
+
+    def index_valid(self, name: str, table: Optional[str] = None) -> Optional[bool]:
+        """None se o índice não existe; senão se ele é válido (só o PostgreSQL tem índices inválidos)"""
+        if self.dialect == 'postgresql':
+            with self.engine.connect() as conn:
+                return conn.execute(_PG_INDEX_VALID, {'name': self.quote(self._qualified(name, table))}).scalar()
+        if table is None:
+            raise ValueError("Informe a tabela do índice")
+        schema, _, table_name = table.rpartition('.')
+        existing = inspect(self.engine).get_indexes(table_name, schema=schema or None)
+        return True if any(index['name'] == name for index in existing) else None
+
+    def create_index(self, table: str, columns: Sequence[str], name: Optional[str] = None,
+                     unique: bool = False, where: Optional[str] = None, include: Optional[Sequence[str]] = None,
+                     using: Optional[str] = None, online: bool = False) -> str:
+        """
+        Cria um índice (nome padrão `ix_<tabela>_<colunas>`) e retorna o nome
+
+        As colunas e opções seguem a sintaxe de `__indexes__`: `-coluna` é
+        decrescente, expressões são aceitas e `where`/`include`/`using` só
+        chegam aos dialetos que os suportam. Com `online=True` um índice já
+        existente é mantido e, no PostgreSQL e no MySQL, o índice é construído
+        sem bloquear escritas.
+        """
+        if unique and where and self.dialect not in PARTIAL_DIALECTS:
+            raise ValueError(f"{self.dialect} não tem índices parciais: um índice único com where seria "
+                             "criado completo e mais restrito que o declarado")
+        spec = {'columns': list(columns), 'name': name, 'unique': unique, 'where': where,
+                'include': include, 'using': using}
+        index = standalone_index(table, {key: value for key, value in spec.items() if value})
+        valid = self.index_valid(index.name, table) if online else None
+        if valid:
+            logger.info("Índice %s já existe", index.name)
+            return index.name
+        if not online or self.dialect not in ('postgresql', 'mysql', 'mariadb'):
+            self.execute(str(CreateIndex(index).compile(dialect=self.engine.dialect)))
+            return index.name
+
+        if self.dialect == 'postgresql':
+            if valid is False:
+                logger.warning("Removendo o índice inválido %s de uma construção interrompida", index.name)
+                self.drop_index(index.name, table=table, online=True)
+            index.dialect_options['postgresql']['concurrently'] = True
+            sql = str(CreateIndex(index).compile(dialect=self.engine.dialect))
+        else:
+            sql = f"{CreateIndex(index).compile(dialect=self.engine.dialect)} ALGORITHM=INPLACE LOCK=NONE"
+
+        watcher = IndexProgress(self.engine, table, index.name, self.progress, self.progress_interval)
+        watcher.start()
+        try:
+            self.execute_autocommit(sql)
+        finally:
+            watcher.stop()
+        self.progress(index.name, {'phase': 'concluído', 'done': None, 'total': None, 'percent': 100.0})
+        return index.name
+
+    def drop_index(self, name: str, table: Optional[str] = None, online: bool = False) -> None:
+        if self.dialect in ('mysql', 'mariadb'):
+            if table is None:
+                raise ValueError("No MySQL DROP INDEX exige a tabela")
+            lock = ' ALGORITHM=INPLACE LOCK=NONE' if online else ''
+            self.execute(f"DROP INDEX {self.quote(name)} ON {self.quote(table)}{lock}")
+        elif online and self.dialect == 'postgresql':
+            self.execute_autocommit(f"DROP INDEX CONCURRENTLY IF EXISTS {self.quote(self._qualified(name, table))}")
+        else:
+            self.execute(f"DROP INDEX {self.quote(self._qualified(name, table))}")
+
+    def invalid_indexes(self, table: Optional[str] = None) -> List[str]:
+        """Índices inválidos (`schema.nome`) deixados por construções concorrentes interrompidas"""
+        if self.dialect != 'postgresql':
+            return []
+        with self.engine.connect() as conn:
+            rows = conn.execute(_PG_INVALID, {'table': self.quote(table) if table else None}).all()
+        return [f"{schema}.{name}" for schema, name in rows]
+
+    def cleanup_invalid_indexes(self, table: Optional[str] = None) -> List[str]:
+        """Remove, sem bloquear as tabelas, os índices inválidos e retorna os nomes removidos"""
+        names = self.invalid_indexes(table)
+        for name in names:
+            logger.warning("Removendo o índice inválido %s", name)
+            self.drop_index(name, online=True)
+        return names
+
+    def backfill(self, model: Any, set: Dict[str, Any], where: Any = None, batch_size: int = 1000,
+                 sleep_ms: int = 0, max_replication_lag: Optional[float] = None, target_ms: float = 200.0,
+                 name: Optional[str] = None) -> int:
+        """
+        Atualiza `model` (modelo, `Table` ou nome da tabela) em lotes por faixa
+        de chave primária e retorna o número de linhas atualizadas
+
+        `set` mapeia colunas a expressões SQL (strings) ou valores; `where`
+        restringe as linhas. Cada lote é confirmado com o ponto de retomada
+        em `quentorm_backfills`; `name` identifica o backfill (padrão
+        `<Migração>:<tabela>`).
+        """
+        table = getattr(model, '__table__', None)
+        table_name = table.name if table is not None else getattr(model, 'name', model)
+        return Backfill(self.engine, model, set, name or f"{type(self).__name__}:{table_name}", where=where,
+                        batch_size=batch_size, sleep_ms=sleep_ms, max_replication_lag=max_replication_lag,
+                        target_ms=target_ms, router=self.db.router(self.connection)).run()
+
+    def _replace_column(self, table: str, column: str, type_: Any, expression: str,
+                        options: Dict[str, Any]) -> int:
+        """
+        Troca o tipo de `column` por uma coluna nova preenchida com `expression`
+
+        A coluna `<coluna>_new` é criada, preenchida por backfill, e substitui
+        a original (DROP + RENAME). Cada passo verifica o estado da tabela: a
+        migração interrompida continua de onde parou.
+        """
+        schema, _, name = table.rpartition('.')
+        existing = {col['name']: col for col in inspect(self.engine).get_columns(name, schema=schema or None)}
+        staging = f"{column}_new"
+        quoted, target, new = self.quote(table), self.quote(column), self.quote(staging)
+        type_sql = type_.compile(dialect=self.engine.dialect)
+        rows = 0
+        if column in existing:
+            if staging not in existing:
+                self.execute(f"ALTER TABLE {quoted} ADD COLUMN {new} {type_sql}")
+            rows = self.backfill(table, set={staging: expression.format(column=target)},
+                                 where=f"{new} IS NULL AND {target} IS NOT NULL",
+                                 name=f"{type(self).__name__}:{table}.{column}:{type_sql}", **options)
+            self.execute(f"ALTER TABLE {quoted} DROP COLUMN {target}")
+        elif staging not in existing:
+            raise ValueError(f"Coluna desconhecida em {table}: {column}")
+        self.execute(f"ALTER TABLE {quoted} RENAME COLUMN {new} TO {target}")
+        nullable = existing.get(column, existing.get(staging, {})).get('nullable', True)
+        if not nullable:
+            if self.dialect == 'postgresql':
+                self.execute(f"ALTER TABLE {quoted} ALTER COLUMN {target} SET NOT NULL")
+            elif self.dialect in ('mysql', 'mariadb'):
+                self.execute(f"ALTER TABLE {quoted} MODIFY {target} {type_sql} NOT NULL")
+            else:
+                logger.warning("%s.%s: NOT NULL não restaurado (o %s não altera colunas existentes)",
+                               table, column, self.dialect)
+        return rows
+
+    def convert_to_money(self, table: str, column: str, **options: Any) -> int:
+        """
+        Converte uma coluna `Numeric` em centavos (BIGINT, o tipo `Money`)
+
+        Os valores são arredondados ao centavo por um backfill em lotes
+        (`options` vão para `backfill`); retorna o número de linhas
+        convertidas. Índices que usam a coluna devem ser removidos antes e
+        recriados depois, e as escritas na coluna devem esperar o fim da
+        conversão.
+        """
+        return self._replace_column(table, column, BigInteger(), 'ROUND({column} * 100)', options)
+
+    def convert_from_money(self, table: str, column: str, precision: int = 10, scale: int = 2,
+                           **options: Any) -> int:
+        """Volta uma coluna `Money` (centavos) para `Numeric(precision, scale)`"""
+        return self._replace_column(table, column, Numeric(precision, scale), '{column} / 100.0', options)
+
+    def up(self) -> None:
+        raise NotImplementedError
+
+    def down(self) -> None:
+        raise NotImplementedError
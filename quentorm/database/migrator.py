@@ -0,0 +1,127 @@
+"""
+Execução das migrações
+
+O `Migrator` aplica em ordem os arquivos de `database/migrations/` (o prefixo
+de data do nome ordena os arquivos) e registra cada migração aplicada na
+tabela `quentorm_migrations` da conexão padrão, com o lote em que ela entrou.
+`rollback()` desfaz o último lote, na ordem inversa, e `status()` lista as
+migrações e os backfills de cada conexão.
+
+As migrações com `create_index(..., online=True)` são reexecutáveis: se o
+processo cair no meio da construção, rodar `quentorm migrate` de novo remove
+o índice inválido e recomeça, sem tocar nos índices já concluídos.
+"""
+
+import importlib.util
+import inspect
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select
+
+from .backfill import backfills, clear_backfills
+from .migration import Migration, ProgressCallback
+
+MIGRATIONS_PATH = os.path.join('database', 'migrations')
+
+_metadata = MetaData()
+migrations_table = Table(
+    'quentorm_migrations', _metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('migration', String(255), nullable=False, unique=True),
+    Column('batch', Integer, nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def load_migration(path: str) -> Type[Migration]:
+    """Importa um arquivo de migração e retorna a sua subclasse de `Migration`"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(f"quentorm_migration_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    classes = [value for value in vars(module).values()
+               if inspect.isclass(value) and issubclass(value, Migration) and value is not Migration
+               and value.__module__ == module.__name__]
+    if len(classes) != 1:
+        raise ValueError(f"{path} deve definir exatamente uma subclasse de Migration")
+    return classes[0]
+
+
+class Migrator:
+    """Aplica e desfaz as migrações de um diretório"""
+
+    def __init__(self, db: Any, path: str = MIGRATIONS_PATH, connection: str = 'default',
+                 progress: Optional[ProgressCallback] = None):
+        self.db = db
+        self.path = path
+        self.connection = connection
+        self.progress = progress
+
+    @property
+    def engine(self):
+        return self.db.engine(self.connection)
+
+    def files(self) -> List[str]:
+        """Nomes (sem `.py`) dos arquivos de migração, em ordem"""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.path)
+                      if name.endswith('.py') and not name.startswith('_'))
+
+    def applied(self) -> Dict[str, Tuple[int, datetime]]:
+        """{migração: (lote, aplicada em)} das migrações já aplicadas"""
+        _metadata.create_all(self.engine, tables=[migrations_table])
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(migrations_table.c.migration, migrations_table.c.batch,
+                                       migrations_table.c.applied_at)).all()
+        return {name: (batch, applied_at) for name, batch, applied_at in rows}
+
+    def pending(self) -> List[str]:
+        applied = self.applied()
+        return [name for name in self.files() if name not in applied]
+
+    def instance(self, name: str) -> Migration:
+        migration = load_migration(os.path.join(self.path, f"{name}.py"))
+        return migration(self.db, progress=self.progress) if self.progress else migration(self.db)
+
+    def run(self) -> List[str]:
+        """Aplica as migrações pendentes em um novo lote e retorna os nomes aplicados"""
+        pending = self.pending()
+        if not pending:
+            return []
+        with self.engine.connect() as conn:
+            batch = (conn.execute(select(func.max(migrations_table.c.batch))).scalar() or 0) + 1
+        for name in pending:
+            self.instance(name).up()
+            # Registrada uma a uma: uma falha no meio deixa as anteriores aplicadas
+            with self.engine.begin() as conn:
+                conn.execute(migrations_table.insert().values(migration=name, batch=batch,
+                                                              applied_at=datetime.now()))
+        return pending
+
+    def rollback(self, steps: int = 1) -> List[str]:
+        """Desfaz os últimos `steps` lotes e retorna os nomes desfeitos"""
+        applied = self.applied()
+        batches = sorted({batch for batch, _ in applied.values()}, reverse=True)[:steps]
+        names = sorted((name for name, (batch, _) in applied.items() if batch in batches), reverse=True)
+        for name in names:
+            migration = self.instance(name)
+            migration.down()
+            # Reaplicada depois, a migração refaz os seus backfills do início
+            clear_backfills(migration.engine, type(migration).__name__)
+            with self.engine.begin() as conn:
+                conn.execute(migrations_table.delete().where(migrations_table.c.migration == name))
+        return names
+
+    def status(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Migrações (aplicadas e pendentes) e backfills registrados em cada conexão"""
+        applied = self.applied()
+        migrations = [{'migration': name, 'batch': applied.get(name, (None, None))[0],
+                       'applied_at': applied.get(name, (None, None))[1]} for name in self.files()]
+        found = []
+        for connection in self.db.connections:
+            for backfill in backfills(self.db.engine(connection)):
+                found.append(dict(backfill, connection=connection))
+        return {'migrations': migrations, 'backfills': found}
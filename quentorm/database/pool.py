@@ -0,0 +1,88 @@
+"""
+Pool de conexões instrumentado do QuentORM
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Estatísticas acumuladas de obtenção de conexões de um pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_time_total': self.wait_total,
+                'wait_time_max': self.wait_max,
+                'wait_time_avg': self.wait_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede o tempo de espera por conexões e os timeouts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Versão instrumentada do pool das engines asyncio"""
+
+
+def pool_status(pool: Any) -> Dict[str, Any]:
+    """Retorna a ocupação atual e as estatísticas acumuladas de um pool"""
+    status: Dict[str, Any] = {'pool': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[{'checkedin': 'checked_in', 'checkedout': 'checked_out'}.get(name, name)] = method()
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        status.update(stats.as_dict())
+    return status
@@ -0,0 +1,233 @@
+"""
+Separação de leitura e escrita entre primário e réplicas
+
+SELECTs sem `FOR UPDATE` vão para uma réplica saudável (round-robin ou a
+menos ocupada); escritas, `FOR UPDATE` e qualquer outra instrução vão para o
+primário. Depois de escrever, a sessão fica presa ao primário até o fim da
+transação e, se ela for confirmada, durante a janela `sticky_window` após o
+commit, para ler o que acabou de gravar. Réplicas que falham saem de rotação
+por `replica_retry_after` segundos.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CompoundSelect
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('round_robin', 'least_busy')
+
+# Chaves em Session.info
+_LAST_WRITE = 'quentorm_last_write'
+_WROTE = 'quentorm_wrote'
+_PINNED_REPLICA = 'quentorm_replica'
+
+
+class ReplicaRouter:
+    """Escolhe a engine de cada instrução entre o primário e as réplicas"""
+
+    def __init__(self, primary: Engine, replicas: List[Engine], strategy: str = 'round_robin',
+                 sticky_window: float = 5.0, retry_after: float = 30.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia de leitura inválida: {strategy}. Use uma de: {', '.join(STRATEGIES)}")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.sticky_window = sticky_window
+        self.retry_after = retry_after
+        # Indexado pela engine base: visões com execution_options compartilham a saúde
+        self._down_until: Dict[Engine, float] = {}
+        self._cycle = itertools.count()
+        self._lock = threading.Lock()
+        for replica in self.replicas:
+            event.listen(replica, 'handle_error', self._on_error)
+
+    def with_execution_options(self, **options: Any) -> 'ReplicaRouter':
+        """
+        Visão do roteador com execution_options aplicadas a todas as engines
+
+        Usa os mesmos pools, o mesmo rodízio e o mesmo estado de saúde (ex.:
+        `schema_translate_map` de um tenant).
+        """
+        view = object.__new__(ReplicaRouter)
+        view.__dict__.update(self.__dict__)
+        view.primary = self.primary.execution_options(**options)
+        view.replicas = [replica.execution_options(**options) for replica in self.replicas]
+        return view
+
+    def _on_error(self, context: Any) -> None:
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+    def mark_down(self, replica: Engine) -> None:
+        """Tira a réplica de rotação por `retry_after` segundos"""
+        logger.warning("Réplica %s fora de rotação por %ss", replica.url, self.retry_after)
+        with self._lock:
+            self._down_until[_base(replica)] = time.monotonic() + self.retry_after
+
+    def mark_up(self, replica: Engine) -> None:
+        with self._lock:
+            self._down_until.pop(_base(replica), None)
+
+    def healthy(self) -> List[Engine]:
+        """Réplicas atualmente em rotação"""
+        now = time.monotonic()
+        return [r for r in self.replicas if self._down_until.get(_base(r), 0) <= now]
+
+    def replica(self) -> Engine:
+        """Escolhe uma réplica saudável (ou o primário, se não houver nenhuma)"""
+        healthy = self.healthy()
+        if not healthy:
+            return self.primary
+        if self.strategy == 'least_busy':
+            return min(healthy, key=lambda r: r.pool.checkedout() if hasattr(r.pool, 'checkedout') else 0)
+        return healthy[next(self._cycle) % len(healthy)]
+
+    def check(self) -> Dict[str, bool]:
+        """Testa cada réplica com `SELECT 1` e atualiza a rotação"""
+        status = {}
+        for replica in self.replicas:
+            try:
+                with replica.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+            except Exception:
+                self.mark_down(replica)
+                status[str(replica.url)] = False
+            else:
+                self.mark_up(replica)
+                status[str(replica.url)] = True
+        return status
+
+    def lag(self) -> Dict[str, Optional[float]]:
+        """Atraso de replicação de cada réplica em segundos (None se não for possível medir)"""
+        lags: Dict[str, Optional[float]] = {}
+        for replica in self.replicas:
+            try:
+                lags[str(replica.url)] = replica_lag(replica)
+            except Exception as e:
+                logger.debug("Atraso da réplica %s indisponível: %s", replica.url, e)
+                lags[str(replica.url)] = None
+        return lags
+
+
+# Executadas na réplica; 0 se ela já aplicou tudo o que recebeu (primário ocioso)
+_PG_REPLICA_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+# Executada no primário, quando as réplicas não estão configuradas
+_PG_PRIMARY_LAG = text(
+    "SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication"
+)
+
+
+def replica_lag(engine: Engine) -> Optional[float]:
+    """Atraso de replicação medido na réplica (PostgreSQL e MySQL; None nos demais)"""
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            value = conn.execute(_PG_REPLICA_LAG).scalar()
+            return float(value or 0)
+        if engine.dialect.name in ('mysql', 'mariadb'):
+            row = conn.exec_driver_sql('SHOW REPLICA STATUS').mappings().first()
+            if row is None:
+                return None
+            value = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+            return None if value is None else float(value)
+    return None
+
+
+def primary_lag(engine: Engine) -> Optional[float]:
+    """Maior atraso das réplicas visto pelo primário (só no PostgreSQL)"""
+    if engine.dialect.name != 'postgresql':
+        return None
+    with engine.connect() as conn:
+        return float(conn.execute(_PG_PRIMARY_LAG).scalar() or 0)
+
+
+def _base(engine: Engine) -> Engine:
+    """Engine original de uma engine criada por `execution_options()`"""
+    return getattr(engine, '_proxied', engine)
+
+
+def is_read(clause: Any) -> bool:
+    """Indica se a instrução é um SELECT que pode ir para uma réplica"""
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    return isinstance(clause, CompoundSelect)
+
+
+class RoutingSession(Session):
+    """Sessão que direciona leituras para réplicas e escritas para o primário"""
+
+    def __init__(self, router: Optional[ReplicaRouter] = None, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.router = router
+
+    def sticky(self) -> bool:
+        """
+        Indica se as leituras vão para o primário: a transação atual escreveu,
+        ou a sessão confirmou escritas há menos de `sticky_window` segundos
+        """
+        if self.info.get(_WROTE):
+            return True
+        last_write = self.info.get(_LAST_WRITE)
+        return last_write is not None and time.monotonic() - last_write < self.router.sticky_window
+
+    def read_bind(self, mapper: Any = None) -> Any:
+        """
+        Engine para leituras feitas fora da sessão (relatórios, streaming)
+
+        Uma réplica, ou o primário durante a janela `sticky_window`; ao
+        contrário de `get_bind()` sem instrução, não marca uma escrita nem
+        fixa a réplica da transação.
+        """
+        if self.router is None:
+            return super().get_bind(mapper=mapper)
+        return self.router.primary if self.sticky() else self.router.replica()
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Any:
+        if self.router is None or kwargs.get('bind') is not None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if is_read(clause):
+            if self.sticky():
+                return self.router.primary
+            # A réplica fica fixa até o fim da transação para leituras consistentes
+            replica = self.info.get(_PINNED_REPLICA)
+            if replica is None or replica not in self.router.healthy():
+                replica = self.info[_PINNED_REPLICA] = self.router.replica()
+            return replica
+        self.info[_WROTE] = True
+        return self.router.primary
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session: Session, flush_context: Any) -> None:
+    session.info[_WROTE] = True
+
+
+@event.listens_for(RoutingSession, 'after_bulk_update')
+@event.listens_for(RoutingSession, 'after_bulk_delete')
+def _bulk_written(context: Any) -> None:
+    context.session.info[_WROTE] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session: Session) -> None:
+    # A janela de leitura do primário conta a partir do commit: antes dele as réplicas não têm as escritas
+    if session.info.get(_WROTE):
+        session.info[_LAST_WRITE] = time.monotonic()
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _unpin_replica(session: Session, transaction: Any) -> None:
+    if transaction.parent is None:
+        session.info.pop(_PINNED_REPLICA, None)
+        session.info.pop(_WROTE, None)
@@ -0,0 +1,213 @@
+"""
+Seeders do QuentORM
+
+Cada arquivo em `database/seeders/` define uma subclasse de `Seeder` ligada a
+um modelo. `run()` produz lotes de registros (listas de dicionários), que são
+gravados com um INSERT de várias linhas por lote na conexão do seeder:
+
+    from quentorm import Seeder
+    from app.models.cliente import Cliente
+
+    class ClienteSeeder(Seeder):
+        model = Cliente
+
+        def run(self):
+            for inicio in range(0, 100_000, self.batch_size):
+                yield [{'nome': f'Cliente {i}'} for i in range(inicio, inicio + self.batch_size)]
+
+Um lote também pode ser `(OutroModelo, registros)`. O `SeederRunner` monta o
+grafo de dependências pelas chaves estrangeiras dos modelos (e por
+`depends_on`) e executa em paralelo, cada um em sua conexão e transação, os
+seeders cujas dependências já terminaram.
+"""
+
+import importlib.util
+import inspect
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Type
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger('quentorm.seeders')
+
+SEEDERS_PATH = os.path.join('database', 'seeders')
+
+
+class Seeder:
+    """Base dos seeders"""
+
+    # Modelo preenchido pelo seeder (define a conexão e as dependências)
+    model: Any = None
+
+    # Seeders (classes ou nomes) que devem terminar antes, além dos deduzidos das chaves estrangeiras
+    depends_on: Sequence[Any] = ()
+
+    # Conexão usada quando o seeder não tem modelo
+    connection = 'default'
+
+    # Tamanho sugerido dos lotes produzidos por run()
+    batch_size = 1000
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.rows = 0
+
+    @classmethod
+    def connection_name(cls) -> str:
+        return getattr(cls.model, '__connection__', None) or cls.connection
+
+    def insert(self, model: Any, rows: Sequence[Dict[str, Any]]) -> int:
+        """Grava um lote com um INSERT de várias linhas e retorna o número de linhas"""
+        rows = list(rows)
+        if rows:
+            self.conn.execute(insert(model.__table__), rows)
+            self.rows += len(rows)
+        return len(rows)
+
+    def run(self) -> Optional[Iterable[Any]]:
+        """Produz os lotes (ou grava diretamente por `self.insert`/`self.conn`)"""
+        raise NotImplementedError
+
+    def seed(self) -> int:
+        """Executa `run()` gravando cada lote produzido; retorna as linhas gravadas"""
+        batches = self.run()
+        for batch in batches or ():
+            model, rows = batch if isinstance(batch, tuple) else (self.model, batch)
+            if model is None:
+                raise ValueError(f"{type(self).__name__} produziu um lote sem modelo")
+            self.insert(model, rows)
+        return self.rows
+
+
+@dataclass
+class SeederResult:
+    """Resultado de um seeder executado"""
+
+    name: str
+    rows: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def load_seeders(path: str = SEEDERS_PATH) -> List[Type[Seeder]]:
+    """Importa os arquivos de seeders do diretório e retorna as subclasses de `Seeder`"""
+    found: List[Type[Seeder]] = []
+    if not os.path.isdir(path):
+        return found
+    for filename in sorted(os.listdir(path)):
+        if not filename.endswith('.py') or filename.startswith('_'):
+            continue
+        name = os.path.splitext(filename)[0]
+        spec = importlib.util.spec_from_file_location(f"quentorm_seeder_{name}", os.path.join(path, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        found.extend(value for value in vars(module).values()
+                     if inspect.isclass(value) and issubclass(value, Seeder) and value is not Seeder
+                     and value.__module__ == module.__name__)
+    return found
+
+
+def dependencies(seeders: Sequence[Type[Seeder]]) -> Dict[Type[Seeder], Set[Type[Seeder]]]:
+    """Seeders de que cada seeder depende: os das tabelas referenciadas por chave estrangeira e `depends_on`"""
+    by_table: Dict[Any, List[Type[Seeder]]] = {}
+    by_name = {seeder.__name__: seeder for seeder in seeders}
+    for seeder in seeders:
+        if seeder.model is not None:
+            by_table.setdefault(seeder.model.__table__, []).append(seeder)
+    graph: Dict[Type[Seeder], Set[Type[Seeder]]] = {}
+    for seeder in seeders:
+        needs: Set[Type[Seeder]] = set()
+        if seeder.model is not None:
+            for fk in seeder.model.__table__.foreign_keys:
+                needs.update(by_table.get(fk.column.table, ()))
+        for dependency in seeder.depends_on:
+            if isinstance(dependency, str):
+                if dependency not in by_name:
+                    raise ValueError(f"{seeder.__name__} depende de {dependency}, que não foi encontrado")
+                dependency = by_name[dependency]
+            needs.add(dependency)
+        needs.discard(seeder)
+        graph[seeder] = needs & set(seeders)
+    return graph
+
+
+def execution_order(graph: Dict[Type[Seeder], Set[Type[Seeder]]]) -> List[List[Type[Seeder]]]:
+    """Níveis do grafo (cada nível só depende dos anteriores); erro se houver ciclo"""
+    remaining = {seeder: set(needs) for seeder, needs in graph.items()}
+    levels = []
+    while remaining:
+        ready = sorted((seeder for seeder, needs in remaining.items() if not needs), key=lambda s: s.__name__)
+        if not ready:
+            cycle = ', '.join(sorted(seeder.__name__ for seeder in remaining))
+            raise ValueError(f"Dependência circular entre os seeders: {cycle}")
+        levels.append(ready)
+        for seeder in ready:
+            del remaining[seeder]
+        for needs in remaining.values():
+            needs.difference_update(ready)
+    return levels
+
+
+class SeederRunner:
+    """Executa seeders respeitando as dependências, em paralelo quando possível"""
+
+    def __init__(self, db: Any, seeders: Sequence[Type[Seeder]], workers: int = 4,
+                 on_done: Optional[Callable[[SeederResult], None]] = None):
+        self.db = db
+        self.seeders = list(seeders)
+        self.graph = dependencies(self.seeders)
+        execution_order(self.graph)
+        self.workers = workers
+        self.on_done = on_done
+
+    def run_one(self, seeder: Type[Seeder]) -> SeederResult:
+        began = time.perf_counter()
+        with self.db.engine(seeder.connection_name()).begin() as conn:
+            rows = seeder(conn).seed()
+        result = SeederResult(seeder.__name__, rows, time.perf_counter() - began)
+        logger.info("Seeder %s: %s linhas em %.2fs", result.name, result.rows, result.seconds)
+        return result
+
+    def _workers(self) -> int:
+        # O SQLite aceita um escritor por vez: em paralelo, os seeders só disputariam o lock
+        if any(self.db.engine(seeder.connection_name()).dialect.name == 'sqlite' for seeder in self.seeders):
+            return 1
+        return max(1, self.workers)
+
+    def run(self) -> List[SeederResult]:
+        """Executa todos os seeders e retorna os resultados na ordem de término"""
+        results: List[SeederResult] = []
+        pending = {seeder: set(needs) for seeder, needs in self.graph.items()}
+        running: Dict[Future, Type[Seeder]] = {}
+        workers = self._workers()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quentorm-seeder') as pool:
+            while pending or running:
+                ready = sorted((s for s, needs in pending.items() if not needs), key=lambda s: s.__name__)
+                # Só entram no pool os que têm uma thread livre: nenhum fica na fila para depois de uma falha
+                for seeder in ready[:workers - len(running)]:
+                    del pending[seeder]
+                    running[pool.submit(self.run_one, seeder)] = seeder
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    seeder = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        # Os que já estão em execução terminam; nenhum outro é iniciado
+                        pending.clear()
+                        wait(running)
+                        raise
+                    results.append(result)
+                    if self.on_done is not None:
+                        self.on_done(result)
+                    for needs in pending.values():
+                        needs.discard(seeder)
+        return results
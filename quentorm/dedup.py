@@ -0,0 +1,231 @@
+"""
+Detecção de duplicados antes de importar registros
+
+Antes de gravar uma planilha de clientes, as linhas são separadas pela chave
+normalizada (o CPF/CNPJ só com dígitos, por padrão) em novas, já
+cadastradas, repetidas no próprio arquivo e sem chave válida:
+
+    from quentorm.dedup import deduplicate
+
+    grupos = deduplicate(linhas, Cliente, 'cpf_cnpj', key='cpf')
+    for chave, linha in grupos.new:
+        ...                                   # grava só as novas
+    grupos.summary()
+    # {'new': 9120, 'existing': 850, 'duplicates': 27, 'invalid': 3}
+
+As chaves já gravadas são lidas em uma consulta por streaming, só a coluna da
+chave, e guardadas em um `set` (como inteiros, quando só têm dígitos). Em
+tabelas muito grandes (`BLOOM_THRESHOLD` linhas ou mais, ou `bloom=True`) elas
+vão para um `BloomFilter` de poucos MB: uma chave ausente do filtro é nova com
+certeza, e as poucas que o filtro indica como presentes são confirmadas numa
+segunda leitura da coluna, normalizada da mesma forma. As chaves são lidas do
+primário, mesmo com réplicas: uma réplica atrasada não teria os cadastros
+recentes. As repetições dentro do arquivo são
+detectadas por um `set` das chaves já vistas; a primeira ocorrência segue
+para as novas (ou já cadastradas) e as seguintes são duplicadas.
+"""
+
+import hashlib
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+
+from .utils.reading import connect, stream
+
+# Linhas na tabela a partir das quais as chaves existentes vão para um filtro de Bloom
+BLOOM_THRESHOLD = 5_000_000
+
+# Taxa de falsos positivos do filtro de Bloom
+BLOOM_ERROR_RATE = 0.001
+
+# Chaves lidas por lote
+FETCH_BATCH = 50_000
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_document(value: Any) -> Optional[str]:
+    """
+    CPF ou CNPJ só com dígitos, com os zeros à esquerda perdidos por
+    planilhas restaurados (11 dígitos para CPF, 14 para CNPJ); None se vazio
+    ou com mais de 14 dígitos
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if value != value:
+            return None
+        value = int(value)
+    digits = _NON_DIGITS.sub('', str(value))
+    if not digits or len(digits) > 14:
+        return None
+    return digits.zfill(11 if len(digits) <= 11 else 14)
+
+
+def _compact(key: str) -> Any:
+    """A chave como inteiro quando só tem dígitos (o '1' à frente preserva os zeros à esquerda)"""
+    return int('1' + key) if key.isdigit() and len(key) < 19 else key
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom para textos
+
+    `chave in filtro` é False com certeza para chaves nunca adicionadas e
+    True para as adicionadas; chaves não adicionadas dão True com
+    probabilidade de cerca de `error_rate` (até `capacity` chaves).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate deve estar entre 0 e 1")
+        capacity = max(1, capacity)
+        self.size = max(64, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterator[int]:
+        # Dupla dispersão: k posições a partir de dois hashes de 64 bits de um só digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, key: str) -> None:
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+@dataclass
+class DedupResult:
+    """Linhas de uma importação, como pares (chave normalizada, linha), separadas antes de gravar"""
+
+    new: List[Tuple[str, Any]] = field(default_factory=list)
+    existing: List[Tuple[str, Any]] = field(default_factory=list)
+    duplicates: List[Tuple[str, Any]] = field(default_factory=list)
+    invalid: List[Tuple[Optional[str], Any]] = field(default_factory=list)
+    # Falsos positivos do filtro de Bloom descartados pela confirmação no banco
+    false_positives: int = 0
+
+    def summary(self) -> Dict[str, int]:
+        return {'new': len(self.new), 'existing': len(self.existing), 'duplicates': len(self.duplicates),
+                'invalid': len(self.invalid)}
+
+
+def _column(model: Any, column: str) -> Any:
+    return model.__table__.c[column]
+
+
+def _stream_keys(conn: Connection, column: Any, normalize: Callable[[Any], Optional[str]],
+                 batch_size: int) -> Iterator[str]:
+    for values in stream(conn, select(column).where(column.isnot(None)), batch_size, scalars=True):
+        for value in values:
+            key = normalize(value)
+            if key is not None:
+                yield key
+
+
+def existing_keys(conn: Connection, column: Any, normalize: Callable[[Any], Optional[str]] = normalize_document,
+                  batch_size: int = FETCH_BATCH) -> Set[Any]:
+    """As chaves normalizadas da coluna em um `set` (inteiros para chaves só com dígitos)"""
+    return {_compact(key) for key in _stream_keys(conn, column, normalize, batch_size)}
+
+
+def existing_bloom(conn: Connection, column: Any, normalize: Callable[[Any], Optional[str]] = normalize_document,
+                   capacity: Optional[int] = None, error_rate: float = BLOOM_ERROR_RATE,
+                   batch_size: int = FETCH_BATCH) -> BloomFilter:
+    """As chaves normalizadas da coluna em um filtro de Bloom dimensionado pelo número de linhas"""
+    if capacity is None:
+        capacity = conn.execute(select(func.count()).select_from(column.table)).scalar() or 0
+    # Margem para as linhas gravadas enquanto as chaves são lidas
+    bloom = BloomFilter(int(capacity * 1.1) + 1000, error_rate)
+    for key in _stream_keys(conn, column, normalize, batch_size):
+        bloom.add(key)
+    return bloom
+
+
+def confirm_keys(conn: Connection, column: Any, keys: Iterable[str],
+                 normalize: Callable[[Any], Optional[str]] = normalize_document,
+                 batch_size: int = FETCH_BATCH) -> Set[str]:
+    """
+    As chaves de `keys` que existem de fato na coluna
+
+    A coluna é lida de novo e cada valor normalizado, como em
+    `existing_keys`: a chave é encontrada em qualquer formato gravado.
+    """
+    wanted = set(keys)
+    found: Set[str] = set()
+    for key in _stream_keys(conn, column, normalize, batch_size):
+        if key in wanted:
+            found.add(key)
+    return found
+
+
+def deduplicate(rows: Iterable[Any], model: Any, column: str, key: Union[str, Callable[[Any], Any], None] = None,
+                normalize: Callable[[Any], Optional[str]] = normalize_document, bloom: Optional[bool] = None,
+                conn: Optional[Connection] = None, batch_size: int = FETCH_BATCH) -> DedupResult:
+    """
+    Separa `rows` em novas, já cadastradas em `model.column`, duplicadas no
+    próprio arquivo e sem chave válida, sem gravar nada
+
+    `key` é o campo da linha (padrão: `column`) ou uma função que extrai o
+    valor; as linhas podem ser dicionários ou objetos. Com `bloom=None` o
+    filtro de Bloom é usado a partir de `BLOOM_THRESHOLD` linhas na tabela.
+    """
+    field_name = column if key is None else key
+    extract = field_name if callable(field_name) else (
+        lambda row: row.get(field_name) if isinstance(row, dict) else getattr(row, field_name, None))
+    target = _column(model, column)
+    result = DedupResult()
+    # Do primário: numa réplica atrasada um cadastro recente passaria por novo
+    with connect(model, conn, primary=True) as conn:
+        total = None
+        if bloom is None:
+            total = conn.execute(select(func.count()).select_from(target.table)).scalar() or 0
+            bloom = total >= BLOOM_THRESHOLD
+        stored: Any = (existing_bloom(conn, target, normalize, total, batch_size=batch_size) if bloom
+                       else existing_keys(conn, target, normalize, batch_size))
+
+        seen: Set[Any] = set()
+        # Linhas novas ou já cadastradas, na ordem do arquivo; no filtro de Bloom, "talvez" até a confirmação
+        first: List[Tuple[str, Any, Optional[bool]]] = []
+        for row in rows:
+            normalized = normalize(extract(row))
+            if normalized is None:
+                result.invalid.append((None, row))
+                continue
+            compact = _compact(normalized)
+            if compact in seen:
+                result.duplicates.append((normalized, row))
+                continue
+            seen.add(compact)
+            if bloom:
+                first.append((normalized, row, None if normalized in stored else False))
+            else:
+                first.append((normalized, row, compact in stored))
+
+        if bloom:
+            suspects = [normalized for normalized, _, state in first if state is None]
+            confirmed = confirm_keys(conn, target, suspects, normalize, batch_size) if suspects else set()
+            result.false_positives = len(suspects) - len(confirmed)
+            first = [(normalized, row, normalized in confirmed if state is None else state)
+                     for normalized, row, state in first]
+
+    for normalized, row, exists in first:
+        (result.existing if exists else result.new).append((normalized, row))
+    return result
@@ -0,0 +1,271 @@
+"""
+Saldos diários mantidos incrementalmente
+
+Um `Ledger` liga um modelo de lançamentos a uma tabela de saldos por conta e
+dia: cada linha guarda o saldo da conta no fim do dia (acumulado desde o
+primeiro lançamento). Os lançamentos inseridos, alterados ou removidos pela
+sessão atualizam os saldos no mesmo flush, na mesma transação:
+
+    saldos = Ledger(Lancamento, account='conta_bancaria_id', date='data', amount='valor',
+                    kind='tipo', table='tbl_saldos_diarios')
+
+    saldos.balance_at(conta.id, date(2025, 3, 31))   # uma linha lida pela chave primária
+
+Com `kind`, os valores com `credit` ('entrada') somam e os com `debit`
+('saida') subtraem; sem `kind`, o valor já tem sinal. Um lançamento do dia
+atualiza uma linha; um retroativo atualiza também os dias seguintes da conta.
+Escritas que não passam pela sessão (INSERT em massa, SQL direto) não
+atualizam os saldos: `rebuild()` (ou `quentorm ledger:rebuild`) os recalcula.
+
+Transações concorrentes na mesma conta são serializadas antes de tocar nos
+saldos: a linha da conta (a tabela referenciada pela chave estrangeira de
+`account`) é travada com `SELECT ... FOR UPDATE`; sem chave estrangeira, o
+PostgreSQL usa um advisory lock da transação. O dia novo é criado com
+`INSERT ... ON CONFLICT DO NOTHING` (`ON DUPLICATE KEY` no MySQL).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as Date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, Date as DateType, Numeric, Table, case, event, func, inspect, literal, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import NoReferencedTableError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger('quentorm.ledger')
+
+# Ledgers declarados, por nome da tabela de saldos (usados por `ledger:rebuild`)
+ledgers: Dict[str, 'Ledger'] = {}
+
+
+class Ledger:
+    """Saldos diários por conta de um modelo de lançamentos"""
+
+    def __init__(self, model: Any, account: str, date: str, amount: str, kind: Optional[str] = None,
+                 credit: Any = 'entrada', debit: Any = 'saida', table: Optional[str] = None):
+        self.model = model
+        self.account = account
+        self.date = date
+        self.amount = amount
+        self.kind = kind
+        self.credit = credit
+        self.debit = debit
+        entries = model.__table__
+        scale = getattr(entries.c[amount].type, 'scale', None) or 2
+        self.table = Table(
+            table or f"{entries.name}_saldos", entries.metadata,
+            Column('account_id', entries.c[account].type, primary_key=True),
+            Column('data', DateType, primary_key=True),
+            Column('saldo', Numeric(18, scale), nullable=False),
+            schema=entries.schema,
+        )
+        ledgers[self.table.name] = self
+        for field in self.fields:
+            # Carrega o valor antigo ao alterar um registro expirado (necessário para desfazer a sua parte no saldo)
+            event.listen(getattr(model, field), 'set', _keep_history, active_history=True)
+
+    @property
+    def fields(self) -> List[str]:
+        return [self.account, self.date, self.amount] + ([self.kind] if self.kind else [])
+
+    @property
+    def engine(self) -> Engine:
+        return self.model.session().get_bind(mapper=inspect(self.model))
+
+    def signed(self, kind: Any, amount: Any) -> Decimal:
+        """Valor do lançamento com o sinal do tipo"""
+        amount = Decimal(str(amount or 0))
+        if self.kind is None:
+            return amount
+        if kind == self.credit:
+            return amount
+        if kind == self.debit:
+            return -amount
+        return Decimal(0)
+
+    def _signed_column(self) -> Any:
+        column = self.model.__table__.c[self.amount]
+        if self.kind is None:
+            return column
+        kind = self.model.__table__.c[self.kind]
+        return case((kind == self.credit, column), (kind == self.debit, -column), else_=0)
+
+    # Leitura
+
+    def balance_at(self, account_id: Any, day: Date, conn: Optional[Connection] = None,
+                   for_update: bool = False) -> Decimal:
+        """Saldo da conta no fim do dia `day` (0 se não houver lançamentos até lá)"""
+        query = (select(self.table.c.saldo)
+                 .where(self.table.c.account_id == account_id, self.table.c.data <= day)
+                 .order_by(self.table.c.data.desc()).limit(1))
+        if for_update:
+            # Leitura travada: no MySQL (REPEATABLE READ) vê a versão confirmada mais recente
+            query = query.with_for_update()
+        if conn is None:
+            value = self.model.session().execute(query).scalar()
+        else:
+            value = conn.execute(query).scalar()
+        return Decimal(value) if value is not None else Decimal(0)
+
+    # Manutenção incremental
+
+    def deltas(self, session: Session) -> Dict[Tuple[Any, Date], Decimal]:
+        """Variação de saldo por (conta, dia) dos lançamentos do flush"""
+        fields = self.fields
+        changes: Dict[Tuple[Any, Date], Decimal] = {}
+
+        def add(values: Dict[str, Any], sign: int) -> None:
+            if values[self.account] is None or values[self.date] is None:
+                return
+            value = self.signed(values.get(self.kind), values[self.amount]) * sign
+            key = (values[self.account], values[self.date])
+            changes[key] = changes.get(key, Decimal(0)) + value
+
+        for obj in session.new:
+            if isinstance(obj, self.model):
+                add({field: getattr(obj, field) for field in fields}, 1)
+        for obj in session.deleted:
+            if isinstance(obj, self.model):
+                add({field: getattr(obj, field) for field in fields}, -1)
+        for obj in session.dirty:
+            if not isinstance(obj, self.model):
+                continue
+            attrs = inspect(obj).attrs
+            histories = {field: attrs[field].history for field in fields}
+            if not any(history.has_changes() for history in histories.values()):
+                continue
+            old = {field: (h.deleted or h.unchanged or [None])[0] for field, h in histories.items()}
+            new = {field: (h.added or h.unchanged or [None])[0] for field, h in histories.items()}
+            add(old, -1)
+            add(new, 1)
+        return {key: value for key, value in changes.items() if value}
+
+    def _account_row(self) -> Optional[Column]:
+        """Coluna referenciada pela chave estrangeira de `account` (a linha da conta), se houver"""
+        for foreign_key in self.model.__table__.c[self.account].foreign_keys:
+            try:
+                return foreign_key.column
+            except NoReferencedTableError:
+                continue
+        return None
+
+    def lock(self, conn: Connection, account_id: Any) -> None:
+        """Serializa as transações que alteram os saldos da conta até o fim da transação"""
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            # Um escritor por vez no banco inteiro
+            return
+        column = self._account_row()
+        if column is not None:
+            conn.execute(select(column).where(column == account_id).with_for_update())
+        elif dialect == 'postgresql':
+            key = f"{self.table.fullname}:{account_id}"
+            conn.execute(select(func.pg_advisory_xact_lock(func.hashtext(literal(key)))))
+
+    def _insert_day(self, conn: Connection, account_id: Any, day: Date, balance: Decimal) -> None:
+        """Cria o dia com o saldo inicial, sem efeito se ele já existir"""
+        snapshots = self.table
+        values = {'account_id': account_id, 'data': day, 'saldo': balance}
+        dialect = conn.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = (postgresql if dialect == 'postgresql' else sqlite).insert(snapshots).values(**values)
+            conn.execute(insert.on_conflict_do_nothing(index_elements=['account_id', 'data']))
+        elif dialect in ('mysql', 'mariadb'):
+            insert = mysql.insert(snapshots).values(**values)
+            conn.execute(insert.on_duplicate_key_update(saldo=snapshots.c.saldo))
+        elif conn.execute(select(snapshots.c.data).where(
+                snapshots.c.account_id == account_id, snapshots.c.data == day)).first() is None:
+            conn.execute(snapshots.insert().values(**values))
+
+    def apply(self, conn: Connection, changes: Dict[Tuple[Any, Date], Decimal]) -> None:
+        """Aplica as variações: trava a conta, cria o dia se preciso e soma no dia e nos seguintes"""
+        snapshots = self.table
+        locked = set()
+        # Contas em ordem fixa: duas transações travam as mesmas contas na mesma ordem
+        for (account_id, day), delta in sorted(changes.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+            if account_id not in locked:
+                self.lock(conn, account_id)
+                locked.add(account_id)
+            self._insert_day(conn, account_id, day, self.balance_at(account_id, day, conn, for_update=True))
+            conn.execute(snapshots.update()
+                         .where(snapshots.c.account_id == account_id, snapshots.c.data >= day)
+                         .values(saldo=snapshots.c.saldo + delta))
+
+    # Reconstrução
+
+    def accounts(self, conn: Connection) -> List[Any]:
+        column = self.model.__table__.c[self.account]
+        return [row[0] for row in conn.execute(select(column).where(column.isnot(None)).distinct().order_by(column))]
+
+    def rebuild_accounts(self, conn: Connection, account_ids: Sequence[Any]) -> int:
+        """Recalcula os saldos das contas a partir dos lançamentos; retorna as linhas gravadas"""
+        entries = self.model.__table__
+        conn.execute(self.table.delete().where(self.table.c.account_id.in_(account_ids)))
+        rows = conn.execute(
+            select(entries.c[self.account], entries.c[self.date], func.sum(self._signed_column()))
+            .where(entries.c[self.account].in_(account_ids), entries.c[self.date].isnot(None))
+            .group_by(entries.c[self.account], entries.c[self.date])
+            .order_by(entries.c[self.account], entries.c[self.date])
+        ).all()
+        snapshots: List[Dict[str, Any]] = []
+        balance, current = Decimal(0), object()
+        for account_id, day, total in rows:
+            if account_id != current:
+                balance, current = Decimal(0), account_id
+            balance += Decimal(str(total or 0))
+            snapshots.append({'account_id': account_id, 'data': day, 'saldo': balance})
+        if snapshots:
+            conn.execute(self.table.insert(), snapshots)
+        return len(snapshots)
+
+    def rebuild(self, engine: Optional[Engine] = None, accounts: Optional[Iterable[Any]] = None,
+                batch_size: int = 100, workers: int = 4) -> int:
+        """
+        Recalcula os saldos de todas as contas (ou das indicadas) em lotes de
+        `batch_size` contas, cada lote em sua transação, `workers` em paralelo
+        """
+        engine = engine or self.engine
+        self.table.create(engine, checkfirst=True)
+        if accounts is None:
+            with engine.connect() as conn:
+                accounts = self.accounts(conn)
+        accounts = list(accounts)
+        batches = [accounts[start:start + batch_size] for start in range(0, len(accounts), batch_size)]
+
+        def run(batch: List[Any]) -> int:
+            with engine.begin() as conn:
+                return self.rebuild_accounts(conn, batch)
+
+        # O SQLite aceita um escritor por vez
+        workers = 1 if engine.dialect.name == 'sqlite' else max(1, workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quentorm-ledger') as pool:
+            total = sum(pool.map(run, batches))
+        logger.info("Saldos de %s recalculados: %s contas, %s dias", self.table.name, len(accounts), total)
+        return total
+
+
+def _keep_history(target: Any, value: Any, oldvalue: Any, initiator: Any) -> Any:
+    return value
+
+
+@event.listens_for(Session, 'before_flush')
+def _before_flush(session: Session, flush_context: Any, instances: Any) -> None:
+    """Carrega os campos dos lançamentos removidos enquanto as linhas ainda existem"""
+    for ledger in ledgers.values():
+        for obj in session.deleted:
+            if isinstance(obj, ledger.model):
+                for field in ledger.fields:
+                    getattr(obj, field)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session: Session, flush_context: Any) -> None:
+    """Atualiza os saldos com os lançamentos do flush, na transação da sessão"""
+    for ledger in ledgers.values():
+        changes = ledger.deltas(session)
+        if changes:
+            ledger.apply(session.connection(bind_arguments={'mapper': inspect(ledger.model)}), changes)
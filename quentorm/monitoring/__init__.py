@@ -0,0 +1,46 @@
+"""
+Módulo de monitoramento de consultas do QuentORM
+"""
+
+from .advisor import Advice, advise, observed_fingerprints, write_migration
+from .decorators import log_query
+from .explain import Explainer, full_scans
+from .fingerprint import fingerprint, normalize
+from .instrument import QueryRecord, collect, configure_query_log, get_query_log, instrument
+from .metrics import (aggregate, collect_metrics, enable_multiprocess, register_database, render_prometheus,
+                      reset_metrics)
+from .profile import QueryProfile, profile
+from .querylog import SlowQueryLog, redact
+from .stats import BUCKETS, QueryStats, query_stats, reset_query_stats, stats_for
+
+__all__ = [
+    'Advice',
+    'advise',
+    'observed_fingerprints',
+    'write_migration',
+    'log_query',
+    'Explainer',
+    'full_scans',
+    'QueryRecord',
+    'collect',
+    'fingerprint',
+    'normalize',
+    'instrument',
+    'aggregate',
+    'collect_metrics',
+    'enable_multiprocess',
+    'register_database',
+    'render_prometheus',
+    'reset_metrics',
+    'configure_query_log',
+    'get_query_log',
+    'QueryProfile',
+    'profile',
+    'SlowQueryLog',
+    'redact',
+    'BUCKETS',
+    'QueryStats',
+    'query_stats',
+    'reset_query_stats',
+    'stats_for'
+]
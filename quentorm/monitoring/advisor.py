@@ -0,0 +1,458 @@
+"""
+Recomendação de índices a partir das consultas observadas
+
+Os fingerprints coletados pela instrumentação dizem quais colunas aparecem
+nos filtros (`WHERE`, `JOIN ... ON`) e nas ordenações de cada tabela e
+quanto tempo cada consulta custou. `advise()` compara essas colunas com os
+índices declarados nos modelos e com os índices existentes no banco:
+
+- `missing`: nenhum índice começa por uma coluna filtrada; a sugestão põe as
+  colunas de igualdade primeiro, depois uma de intervalo ou as de ordenação
+- `redundant`: índice cujas colunas são o início de outro índice da tabela
+  (o maior atende às mesmas consultas e cada escrita paga pelos dois)
+- `pending`: índice declarado no modelo que não existe no banco
+
+O impacto estimado de um índice ausente é o tempo total gasto pelas consultas
+que ele atenderia; o de um redundante, a quantidade de escritas na tabela.
+
+    from quentorm.monitoring import advise, observed_fingerprints
+
+    for advice in advise(observed_fingerprints(), engines={'default': db.engine()}):
+        print(advice.statement, advice.reason)
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect
+
+from ..utils.indexes import PARTIAL_DIALECTS
+from .stats import main_table
+
+# Fim da cláusula WHERE no SQL normalizado
+_CLAUSE_END = re.compile(r"\b(?:group by|order by|having|limit|offset|for update|for share|returning|union)\b")
+# Tabelas do FROM/JOIN/UPDATE/DELETE e seus apelidos
+_TABLES = re.compile(r"\b(?:from|join|update|delete from)\s+([\w.\"`]+)(?:\s+as\s+([\w\"`]+)|\s+(?!(?:where|join|on|set|inner|left|right|full|cross|order|group|limit|as)\b)([a-z_][\w]*))?")
+# Condições do ON de cada JOIN
+_JOIN_ON = re.compile(r"\bjoin\s+[\w.\"`]+(?:\s+(?:as\s+)?[\w\"`]+)?\s+on\s+(.*?)(?=\b(?:left |right |inner |full |cross )?join\b|\bwhere\b|$)")
+_COLUMN = r"((?:[\w\"`]+\.)?[\w\"`]+)"
+# coluna <op> valor e valor <op> coluna
+_EQUALITY = re.compile(_COLUMN + r" (?:=|in \(|is (?:not )?null)")
+_EQUALITY_REVERSED = re.compile(r"\? = " + _COLUMN)
+_RANGE = re.compile(_COLUMN + r" (?:<|>|<=|>=|between|like) ")
+_ORDER_BY = re.compile(r"\border by (.*?)(?=\blimit\b|\boffset\b|\bfor update\b|$)")
+_WRITE = re.compile(r"^(?:insert into|update|delete from)\b")
+
+# Palavras que o regex de colunas pode capturar mas não são colunas
+_KEYWORDS = {'and', 'or', 'not', 'where', 'on', 'set', 'select', 'exists', 'case', 'when', 'then', 'else'}
+
+
+def _unquote(name: str) -> str:
+    return name.replace('"', '').replace('`', '')
+
+
+class Advice:
+    """Uma recomendação de índice"""
+
+    __slots__ = ('kind', 'connection', 'table', 'columns', 'name', 'impact', 'count', 'fingerprints', 'reason',
+                 'options')
+
+    def __init__(self, kind: str, connection: str, table: str, columns: Sequence[str], name: str,
+                 impact: float = 0.0, count: int = 0, fingerprints: Optional[List[str]] = None,
+                 reason: str = '', options: Optional[Dict[str, Any]] = None):
+        self.kind = kind
+        self.connection = connection
+        self.table = table
+        self.columns = tuple(columns)
+        self.name = name
+        self.impact = impact
+        self.count = count
+        self.fingerprints = fingerprints or []
+        self.reason = reason
+        # unique, where, include e using do índice, como em `__indexes__`
+        self.options = options or {}
+
+    @property
+    def statement(self) -> str:
+        if self.kind == 'redundant':
+            return f"DROP INDEX {self.name}"
+        options = self.options
+        statement = f"CREATE {'UNIQUE ' if options.get('unique') else ''}INDEX {self.name} ON {self.table}"
+        if options.get('using'):
+            statement += f" USING {options['using']}"
+        statement += f" ({', '.join(self.columns)})"
+        if options.get('include'):
+            statement += f" INCLUDE ({', '.join(options['include'])})"
+        if options.get('where'):
+            statement += f" WHERE {options['where']}"
+        return statement
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"<Advice({self.kind}, {self.table}({', '.join(self.columns)}), {self.impact:.3f})>"
+
+
+def index_name(table: str, columns: Sequence[str]) -> str:
+    return f"ix_{table.rsplit('.', 1)[-1]}_{'_'.join(columns)}"
+
+
+def predicates(sql: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Colunas filtradas e ordenadas de um SQL normalizado, por tabela:
+    {'tabela': {'eq': [...], 'range': [...], 'order': [...], 'join': [...]}}
+
+    Condições com OR não geram sugestões (um índice composto não as atende).
+    """
+    aliases: Dict[str, str] = {}
+    for match in _TABLES.finditer(sql):
+        table = _unquote(match.group(1))
+        aliases[table] = table
+        aliases[table.rsplit('.', 1)[-1]] = table
+        alias = match.group(2) or match.group(3)
+        if alias:
+            aliases[_unquote(alias)] = table
+    if not aliases:
+        return {}
+    default = _unquote(main_table(sql) or next(iter(aliases.values())))
+    result: Dict[str, Dict[str, List[str]]] = {}
+
+    def add(kind: str, reference: str) -> None:
+        reference = _unquote(reference)
+        if '.' in reference:
+            qualifier, column = reference.rsplit('.', 1)
+            table = aliases.get(qualifier)
+        else:
+            column, table = reference, default if len(set(aliases.values())) == 1 else None
+        if table is None or column in _KEYWORDS:
+            return
+        columns = result.setdefault(table, {'eq': [], 'range': [], 'order': [], 'join': []})[kind]
+        if column not in columns:
+            columns.append(column)
+
+    where = sql.split(' where ', 1)[1] if ' where ' in sql else ''
+    where = _CLAUSE_END.split(where, 1)[0]
+    if where and ' or ' not in where and ' select ' not in where:
+        for reference in _EQUALITY.findall(where) + _EQUALITY_REVERSED.findall(where):
+            add('eq', reference)
+        for reference in _RANGE.findall(where):
+            add('range', reference)
+    for condition in _JOIN_ON.findall(sql):
+        # Em "a.x = b.y" os dois lados servem de igualdade para as respectivas tabelas
+        for left, right in re.findall(_COLUMN + r" = " + _COLUMN, condition):
+            add('join', left)
+            add('join', right)
+    order = _ORDER_BY.search(sql)
+    if order:
+        for item in order.group(1).split(','):
+            reference = item.strip().split(' ')[0]
+            if reference and reference != '?':
+                add('order', reference)
+    return result
+
+
+def candidate(columns: Dict[str, List[str]]) -> Tuple[str, ...]:
+    """Índice composto sugerido: igualdades (do WHERE ou, sem elas, do JOIN), depois um intervalo ou a ordenação"""
+    eq = list(columns['eq'] or columns['join'])
+    rest = [c for c in columns['range'] if c not in eq][:1] or [c for c in columns['order'] if c not in eq]
+    return tuple(eq + rest) if eq else tuple(rest[:1])
+
+
+def index_options(unique: Any, dialect_options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Opções de um índice como em `__indexes__` (unique, where, include, using),
+    a partir das opções por dialeto do SQLAlchemy ou da reflexão
+    """
+    options: Dict[str, Any] = {'unique': True} if unique else {}
+    for key, value in dialect_options.items():
+        option = key.rsplit('_', 1)[-1]
+        if option not in ('where', 'include', 'using') or value is None or option in options:
+            continue
+        if option == 'include':
+            if value:
+                options['include'] = [getattr(column, 'name', column) for column in value]
+        elif option == 'using':
+            if str(value).lower() != 'btree':
+                options['using'] = str(value).lower()
+        else:
+            options['where'] = str(value)
+    return options
+
+
+def _special(options: Dict[str, Any]) -> bool:
+    """Índice parcial (where) ou de cobertura (include)"""
+    return bool(options.get('where') or options.get('include'))
+
+
+# (nome, colunas, protegido, opções)
+IndexEntry = Tuple[str, Tuple[str, ...], bool, Dict[str, Any]]
+
+_UNIQUE = {'unique': True}
+
+
+def _entry(name: str, columns: Tuple[str, ...], options: Dict[str, Any]) -> IndexEntry:
+    return name, columns, bool(options.get('unique')) or _special(options), options
+
+
+def model_indexes() -> Dict[str, List[IndexEntry]]:
+    """
+    Índices declarados nos modelos: tabela -> [(nome, colunas, protegido,
+    opções)], com a chave primária. Protegidos (nunca redundantes) são os
+    únicos, parciais e de cobertura.
+    """
+    from ..utils.models import BaseModel
+    tables: Dict[str, List[IndexEntry]] = {}
+    for table in BaseModel.metadata.tables.values():
+        indexes = tables.setdefault(table.name, [])
+        if table.primary_key.columns:
+            indexes.append(_entry('primary', tuple(c.name for c in table.primary_key.columns), _UNIQUE))
+        for index in table.indexes:
+            indexes.append(_entry(index.name or index_name(table.name, [c.name for c in index.columns]),
+                                  tuple(c.name for c in index.columns), index_options(index.unique, index.kwargs)))
+        for constraint in table.constraints:
+            if type(constraint).__name__ == 'UniqueConstraint':
+                indexes.append(_entry(constraint.name or index_name(table.name, [c.name for c in constraint.columns]),
+                                      tuple(c.name for c in constraint.columns), _UNIQUE))
+    return tables
+
+
+def database_indexes(engine: Any, tables: Iterable[str]) -> Dict[str, List[IndexEntry]]:
+    """Índices existentes no banco (reflexão), para as tabelas informadas que existem"""
+    inspector = inspect(engine)
+    existing: Dict[str, List[IndexEntry]] = {}
+    for qualified in set(tables):
+        schema, _, table = qualified.rpartition('.')
+        if not inspector.has_table(table, schema=schema or None):
+            continue
+        indexes = existing.setdefault(qualified, [])
+        pk = inspector.get_pk_constraint(table, schema=schema or None)
+        if pk and pk.get('constrained_columns'):
+            indexes.append(_entry('primary', tuple(pk['constrained_columns']), _UNIQUE))
+        for index in inspector.get_indexes(table, schema=schema or None):
+            columns = tuple(c for c in index['column_names'] if c)
+            if columns:
+                indexes.append(_entry(index['name'], columns,
+                                      index_options(index.get('unique'), index.get('dialect_options', {}))))
+        for unique in inspector.get_unique_constraints(table, schema=schema or None):
+            indexes.append(_entry(unique['name'], tuple(unique['column_names']), _UNIQUE))
+    return existing
+
+
+def _usable(columns: Tuple[str, ...], wanted: Dict[str, List[str]], indexes: List[Any]) -> bool:
+    """Algum índice começa por uma coluna filtrada (ou pela primeira coluna da sugestão)?"""
+    leading = set(wanted['eq'] or wanted['join']) or set(columns[:1])
+    return any(index[1] and index[1][0] in leading for index in indexes)
+
+
+def redundant(indexes: List[Any]) -> List[Tuple[str, Tuple[str, ...], str]]:
+    """
+    Índices não protegidos cujas colunas são o início de outro índice: [(nome,
+    colunas, coberto por)]
+
+    `indexes`: (nome, colunas, protegido[, opções]). Um índice parcial ou de
+    cobertura não cobre outro (não atende às mesmas linhas ou consultas), nem
+    um de outro método (`using`); sem as opções, nenhum índice protegido
+    cobre outro.
+    """
+    found = []
+    for entry in indexes:
+        name, columns, protected = entry[:3]
+        if protected or name == 'primary':
+            continue
+        using = _options(entry).get('using')
+        for other_entry in indexes:
+            other, other_columns, other_protected = other_entry[:3]
+            other_options = _options(other_entry)
+            if other_protected and (len(other_entry) < 4 or _special(other_options)):
+                continue
+            if other_options.get('using') != using:
+                continue
+            if other != name and len(other_columns) >= len(columns) and other_columns[:len(columns)] == columns \
+                    and (len(other_columns) > len(columns) or other < name):
+                found.append((name, columns, other))
+                break
+    return found
+
+
+def _options(entry: Any) -> Dict[str, Any]:
+    return entry[3] if len(entry) > 3 else {}
+
+
+def advise(fingerprints: Iterable[Dict[str, Any]], engines: Optional[Dict[str, Any]] = None,
+           min_count: int = 1) -> List[Advice]:
+    """
+    Recomendações de índices, do maior para o menor impacto
+
+    `fingerprints`: dicionários com `connection`, `id`, `sql`, `count` e
+    `total` (como os de `observed_fingerprints()`). `engines`: conexão ->
+    engine para comparar com os índices reais do banco; sem engine, só os
+    índices declarados nos modelos são considerados.
+    """
+    engines = engines or {}
+    declared = model_indexes()
+    wanted: Dict[Tuple[str, str, Tuple[str, ...]], Advice] = {}
+    writes: Dict[Tuple[str, str], int] = {}
+    filters: Dict[Tuple[str, str, Tuple[str, ...]], Dict[str, List[str]]] = {}
+    for entry in fingerprints:
+        sql, connection = entry['sql'], entry.get('connection', 'default')
+        if entry.get('count', 0) < min_count:
+            continue
+        if _WRITE.match(sql):
+            table = main_table(sql)
+            if table:
+                key = (connection, _unquote(table))
+                writes[key] = writes.get(key, 0) + entry.get('count', 0)
+            if sql.startswith('insert'):
+                continue
+        for table, columns in predicates(sql).items():
+            index = candidate(columns)
+            if not index:
+                continue
+            key = (connection, table, index)
+            advice = wanted.get(key)
+            if advice is None:
+                advice = wanted[key] = Advice('missing', connection, table, index, index_name(table, index))
+                filters[key] = columns
+            advice.impact += entry.get('total', 0.0)
+            advice.count += entry.get('count', 0)
+            advice.fingerprints.append(entry.get('id', ''))
+
+    # Uma sugestão que é o início de outra é atendida por ela
+    for key, advice in sorted(wanted.items(), key=lambda item: len(item[0][2])):
+        for other_key, other in wanted.items():
+            if other is not advice and other_key[:2] == key[:2] and len(other.columns) > len(advice.columns) \
+                    and other.columns[:len(advice.columns)] == advice.columns and advice.count:
+                other.impact += advice.impact
+                other.count += advice.count
+                other.fingerprints += advice.fingerprints
+                advice.count = 0
+                break
+
+    reflected: Dict[str, Dict[str, List[IndexEntry]]] = {}
+    for connection, engine in engines.items():
+        tables = {key[1] for key in wanted if key[0] == connection} | {key[1] for key in writes if key[0] == connection}
+        reflected[connection] = database_indexes(engine, tables | set(declared))
+
+    result: List[Advice] = []
+    for key, advice in wanted.items():
+        connection, table, _ = key
+        if not advice.count:
+            continue
+        short = table.rsplit('.', 1)[-1]
+        existing = reflected[connection].get(table) if connection in reflected else declared.get(short)
+        if existing is None and connection in reflected:
+            # Tabela inexistente no banco (ex.: temporária): nada a sugerir
+            continue
+        if _usable(advice.columns, filters[key], existing or []):
+            continue
+        advice.reason = (f"{advice.count} execução(ões), {advice.impact:.3f} s sem índice que comece por "
+                         f"{', '.join(filters[key]['eq'] or filters[key]['join'] or advice.columns[:1])}")
+        result.append(advice)
+
+    sources = reflected if reflected else {None: declared}
+    for connection, indexes_by_table in sources.items():
+        for table, indexes in indexes_by_table.items():
+            options = {entry[0]: entry[3] for entry in indexes}
+            for name, columns, covered_by in redundant(indexes):
+                count = sum(n for (conn, t), n in writes.items()
+                            if t.rsplit('.', 1)[-1] == table.rsplit('.', 1)[-1] and (connection is None or conn == connection))
+                result.append(Advice('redundant', connection or 'default', table, columns, name, float(count), count,
+                                     reason=f"coberto por {covered_by}; {count} escrita(s) na tabela pagam pelos dois",
+                                     options=options[name]))
+
+    for connection, indexes_by_table in reflected.items():
+        dialect = engines[connection].dialect.name
+        for table, indexes in declared.items():
+            if table not in indexes_by_table:
+                continue
+            present = {(columns, _comparable(options, dialect)) for _, columns, _, options in indexes_by_table[table]}
+            for name, columns, _, options in indexes:
+                if options.get('unique') and options.get('where') and dialect not in PARTIAL_DIALECTS:
+                    # Não é criado nesse dialeto (ver quentorm.utils.indexes): não está pendente
+                    continue
+                if (columns, _comparable(options, dialect)) not in present:
+                    result.append(Advice('pending', connection, table, columns, name, options=options,
+                                         reason='declarado no modelo e ausente no banco'))
+
+    order = {'missing': 0, 'pending': 1, 'redundant': 2}
+    return sorted(result, key=lambda advice: (order[advice.kind], -advice.impact, advice.table, advice.columns))
+
+
+def _comparable(options: Dict[str, Any], dialect: str) -> Tuple[Any, ...]:
+    """
+    As opções que o dialeto guarda, para comparar o declarado com o refletido
+    (de `where` só a presença: o banco devolve a expressão reescrita)
+    """
+    return (bool(options.get('unique')),
+            bool(options.get('where')) and dialect in PARTIAL_DIALECTS,
+            tuple(sorted(options.get('include') or ())) if dialect in ('postgresql', 'mssql') else (),
+            options.get('using') if dialect in ('postgresql', 'mysql', 'mariadb') else None)
+
+
+def observed_fingerprints(directory: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Fingerprints observados: do processo corrente ou, com `directory`, do modo multiprocesso"""
+    if directory is None:
+        from .stats import query_stats
+        return [dict(entry, connection=connection)
+                for connection, entries in query_stats().items() for entry in entries]
+    from .metrics import aggregate
+    entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for family in aggregate(directory):
+        for name, labels, value in family.samples:
+            if 'fingerprint' not in labels:
+                continue
+            entry = entries.setdefault((labels['connection'], labels['fingerprint']), {
+                'connection': labels['connection'], 'id': labels['fingerprint'], 'sql': '', 'count': 0, 'total': 0.0})
+            if name == 'quentorm_query_info':
+                entry['sql'] = labels['sql']
+            elif name == 'quentorm_query_duration_seconds_count':
+                entry['count'] = int(value)
+            elif name == 'quentorm_query_duration_seconds_sum':
+                entry['total'] = value
+    return [entry for entry in entries.values() if entry['sql']]
+
+
+def write_migration(advices: Iterable[Advice], directory: str = os.path.join('database', 'migrations'),
+                    drop_redundant: bool = False) -> List[str]:
+    """
+    Gera as migrações com os CREATE INDEX sugeridos, uma por conexão (os
+    DROP INDEX dos redundantes ficam comentados, salvo `drop_redundant`).
+    Retorna os caminhos dos arquivos criados.
+    """
+    by_connection: Dict[str, Tuple[List[str], List[str]]] = {}
+    for advice in advices:
+        up, down = by_connection.setdefault(advice.connection, ([], []))
+        columns = ', '.join(repr(c) for c in advice.columns)
+        options = ''.join(f", {key}={advice.options[key]!r}" for key in ('unique', 'where', 'include', 'using')
+                          if advice.options.get(key))
+        # Tabelas já em uso: construção sem bloquear as escritas
+        create = f"self.create_index({advice.table!r}, [{columns}], name={advice.name!r}{options}, online=True)"
+        drop = f"self.drop_index({advice.name!r}, table={advice.table!r}, online=True)"
+        up.append(f"        # {advice.reason}")
+        if advice.kind == 'redundant':
+            prefix = '' if drop_redundant else '# '
+            up.append(f"        {prefix}{drop}")
+            down.insert(0, f"        {prefix}{create}")
+        else:
+            up.append(f"        {create}")
+            down.insert(0, f"        {drop}")
+    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    paths = []
+    for connection, (up, down) in sorted(by_connection.items()):
+        suffix = '' if connection == 'default' else f"_{connection}"
+        path = os.path.join(directory, f"{timestamp}_add_advised_indexes{suffix}.py")
+        class_name = 'AddAdvisedIndexes' + ''.join(part.capitalize() for part in suffix.split('_'))
+        if all(line.lstrip().startswith('#') for line in down):
+            down.append('        pass')
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("from quentorm import Migration\n\n"
+                    f"class {class_name}(Migration):\n"
+                    f"    connection = {connection!r}\n\n"
+                    "    def up(self):\n" + '\n'.join(up) + "\n\n"
+                    "    def down(self):\n" + '\n'.join(down) + "\n")
+        paths.append(path)
+    return paths
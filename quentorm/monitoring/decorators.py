@@ -0,0 +1,83 @@
+"""
+Decorador `@log_query`
+
+Registra no log da conexão cada instrução executada pela função decorada,
+com o SQL, os parâmetros (mascarados como no log de consultas lentas), o
+tempo e o número de linhas, além de um resumo da chamada. Com `explain: True`
+na configuração de log da conexão, o plano de cada fingerprint também é
+capturado (respeitando `explain_interval`).
+
+    class Product(BaseModel):
+        @classmethod
+        @log_query(level='warning')
+        def get_out_of_stock_products(cls):
+            return cls.where('stock', 0).all()
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from typing import Any, Callable, List, Optional
+
+from .instrument import QueryRecord, collect, get_query_log
+from .querylog import redact
+
+
+def _rows(result: Any) -> Optional[int]:
+    """Número de registros retornados pela função, quando dá para saber"""
+    if isinstance(result, (list, tuple, set, dict)):
+        return len(result)
+    return None if result is None or isinstance(result, (int, float, str, bool)) else 1
+
+
+def _logger(connection: Optional[str]) -> logging.Logger:
+    """Logger da conexão (com a fila do log de consultas lentas, se configurado)"""
+    return logging.getLogger(f"quentorm.queries.{connection}" if connection else 'quentorm.queries')
+
+
+def _report(name: str, level: int, records: List[QueryRecord], result: Any, elapsed: float) -> None:
+    rows = _rows(result)
+    _logger(records[0].connection if records else None).log(
+        level, "%s: %d consulta(s) em %.1f ms%s", name, len(records), elapsed * 1000,
+        f", {rows} registro(s)" if rows is not None else '')
+    for record in records:
+        slow_log = get_query_log(record.connection)
+        params = redact(record.parameters, slow_log.redact if slow_log is not None else False, record.names)
+        rowcount = f" | linhas: {record.rowcount}" if record.rowcount >= 0 else ''
+        _logger(record.connection).log(level, "%s (%.1f ms) [%s] %s | parâmetros: %r%s", name,
+                                       record.elapsed * 1000, record.id,
+                                       ' '.join(record.statement.split()), params, rowcount)
+        if slow_log is not None:
+            slow_log.explain(record.engine, record.id, record.statement, record.parameters)
+
+
+def log_query(func: Optional[Callable] = None, *, level: str = 'info') -> Any:
+    """Registra as consultas executadas pela função: `@log_query` ou `@log_query(level='warning')`"""
+    numeric_level = logging.getLevelName(level.upper())
+    if not isinstance(numeric_level, int):
+        raise ValueError(f"Nível de log inválido: {level}")
+
+    def decorator(f: Callable) -> Callable:
+        name = f.__qualname__
+
+        if asyncio.iscoroutinefunction(f):
+            @functools.wraps(f)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                with collect() as records:
+                    result = await f(*args, **kwargs)
+                _report(name, numeric_level, records, result, time.perf_counter() - started)
+                return result
+            return async_wrapper
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            with collect() as records:
+                result = f(*args, **kwargs)
+            _report(name, numeric_level, records, result, time.perf_counter() - started)
+            return result
+        return wrapper
+
+    return decorator(func) if callable(func) else decorator
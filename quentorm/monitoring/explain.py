@@ -0,0 +1,168 @@
+"""
+Captura automática de planos de execução
+
+Quando uma consulta passa do limite de lentidão (ou é executada dentro de um
+`@log_query`), o plano é obtido com `EXPLAIN` (PostgreSQL e MySQL) ou
+`EXPLAIN QUERY PLAN` (SQLite) em outra conexão do pool, numa thread de fundo,
+no máximo uma vez por fingerprint a cada `explain_interval` segundos. O plano
+fica nas estatísticas do fingerprint e é registrado no log da conexão;
+varreduras completas (full scan) em tabelas grandes são sinalizadas. O próprio
+EXPLAIN roda com a opção `UNINSTRUMENTED` e não entra nas estatísticas, no log
+de consultas lentas nem no `@log_query`.
+"""
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+
+from .stats import stats_for
+
+logger = logging.getLogger(__name__)
+
+# Intervalo padrão entre dois EXPLAIN do mesmo fingerprint (segundos)
+DEFAULT_INTERVAL = 3600
+
+# Estimativa de linhas a partir da qual uma tabela é considerada grande
+DEFAULT_LARGE_TABLE_ROWS = 100000
+
+# execution_option que desliga a instrumentação da conexão (ver `instrument`)
+UNINSTRUMENTED = 'quentorm_uninstrumented'
+
+# Instruções que podem ser explicadas sem efeitos colaterais
+_EXPLAINABLE = re.compile(r"^\s*(select|with|update|delete)\b", re.I)
+
+# SQLite: "SCAN tabela" (ou "SCAN TABLE tabela") sem índice
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)(?:\s+AS\s+\S+)?$", re.I)
+# PostgreSQL: "Seq Scan on tabela [alias] (cost=... rows=N ...)"
+_PG_SCAN = re.compile(r"Seq Scan on (\S+)(?:.*?rows=(\d+))?")
+
+
+def explain_prefix(dialect: str) -> Optional[str]:
+    """Comando EXPLAIN do dialeto (None se não suportado)"""
+    return {
+        'postgresql': 'EXPLAIN',
+        'mysql': 'EXPLAIN',
+        'mariadb': 'EXPLAIN',
+        'sqlite': 'EXPLAIN QUERY PLAN',
+    }.get(dialect)
+
+
+def full_scans(dialect: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Tabelas lidas por inteiro segundo o plano: [{'table': ..., 'rows': estimativa ou None}]"""
+    scans = []
+    if dialect == 'sqlite':
+        for row in rows:
+            match = _SQLITE_SCAN.match(str(row.get('detail', '')))
+            if match:
+                scans.append({'table': match.group(1), 'rows': None})
+    elif dialect == 'postgresql':
+        for row in rows:
+            for match in _PG_SCAN.finditer(str(row.get('QUERY PLAN', ''))):
+                scans.append({'table': match.group(1), 'rows': int(match.group(2)) if match.group(2) else None})
+    elif dialect in ('mysql', 'mariadb'):
+        for row in rows:
+            if str(row.get('type', '')).upper() == 'ALL':
+                scans.append({'table': row.get('table'), 'rows': row.get('rows')})
+    return scans
+
+
+def plan_text(dialect: str, rows: List[Dict[str, Any]]) -> str:
+    """Representação textual do plano para o log"""
+    if dialect == 'postgresql':
+        return '\n'.join(str(row.get('QUERY PLAN', '')) for row in rows)
+    if dialect == 'sqlite':
+        return '\n'.join(str(row.get('detail', '')) for row in rows)
+    return '\n'.join(', '.join(f"{k}={v}" for k, v in row.items() if v is not None) for row in rows)
+
+
+class Explainer:
+    """Obtém, em segundo plano, os planos das consultas lentas de uma conexão"""
+
+    def __init__(self, connection: str, config: Dict[str, Any], logger: logging.Logger):
+        self.connection = connection
+        self.interval = float(config.get('explain_interval', DEFAULT_INTERVAL))
+        self.large_tables = {t.lower() for t in config.get('large_tables', ())}
+        self.large_table_rows = int(config.get('large_table_rows', DEFAULT_LARGE_TABLE_ROWS))
+        self.logger = logger
+        self._last: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _due(self, id: str) -> bool:
+        """Limita a um EXPLAIN por fingerprint a cada `interval` segundos"""
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(id)
+            if last is not None and now - last < self.interval:
+                return False
+            self._last[id] = now
+            return True
+
+    def submit(self, engine: Engine, id: str, statement: str, parameters: Any) -> bool:
+        """Agenda o EXPLAIN de uma instrução; retorna False se ignorada"""
+        if not _EXPLAINABLE.match(statement) or explain_prefix(engine.dialect.name) is None:
+            return False
+        database = engine.url.database
+        if engine.dialect.name == 'sqlite' and database in (None, '', ':memory:'):
+            # Outra conexão de um banco em memória enxergaria outro banco
+            return False
+        if not self._due(id):
+            return False
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quentorm-explain')
+        if isinstance(parameters, list) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+            parameters = parameters[0]
+        self._executor.submit(self._explain, engine, id, statement, parameters)
+        return True
+
+    def is_large(self, scan: Dict[str, Any]) -> bool:
+        table = str(scan['table']).strip('"`').lower()
+        if table in self.large_tables or table.rsplit('.', 1)[-1] in self.large_tables:
+            return True
+        return scan['rows'] is not None and int(scan['rows']) >= self.large_table_rows
+
+    def explain(self, engine: Engine, statement: str, parameters: Any = None) -> Dict[str, Any]:
+        """Executa o EXPLAIN em uma conexão própria e analisa o plano"""
+        dialect = engine.dialect.name
+        sql = f"{explain_prefix(dialect)} {statement}"
+        with engine.connect().execution_options(**{UNINSTRUMENTED: True}) as conn:
+            result = conn.exec_driver_sql(sql, parameters) if parameters else conn.exec_driver_sql(sql)
+            rows = [dict(row) for row in result.mappings()]
+            conn.rollback()
+        scans = full_scans(dialect, rows)
+        return {
+            'plan': plan_text(dialect, rows),
+            'full_scans': scans,
+            'large_full_scans': [scan['table'] for scan in scans if self.is_large(scan)],
+            'captured_at': time.time(),
+        }
+
+    def _explain(self, engine: Engine, id: str, statement: str, parameters: Any) -> None:
+        try:
+            plan = self.explain(engine, statement, parameters)
+        except Exception as e:
+            logger.debug("EXPLAIN falhou para [%s]: %s", id, e)
+            return
+        stats_for(self.connection).set_plan(id, plan)
+        if plan['large_full_scans']:
+            self.logger.warning("Plano [%s] com full scan em tabela grande (%s):\n%s",
+                                id, ', '.join(plan['large_full_scans']), plan['plan'])
+        else:
+            self.logger.info("Plano [%s]:\n%s", id, plan['plan'])
+
+    def after_fork(self) -> None:
+        """No processo filho a thread do executor não existe mais"""
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def close(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,51 @@
+"""
+Impressão digital (fingerprint) de instruções SQL
+
+Normaliza o SQL removendo literais e parâmetros, para que consultas que só
+diferem nos valores sejam agrupadas:
+
+    SELECT * FROM clientes WHERE id = 42
+    SELECT * FROM clientes WHERE id = ?      -> select * from clientes where id = ?
+
+Listas de IN e linhas de VALUES de tamanhos diferentes também são agrupadas.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from typing import Tuple
+
+# Quantidade de instruções distintas mantidas no cache de normalização
+CACHE_SIZE = 4096
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"[EeNn]?'(?:[^']|'')*'")
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.I)
+_OPERATORS = re.compile(r"\s*(->>|->|<=|>=|<>|!=|=|<|>)\s*")
+_COMMAS = re.compile(r"\s*,\s*")
+_PARENS = re.compile(r"\(\s+|\s+\)")
+_IN_LISTS = re.compile(r"\bin ?\(\?(?:, \?)*\)", re.I)
+_VALUES = re.compile(r"\bvalues\s*(\([^()]*\))(?:, \([^()]*\))+", re.I)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """Retorna o SQL sem comentários, literais e parâmetros, em minúsculas"""
+    sql = _COMMENTS.sub(' ', statement)
+    sql = _STRINGS.sub('?', sql)
+    sql = _PARAMS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _SPACES.sub(' ', sql).strip().lower()
+    sql = _OPERATORS.sub(r' \1 ', sql)
+    sql = _COMMAS.sub(', ', sql)
+    sql = _PARENS.sub(lambda m: m.group(0).strip(), sql)
+    sql = _IN_LISTS.sub('in (...)', sql)
+    return _VALUES.sub(r'values \1', sql)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """Retorna (id, SQL normalizado) de uma instrução; o id tem 16 caracteres hexadecimais"""
+    sql = normalize(statement)
+    return hashlib.sha1(sql.encode('utf-8')).hexdigest()[:16], sql
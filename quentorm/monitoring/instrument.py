@@ -0,0 +1,201 @@
+"""
+Instrumentação das engines do QuentORM
+
+`instrument(engine, connection)` registra os eventos `before_cursor_execute`
+e `after_cursor_execute` da engine. Cada instrução alimenta as estatísticas
+por fingerprint da conexão e, se passar do limite configurado em
+`db.logging_config()`, o log de consultas lentas. O caminho comum custa
+poucos microssegundos: o fingerprint de cada SQL distinto é calculado uma
+única vez.
+
+Conexões com a execution_option `UNINSTRUMENTED` (usada pelo `EXPLAIN`) não
+são medidas.
+
+`collect()` registra as instruções executadas no contexto corrente (usado
+por `@log_query` e `db.profile()`), com o trecho do código que as emitiu.
+"""
+
+import os
+import sys
+import sysconfig
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .explain import UNINSTRUMENTED
+from .fingerprint import fingerprint
+from .querylog import SlowQueryLog
+from .stats import stats_for
+
+# Atributo do ExecutionContext com o instante de início da instrução
+_STARTED = '_quentorm_started'
+
+_slow_logs: Dict[str, SlowQueryLog] = {}
+_lock = threading.Lock()
+
+# Pacotes ignorados ao procurar quem emitiu a instrução
+_PACKAGES = (
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep,
+    os.path.dirname(os.path.abspath(sqlalchemy.__file__)) + os.sep,
+)
+_STDLIB = sysconfig.get_paths()['stdlib'] + os.sep
+
+# Quadro de código: (arquivo, linha, função)
+Frame = Tuple[str, int, str]
+
+
+def _internal(filename: str) -> bool:
+    if filename.startswith(_PACKAGES) or filename.startswith('<'):
+        return True
+    return filename.startswith(_STDLIB) and 'site-packages' not in filename and 'dist-packages' not in filename
+
+
+def _frames() -> Iterator[Any]:
+    frame = sys._getframe(2)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    # API asyncio: a instrução roda numa greenlet; quem a emitiu está na greenlet mãe
+    greenlet = sys.modules.get('greenlet')
+    if greenlet is not None:
+        parent = greenlet.getcurrent().parent
+        while parent is not None:
+            frame = parent.gr_frame
+            while frame is not None:
+                yield frame
+                frame = frame.f_back
+            parent = parent.parent
+
+
+def caller() -> Optional[Frame]:
+    """Primeiro quadro da pilha fora do QuentORM, do SQLAlchemy e da biblioteca padrão"""
+    for frame in _frames():
+        if not _internal(frame.f_code.co_filename):
+            return frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name
+    return None
+
+
+class QueryRecord:
+    """Uma instrução executada, como vista pela instrumentação"""
+
+    __slots__ = ('connection', 'engine', 'id', 'sql', 'statement', 'parameters', 'elapsed', 'rowcount', 'frame',
+                 'names')
+
+    def __init__(self, connection: str, engine: Engine, id: str, sql: str, statement: str,
+                 parameters: Any, elapsed: float, rowcount: int, frame: Optional[Frame] = None,
+                 names: Optional[Sequence[str]] = None):
+        self.connection = connection
+        self.engine = engine
+        self.id = id
+        self.sql = sql
+        self.statement = statement
+        self.parameters = parameters
+        self.elapsed = elapsed
+        self.rowcount = rowcount
+        self.frame = frame
+        # Nomes dos parâmetros posicionais, na ordem (para mascará-los no log)
+        self.names = names
+
+    @property
+    def location(self) -> str:
+        """`arquivo:linha (função)` de quem emitiu a instrução"""
+        if self.frame is None:
+            return '?'
+        filename, lineno, function = self.frame
+        return f"{filename}:{lineno} ({function})"
+
+    def __repr__(self):
+        return f"<QueryRecord({self.connection!r}, {self.elapsed * 1000:.1f} ms, {self.sql!r})>"
+
+
+class Collected(list):
+    """Instruções coletadas por `collect()` e registros carregados pelo ORM no bloco"""
+
+    loaded = 0
+
+
+# Listas que recebem as instruções executadas no contexto corrente
+_collectors: ContextVar[Tuple[Collected, ...]] = ContextVar('quentorm_collectors', default=())
+
+
+@contextmanager
+def collect() -> Iterator[Collected]:
+    """Coleta as instruções executadas dentro do bloco (pode ser aninhado)"""
+    records = Collected()
+    token = _collectors.set(_collectors.get() + (records,))
+    try:
+        yield records
+    finally:
+        _collectors.reset(token)
+
+
+def configure_query_log(connection: str, config: Dict[str, Any]) -> SlowQueryLog:
+    """Cria (ou substitui) o log de consultas lentas de uma conexão"""
+    with _lock:
+        previous = _slow_logs.get(connection)
+        _slow_logs[connection] = log = SlowQueryLog(connection, config)
+    if previous is not None:
+        previous.close()
+    return log
+
+
+def get_query_log(connection: str) -> Optional[SlowQueryLog]:
+    return _slow_logs.get(connection)
+
+
+def _positions(context: Any) -> Optional[Sequence[str]]:
+    """Nomes dos parâmetros posicionais da instrução compilada (None em SQL textual)"""
+    compiled = getattr(context, 'compiled', None)
+    return getattr(compiled, 'positiontup', None) if compiled is not None else None
+
+
+def instrument(engine: Engine, connection: str) -> Engine:
+    """Registra a instrumentação de consultas na engine (uma única vez)"""
+    if getattr(engine, '_quentorm_instrumented', False):
+        return engine
+    engine._quentorm_instrumented = True
+    stats = stats_for(connection)
+    perf_counter = time.perf_counter
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if not context.execution_options.get(UNINSTRUMENTED):
+            context._quentorm_started = perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, _STARTED, None)
+        if started is None:
+            return
+        elapsed = perf_counter() - started
+        id, sql = fingerprint(statement)
+        rows = cursor.rowcount
+        if sql.startswith('insert') and (rows < 0 or (rows == 0 and ' returning ' in sql)):
+            # Com RETURNING o rowcount só é conhecido após o fetch: conta os conjuntos de parâmetros
+            rows = len(parameters) if executemany else 1
+        stats.record(id, sql, elapsed, rows=rows)
+        slow_log = _slow_logs.get(connection)
+        if slow_log is not None and slow_log.is_slow(elapsed):
+            slow_log.log(id, statement, parameters, elapsed, _positions(context))
+            slow_log.explain(conn.engine, id, statement, parameters)
+        collectors = _collectors.get()
+        if collectors:
+            record = QueryRecord(connection, conn.engine, id, sql, statement, parameters,
+                                 elapsed, rows, caller(), _positions(context))
+            for records in collectors:
+                records.append(record)
+
+    @event.listens_for(engine, 'handle_error')
+    def _error(error_context):
+        started = getattr(error_context.execution_context, _STARTED, None)
+        if started is not None and error_context.statement is not None:
+            id, sql = fingerprint(error_context.statement)
+            stats.record(id, sql, perf_counter() - started, error=True)
+
+    return engine
@@ -0,0 +1,454 @@
+"""
+Registro de métricas do QuentORM
+
+Reúne, no formato de exposição do Prometheus, o que a biblioteca já mede:
+
+- pools: conexões obtidas, timeouts, tempo de espera e ocupação por conexão
+- consultas: histograma de latência por fingerprint e por modelo, erros e
+  linhas afetadas
+- modelos: registros carregados pelo ORM
+- caches: acertos e falhas por cache nomeado, por cache de chave primária e
+  por camada (L1/L2) do cache em duas camadas
+- cargas: linhas e tempo das instruções INSERT por tabela (a razão entre os
+  dois contadores é a vazão da carga)
+
+    from quentorm.monitoring import render_prometheus
+    print(render_prometheus())
+
+Com vários processos (gunicorn, pools de processos), `enable_multiprocess()`
+(ou a variável `QUENTORM_METRICS_DIR`) faz cada processo gravar suas
+métricas em `<diretório>/<pid>.json` a cada `interval` segundos e na saída.
+`render_prometheus(directory)` e `quentorm stats` somam os contadores e
+histogramas de todos os arquivos; os gauges só contam processos vivos. Os
+arquivos de processos encerrados são consolidados em `archive.json`.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..caching.backends import cache_backends
+from ..caching.decorators import cache_stats
+from .instrument import _collectors
+from .stats import BUCKETS, _stats
+
+# Variável de ambiente que habilita o modo multiprocesso
+ENV_DIRECTORY = 'QUENTORM_METRICS_DIR'
+
+# Intervalo padrão entre duas gravações do arquivo do processo (segundos)
+DEFAULT_INTERVAL = 10.0
+
+ARCHIVE = 'archive.json'
+_LOCK_FILE = '.lock'
+
+# Agregação entre processos: soma, soma apenas dos vivos ou máximo
+SUM, LIVE, MAX = 'sum', 'live', 'max'
+
+# Amostra: (nome, rótulos, valor)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class Family:
+    """Uma métrica do Prometheus com suas amostras"""
+
+    __slots__ = ('name', 'type', 'help', 'aggregate', 'samples')
+
+    def __init__(self, name: str, type: str, help: str, aggregate: Optional[str] = None):
+        self.name = name
+        self.type = type
+        self.help = help
+        self.aggregate = aggregate or (LIVE if type == 'gauge' else SUM)
+        self.samples: List[Sample] = []
+
+    def add(self, labels: Dict[str, str], value: float, suffix: str = '') -> None:
+        self.samples.append((self.name + suffix, labels, value))
+
+    def histogram(self, labels: Dict[str, str], buckets: Iterable[int], total: float, count: int) -> None:
+        """Adiciona um histograma a partir das contagens por bucket (não acumuladas)"""
+        cumulative = 0
+        for bound, observed in zip(BUCKETS + (float('inf'),), buckets):
+            cumulative += observed
+            self.add({**labels, 'le': _bound(bound)}, cumulative, '_bucket')
+        self.add(labels, total, '_sum')
+        self.add(labels, count, '_count')
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'type': self.type, 'help': self.help, 'aggregate': self.aggregate,
+                'samples': [list(sample) for sample in self.samples]}
+
+
+def _bound(value: float) -> str:
+    return '+Inf' if value == float('inf') else repr(float(value))
+
+
+# Contadores de registros carregados pelo ORM, por modelo
+_model_rows: Dict[str, int] = {}
+
+# Gerenciadores (Database, AsyncDatabase) cujos pools são expostos
+_managers: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+
+
+def register_database(manager: Any) -> None:
+    """Inclui os pools de um gerenciador de conexões nas métricas"""
+    _managers.add(manager)
+
+
+def count_loaded(target: Any, context: Any) -> None:
+    """Evento `load` dos modelos: conta os registros carregados"""
+    name = type(target).__name__
+    _model_rows[name] = _model_rows.get(name, 0) + 1
+    for records in _collectors.get():
+        records.loaded += 1
+
+
+def _table_models() -> Dict[str, str]:
+    """Nome da tabela -> nome do modelo mapeado"""
+    from ..utils.models import BaseModel
+    tables: Dict[str, str] = {}
+    for mapper in BaseModel.registry.mappers:
+        table = getattr(mapper, 'local_table', None)
+        if table is not None and getattr(table, 'name', None):
+            tables.setdefault(table.name.lower(), mapper.class_.__name__)
+    return tables
+
+
+def _pool_families() -> List[Family]:
+    checkouts = Family('quentorm_pool_checkouts_total', 'counter', 'Conexões obtidas do pool')
+    timeouts = Family('quentorm_pool_timeouts_total', 'counter', 'Timeouts ao obter conexão do pool')
+    waited = Family('quentorm_pool_wait_seconds_total', 'counter', 'Tempo total de espera por conexões')
+    size = Family('quentorm_pool_size', 'gauge', 'Tamanho configurado do pool')
+    checked_out = Family('quentorm_pool_checked_out', 'gauge', 'Conexões em uso')
+    overflow = Family('quentorm_pool_overflow', 'gauge', 'Conexões além do tamanho do pool')
+    for manager in list(_managers):
+        mode = 'async' if type(manager).__name__ == 'AsyncDatabase' else 'sync'
+        for connection, status in manager.pool_stats().items():
+            labels = {'connection': connection, 'mode': mode}
+            checkouts.add(labels, status.get('checkouts', 0))
+            timeouts.add(labels, status.get('timeouts', 0))
+            waited.add(labels, status.get('wait_time_total', 0.0))
+            size.add(labels, status.get('size', 0))
+            checked_out.add(labels, status.get('checked_out', 0))
+            overflow.add(labels, max(status.get('overflow', 0), 0))
+    return [checkouts, timeouts, waited, size, checked_out, overflow]
+
+
+def _query_families() -> List[Family]:
+    duration = Family('quentorm_query_duration_seconds', 'histogram', 'Latência das instruções por fingerprint')
+    info = Family('quentorm_query_info', 'gauge', 'SQL normalizado de cada fingerprint', MAX)
+    errors = Family('quentorm_query_errors_total', 'counter', 'Instruções que falharam por fingerprint')
+    rows = Family('quentorm_query_rows_total', 'counter', 'Linhas informadas pelo driver por fingerprint')
+    model_duration = Family('quentorm_model_query_duration_seconds', 'histogram', 'Latência das instruções por modelo')
+    insert_rows = Family('quentorm_insert_rows_total', 'counter', 'Linhas inseridas por tabela')
+    insert_seconds = Family('quentorm_insert_seconds_total', 'counter', 'Tempo gasto em INSERT por tabela')
+    tables = _table_models()
+    for connection, stats in list(_stats.items()):
+        by_model: Dict[str, List[Any]] = {}
+        for entry in stats.snapshot():
+            labels = {'connection': connection, 'fingerprint': entry['id']}
+            duration.histogram(labels, entry['buckets'].values(), entry['total'], entry['count'])
+            info.add({**labels, 'sql': entry['sql']}, 1)
+            errors.add(labels, entry['errors'])
+            rows.add(labels, entry['rows'])
+            table = entry['table']
+            if table is None:
+                continue
+            if entry['sql'].startswith('insert'):
+                insert_labels = {'connection': connection, 'table': table}
+                insert_rows.add(insert_labels, entry['rows'])
+                insert_seconds.add(insert_labels, entry['total'])
+            model = tables.get(table.rsplit('.', 1)[-1].lower())
+            if model is not None:
+                acc = by_model.setdefault(model, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+                acc[0] = [a + b for a, b in zip(acc[0], entry['buckets'].values())]
+                acc[1] += entry['total']
+                acc[2] += entry['count']
+        for model, (buckets, total, count) in sorted(by_model.items()):
+            model_duration.histogram({'connection': connection, 'model': model}, buckets, total, count)
+    return [duration, info, errors, rows, model_duration, insert_rows, insert_seconds]
+
+
+def _model_families() -> List[Family]:
+    loaded = Family('quentorm_model_rows_total', 'counter', 'Registros carregados pelo ORM por modelo')
+    for model, count in sorted(_model_rows.items()):
+        loaded.add({'model': model}, count)
+    return [loaded]
+
+
+def _cache_families() -> List[Family]:
+    hits = Family('quentorm_cache_hits_total', 'counter', 'Acertos por cache')
+    misses = Family('quentorm_cache_misses_total', 'counter', 'Falhas por cache')
+    events = Family('quentorm_cache_events_total', 'counter', 'Demais eventos dos caches nomeados')
+    for name, metrics in sorted(cache_stats().items()):
+        hits.add({'cache': name}, metrics['hits'])
+        misses.add({'cache': name}, metrics['misses'])
+        for event, value in metrics.items():
+            if event not in ('hits', 'misses', 'hit_rate'):
+                events.add({'cache': name, 'event': event}, value)
+    layers = Family('quentorm_cache_layer_hits_total', 'counter', 'Acertos por camada do cache em duas camadas')
+    layer_misses = Family('quentorm_cache_layer_misses_total', 'counter', 'Leituras que não acharam a chave em nenhuma camada')
+    for connection, backend in sorted(cache_backends().items()):
+        stats = getattr(backend, 'stats', None)
+        if isinstance(stats, dict):
+            layers.add({'connection': connection, 'layer': 'l1'}, stats.get('l1_hits', 0))
+            layers.add({'connection': connection, 'layer': 'l2'}, stats.get('l2_hits', 0))
+            layer_misses.add({'connection': connection}, stats.get('misses', 0))
+    return [hits, misses, events, layers, layer_misses]
+
+
+def collect_metrics() -> List[Family]:
+    """Métricas do processo corrente"""
+    return _pool_families() + _query_families() + _model_families() + _cache_families()
+
+
+def reset_metrics() -> None:
+    """Zera as métricas do processo (estatísticas de consultas, pools, caches e modelos)"""
+    from ..caching.decorators import reset_cache_stats
+    from .stats import reset_query_stats
+    reset_query_stats()
+    reset_cache_stats()
+    _model_rows.clear()
+    for backend in cache_backends().values():
+        stats = getattr(backend, 'stats', None)
+        if isinstance(stats, dict):
+            for key in stats:
+                stats[key] = 0
+    for manager in list(_managers):
+        for engine in list(manager._engines.values()):
+            pool = getattr(engine, 'sync_engine', engine).pool
+            if getattr(pool, 'stats', None) is not None:
+                pool.stats.reset()
+
+
+# Exposição
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(families: Iterable[Family]) -> str:
+    """Formato de texto do Prometheus (versão 0.0.4)"""
+    lines: List[str] = []
+    for family in families:
+        if not family.samples:
+            continue
+        lines.append(f"# HELP {family.name} {_escape(family.help)}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for name, labels, value in family.samples:
+            if labels:
+                text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def render_prometheus(directory: Optional[str] = None) -> str:
+    """
+    Métricas no formato de texto do Prometheus
+
+    Sem `directory`, as do processo corrente (ou, no modo multiprocesso, as
+    de todos os processos que gravam no diretório configurado).
+    """
+    directory = directory or (_writer.directory if _writer is not None else None)
+    if directory is None:
+        return render(collect_metrics())
+    if _writer is not None and os.path.abspath(directory) == os.path.abspath(_writer.directory):
+        _writer.flush()
+    return render(aggregate(directory))
+
+
+# Modo multiprocesso
+
+def _dump(path: str, data: Dict[str, Any]) -> None:
+    """Grava o JSON de forma atômica (arquivo temporário + rename)"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _load(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(target: Dict[str, Dict[str, Any]], families: Dict[str, Any], live: bool) -> None:
+    """Acumula as famílias de um arquivo em `target`"""
+    for name, family in families.items():
+        merged = target.setdefault(name, {'type': family['type'], 'help': family['help'],
+                                          'aggregate': family['aggregate'], 'samples': {}})
+        if family['aggregate'] == LIVE and not live:
+            continue
+        for sample, labels, value in family['samples']:
+            key = (sample, tuple(sorted(labels.items())))
+            if family['aggregate'] == MAX:
+                merged['samples'][key] = max(merged['samples'].get(key, value), value)
+            else:
+                merged['samples'][key] = merged['samples'].get(key, 0) + value
+
+
+def _lock_directory(directory: str) -> Any:
+    """Lock exclusivo do diretório (consolidação), quando há fcntl"""
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    handle = open(os.path.join(directory, _LOCK_FILE), 'a')
+    fcntl.flock(handle, fcntl.LOCK_EX)
+    return handle
+
+
+def _compact(directory: str) -> None:
+    """Consolida em `archive.json` os arquivos de processos encerrados"""
+    handle = _lock_directory(directory)
+    try:
+        dead = []
+        for entry in os.listdir(directory):
+            pid = entry[:-5]
+            if entry.endswith('.json') and pid.isdigit() and not _alive(int(pid)):
+                dead.append(os.path.join(directory, entry))
+        if not dead:
+            return
+        archive_path = os.path.join(directory, ARCHIVE)
+        merged: Dict[str, Dict[str, Any]] = {}
+        archive = _load(archive_path)
+        if archive is not None:
+            _merge(merged, archive['families'], live=False)
+        for path in dead:
+            data = _load(path)
+            if data is not None:
+                _merge(merged, data['families'], live=False)
+        _dump(archive_path, {'pid': None, 'families': _families_dict(merged)})
+        for path in dead:
+            os.unlink(path)
+    finally:
+        if handle is not None:
+            handle.close()
+
+
+def _families_dict(merged: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        name: {'type': family['type'], 'help': family['help'], 'aggregate': family['aggregate'],
+               'samples': [[sample, dict(labels), value] for (sample, labels), value in family['samples'].items()]}
+        for name, family in merged.items()
+    }
+
+
+def aggregate(directory: str) -> List[Family]:
+    """Soma as métricas gravadas no diretório por todos os processos"""
+    if not os.path.isdir(directory):
+        return []
+    _compact(directory)
+    merged: Dict[str, Dict[str, Any]] = {}
+    for entry in sorted(os.listdir(directory)):
+        if not entry.endswith('.json') or entry.startswith('.'):
+            continue
+        data = _load(os.path.join(directory, entry))
+        if data is None:
+            continue
+        pid = data.get('pid')
+        _merge(merged, data['families'], live=pid is not None and _alive(int(pid)))
+    families = []
+    for name, data in merged.items():
+        family = Family(name, data['type'], data['help'], data['aggregate'])
+        family.samples = [(sample, dict(labels), value) for (sample, labels), value in data['samples'].items()]
+        families.append(family)
+    return families
+
+
+class MetricsWriter:
+    """Grava periodicamente as métricas do processo no diretório compartilhado"""
+
+    def __init__(self, directory: str, interval: float = DEFAULT_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    def start(self) -> None:
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='quentorm-metrics', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def flush(self) -> None:
+        families = {family.name: family.as_dict() for family in collect_metrics()}
+        _dump(self.path, {'pid': os.getpid(), 'families': families})
+
+    def after_fork(self) -> None:
+        """O filho herda as métricas do pai: começa do zero com arquivo e thread próprios"""
+        reset_metrics()
+        self.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+
+_writer: Optional[MetricsWriter] = None
+_fork_hook = False
+
+
+def enable_multiprocess(directory: Optional[str] = None, interval: float = DEFAULT_INTERVAL) -> MetricsWriter:
+    """Habilita a gravação das métricas do processo em `<directory>/<pid>.json`"""
+    global _writer, _fork_hook
+    directory = directory or os.environ.get(ENV_DIRECTORY)
+    if not directory:
+        raise ValueError(f"Informe o diretório das métricas ou defina {ENV_DIRECTORY}")
+    if _writer is not None:
+        _writer.close()
+    _writer = MetricsWriter(directory, interval)
+    _writer.start()
+    if not _fork_hook:
+        _fork_hook = True
+        atexit.register(lambda: _writer.close() if _writer is not None else None)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=lambda: _writer.after_fork() if _writer is not None else None)
+    return _writer
+
+
+if os.environ.get(ENV_DIRECTORY):
+    enable_multiprocess()
@@ -0,0 +1,98 @@
+"""
+Perfil das consultas de um bloco de código
+
+    with db.profile() as p:
+        listar_contas_cliente(1)
+    print(p.count, p.total, p.rows, p.loaded)
+    print(p.report())
+
+Cada instrução executada dentro do bloco é registrada com o SQL, os
+parâmetros, o tempo, as linhas e o trecho do código que a emitiu; `p.loaded`
+conta os registros carregados pelo ORM (o SQLite não informa as linhas de um
+SELECT). `p.repeated()` aponta as consultas repetidas por um mesmo trecho (o padrão
+N+1 de um lazy load por registro).
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .instrument import Collected, QueryRecord, collect
+
+
+class QueryProfile:
+    """Instruções registradas por `db.profile()`"""
+
+    def __init__(self, connections: Optional[Iterable[str]] = None):
+        self.connections = set(connections) if connections is not None else None
+        self._records: Collected = Collected()
+
+    @property
+    def records(self) -> List[QueryRecord]:
+        if self.connections is None:
+            return list(self._records)
+        return [record for record in self._records if record.connection in self.connections]
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total(self) -> float:
+        """Tempo total das instruções (segundos)"""
+        return sum(record.elapsed for record in self.records)
+
+    @property
+    def rows(self) -> int:
+        """Linhas informadas pelo driver (instruções sem rowcount não contam)"""
+        return sum(record.rowcount for record in self.records if record.rowcount > 0)
+
+    @property
+    def loaded(self) -> int:
+        """Registros carregados pelo ORM no bloco (de qualquer conexão)"""
+        return self._records.loaded
+
+    def by_fingerprint(self) -> List[Dict[str, Any]]:
+        """Instruções agrupadas por fingerprint, das mais frequentes para as menos"""
+        groups: Dict[str, Dict[str, Any]] = {}
+        for record in self.records:
+            group = groups.setdefault(record.id, {'id': record.id, 'sql': record.sql, 'count': 0,
+                                                  'total': 0.0, 'locations': []})
+            group['count'] += 1
+            group['total'] += record.elapsed
+            if record.location not in group['locations']:
+                group['locations'].append(record.location)
+        return sorted(groups.values(), key=lambda group: (group['count'], group['total']), reverse=True)
+
+    def repeated(self, threshold: int = 2) -> List[Dict[str, Any]]:
+        """Fingerprints emitidos `threshold` ou mais vezes pelo mesmo trecho de código"""
+        groups: Dict[Any, Dict[str, Any]] = {}
+        for record in self.records:
+            group = groups.setdefault((record.id, record.frame),
+                                      {'id': record.id, 'sql': record.sql, 'location': record.location, 'count': 0})
+            group['count'] += 1
+        return sorted((group for group in groups.values() if group['count'] >= threshold),
+                      key=lambda group: group['count'], reverse=True)
+
+    def report(self) -> str:
+        """Resumo textual: totais e uma linha por instrução"""
+        lines = [f"{self.count} consulta(s) em {self.total * 1000:.1f} ms, {self.rows} linha(s), "
+                 f"{self.loaded} registro(s) carregado(s)"]
+        for number, record in enumerate(self.records, 1):
+            lines.append(f"{number:>3}. [{record.connection}] {record.elapsed * 1000:.1f} ms "
+                         f"{' '.join(record.statement.split())}")
+            lines.append(f"     em {record.location}")
+        for group in self.repeated():
+            lines.append(f"Repetida {group['count']}x em {group['location']}: {group['sql']}")
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"<QueryProfile({self.count} consultas, {self.total * 1000:.1f} ms)>"
+
+
+@contextmanager
+def profile(connections: Optional[Iterable[str]] = None) -> Iterator[QueryProfile]:
+    """Registra as instruções do bloco (de todas as conexões ou apenas das informadas)"""
+    result = QueryProfile(connections)
+    with collect() as records:
+        result._records = records
+        yield result
@@ -0,0 +1,164 @@
+"""
+Log de consultas lentas
+
+As consultas acima de `slow_query_threshold` (ms) são registradas com o
+fingerprint, o tempo e os parâmetros (mascaráveis) no logger
+`quentorm.queries.<conexão>`. O logger só tem um `QueueHandler`: a escrita
+no arquivo acontece na thread de um `QueueListener`, nunca na thread da
+requisição. Com `explain: True` o plano de cada consulta lenta também é
+capturado (ver `explain`).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy.engine import Engine
+
+from .explain import Explainer
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Tamanho máximo da representação de cada parâmetro no log
+MAX_PARAM_LENGTH = 200
+
+# Quantidade máxima de conjuntos de parâmetros registrados de um executemany
+MAX_PARAM_SETS = 5
+
+REDACTED = '***'
+
+# Sufixo que o SQLAlchemy acrescenta ao nome da coluna nos parâmetros (cpf_1, cnpj_2, ...)
+_BIND_SUFFIX = re.compile(r'_\d+$')
+
+
+def _param(value: Any) -> Any:
+    if isinstance(value, (str, bytes)) and len(value) > MAX_PARAM_LENGTH:
+        return value[:MAX_PARAM_LENGTH] + (b'...' if isinstance(value, bytes) else '...')
+    return value
+
+
+def redact(parameters: Any, redact: Any = False, names: Optional[Sequence[str]] = None) -> Any:
+    """
+    Prepara os parâmetros de uma instrução para o log
+
+    `redact=True` mascara todos os valores; uma lista de nomes mascara apenas
+    os parâmetros das colunas correspondentes (ex.: ['senha', 'cpf'] mascara
+    `cpf` e `cpf_1`). Parâmetros posicionais são identificados por `names`
+    (o `positiontup` da instrução compilada); sem eles, com uma lista de
+    nomes, todos os valores posicionais são mascarados.
+    """
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        sets = [redact_one(p, redact, names) for p in parameters[:MAX_PARAM_SETS]]
+        if len(parameters) > MAX_PARAM_SETS:
+            sets.append(f"... (+{len(parameters) - MAX_PARAM_SETS})")
+        return sets
+    return redact_one(parameters, redact, names)
+
+
+def masked(key: Any, names: Any) -> bool:
+    """Indica se o parâmetro `key` é de uma das colunas em `names`"""
+    return isinstance(key, str) and (key in names or _BIND_SUFFIX.sub('', key) in names)
+
+
+def redact_one(parameters: Any, redact: Any, names: Optional[Sequence[str]] = None) -> Any:
+    columns = set(redact) if isinstance(redact, (list, tuple, set)) else None
+    if isinstance(parameters, dict):
+        return {
+            key: REDACTED if redact is True or (columns is not None and masked(key, columns)) else _param(value)
+            for key, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        if columns is None:
+            return [REDACTED if redact is True else _param(value) for value in parameters]
+        if names is None or len(names) != len(parameters):
+            # Sem saber a coluna de cada posição (SQL textual, IN expandido), nada sai em claro
+            return [REDACTED] * len(parameters)
+        return [REDACTED if masked(name, columns) else _param(value) for name, value in zip(names, parameters)]
+    return parameters
+
+
+class SlowQueryLog:
+    """Registro assíncrono das consultas lentas de uma conexão"""
+
+    def __init__(self, connection: str, config: Dict[str, Any]):
+        self.connection = connection
+        self.enabled = config.get('enabled', True)
+        self.threshold = float(config.get('slow_query_threshold', 1000)) / 1000
+        self.log_params = config.get('log_params', True)
+        self.redact = config.get('redact_params', False)
+        self.log_file = config.get('log_file')
+        self.format = config.get('format', DEFAULT_FORMAT)
+        self.logger = logging.getLogger(f"quentorm.queries.{connection}")
+        self.listener: Optional[QueueListener] = None
+        self._handler: Optional[QueueHandler] = None
+        self.explainer = Explainer(connection, config, self.logger) if config.get('explain') else None
+        if self.enabled:
+            self._start()
+            atexit.register(self.close)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._restart)
+
+    def _target(self) -> logging.Handler:
+        if self.log_file:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler: logging.Handler = logging.FileHandler(self.log_file, encoding='utf-8')
+        else:
+            handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(self.format))
+        return handler
+
+    def _start(self) -> None:
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        self._handler = QueueHandler(records)
+        self.logger.addHandler(self._handler)
+        self.logger.setLevel(logging.INFO)
+        # Sem propagar: handlers do logger raiz escreveriam na thread da requisição
+        self.logger.propagate = False
+        self.listener = QueueListener(records, self._target())
+        self.listener.start()
+
+    def _restart(self) -> None:
+        """No processo filho de um fork a thread do listener não existe mais"""
+        if self._handler is not None:
+            self.logger.removeHandler(self._handler)
+        if self.enabled and self.listener is not None:
+            self._start()
+        if self.explainer is not None:
+            self.explainer.after_fork()
+
+    def is_slow(self, elapsed: float) -> bool:
+        return self.enabled and elapsed >= self.threshold
+
+    def log(self, id: str, statement: str, parameters: Any, elapsed: float,
+            names: Optional[Sequence[str]] = None) -> None:
+        """Enfileira o registro de uma consulta lenta (`names`: nomes dos parâmetros posicionais)"""
+        if self.log_params and parameters:
+            params = redact(parameters, self.redact, names)
+            self.logger.warning("Consulta lenta (%.1f ms) [%s] %s | parâmetros: %r",
+                                elapsed * 1000, id, ' '.join(statement.split()), params)
+        else:
+            self.logger.warning("Consulta lenta (%.1f ms) [%s] %s", elapsed * 1000, id, ' '.join(statement.split()))
+
+    def explain(self, engine: Engine, id: str, statement: str, parameters: Any) -> None:
+        """Agenda a captura do plano, se habilitada e ainda não feita recentemente"""
+        if self.explainer is not None:
+            self.explainer.submit(engine, id, statement, parameters)
+
+    def close(self) -> None:
+        """Descarrega a fila e encerra a thread do listener"""
+        if self.explainer is not None:
+            self.explainer.close()
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        if self._handler is not None:
+            self.logger.removeHandler(self._handler)
+            self._handler = None
@@ -0,0 +1,137 @@
+"""
+Estatísticas de execução por fingerprint de SQL
+
+Para cada conexão e fingerprint são mantidos a contagem, o tempo total,
+mínimo e máximo, as linhas informadas pelo driver e um histograma de
+latência com limites fixos (em segundos).
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+# Limites superiores dos buckets do histograma (segundos); o último bucket é +Inf
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fingerprints distintos guardados por conexão; os excedentes vão para OTHER
+MAX_FINGERPRINTS = 5000
+OTHER = 'other'
+
+# Tabela principal de uma instrução normalizada
+_TABLE = re.compile(r"^(?:select\b.*?\bfrom|insert into|update|delete from)\s+([\w.\"`]+)")
+
+
+def main_table(sql: str) -> Optional[str]:
+    """Tabela principal (primeiro FROM, INSERT INTO, UPDATE ou DELETE FROM) de um SQL normalizado"""
+    match = _TABLE.match(sql)
+    return match.group(1).replace('"', '').replace('`', '') if match else None
+
+
+class FingerprintStats:
+    """Contadores de um fingerprint"""
+
+    __slots__ = ('id', 'sql', 'table', 'count', 'errors', 'rows', 'total', 'min', 'max', 'buckets', 'plan')
+
+    def __init__(self, id: str, sql: str):
+        self.id = id
+        self.sql = sql
+        self.table = main_table(sql)
+        self.count = 0
+        self.rows = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        # Último plano capturado por `explain` (ou None)
+        self.plan: Optional[Dict[str, Any]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'sql': self.sql,
+            'table': self.table,
+            'count': self.count,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total': self.total,
+            'avg': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'buckets': dict(zip(BUCKETS + (float('inf'),), self.buckets)),
+            'plan': self.plan,
+        }
+
+
+class QueryStats:
+    """Estatísticas de todas as instruções executadas em uma conexão"""
+
+    def __init__(self, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.max_fingerprints = max_fingerprints
+        self._entries: Dict[str, FingerprintStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, id: str, sql: str, elapsed: float, error: bool = False, rows: int = 0) -> None:
+        bucket = bisect_left(BUCKETS, elapsed)
+        with self._lock:
+            entry = self._entries.get(id)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    id, sql = OTHER, OTHER
+                    entry = self._entries.get(OTHER)
+                if entry is None:
+                    entry = self._entries[id] = FingerprintStats(id, sql)
+            entry.count += 1
+            entry.total += elapsed
+            if rows > 0:
+                entry.rows += rows
+            entry.buckets[bucket] += 1
+            if elapsed < entry.min:
+                entry.min = elapsed
+            if elapsed > entry.max:
+                entry.max = elapsed
+            if error:
+                entry.errors += 1
+
+    def set_plan(self, id: str, plan: Dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._entries.get(id)
+            if entry is not None:
+                entry.plan = plan
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Cópia das estatísticas, das instruções com maior tempo total para as de menor"""
+        with self._lock:
+            entries = [entry.as_dict() for entry in self._entries.values()]
+        return sorted(entries, key=lambda entry: entry['total'], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_stats: Dict[str, QueryStats] = {}
+_stats_lock = threading.Lock()
+
+
+def stats_for(connection: str) -> QueryStats:
+    """Retorna (criando) as estatísticas de uma conexão"""
+    stats = _stats.get(connection)
+    if stats is None:
+        with _stats_lock:
+            stats = _stats.setdefault(connection, QueryStats())
+    return stats
+
+
+def query_stats(connection: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Estatísticas por fingerprint de todas as conexões (ou de uma conexão)"""
+    names = [connection] if connection else list(_stats)
+    return {name: _stats[name].snapshot() for name in names if name in _stats}
+
+
+def reset_query_stats(connection: Optional[str] = None) -> None:
+    """Zera as estatísticas de todas as conexões (ou de uma conexão)"""
+    for name in ([connection] if connection else list(_stats)):
+        if name in _stats:
+            _stats[name].reset()
@@ -0,0 +1,425 @@
+"""
+Conciliação de extratos bancários com os lançamentos
+
+Um `Reconciler` liga um modelo de lançamentos a uma tabela de resultados da
+conciliação. As linhas do extrato (CSV, OFX ou qualquer iterável de
+`StatementLine`) são casadas com os lançamentos da conta pelo valor com sinal
+e pela data, com tolerância de alguns dias:
+
+    conciliacao = Reconciler(Lancamento, account='conta_bancaria_id', date='data', amount='valor',
+                             kind='tipo', table='tbl_conciliacoes')
+
+    conciliacao.reconcile(conta, 'extrato.ofx')
+    # {'matched': 980, 'unmatched': 15, 'ambiguous': 5, 'skipped': 0}
+
+Os lançamentos candidatos do período são lidos em uma única consulta, só as
+colunas necessárias. O casamento agrupa extrato e lançamentos por valor em
+centavos e varre as linhas em ordem de data (e, no mesmo dia, na ordem do
+extrato) procurando primeiro o lançamento do mesmo dia, depois a 1 dia, e
+assim até a tolerância; entre lançamentos do mesmo dia vence o de menor id.
+Uma linha com candidatos à mesma distância antes e depois da sua data fica
+como ambígua. Os resultados são gravados em lote, e uma nova importação do
+mesmo extrato pula as linhas já conciliadas e refaz as demais.
+"""
+
+import csv
+import hashlib
+import io
+import logging
+import re
+import time
+from datetime import date as Date, datetime
+from typing import Any, Dict, IO, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import Column, Date as DateType, DateTime, Index, Integer, String, Table, inspect, select, type_coerce
+from sqlalchemy.engine import Connection, Engine
+
+from .utils.money import Amount, Money, raw
+from .utils.reading import stream
+
+logger = logging.getLogger('quentorm.reconciliation')
+
+MATCHED, UNMATCHED, AMBIGUOUS = 'matched', 'unmatched', 'ambiguous'
+
+# Dias de diferença aceitos entre a data do extrato e a do lançamento
+TOLERANCE = 3
+
+# Chave de casamento: centavos * _SPAN + ordinal da data (os ordinais até date.max cabem em 22 bits)
+_SPAN = 1 << 22
+
+# Linhas gravadas por INSERT e FITIDs por DELETE
+WRITE_BATCH = 5000
+DELETE_BATCH = 500
+
+# Conciliações declaradas, por nome da tabela de resultados
+reconcilers: Dict[str, 'Reconciler'] = {}
+
+
+class StatementLine(NamedTuple):
+    """Uma linha do extrato: valor em centavos, positivo para créditos e negativo para débitos"""
+
+    fitid: str
+    day: Date
+    cents: int
+    description: str = ''
+
+
+# Leitura de extratos
+
+def _cents(text: str, decimal: str = '.') -> int:
+    """Centavos de um valor em texto ('1.234,56' com decimal=',', '-50.00' com decimal='.')"""
+    text = text.strip().replace(' ', '')
+    if decimal == ',':
+        text = text.replace('.', '').replace(',', '.')
+    else:
+        text = text.replace(',', '')
+    sign = -1 if text[:1] == '-' else 1
+    units, _, fraction = text.lstrip('+-').partition('.')
+    if units.isdigit() and len(fraction) <= 2 and (not fraction or fraction.isdigit()):
+        return sign * (int(units) * 100 + int(fraction.ljust(2, '0')))
+    return Amount(text).cents
+
+
+def _fitid(day: Date, cents: int, description: str, seen: Dict[Tuple[Date, int, str], int]) -> str:
+    """Identificador estável de uma linha sem FITID (a ocorrência desambigua linhas repetidas)"""
+    key = (day, cents, description)
+    occurrence = seen[key] = seen.get(key, 0) + 1
+    return hashlib.sha1(f"{day.isoformat()}|{cents}|{description}|{occurrence}".encode('utf-8')).hexdigest()[:20]
+
+
+def _open(source: Union[str, IO[Any]], encoding: str) -> IO[str]:
+    if isinstance(source, str):
+        return open(source, newline='', encoding=encoding)
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding=encoding, newline='')
+
+
+def read_csv(source: Union[str, IO[Any]], date: str = 'data', amount: str = 'valor',
+             description: Optional[str] = 'descricao', fitid: Optional[str] = None,
+             date_format: str = '%d/%m/%Y', decimal: str = ',', delimiter: str = ';',
+             encoding: str = 'utf-8') -> Iterator[StatementLine]:
+    """
+    Linhas de um extrato CSV com cabeçalho
+
+    O valor tem sinal (débitos negativos) e usa `decimal` como separador
+    decimal. Sem a coluna `fitid`, o identificador é derivado de data,
+    valor, descrição e ocorrência, e se repete ao importar o mesmo arquivo.
+    """
+    handle = _open(source, encoding)
+    try:
+        reader = csv.reader(handle, delimiter=delimiter)
+        header = [name.strip() for name in next(reader, [])]
+        try:
+            positions = [header.index(name) if name else None for name in (date, amount, description, fitid)]
+        except ValueError as e:
+            raise ValueError(f"Coluna ausente no extrato: {e}") from None
+        at_date, at_amount, at_description, at_fitid = positions
+        days: Dict[str, Date] = {}
+        seen: Dict[Tuple[Date, int, str], int] = {}
+        for row in reader:
+            if not row:
+                continue
+            text = row[at_date].strip()
+            day = days.get(text)
+            if day is None:
+                day = days[text] = datetime.strptime(text, date_format).date()
+            cents = _cents(row[at_amount], decimal)
+            memo = row[at_description].strip() if at_description is not None else ''
+            ident = row[at_fitid].strip() if at_fitid is not None else _fitid(day, cents, memo, seen)
+            yield StatementLine(ident, day, cents, memo)
+    finally:
+        if isinstance(source, str):
+            handle.close()
+
+
+_OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>|</BANKTRANLIST>))', re.S | re.I)
+_OFX_FIELD = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+def read_ofx(source: Union[str, IO[Any]], encoding: str = 'latin-1') -> Iterator[StatementLine]:
+    """Linhas (`<STMTTRN>`) de um extrato OFX 1.x (SGML) ou 2.x (XML)"""
+    handle = _open(source, encoding)
+    try:
+        content = handle.read()
+    finally:
+        if isinstance(source, str):
+            handle.close()
+    seen: Dict[Tuple[Date, int, str], int] = {}
+    for block in _OFX_TRANSACTION.finditer(content):
+        fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(block.group(1))}
+        posted = fields.get('DTPOSTED', '')
+        if len(posted) < 8 or 'TRNAMT' not in fields:
+            raise ValueError(f"Transação OFX sem data ou valor: {block.group(1).strip()[:80]}")
+        day = Date(int(posted[:4]), int(posted[4:6]), int(posted[6:8]))
+        amount = fields['TRNAMT']
+        cents = _cents(amount, ',' if ',' in amount and '.' not in amount else '.')
+        memo = fields.get('MEMO') or fields.get('NAME') or ''
+        yield StatementLine(fields.get('FITID') or _fitid(day, cents, memo, seen), day, cents, memo)
+
+
+def read_statement(path: str, **options: Any) -> Iterator[StatementLine]:
+    """Lê um extrato pelo tipo do arquivo: `.ofx` ou CSV (`options` vão para o leitor)"""
+    if path.lower().endswith('.ofx'):
+        return read_ofx(path, **options)
+    return read_csv(path, **options)
+
+
+def _unique(lines: Iterable[StatementLine]) -> List[StatementLine]:
+    """As linhas com FITIDs únicos: um FITID repetido pelo banco ganha o sufixo `#2`, `#3`, ..."""
+    result = list(lines)
+    counts: Dict[str, int] = {}
+    for index, line in enumerate(result):
+        count = counts[line.fitid] = counts.get(line.fitid, 0) + 1
+        if count > 1:
+            result[index] = line._replace(fitid=f"{line.fitid}#{count}")
+    return result
+
+
+# Casamento
+
+def _count(ids: Any) -> int:
+    return len(ids) if type(ids) is list else 1
+
+
+def _take(keyed: Dict[int, Any], key: int, ids: Any) -> Any:
+    """Retira de `keyed` o menor id da chave"""
+    if type(ids) is not list:
+        del keyed[key]
+        return ids
+    entry_id = ids.pop()
+    if not ids:
+        del keyed[key]
+    return entry_id
+
+
+def match(lines: List[StatementLine], candidates: Iterable[Tuple[Any, int, int]],
+          tolerance: int = TOLERANCE) -> List[Tuple[str, Any, Optional[int], int]]:
+    """
+    Casa as linhas do extrato com os lançamentos candidatos
+
+    `candidates` são tuplas (id, ordinal da data, centavos com sinal). Retorna,
+    na ordem de `lines`, (status, id do lançamento, dias de diferença,
+    candidatos vistos). Cada lançamento casa com no máximo uma linha.
+    """
+    # (centavos, dia) -> id, ou lista de ids em ordem decrescente quando há mais de um (o menor sai
+    # por pop()); a chave é um só inteiro e a maioria dos valores dispensa uma lista
+    keyed: Dict[int, Any] = {}
+    for entry_id, day, cents in candidates:
+        key = cents * _SPAN + day
+        ids = keyed.get(key)
+        if ids is None:
+            keyed[key] = entry_id
+        elif type(ids) is list:
+            ids.append(entry_id)
+        else:
+            keyed[key] = [ids, entry_id]
+    for ids in keyed.values():
+        if type(ids) is list:
+            ids.sort(reverse=True)
+
+    # Poucas datas distintas em muitas linhas: o ordinal é calculado uma vez por data
+    ordinals: Dict[Date, int] = {}
+    keys = []
+    for line in lines:
+        day = ordinals.get(line.day)
+        if day is None:
+            day = ordinals[line.day] = line.day.toordinal()
+        keys.append(line.cents * _SPAN + day)
+
+    results: List[Tuple[str, Any, Optional[int], int]] = [(UNMATCHED, None, None, 0)] * len(lines)
+    # Em ordem de valor e data; linhas iguais mantêm a ordem do extrato
+    pending = sorted(range(len(lines)), key=keys.__getitem__)
+    # Varredura por distância: todas as linhas procuram o mesmo dia antes de aceitar 1 dia de diferença
+    for distance in range(tolerance + 1):
+        remaining = []
+        for index in pending:
+            key = keys[index]
+            before = keyed.get(key - distance)
+            after = keyed.get(key + distance) if distance else None
+            if before is not None and after is not None:
+                results[index] = (AMBIGUOUS, None, distance, _count(before) + _count(after))
+            elif before is not None:
+                count = _count(before)
+                results[index] = (MATCHED, _take(keyed, key - distance, before), -distance, count)
+            elif after is not None:
+                count = _count(after)
+                results[index] = (MATCHED, _take(keyed, key + distance, after), distance, count)
+            else:
+                remaining.append(index)
+        pending = remaining
+        if not pending:
+            break
+    return results
+
+
+class Reconciler:
+    """Conciliação de extratos com os lançamentos de um modelo"""
+
+    def __init__(self, model: Any, account: str, date: str, amount: str, kind: Optional[str] = None,
+                 credit: Any = 'entrada', debit: Any = 'saida', table: Optional[str] = None,
+                 tolerance: int = TOLERANCE):
+        self.model = model
+        self.account = account
+        self.date = date
+        self.amount = amount
+        self.kind = kind
+        self.credit = credit
+        self.debit = debit
+        self.tolerance = tolerance
+        entries = model.__table__
+        pk = list(entries.primary_key.columns)[0]
+        self.table = Table(
+            table or f"{entries.name}_conciliacao", entries.metadata,
+            Column('account_id', entries.c[account].type, primary_key=True),
+            Column('fitid', String(255), primary_key=True),
+            Column('data', DateType, nullable=False),
+            Column('valor', Money, nullable=False),
+            Column('descricao', String(255)),
+            Column('status', String(20), nullable=False),
+            Column('entry_id', pk.type),
+            Column('days_apart', Integer),
+            Column('candidates', Integer, nullable=False, default=0),
+            Column('reconciled_at', DateTime, nullable=False),
+            schema=entries.schema,
+        )
+        Index(f"ix_{self.table.name}_entry", self.table.c.account_id, self.table.c.entry_id)
+        reconcilers[self.table.name] = self
+
+    @property
+    def engine(self) -> Engine:
+        return self.model.session().get_bind(mapper=inspect(self.model))
+
+    def candidates(self, conn: Connection, account_id: Any, start: Date, end: Date) -> Iterator[Tuple[Any, int, int]]:
+        """(id, ordinal da data, centavos com sinal) dos lançamentos da conta ainda não conciliados"""
+        entries = self.model.__table__
+        pk = list(entries.primary_key.columns)[0]
+        amount = entries.c[self.amount]
+        money = isinstance(amount.type, Money)
+        kind = entries.c[self.kind] if self.kind else None
+        reconciled = select(self.table.c.entry_id).where(
+            self.table.c.account_id == account_id, self.table.c.status == MATCHED, self.table.c.entry_id.isnot(None))
+        # A data vem como o driver a entrega (texto no SQLite), convertida uma vez por dia distinto
+        query = (select(pk, type_coerce(entries.c[self.date], String), raw(amount) if money else amount,
+                        *([kind] if kind is not None else []))
+                 .where(entries.c[self.account] == account_id,
+                        entries.c[self.date].between(start, end), pk.notin_(reconciled)))
+        ordinals: Dict[Any, int] = {}
+        for rows in stream(conn, query, WRITE_BATCH * 10):
+            for row in rows:
+                cents = row[2] if money else Amount(row[2]).cents
+                if kind is not None:
+                    if row[3] == self.debit:
+                        cents = -cents
+                    elif row[3] != self.credit:
+                        continue
+                day = ordinals.get(row[1])
+                if day is None:
+                    value = row[1]
+                    day = ordinals[value] = (Date.fromisoformat(value[:10]) if isinstance(value, str)
+                                             else value).toordinal()
+                yield row[0], day, cents
+
+    def _write(self, conn: Connection, rows: List[List[Any]]) -> None:
+        """
+        Grava as linhas de resultado (na ordem das colunas, `valor` em
+        centavos) por `executemany` do driver
+
+        Os valores passam pelos conversores do dialeto uma vez por valor
+        distinto (datas se repetem muito), sem o custo por linha do
+        `insert()` do Core.
+        """
+        dialect = conn.dialect
+        keys = [column.key for column in self.table.c]
+        compiled = self.table.insert().compile(
+            dialect=dialect, column_keys=keys,
+            schema_translate_map=conn.get_execution_options().get('schema_translate_map'))
+        converters = []
+        for position, column in enumerate(self.table.c):
+            kind = column.type.impl_instance if isinstance(column.type, Money) else column.type
+            processor = kind.dialect_impl(dialect).bind_processor(dialect)
+            if processor is not None:
+                converters.append((position, processor, {}))
+        for row in rows:
+            for position, processor, seen in converters:
+                value = row[position]
+                if value is not None:
+                    converted = seen.get(value)
+                    if converted is None:
+                        converted = seen[value] = processor(value)
+                    row[position] = converted
+        if compiled.positional:
+            order = [keys.index(name) for name in compiled.positiontup]
+            parameters: List[Any] = [tuple(row[index] for index in order) for row in rows]
+        else:
+            parameters = [dict(zip(keys, row)) for row in rows]
+        conn.exec_driver_sql(compiled.string, parameters)
+
+    def reconcile(self, account: Any, statement: Union[str, Iterable[StatementLine]],
+                  tolerance: Optional[int] = None, conn: Optional[Connection] = None) -> Dict[str, int]:
+        """
+        Concilia o extrato (caminho de um arquivo ou linhas) com os lançamentos
+        de `account` (instância ou id) e grava os resultados
+
+        Retorna a quantidade de linhas por status; 'skipped' são as linhas já
+        conciliadas em importações anteriores. Sem `conn`, tudo acontece em
+        uma transação própria.
+        """
+        if conn is None:
+            with self.engine.begin() as conn:
+                return self.reconcile(account, statement, tolerance, conn)
+        began = time.perf_counter()
+        account_id = getattr(account, 'id', account)
+        tolerance = self.tolerance if tolerance is None else tolerance
+        if tolerance < 0:
+            raise ValueError("A tolerância deve ser de zero ou mais dias")
+        lines = _unique(read_statement(statement) if isinstance(statement, str) else statement)
+        summary = {MATCHED: 0, UNMATCHED: 0, AMBIGUOUS: 0, 'skipped': 0}
+        if not lines:
+            return summary
+        self.table.create(conn, checkfirst=True)
+        start = min(line.day for line in lines)
+        end = max(line.day for line in lines)
+
+        # Linhas já conciliadas são mantidas; as demais são refeitas
+        previous = dict(conn.execute(
+            select(self.table.c.fitid, self.table.c.status)
+            .where(self.table.c.account_id == account_id, self.table.c.data.between(start, end))).all())
+        if previous:
+            stale = [line.fitid for line in lines if previous.get(line.fitid, MATCHED) != MATCHED]
+            for offset in range(0, len(stale), DELETE_BATCH):
+                conn.execute(self.table.delete().where(self.table.c.account_id == account_id,
+                                                       self.table.c.fitid.in_(stale[offset:offset + DELETE_BATCH])))
+            pending = [line for line in lines if previous.get(line.fitid) != MATCHED]
+            summary['skipped'] = len(lines) - len(pending)
+            lines = pending
+
+        candidates = self.candidates(conn, account_id, Date.fromordinal(start.toordinal() - tolerance),
+                                     Date.fromordinal(end.toordinal() + tolerance))
+        results = match(lines, candidates, tolerance)
+
+        now = datetime.now()
+        rows: List[List[Any]] = []
+        for line, (status, entry_id, days_apart, count) in zip(lines, results):
+            summary[status] += 1
+            rows.append([account_id, line.fitid, line.day, line.cents, line.description[:255] or None,
+                         status, entry_id, days_apart, count, now])
+            if len(rows) >= WRITE_BATCH:
+                self._write(conn, rows)
+                rows = []
+        if rows:
+            self._write(conn, rows)
+        logger.info("Conciliação da conta %s em %s: %s (%.2fs)", account_id, self.table.name, summary,
+                    time.perf_counter() - began)
+        return summary
+
+    def results(self, account: Any, status: Optional[str] = None,
+                conn: Optional[Connection] = None) -> List[Dict[str, Any]]:
+        """Resultados gravados da conta, opcionalmente de um status, em ordem de data"""
+        query = select(self.table).where(self.table.c.account_id == getattr(account, 'id', account))
+        if status is not None:
+            query = query.where(self.table.c.status == status)
+        query = query.order_by(self.table.c.data, self.table.c.fitid)
+        if conn is None:
+            return [dict(row) for row in self.model.session().execute(query).mappings()]
+        return [dict(row) for row in conn.execute(query).mappings()]
@@ -0,0 +1,251 @@
+"""
+Relatórios financeiros agregados no banco: aging e fluxo de caixa
+
+Os títulos em aberto (contas a pagar e a receber) são agregados sem carregar
+objetos do ORM:
+
+    from quentorm.reports import aging, cash_flow, net_cash_flow
+
+    aging(ContaPagar, group_by='fornecedor_id')             # 0-30, 31-60, ... dias em atraso
+    entradas = cash_flow(ContaReceber, days=90, period='week')
+    saidas = cash_flow(ContaPagar, days=90, period='week')
+    net_cash_flow(entradas, saidas, opening_balance=saldo_atual)
+
+Os padrões de colunas (`data_vencimento`, `valor`, `status` = 'pendente')
+são os de ContaPagar e ContaReceber. Com `strategy='sql'` (padrão nos bancos
+suportados) as faixas viram um `GROUP BY CASE` com limites em datas, sem
+aritmética de datas do dialeto. Com `strategy='stream'` as colunas são lidas
+em lotes e acumuladas com NumPy (ou em Python puro, se o NumPy não estiver
+instalado), em valores inteiros de centavos; colunas `Money` já são lidas em
+centavos, sem conversão por linha. Títulos com valor nulo ficam fora dos
+relatórios.
+"""
+
+from bisect import bisect_right
+from datetime import date as Date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, null, select, true
+from sqlalchemy.engine import Connection
+
+from .utils.money import Money, raw
+from .utils.reading import connect, stream
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# Dialetos em que o agrupamento é feito pelo banco
+SQL_DIALECTS = ('postgresql', 'mysql', 'mariadb', 'sqlite', 'mssql', 'oracle')
+
+STRATEGIES = ('auto', 'sql', 'stream')
+
+PERIODS = ('day', 'week', 'month')
+
+NOT_DUE = 'a vencer'
+
+# Linhas lidas por lote na estratégia `stream`
+STREAM_BATCH = 50_000
+
+
+def bucket_labels(buckets: Sequence[int]) -> List[str]:
+    """Rótulos das faixas: 'a vencer', '0-30', '31-60', ..., '91+'"""
+    labels, low = [NOT_DUE], 0
+    for high in buckets:
+        labels.append(f"{low}-{high}")
+        low = high + 1
+    labels.append(f"{low}+")
+    return labels
+
+
+def _columns(model: Any, names: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    table = model.__table__
+    return {key: table.c[name] if name else None for key, name in names.items()}
+
+
+def _scale(column: Any) -> int:
+    return getattr(column.type, 'scale', None) or 2
+
+
+def _streamed(column: Any) -> Tuple[Any, int]:
+    """A coluna de valores lida no stream e a escala que a leva a centavos"""
+    if isinstance(column.type, Money):
+        return raw(column), 0
+    return column, _scale(column)
+
+
+def _strategy(strategy: str, conn: Connection) -> str:
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estratégia inválida: {strategy}. Use uma de: {', '.join(STRATEGIES)}")
+    if strategy == 'auto':
+        return 'sql' if conn.dialect.name in SQL_DIALECTS else 'stream'
+    return strategy
+
+
+def _filters(cols: Dict[str, Any], open_status: Sequence[Any], start: Optional[Date], end: Optional[Date]) -> List[Any]:
+    # Títulos sem valor ficam fora nas duas estratégias (o stream não acumula NULL)
+    conditions = [cols['amount'].isnot(None)]
+    if cols['status'] is not None and open_status:
+        conditions.append(cols['status'].in_(list(open_status)))
+    if start is not None:
+        conditions.append(cols['due'] >= start)
+    if end is not None:
+        conditions.append(cols['due'] <= end)
+    return conditions
+
+
+def _accumulate(batches: Iterable[List[Any]], bounds: List[int], scale: int) -> Dict[Tuple[Any, int], List[int]]:
+    """
+    {(grupo, faixa): [quantidade, total em centavos]} das linhas (grupo, vencimento, valor)
+
+    A faixa é a posição do ordinal do vencimento em `bounds` (crescente).
+    """
+    factor = 10 ** scale
+    totals: Dict[Tuple[Any, int], List[int]] = {}
+    groups: Dict[Any, int] = {}
+    for rows in batches:
+        if _np is not None:
+            keys = [groups.setdefault(row[0], len(groups)) for row in rows]
+            days = _np.fromiter((row[1].toordinal() for row in rows), dtype=_np.int64, count=len(rows))
+            cents = _np.fromiter((int(round(row[2] * factor)) for row in rows), dtype=_np.int64, count=len(rows))
+            slots = _np.searchsorted(_np.asarray(bounds, dtype=_np.int64), days, side='right')
+            combined = _np.asarray(keys, dtype=_np.int64) * (len(bounds) + 1) + slots
+            counts = _np.bincount(combined)
+            # bincount com pesos usa float64: a soma exata em centavos é feita por np.add.at
+            sums = _np.zeros(len(counts), dtype=_np.int64)
+            _np.add.at(sums, combined, cents)
+            names = {index: group for group, index in groups.items()}
+            for position in _np.nonzero(counts)[0]:
+                key = (names[int(position) // (len(bounds) + 1)], int(position) % (len(bounds) + 1))
+                entry = totals.setdefault(key, [0, 0])
+                entry[0] += int(counts[position])
+                entry[1] += int(sums[position])
+        else:
+            for group, due, amount in rows:
+                entry = totals.setdefault((group, bisect_right(bounds, due.toordinal())), [0, 0])
+                entry[0] += 1
+                entry[1] += int(round(amount * factor))
+    return totals
+
+
+def aging(model: Any, as_of: Optional[Date] = None, buckets: Sequence[int] = (30, 60, 90),
+          group_by: Optional[str] = None, start: Optional[Date] = None, end: Optional[Date] = None,
+          due: str = 'data_vencimento', amount: str = 'valor', status: Optional[str] = 'status',
+          open_status: Sequence[Any] = ('pendente',), strategy: str = 'auto', conn: Optional[Connection] = None,
+          batch_size: int = STREAM_BATCH) -> List[Dict[str, Any]]:
+    """
+    Títulos em aberto por faixa de dias em atraso em `as_of` (padrão: hoje)
+
+    Retorna linhas {'group', 'bucket', 'count', 'total'} ordenadas por grupo
+    e faixa; 'group' é None sem `group_by`. `start`/`end` filtram pelo
+    vencimento.
+    """
+    as_of = as_of or Date.today()
+    buckets = sorted(buckets)
+    labels = bucket_labels(buckets)
+    cols = _columns(model, {'due': due, 'amount': amount, 'status': status, 'group': group_by})
+    # Sem `group_by` o grupo é NULL no SELECT e fica fora do GROUP BY
+    grouping = [cols['group']] if cols['group'] is not None else []
+    group = cols['group'] if cols['group'] is not None else null()
+    # Vencimentos em ordem crescente: 'a vencer' fica em cima, depois as faixas do atraso menor ao maior
+    limits = [as_of - timedelta(days=high) for high in reversed(buckets)]
+    conditions = _filters(cols, open_status, start, end)
+    with connect(model, conn) as conn:
+        if _strategy(strategy, conn) == 'sql':
+            whens = [(cols['due'] > as_of, 0)]
+            whens += [(cols['due'] >= as_of - timedelta(days=high), index) for index, high in enumerate(buckets, 1)]
+            # A faixa é calculada em uma subconsulta: no GROUP BY externo ela é só uma coluna (os
+            # parâmetros do CASE não se repetem, o que drivers com parâmetros no servidor recusariam)
+            inner = select(group.label('grp'), case(*whens, else_=len(buckets) + 1).label('bucket'),
+                           cols['amount'].label('amount')).where(and_(true(), *conditions)).subquery()
+            rows = conn.execute(
+                select(inner.c.grp, inner.c.bucket, func.count(), func.sum(inner.c.amount))
+                .group_by(*([inner.c.grp] if grouping else []), inner.c.bucket)
+            ).all()
+            result = [{'group': grp, 'bucket': labels[index], 'count': count, 'total': Decimal(str(total or 0))}
+                      for grp, index, count, total in rows]
+        else:
+            amount_column, scale = _streamed(cols['amount'])
+            query = select(group, cols['due'], amount_column).where(and_(true(), *conditions))
+            # Ordinais crescentes: antes do primeiro limite é a faixa mais antiga, depois de `as_of` é 'a vencer'
+            bounds = [limit.toordinal() for limit in limits] + [as_of.toordinal() + 1]
+            totals = _accumulate(stream(conn, query, batch_size), bounds, scale)
+            factor = Decimal(10) ** _scale(cols['amount'])
+            result = [{'group': grp, 'bucket': labels[len(labels) - 1 - slot], 'count': count,
+                       'total': Decimal(cents) / factor}
+                      for (grp, slot), (count, cents) in totals.items()]
+    order = {label: index for index, label in enumerate(labels)}
+    return sorted(result, key=lambda row: (str(row['group']), order[row['bucket']]))
+
+
+def period_start(day: Date, period: str) -> Date:
+    """Primeiro dia do período (dia, semana iniciada na segunda-feira ou mês)"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def cash_flow(model: Any, start: Optional[Date] = None, days: int = 90, period: str = 'day',
+              group_by: Optional[str] = None, include_overdue: bool = False, due: str = 'data_vencimento',
+              amount: str = 'valor', status: Optional[str] = 'status', open_status: Sequence[Any] = ('pendente',),
+              strategy: str = 'auto', conn: Optional[Connection] = None,
+              batch_size: int = STREAM_BATCH) -> List[Dict[str, Any]]:
+    """
+    Projeção dos títulos em aberto que vencem em [start, start + days)
+
+    Retorna linhas {'group', 'period', 'count', 'total'}, com 'period' o
+    primeiro dia do período. Com `include_overdue`, os vencidos antes de
+    `start` entram no primeiro período.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Período inválido: {period}. Use um de: {', '.join(PERIODS)}")
+    start = start or Date.today()
+    end = start + timedelta(days=days - 1)
+    cols = _columns(model, {'due': due, 'amount': amount, 'status': status, 'group': group_by})
+    grouping = [cols['group']] if cols['group'] is not None else []
+    group = cols['group'] if cols['group'] is not None else null()
+    conditions = _filters(cols, open_status, None if include_overdue else start, end)
+    with connect(model, conn) as conn:
+        if _strategy(strategy, conn) == 'sql':
+            # Agrupado por dia no banco (no máximo `days` linhas por grupo); semanas e meses em Python
+            rows = conn.execute(
+                select(group.label('grp'), cols['due'], func.count(), func.sum(cols['amount']))
+                .where(and_(true(), *conditions)).group_by(*grouping, cols['due'])
+            ).all()
+            daily = [(grp, max(day, start), count, Decimal(str(total or 0))) for grp, day, count, total in rows]
+        else:
+            amount_column, scale = _streamed(cols['amount'])
+            query = select(group, cols['due'], amount_column).where(and_(true(), *conditions))
+            # Uma faixa por dia do intervalo; os vencidos caem na faixa 0 (o primeiro dia)
+            bounds = [(start + timedelta(days=offset)).toordinal() for offset in range(1, days)]
+            totals = _accumulate(stream(conn, query, batch_size), bounds, scale)
+            factor = Decimal(10) ** _scale(cols['amount'])
+            daily = [(grp, start + timedelta(days=slot), count, Decimal(cents) / factor)
+                     for (grp, slot), (count, cents) in totals.items()]
+    periods: Dict[Tuple[Any, Date], List[Any]] = {}
+    for grp, day, count, total in daily:
+        entry = periods.setdefault((grp, period_start(day, period)), [0, Decimal(0)])
+        entry[0] += count
+        entry[1] += total
+    return [{'group': grp, 'period': day, 'count': count, 'total': total}
+            for (grp, day), (count, total) in sorted(periods.items(), key=lambda item: (str(item[0][0]), item[0][1]))]
+
+
+def net_cash_flow(inflows: Iterable[Dict[str, Any]], outflows: Iterable[Dict[str, Any]],
+                  opening_balance: Any = 0) -> List[Dict[str, Any]]:
+    """Combina as projeções de recebimentos e pagamentos em saldo projetado por período"""
+    periods: Dict[Date, List[Decimal]] = {}
+    for rows, index in ((inflows, 0), (outflows, 1)):
+        for row in rows:
+            periods.setdefault(row['period'], [Decimal(0), Decimal(0)])[index] += row['total']
+    balance = Decimal(str(opening_balance))
+    result = []
+    for day in sorted(periods):
+        inflow, outflow = periods[day]
+        balance += inflow - outflow
+        result.append({'period': day, 'entradas': inflow, 'saidas': outflow, 'saldo_projetado': balance})
+    return result
@@ -0,0 +1,40 @@
+"""
+Ferramentas de teste do QuentORM
+
+`assert_max_queries` fixa o custo em consultas de um trecho de código, para
+que um lazy load por registro falhe no teste e não apareça só nos gráficos de
+latência de produção:
+
+    from quentorm.testing import assert_max_queries
+
+    def test_listar_contas_cliente(client):
+        with assert_max_queries(3):
+            client.get('/api/clientes/1/contas')
+
+Também pode ser usado como decorador (`@assert_max_queries(3)`).
+"""
+
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from .monitoring.profile import QueryProfile, profile
+
+
+class QueryBudgetExceeded(AssertionError):
+    """O trecho executou mais consultas que o permitido"""
+
+    def __init__(self, limit: int, result: QueryProfile):
+        self.limit = limit
+        self.profile = result
+        super().__init__(f"{result.count} consultas executadas, o limite é {limit}\n{result.report()}")
+
+
+@contextmanager
+def assert_max_queries(limit: int, db: Any = None, connection: Optional[str] = None) -> Iterator[QueryProfile]:
+    """Falha se o bloco executar mais de `limit` instruções (em `db`/`connection`, se informados)"""
+    __tracebackhide__ = True
+    block = db.profile(connection) if db is not None else profile([connection] if connection else None)
+    with block as result:
+        yield result
+    if result.count > limit:
+        raise QueryBudgetExceeded(limit, result)
@@ -1,40 +1,59 @@
 """
 Módulo de utilitários do QuentORM
+
+Os nomes são importados sob demanda: os utilitários de projeto (subprocess,
+venv) só são carregados pelo comando `quentorm new`.
 """
 
-from .models import BaseModel, Column, String, Integer, Float, Boolean, DateTime, ForeignKey, relationship
-from .validators import validar_cpf, validar_cnpj, validar_cpf_cnpj, validar_agencia, validar_conta, validar_digito
-from .project import (
-    create_project_structure,
-    create_venv,
-    activate_venv,
-    install_dependencies,
-    create_config_files,
-    create_gitignore,
-    init_git
-)
-
-__all__ = [
-    'BaseModel',
-    'Column',
-    'String',
-    'Integer',
-    'Float',
-    'Boolean',
-    'DateTime',
-    'ForeignKey',
-    'relationship',
-    'validar_cpf',
-    'validar_cnpj',
-    'validar_cpf_cnpj',
-    'validar_agencia',
-    'validar_conta',
-    'validar_digito',
-    'create_project_structure',
-    'create_venv',
-    'activate_venv',
-    'install_dependencies',
-    'create_config_files',
-    'create_gitignore',
-    'init_git'
-] 
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+_EXPORTS = {
+    'BaseModel': '.models',
+    'Column': '.models',
+    'String': '.models',
+    'Integer': '.models',
+    'Float': '.models',
+    'Boolean': '.models',
+    'DateTime': '.models',
+    'ForeignKey': '.models',
+    'relationship': '.models',
+    'Money': '.money',
+    'Amount': '.money',
+    'validar_cpf': '.validators',
+    'validar_cnpj': '.validators',
+    'validar_cpf_cnpj': '.validators',
+    'validar_agencia': '.validators',
+    'validar_conta': '.validators',
+    'validar_digito': '.validators',
+    'create_project_structure': '.project',
+    'create_venv': '.project',
+    'activate_venv': '.project',
+    'install_dependencies': '.project',
+    'create_config_files': '.project',
+    'create_gitignore': '.project',
+    'init_git': '.project',
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .models import BaseModel, Boolean, Column, DateTime, Float, ForeignKey, Integer, String, relationship
+    from .money import Amount, Money
+    from .project import (activate_venv, create_config_files, create_gitignore, create_project_structure,
+                          create_venv, init_git, install_dependencies)
+    from .validators import (validar_agencia, validar_cnpj, validar_conta, validar_cpf, validar_cpf_cnpj,
+                             validar_digito)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(__all__)
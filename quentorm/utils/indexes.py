@@ -0,0 +1,139 @@
+"""
+Índices declarados nos modelos (`__indexes__`)
+
+Cada item de `__indexes__` é uma coluna, uma tupla de colunas ou um
+dicionário com as opções do índice:
+
+    class Lancamento(BaseModel):
+        __tablename__ = 'tbl_lancamentos'
+        __indexes__ = [
+            ('user_id', '-data'),                                   # composto, data decrescente
+            {'columns': ['status', 'data_vencimento'],
+             'where': "status = 'pendente'"},                       # parcial
+            {'columns': ['lower(email)'], 'unique': True},          # expressão
+            {'columns': ['conta_bancaria_id'], 'include': ['valor']},  # cobertura
+        ]
+
+Colunas com `-` na frente são decrescentes; o que não for um nome simples é
+tratado como expressão SQL. Opções: `name`, `unique`, `where`, `include` e
+`using`. Cada dialeto recebe o que suporta: `where` vale no PostgreSQL,
+SQLite e SQL Server (no MySQL o índice é criado completo); `include` vale no
+PostgreSQL e SQL Server (nos demais o índice não é de cobertura); `using`
+vale no PostgreSQL (e no MySQL para btree/hash).
+
+A exceção é o índice único parcial (`unique` com `where`): completo, ele
+seria mais restrito que o declarado. Nos dialetos sem índices parciais ele
+não é criado (com um aviso no log), e `Migration.create_index` recusa a
+combinação.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import Column, Index, MetaData, Table, text
+from sqlalchemy.types import NullType
+
+OPTIONS = ('name', 'unique', 'where', 'include', 'using')
+
+# Dialetos com índices parciais (CREATE INDEX ... WHERE)
+PARTIAL_DIALECTS = ('postgresql', 'sqlite', 'mssql')
+
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER = re.compile(r"^-?[A-Za-z_][\w]*$")
+
+
+def normalize_index(spec: Any) -> Dict[str, Any]:
+    """Converte um item de `__indexes__` em {'columns': [...], opções...}"""
+    if isinstance(spec, str):
+        spec = {'columns': [spec]}
+    elif isinstance(spec, (tuple, list)):
+        spec = {'columns': list(spec)}
+    elif isinstance(spec, dict):
+        spec = dict(spec)
+        unknown = set(spec) - set(OPTIONS) - {'columns'}
+        if unknown:
+            raise ValueError(f"Opções de índice desconhecidas: {', '.join(sorted(unknown))}")
+        if isinstance(spec.get('columns'), str):
+            spec['columns'] = [spec['columns']]
+    else:
+        raise TypeError(f"Índice inválido em __indexes__: {spec!r}")
+    if not spec.get('columns'):
+        raise ValueError("Índice sem colunas em __indexes__")
+    if isinstance(spec.get('include'), str):
+        spec['include'] = [spec['include']]
+    return spec
+
+
+def is_expression(column: str) -> bool:
+    return not _IDENTIFIER.match(column)
+
+
+def index_name(table: str, columns: Sequence[str]) -> str:
+    """Nome padrão: ix_<tabela>_<colunas> (expressões reduzidas a letras, números e _)"""
+    parts = [re.sub(r"\W+", '_', column.lstrip('-')).strip('_') for column in columns]
+    return f"ix_{table.rsplit('.', 1)[-1]}_{'_'.join(parts)}"
+
+
+def is_partial_unique(spec: Dict[str, Any]) -> bool:
+    return bool(spec.get('unique') and spec.get('where'))
+
+
+def supported(index: Index, dialect: Any) -> bool:
+    """Indica se o índice pode ser criado no dialeto sem mudar o que ele garante"""
+    return not index.info.get('partial_unique') or dialect.name in PARTIAL_DIALECTS
+
+
+def create_if_supported(ddl: Any, target: Index, bind: Any, dialect: Any = None, **kw: Any) -> bool:
+    if supported(target, dialect):
+        return True
+    logger.warning("Índice único parcial %s não criado: %s não tem índices parciais e o índice completo "
+                   "seria mais restrito que o declarado", target.name, dialect.name)
+    return False
+
+
+def _dialect_options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    options: Dict[str, Any] = {}
+    if spec.get('where'):
+        for dialect in PARTIAL_DIALECTS:
+            options[f"{dialect}_where"] = text(spec['where'])
+    if spec.get('include'):
+        options['postgresql_include'] = list(spec['include'])
+        options['mssql_include'] = list(spec['include'])
+    if spec.get('using'):
+        options['postgresql_using'] = spec['using']
+        if spec['using'].lower() in ('btree', 'hash'):
+            options['mysql_using'] = spec['using']
+    return options
+
+
+def build_index(table: Table, spec: Any) -> Index:
+    """Cria o `Index` do SQLAlchemy de uma especificação, ligado à tabela"""
+    spec = normalize_index(spec)
+    expressions: List[Any] = []
+    for column in spec['columns']:
+        if is_expression(column):
+            # Entre parênteses: o MySQL só aceita índices funcionais assim
+            expressions.append(text(f"({column})"))
+        elif column.startswith('-'):
+            expressions.append(table.c[column[1:]].desc())
+        else:
+            expressions.append(table.c[column])
+    name = spec.get('name') or index_name(table.name, spec['columns'])
+    index = Index(name, *expressions, unique=bool(spec.get('unique')), _table=table, **_dialect_options(spec))
+    if is_partial_unique(spec):
+        index.info['partial_unique'] = True
+        index.ddl_if(callable_=create_if_supported)
+    return index
+
+
+def standalone_index(table: str, spec: Any) -> Index:
+    """Índice sobre uma tabela sem modelo (migrações): só os nomes das colunas são conhecidos"""
+    spec = normalize_index(spec)
+    names = {column.lstrip('-') for column in spec['columns'] if not is_expression(column)}
+    names.update(spec.get('include') or ())
+    schema, _, name = table.rpartition('.')
+    stub = Table(name, MetaData(), *(Column(column, NullType()) for column in sorted(names)),
+                 schema=schema or None)
+    return build_index(stub, spec)
@@ -1,9 +1,18 @@
 """
 Módulo de modelos base do QuentORM
 """
+from typing import Any, Callable, Iterable, List, Optional
+
 from sqlalchemy import Column as _Column, String as _String, Integer as _Integer, Float as _Float
 from sqlalchemy import Boolean as _Boolean, DateTime as _DateTime, ForeignKey as _ForeignKey
-from sqlalchemy.orm import relationship as _relationship, DeclarativeBase
+from sqlalchemy import event as _event
+from sqlalchemy.orm import relationship as _relationship, DeclarativeBase, Session
+
+from ..caching import identity as _identity
+from ..monitoring.metrics import count_loaded as _count_loaded
+from .indexes import build_index
+from .partitions import Partitioning
+from .query import QueryBuilder
 
 class Base(DeclarativeBase):
     """Classe base para todos os modelos do QuentORM"""
@@ -13,9 +22,175 @@ class BaseModel(Base):
     """Classe base para todos os modelos do QuentORM"""
     __abstract__ = True
 
+    # Nome da conexão usada pelo modelo
+    __connection__ = 'default'
+
+    # Habilita o cache de registros por chave primária (find/find_many)
+    __cache_by_pk__ = False
+
+    # Tempo de vida das entradas do cache por chave primária (segundos ou timedelta)
+    __cache_ttl__ = None
+
+    # Índices do modelo: colunas, tuplas de colunas ou dicionários (ver `indexes`)
+    __indexes__ = ()
+
+    # Particionamento por data: ('range', coluna, 'day' | 'month' | 'year') (ver `partitions`)
+    __partition_by__ = None
+
+    # Partições do modelo, quando __partition_by__ é declarado
+    __partitioning__: Optional[Partitioning] = None
+
+    _connection_resolver: Optional[Callable[[str], Session]] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        table = cls.__dict__.get('__table__')
+        if table is not None:
+            for spec in cls.__dict__.get('__indexes__', ()):
+                build_index(table, spec)
+            if cls.__dict__.get('__partition_by__'):
+                cls.__partitioning__ = Partitioning(cls, cls.__partition_by__)
+
+    # Resolvedor das AsyncSessions, definido por AsyncDatabase.config()
+    _async_resolver: Optional[Callable[[str], Any]] = None
+
+    @classmethod
+    def set_connection_resolver(cls, resolver: Callable[[str], Session]) -> None:
+        """Define a função que retorna a sessão de uma conexão pelo nome"""
+        BaseModel._connection_resolver = resolver
+
+    @classmethod
+    def session(cls) -> Session:
+        """Retorna a sessão da conexão do modelo"""
+        if BaseModel._connection_resolver is None:
+            raise RuntimeError('Nenhuma conexão configurada. Use BaseModel.set_connection_resolver().')
+        return BaseModel._connection_resolver(cls.__connection__)
+
+    @classmethod
+    def set_async_connection_resolver(cls, resolver: Optional[Callable[[str], Any]]) -> None:
+        """Define a função que retorna a AsyncSession de uma conexão pelo nome"""
+        BaseModel._async_resolver = resolver
+
+    @classmethod
+    def async_session(cls) -> Any:
+        """Retorna a AsyncSession da conexão do modelo"""
+        if BaseModel._async_resolver is None:
+            raise RuntimeError('Nenhuma conexão asyncio configurada. Use AsyncDatabase().config().')
+        return BaseModel._async_resolver(cls.__connection__)
+
+    @classmethod
+    async def _run_async(cls, fn: Callable[[Session], Any]) -> Any:
+        """Executa uma função síncrona sobre a sessão da AsyncSession do modelo"""
+        return await cls.async_session().run_sync(fn)
+
+    @classmethod
+    def find(cls, pk: Any) -> Optional['BaseModel']:
+        """Busca um registro pela chave primária"""
+        return _identity.find(cls.session(), cls, pk)
+
+    @classmethod
+    def find_many(cls, ids: Iterable[Any]) -> List['BaseModel']:
+        """Busca vários registros pela chave primária, na ordem dos ids informados"""
+        return _identity.find_many(cls.session(), cls, ids)
+
+    def save(self) -> 'BaseModel':
+        """Insere ou atualiza o registro e confirma a transação da sessão"""
+        session = type(self).session()
+        session.add(self)
+        session.commit()
+        return self
+
+    def delete(self) -> None:
+        """Remove o registro e confirma a transação da sessão"""
+        session = type(self).session()
+        session.delete(self)
+        session.commit()
+
+    @classmethod
+    async def afind(cls, pk: Any) -> Optional['BaseModel']:
+        """Versão asyncio de `find`"""
+        return await cls._run_async(lambda session: _identity.find(session, cls, pk))
+
+    @classmethod
+    async def afind_many(cls, ids: Iterable[Any]) -> List['BaseModel']:
+        """Versão asyncio de `find_many`"""
+        ids = list(ids)
+        return await cls._run_async(lambda session: _identity.find_many(session, cls, ids))
+
+    async def asave(self) -> 'BaseModel':
+        """Versão asyncio de `save`"""
+        session = type(self).async_session()
+        session.add(self)
+        await session.commit()
+        return self
+
+    async def adelete(self) -> None:
+        """Versão asyncio de `delete`"""
+        session = type(self).async_session()
+        await session.delete(self)
+        await session.commit()
+
+    @classmethod
+    def query(cls) -> QueryBuilder:
+        """Inicia uma consulta fluente sobre o modelo"""
+        return QueryBuilder(cls)
+
+    @classmethod
+    def where(cls, column: str, *args: Any) -> QueryBuilder:
+        """Inicia uma consulta com um filtro: where('ativo', True) ou where('idade', '>', 18)"""
+        return cls.query().where(column, *args)
+
+    @classmethod
+    def where_in(cls, column: str, values: Iterable[Any]) -> QueryBuilder:
+        """Inicia uma consulta filtrando a coluna por uma lista de valores"""
+        return cls.query().where_in(column, values)
+
+    @classmethod
+    def where_like(cls, column: str, pattern: str) -> QueryBuilder:
+        """Inicia uma consulta filtrando a coluna por um padrão LIKE"""
+        return cls.query().where_like(column, pattern)
+
+    @classmethod
+    def order_by(cls, column: str, direction: str = 'asc') -> QueryBuilder:
+        """Inicia uma consulta ordenada pela coluna"""
+        return cls.query().order_by(column, direction)
+
+    @classmethod
+    def all(cls) -> List['BaseModel']:
+        """Retorna todos os registros"""
+        return cls.query().get()
+
+    @classmethod
+    def first(cls) -> Optional['BaseModel']:
+        """Retorna o primeiro registro"""
+        return cls.query().first()
+
+    @classmethod
+    def count(cls) -> int:
+        """Conta os registros"""
+        return cls.query().count()
+
+    @classmethod
+    async def aall(cls) -> List['BaseModel']:
+        """Versão asyncio de `all`"""
+        return await cls.query().aget()
+
+    @classmethod
+    async def afirst(cls) -> Optional['BaseModel']:
+        """Versão asyncio de `first`"""
+        return await cls.query().afirst()
+
+    @classmethod
+    async def acount(cls) -> int:
+        """Versão asyncio de `count`"""
+        return await cls.query().acount()
+
     def __repr__(self):
         return f"<{self.__class__.__name__}(id={getattr(self, 'id', None)})>"
 
+# Registros carregados por modelo (métrica quentorm_model_rows_total)
+_event.listen(BaseModel, 'load', _count_loaded, propagate=True)
+
 # Aliases para os tipos do SQLAlchemy
 Column = _Column
 String = _String
@@ -24,4 +199,4 @@ Float = _Float
 Boolean = _Boolean
 DateTime = _DateTime
 ForeignKey = _ForeignKey
-relationship = _relationship 
\ No newline at end of file
+relationship = _relationship
@@ -0,0 +1,326 @@
+"""
+Valores monetários em centavos inteiros
+
+`Money` é um tipo de coluna gravado como BIGINT em centavos e lido como
+`Amount`, um valor imutável com aritmética exata em inteiros:
+
+    from quentorm import Amount, Money
+
+    class ContaPagar(Model):
+        valor = Column(Money, nullable=False)
+
+    conta.valor                            # Amount('1250.90')
+    conta.valor + Amount('0.10')           # Amount('1251.00')
+    conta.valor * Decimal('0.015')         # multa, arredondada ao centavo
+    conta.valor.to_decimal()               # Decimal('1250.90')
+    ContaPagar.where('valor', '>', 100)    # comparado em centavos (10000)
+
+A conversão de e para `Decimal` acontece só nas bordas: `Amount(Decimal)`,
+`Amount('10.50')` e `to_decimal()`. Valores `Amount` são comparáveis e têm o
+mesmo hash que os números iguais (`Amount('10') == 10 == Decimal('10.00')`).
+
+Para somar muitas linhas sem criar um objeto por valor, `raw(coluna)` lê os
+centavos como inteiros e `total()` soma a coluna inteira (com NumPy, se os
+valores vierem em um array):
+
+    centavos = conn.execute(select(raw(ContaPagar.valor))).scalars().all()
+    total(centavos)                        # Amount('...')
+"""
+
+import numbers
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from fractions import Fraction
+from typing import Any, Iterable, List, Optional
+
+from sqlalchemy import BigInteger, type_coerce
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# Casas decimais dos valores (centavos)
+SCALE = 2
+
+_FACTOR = 10 ** SCALE
+
+# Operadores em que o outro operando é um número, não um valor monetário
+_SCALAR_OPERATORS = (operators.mul, operators.truediv, operators.floordiv, operators.mod)
+
+_ARITHMETIC_OPERATORS = (operators.add, operators.sub) + _SCALAR_OPERATORS
+
+
+def _round(value: Decimal) -> int:
+    """Arredonda (metade para cima) um valor em centavos para inteiro"""
+    try:
+        return int(value.to_integral_value(ROUND_HALF_UP))
+    except (InvalidOperation, ValueError, OverflowError):
+        raise ValueError(f"Valor monetário inválido: {value}") from None
+
+
+def _integral(value: Any) -> int:
+    """Centavos inteiros recebidos como outro tipo numérico (sem arredondar)"""
+    if isinstance(value, bool) or not isinstance(value, (numbers.Integral, Decimal, float)):
+        raise TypeError(f"Centavos devem ser um número inteiro, não {type(value).__name__}")
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    exact = value.is_integer() if isinstance(value, float) else (
+        value.is_finite() and value == value.to_integral_value())
+    if not exact:
+        raise ValueError(f"Centavos fracionários: {value!r} (a coluna está em centavos?)")
+    return int(value)
+
+
+def _to_cents(value: Any) -> int:
+    if isinstance(value, Amount):
+        return value.cents
+    if isinstance(value, int):
+        return value * _FACTOR
+    if isinstance(value, Decimal):
+        return _round(value.scaleb(SCALE))
+    if isinstance(value, (float, str)):
+        try:
+            number = Decimal(value.strip() if isinstance(value, str) else repr(value))
+        except InvalidOperation:
+            raise ValueError(f"Valor monetário inválido: {value!r}") from None
+        return _round(number.scaleb(SCALE))
+    raise TypeError(f"Não é possível converter {type(value).__name__} em valor monetário")
+
+
+def _scaled(value: Any) -> Any:
+    """O número `value` em centavos, exato (None se não for um número)"""
+    if isinstance(value, Amount):
+        return value.cents
+    if isinstance(value, (int, Decimal)):
+        return value * _FACTOR
+    if isinstance(value, float):
+        return Fraction(value) * _FACTOR
+    return None
+
+
+class Amount:
+    """
+    Valor monetário imutável em centavos
+
+    Aceita `Decimal`, `int` (reais), `str` e `float` (pela representação
+    decimal, `0.1` vale 10 centavos), arredondando ao centavo (metade para
+    cima). Soma e subtração são exatas; multiplicação e divisão por números
+    arredondam ao centavo.
+    """
+
+    __slots__ = ('cents',)
+
+    cents: int
+
+    def __init__(self, value: Any = 0):
+        object.__setattr__(self, 'cents', _to_cents(value))
+
+    @classmethod
+    def from_cents(cls, cents: Any) -> 'Amount':
+        """
+        Valor a partir dos centavos
+
+        Aceita inteiros e números inteiros em outros tipos (`Decimal('1050')`,
+        como a soma de BIGINT no PostgreSQL); um valor fracionário indica uma
+        coluna que não está em centavos e levanta `ValueError`.
+        """
+        amount = object.__new__(cls)
+        object.__setattr__(amount, 'cents', cents if type(cents) is int else _integral(cents))
+        return amount
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __reduce__(self) -> Any:
+        return type(self).from_cents, (self.cents,)
+
+    def __copy__(self) -> 'Amount':
+        return self
+
+    def __deepcopy__(self, memo: Any) -> 'Amount':
+        return self
+
+    # Conversões
+
+    def to_decimal(self) -> Decimal:
+        """O valor como `Decimal` com duas casas (`Decimal('10.50')`)"""
+        return Decimal(self.cents).scaleb(-SCALE)
+
+    def __float__(self) -> float:
+        return self.cents / _FACTOR
+
+    def __bool__(self) -> bool:
+        return self.cents != 0
+
+    def __str__(self) -> str:
+        units, cents = divmod(abs(self.cents), _FACTOR)
+        return f"{'-' if self.cents < 0 else ''}{units}.{cents:0{SCALE}d}"
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}('{self}')"
+
+    def __format__(self, spec: str) -> str:
+        return format(self.to_decimal(), spec) if spec else str(self)
+
+    # Aritmética
+
+    def __add__(self, other: Any) -> 'Amount':
+        if type(other) is Amount:
+            return Amount.from_cents(self.cents + other.cents)
+        if isinstance(other, (Amount, int, Decimal, float)):
+            return Amount.from_cents(self.cents + _to_cents(other))
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> 'Amount':
+        if type(other) is Amount:
+            return Amount.from_cents(self.cents - other.cents)
+        if isinstance(other, (Amount, int, Decimal, float)):
+            return Amount.from_cents(self.cents - _to_cents(other))
+        return NotImplemented
+
+    def __rsub__(self, other: Any) -> 'Amount':
+        if isinstance(other, (int, Decimal, float)):
+            return Amount.from_cents(_to_cents(other) - self.cents)
+        return NotImplemented
+
+    def __mul__(self, other: Any) -> 'Amount':
+        if isinstance(other, int) and not isinstance(other, bool):
+            return Amount.from_cents(self.cents * other)
+        if isinstance(other, (Decimal, float)):
+            factor = other if isinstance(other, Decimal) else Decimal(repr(other))
+            return Amount.from_cents(_round(self.cents * factor))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: Any) -> Any:
+        """Divide por um número (arredondado ao centavo) ou por outro valor (razão em `Decimal`)"""
+        if isinstance(other, Amount):
+            return Decimal(self.cents) / Decimal(other.cents)
+        if isinstance(other, (int, Decimal, float)) and not isinstance(other, bool):
+            divisor = Decimal(repr(other)) if isinstance(other, float) else Decimal(other)
+            return Amount.from_cents(_round(Decimal(self.cents) / divisor))
+        return NotImplemented
+
+    def __neg__(self) -> 'Amount':
+        return Amount.from_cents(-self.cents)
+
+    def __pos__(self) -> 'Amount':
+        return self
+
+    def __abs__(self) -> 'Amount':
+        return self if self.cents >= 0 else Amount.from_cents(-self.cents)
+
+    def allocate(self, *ratios: Any) -> List['Amount']:
+        """
+        Divide o valor nas proporções `ratios` sem perder centavos
+
+        `Amount('100').allocate(1, 1, 1)` dá 33,34 + 33,33 + 33,33: os
+        centavos que sobram vão para as primeiras partes.
+        """
+        if not ratios or any(ratio < 0 for ratio in ratios) or not sum(ratios):
+            raise ValueError("Informe proporções não negativas com soma positiva")
+        weights = [Fraction(ratio) for ratio in ratios]
+        whole = sum(weights)
+        sign = -1 if self.cents < 0 else 1
+        parts = [abs(self.cents) * weight // whole for weight in weights]
+        for index in range(abs(self.cents) - int(sum(parts))):
+            parts[index % len(parts)] += 1
+        return [Amount.from_cents(sign * int(part)) for part in parts]
+
+    # Comparação
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is Amount:
+            return self.cents == other.cents
+        scaled = _scaled(other)
+        return NotImplemented if scaled is None else self.cents == scaled
+
+    def __lt__(self, other: Any) -> bool:
+        scaled = _scaled(other)
+        return NotImplemented if scaled is None else self.cents < scaled
+
+    def __le__(self, other: Any) -> bool:
+        scaled = _scaled(other)
+        return NotImplemented if scaled is None else self.cents <= scaled
+
+    def __gt__(self, other: Any) -> bool:
+        scaled = _scaled(other)
+        return NotImplemented if scaled is None else self.cents > scaled
+
+    def __ge__(self, other: Any) -> bool:
+        scaled = _scaled(other)
+        return NotImplemented if scaled is None else self.cents >= scaled
+
+    def __hash__(self) -> int:
+        # Igual ao hash dos números de mesmo valor (10, Decimal('10.00'), 10.0)
+        units, cents = divmod(self.cents, _FACTOR)
+        return hash(units) if not cents else hash(Fraction(self.cents, _FACTOR))
+
+
+class Money(TypeDecorator):
+    """Coluna monetária gravada em centavos (BIGINT) e lida como `Amount`"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    # Casas decimais, como em Numeric(…, 2) (usado por relatórios e saldos)
+    scale = SCALE
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def _adapt_expression(self, op: Any, other_comparator: Any) -> Any:
+            # valor + valor e valor * 2 continuam em centavos; valor / valor é uma razão
+            if op in _ARITHMETIC_OPERATORS and not (op in _SCALAR_OPERATORS and
+                                                    isinstance(other_comparator.type, Money)):
+                return op, self.type
+            if op in _SCALAR_OPERATORS:
+                # Entre dois valores o resultado não está em centavos: vale a regra do BIGINT (/ dá NUMERIC)
+                impl = self.type.impl_instance
+                return impl.comparator_factory(self.expr)._adapt_expression(op, other_comparator)
+            return super()._adapt_expression(op, other_comparator)
+
+    @property
+    def python_type(self) -> type:
+        return Amount
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[int]:
+        if value is None:
+            return None
+        return value.cents if type(value) is Amount else _to_cents(value)
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[Amount]:
+        return None if value is None else Amount.from_cents(value)
+
+    def process_literal_param(self, value: Any, dialect: Any) -> str:
+        return str(self.process_bind_param(value, dialect))
+
+    def coerce_compared_value(self, op: Any, value: Any) -> Any:
+        # `valor > 100` compara com 100 reais; em `valor * 2` o 2 é só um número
+        if op in _SCALAR_OPERATORS:
+            return self.impl_instance.coerce_compared_value(op, value)
+        return self
+
+
+def raw(column: Any) -> Any:
+    """A coluna `Money` lida como centavos inteiros, sem criar um `Amount` por linha"""
+    return type_coerce(column, BigInteger)
+
+
+def total(values: Iterable[Any]) -> Amount:
+    """
+    Soma exata de uma coluna de valores
+
+    Aceita centavos inteiros (uma lista, como a de `raw()`, ou um array do
+    NumPy, somado em int64) ou valores `Amount`; nulos são ignorados.
+    """
+    if _np is not None and isinstance(values, _np.ndarray):
+        return Amount.from_cents(int(values.sum(dtype=_np.int64)))
+    result = sum(filter(None, values))
+    return result if isinstance(result, Amount) else Amount.from_cents(result)
@@ -0,0 +1,652 @@
+"""
+Particionamento por intervalo de datas (`__partition_by__`)
+
+    class Lancamento(BaseModel):
+        __tablename__ = 'tbl_lancamentos'
+        __partition_by__ = ('range', 'data', 'month')      # 'day', 'month' ou 'year'
+
+No PostgreSQL a tabela é particionada nativamente (PARTITION BY RANGE), com
+uma partição por período (`tbl_lancamentos_2025_03`); a chave primária da
+tabela inclui a coluna da partição, como o PostgreSQL exige. No SQLite e no
+MySQL cada período é uma tabela e `tbl_lancamentos` é uma view UNION ALL
+delas: as leituras do ORM passam pela view e os INSERT, UPDATE e DELETE são
+encaminhados para a tabela do período. Os ids dessas tabelas vêm de
+`quentorm_sequences`, para não se repetirem entre os períodos.
+
+As partições do período atual e dos `PARTITIONS_AHEAD` seguintes são criadas
+com a tabela; `ensure()` (ou `quentorm db:partitions`) cria as que faltam, e
+um INSERT em um período sem partição a cria na mesma transação (exceto no
+MySQL, onde o DDL encerraria a transação: lá o INSERT falha pedindo o
+`db:partitions`).
+
+O QueryBuilder usa os filtros da coluna de partição para ler só os períodos
+necessários: no PostgreSQL o planejador descarta as partições pelos mesmos
+filtros; no SQLite e no MySQL a consulta lê as tabelas dos períodos em vez
+da view inteira.
+"""
+
+import re
+import threading
+from datetime import date as Date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import (BigInteger, Column, Index, MetaData, PrimaryKeyConstraint, String, Table, event, func,
+                        inspect, or_, select, text, union_all, update)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.schema import CreateTable, DropTable
+from sqlalchemy.sql import Delete, Insert, Update, operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+from sqlalchemy.sql.visitors import iterate, replacement_traverse
+
+from .indexes import create_if_supported
+
+KINDS = ('range',)
+INTERVALS = ('day', 'month', 'year')
+
+# Dialetos sem particionamento nativo usável (o MySQL não aceita chaves estrangeiras em tabelas particionadas)
+FALLBACK_DIALECTS = ('sqlite', 'mysql', 'mariadb')
+
+# Períodos futuros criados junto com a tabela e por `ensure()`
+PARTITIONS_AHEAD = 3
+
+# Ids buscados por vez ao localizar a partição das linhas de um UPDATE/DELETE
+LOCATE_BATCH = 500
+
+_SUFFIXES = {'day': '%Y_%m_%d', 'month': '%Y_%m', 'year': '%Y'}
+_SUFFIX_PATTERN = re.compile(r"^\d{4}(_\d{2}){0,2}$")
+
+# Chave em Connection.info com os particionamentos que criaram partições na transação corrente
+_CREATED = 'quentorm.partitions.created'
+
+# Chave em Connection.info com o que falta fazer depois de um UPDATE/DELETE encaminhado
+_PENDING = 'quentorm.partitions.pending'
+
+sequences_table = Table(
+    'quentorm_sequences', MetaData(),
+    Column('name', String(255), primary_key=True),
+    Column('value', BigInteger, nullable=False),
+)
+
+# Tabelas particionadas, por nome (usadas por `db:partitions`)
+partitioned: Dict[str, 'Partitioning'] = {}
+
+
+def normalize_partition(spec: Any) -> Tuple[str, str, str]:
+    """Converte `__partition_by__` em (tipo, coluna, intervalo)"""
+    if not isinstance(spec, (tuple, list)) or len(spec) not in (2, 3):
+        raise TypeError(f"__partition_by__ inválido: {spec!r} (use ('range', 'coluna', 'month'))")
+    kind, column, interval = (tuple(spec) + ('month',))[:3]
+    if kind not in KINDS:
+        raise ValueError(f"Particionamento não suportado: {kind} (use {', '.join(KINDS)})")
+    if interval not in INTERVALS:
+        raise ValueError(f"Intervalo de partição inválido: {interval} (use {', '.join(INTERVALS)})")
+    return kind, column, interval
+
+
+def to_date(value: Any) -> Optional[Date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, Date):
+        return value
+    if isinstance(value, str):
+        try:
+            return Date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _midnight(value: Any) -> bool:
+    if isinstance(value, datetime):
+        return value.time() == datetime.min.time()
+    return isinstance(value, Date) or (isinstance(value, str) and len(value) <= 10)
+
+
+def date_range(conditions: Iterable[Tuple[str, str, str, Any]], column: str) -> Tuple[Optional[Date], Optional[Date]]:
+    """
+    Menor e maior data possíveis da coluna nos filtros do QueryBuilder (None:
+    sem limite). Com OR, vale a união dos grupos; filtros que não dão para
+    interpretar não limitam nada. Sem linhas possíveis, o início fica depois do fim.
+    """
+    groups: List[List[Any]] = []
+    for boolean, name, operator, value in conditions:
+        if boolean == 'or' or not groups:
+            groups.append([None, None, False])
+        if name != column:
+            continue
+        group = groups[-1]
+        if operator == 'in':
+            values = [to_date(item) for item in value]
+            if not values:
+                group[2] = True
+                continue
+            if None in values:
+                continue
+            low, high = min(values), max(values)
+        elif operator == 'is':
+            group[2] = True
+            continue
+        elif operator in ('=', '==', '>', '>=', '<', '<='):
+            day = to_date(value)
+            if day is None:
+                continue
+            low = day if operator in ('=', '==', '>', '>=') else None
+            high = day if operator in ('=', '==', '<', '<=') else None
+            if operator == '<' and _midnight(value):
+                # data < 2025-04-01 não chega a abril
+                high = day - timedelta(days=1)
+        else:
+            continue
+        if low is not None:
+            group[0] = low if group[0] is None else max(group[0], low)
+        if high is not None:
+            group[1] = high if group[1] is None else min(group[1], high)
+    if not groups:
+        return None, None
+    groups = [group for group in groups if not group[2]]
+    if not groups:
+        return Date.max, Date.min
+    lows = [group[0] for group in groups]
+    highs = [group[1] for group in groups]
+    return (None if None in lows else min(lows)), (None if None in highs else max(highs))
+
+
+def _native(ddl: Any, target: Any, bind: Any, dialect: Any = None, **kw: Any) -> bool:
+    """Índices da tabela mãe só no particionamento nativo (no fallback vão para cada período)"""
+    return dialect.name not in FALLBACK_DIALECTS and create_if_supported(ddl, target, bind, dialect=dialect, **kw)
+
+
+class Partitioning:
+    """Partições por intervalo de datas de um modelo"""
+
+    def __init__(self, model: Any, spec: Any):
+        self.kind, self.column, self.interval = normalize_partition(spec)
+        self.model = model
+        self.table = model.__table__
+        if self.column not in self.table.c:
+            raise ValueError(f"Coluna de partição '{self.column}' não existe em {self.table.name}")
+        primary_key = list(self.table.primary_key.columns)
+        # Só chaves de uma coluna recebem ids da sequência e são localizadas nos UPDATE/DELETE
+        self.pk = primary_key[0].key if len(primary_key) == 1 else None
+        self.pk_attr = inspect(model).get_property_by_column(primary_key[0]).key if self.pk else None
+        self.metadata = MetaData()
+        self.tables: Dict[Date, Table] = {}
+        self._known: Dict[Engine, Set[Date]] = {}
+        self._view: List[Date] = []
+        self._lock = threading.Lock()
+
+        self.table.info['partitioning'] = self
+        self.table.dialect_options['postgresql']['partition_by'] = f"RANGE ({self.column})"
+        for index in self.table.indexes:
+            index.ddl_if(callable_=_native)
+        event.listen(self.table, 'before_create', self._before_create)
+        event.listen(self.table, 'after_create', self._after_create)
+        event.listen(self.table, 'after_drop', self._after_drop)
+        partitioned[self.table.name] = self
+
+    # Períodos
+
+    def period(self, value: Any) -> Date:
+        """Início do período de uma data"""
+        day = to_date(value)
+        if day is None:
+            raise ValueError(f"Valor inválido para a coluna de partição {self.column}: {value!r}")
+        if self.interval == 'year':
+            return day.replace(month=1, day=1)
+        if self.interval == 'month':
+            return day.replace(day=1)
+        return day
+
+    def next_period(self, start: Date) -> Date:
+        if self.interval == 'year':
+            return start.replace(year=start.year + 1)
+        if self.interval == 'month':
+            return Date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        return start + timedelta(days=1)
+
+    def periods(self, first: Any, last: Any) -> List[Date]:
+        """Inícios dos períodos de `first` a `last` (inclusive)"""
+        start, end = self.period(first), self.period(last)
+        periods = []
+        while start <= end:
+            periods.append(start)
+            start = self.next_period(start)
+        return periods
+
+    def window(self, today: Optional[Date] = None, ahead: int = PARTITIONS_AHEAD) -> List[Date]:
+        """Período atual e os `ahead` seguintes"""
+        periods = [self.period(today or Date.today())]
+        for _ in range(ahead):
+            periods.append(self.next_period(periods[-1]))
+        return periods
+
+    def name(self, start: Date) -> str:
+        return f"{self.table.name}_{start.strftime(_SUFFIXES[self.interval])}"
+
+    def parse(self, name: str) -> Optional[Date]:
+        """Início do período de uma partição pelo nome (None se não for uma partição da tabela)"""
+        prefix = f"{self.table.name}_"
+        suffix = name[len(prefix):]
+        if not name.startswith(prefix) or not _SUFFIX_PATTERN.match(suffix):
+            return None
+        try:
+            return datetime.strptime(suffix, _SUFFIXES[self.interval]).date()
+        except ValueError:
+            return None
+
+    # Partições existentes
+
+    def _list(self, conn: Connection) -> Set[Date]:
+        if conn.dialect.name == 'postgresql':
+            names = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "JOIN pg_namespace n ON n.oid = p.relnamespace "
+                "WHERE p.relname = :parent AND n.nspname = coalesce(:schema, current_schema())"
+            ), {'parent': self.table.name, 'schema': self.table.schema}).scalars()
+        else:
+            names = inspect(conn).get_table_names(schema=self.table.schema)
+        return {start for start in map(self.parse, names) if start is not None}
+
+    def partitions(self, bind: Any, refresh: bool = False) -> Set[Date]:
+        """Inícios dos períodos com partição criada (em cache por engine)"""
+        engine = bind.engine
+        with self._lock:
+            known = self._known.get(engine)
+        if known is None or refresh:
+            if isinstance(bind, Connection):
+                known = self._list(bind)
+            else:
+                with bind.connect() as conn:
+                    known = self._list(conn)
+            with self._lock:
+                self._known[engine] = known
+        return set(known)
+
+    def forget(self, engine: Engine) -> None:
+        with self._lock:
+            self._known.pop(engine, None)
+
+    def covering(self, bind: Any, low: Optional[Date], high: Optional[Date]) -> List[Date]:
+        """
+        Períodos existentes que podem ter linhas entre `low` e `high` (None: sem
+        limite). Relê o catálogo se o intervalo for aberto ou tiver períodos fora
+        do cache: outro processo pode ter criado a partição.
+        """
+        if low is not None and high is not None and low > high:
+            return []
+        known = self.partitions(bind)
+        if low is None or high is None or any(start not in known for start in self.periods(low, high)):
+            known = self.partitions(bind, refresh=True)
+        first = self.period(low) if low is not None else None
+        return [start for start in sorted(known)
+                if (first is None or start >= first) and (high is None or start <= high)]
+
+    # Criação
+
+    def partition_table(self, start: Date) -> Table:
+        """Tabela do período no SQLite/MySQL: as colunas e os índices da tabela, sem chaves estrangeiras"""
+        table = self.tables.get(start)
+        if table is None:
+            parent = self.table
+            name = self.name(start)
+            table = Table(name, self.metadata, *(column._copy() for column in parent.columns), schema=parent.schema)
+            for index in parent.indexes:
+                expressions = [replacement_traverse(expression, {}, self._replacer(table))
+                               for expression in index.expressions]
+                index_name = (index.name.replace(parent.name, name, 1) if parent.name in index.name
+                              else f"{index.name}_{name[len(parent.name) + 1:]}")
+                copy = Index(index_name, *expressions, unique=index.unique, _table=table, **index.dialect_kwargs)
+                if index.info.get('partial_unique'):
+                    copy.info['partial_unique'] = True
+                    copy.ddl_if(callable_=create_if_supported)
+            self.tables[start] = table
+        return table
+
+    def _replacer(self, table: Table) -> Any:
+        parent = self.table
+
+        def replace(element: Any) -> Any:
+            if element is parent:
+                return table
+            if isinstance(element, Column) and element.table is parent:
+                return table.c[element.key]
+            return None
+        return replace
+
+    def retarget(self, statement: Any, start: Date) -> Any:
+        """O mesmo INSERT/UPDATE/DELETE sobre a tabela do período"""
+        return replacement_traverse(statement, {}, self._replacer(self.partition_table(start)))
+
+    def _create_native(self, conn: Connection, start: Date) -> None:
+        preparer = conn.dialect.identifier_preparer
+        name = preparer.quote(self.name(start))
+        if self.table.schema:
+            name = f"{preparer.quote_schema(self.table.schema)}.{name}"
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {preparer.format_table(self.table)} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{self.next_period(start).isoformat()}')"
+        ))
+
+    def create(self, conn: Connection, periods: Iterable[Date], view: bool = True) -> List[str]:
+        """Cria as partições que faltam dos períodos; retorna os nomes criados"""
+        missing = sorted(set(map(self.period, periods)) - self.partitions(conn))
+        if not missing:
+            return []
+        native = conn.dialect.name not in FALLBACK_DIALECTS
+        for start in missing:
+            if native:
+                self._create_native(conn, start)
+            else:
+                self.partition_table(start).create(conn, checkfirst=True)
+        with self._lock:
+            self._known.setdefault(conn.engine, set()).update(missing)
+        conn.info.setdefault(_CREATED, set()).add(self)
+        if not native and view:
+            self.refresh_view(conn)
+        return [self.name(start) for start in missing]
+
+    def require(self, conn: Connection, periods: Iterable[Date]) -> None:
+        """Garante as partições dos períodos antes de gravar neles"""
+        periods = set(periods)
+        missing = periods - self.partitions(conn)
+        if missing:
+            missing -= self.partitions(conn, refresh=True)
+        if not missing:
+            return
+        if conn.dialect.name in ('mysql', 'mariadb'):
+            names = ', '.join(self.name(start) for start in sorted(missing))
+            raise RuntimeError(f"Partições inexistentes: {names}. Crie com `quentorm db:partitions "
+                               f"--from {min(missing).isoformat()}` (no MySQL o DDL encerraria a transação).")
+        self.create(conn, missing)
+
+    def ensure(self, bind: Any, start: Optional[Date] = None, end: Optional[Date] = None,
+               ahead: int = PARTITIONS_AHEAD) -> List[str]:
+        """
+        Cria as partições de `start` (padrão: hoje) até `end` (padrão: `ahead`
+        períodos à frente); retorna os nomes criados
+        """
+        last = end or self.window(ahead=ahead)[-1]
+        periods = self.periods(start or Date.today(), last)
+        if isinstance(bind, Connection):
+            return self._ensure(bind, periods)
+        with bind.begin() as conn:
+            return self._ensure(conn, periods)
+
+    def _ensure(self, conn: Connection, periods: List[Date]) -> List[str]:
+        if conn.dialect.name in FALLBACK_DIALECTS:
+            sequences_table.create(conn, checkfirst=True)
+        return self.create(conn, periods)
+
+    # View do SQLite/MySQL
+
+    def view_sql(self, dialect: Any, periods: Sequence[Date]) -> str:
+        tables = [self.partition_table(start) for start in sorted(periods)]
+        body = union_all(*(select(*table.c) for table in tables)) if len(tables) > 1 else select(*tables[0].c)
+        return f"VIEW {dialect.identifier_preparer.format_table(self.table)} AS {body.compile(dialect=dialect)}"
+
+    def refresh_view(self, conn: Connection) -> None:
+        """Recria a view com todas as tabelas de período"""
+        sql = self.view_sql(conn.dialect, self.partitions(conn))
+        if conn.dialect.name == 'sqlite':
+            conn.execute(text(f"DROP VIEW IF EXISTS {conn.dialect.identifier_preparer.format_table(self.table)}"))
+            conn.execute(text(f"CREATE {sql}"))
+        else:
+            conn.execute(text(f"CREATE OR REPLACE {sql}"))
+
+    # Ids do SQLite/MySQL
+
+    def next_ids(self, conn: Connection, count: int) -> List[int]:
+        """
+        Reserva `count` ids em `quentorm_sequences`. No SQLite (um escritor por
+        vez) na própria transação; nos demais em uma transação à parte, para
+        não travar a sequência até o commit.
+        """
+        if conn.dialect.name == 'sqlite':
+            return self._allocate(conn, count)
+        with conn.engine.begin() as other:
+            return self._allocate(other, count)
+
+    def _allocate(self, conn: Connection, count: int) -> List[int]:
+        name = self.table.fullname
+        sequence = sequences_table.c
+        changed = conn.execute(update(sequences_table).where(sequence.name == name)
+                               .values(value=sequence.value + count)).rowcount
+        if not changed:
+            current = conn.execute(select(func.max(self.table.c[self.pk]))).scalar() or 0
+            conn.execute(sequences_table.insert().values(name=name, value=current + count))
+        last = conn.execute(select(sequence.value).where(sequence.name == name)).scalar()
+        return list(range(last - count + 1, last + 1))
+
+    # Encaminhamento das escritas
+
+    def route(self, conn: Connection, statement: Any, rows: List[Dict[str, Any]]) -> Tuple[Any, List[Any], Dict]:
+        if isinstance(statement, Insert):
+            return self._route_insert(conn, statement, rows)
+        if conn.dialect.name not in FALLBACK_DIALECTS:
+            return statement, rows, {}
+        return self._route_change(conn, statement, rows)
+
+    def _route_insert(self, conn: Connection, statement: Insert, rows: List[Dict[str, Any]]) -> Tuple[Any, List[Any], Dict]:
+        native = conn.dialect.name not in FALLBACK_DIALECTS
+        if statement._values or statement._multi_values or statement.select is not None:
+            if native:
+                return statement, rows, {}
+            raise ValueError(f"INSERT em {self.table.name} deve passar as linhas como parâmetros "
+                             f"(conn.execute(stmt, linhas)) para ser encaminhado à tabela do período")
+        key = self.table.c[self.column].key
+        if not native and self.pk is not None:
+            without_id = [index for index, row in enumerate(rows) if row.get(self.pk) is None]
+            if without_id:
+                rows = list(rows)
+                for index, new_id in zip(without_id, self.next_ids(conn, len(without_id))):
+                    rows[index] = dict(rows[index], **{self.pk: new_id})
+        groups: Dict[Date, List[Dict[str, Any]]] = {}
+        for row in rows:
+            if row.get(key) is None:
+                raise ValueError(f"A coluna de partição {self.table.name}.{self.column} não pode ser nula")
+            groups.setdefault(self.period(row[key]), []).append(row)
+        self.require(conn, groups)
+        if native or not groups:
+            return statement, rows, {}
+        starts = sorted(groups)
+        for start in starts[:-1]:
+            conn.execute(self.retarget(statement, start), groups[start] or None)
+        return self.retarget(statement, starts[-1]), groups[starts[-1]], {}
+
+    def _bound_pk(self, statement: Any) -> Optional[BindParameter]:
+        if self.pk is None or statement.whereclause is None:
+            return None
+        column = self.table.c[self.pk]
+        for element in iterate(statement.whereclause):
+            if (isinstance(element, BinaryExpression) and element.operator is operators.eq
+                    and element.left is column and isinstance(element.right, BindParameter)):
+                return element.right
+        return None
+
+    def locate(self, conn: Connection, ids: Sequence[Any]) -> Dict[Any, Date]:
+        """Período de cada id (pela view)"""
+        pk, column = self.table.c[self.pk], self.table.c[self.column]
+        located: Dict[Any, Date] = {}
+        unique = list(dict.fromkeys(ids))
+        for offset in range(0, len(unique), LOCATE_BATCH):
+            for row_id, value in conn.execute(select(pk, column).where(pk.in_(unique[offset:offset + LOCATE_BATCH]))):
+                located[row_id] = self.period(value)
+        return located
+
+    def _route_change(self, conn: Connection, statement: Any, rows: List[Dict[str, Any]]) -> Tuple[Any, List[Any], Dict]:
+        """
+        UPDATE/DELETE: pela chave primária, só na tabela do período de cada
+        linha; com outros filtros, em todas. As linhas de um UPDATE que mudou a
+        coluna de partição são movidas depois para a tabela do novo período.
+        """
+        known = sorted(self.partitions(conn))
+        if not known:
+            return statement, rows, {}
+        bound = self._bound_pk(statement)
+        groups: Dict[Date, List[Dict[str, Any]]]
+        if bound is not None and rows and all(bound.key in row for row in rows):
+            located = self.locate(conn, [row[bound.key] for row in rows])
+            groups = {}
+            for row in rows:
+                groups.setdefault(located.get(row[bound.key], known[0]), []).append(row)
+        elif bound is not None and not rows and bound.value is not None:
+            located = self.locate(conn, [bound.value])
+            groups = {located.get(bound.value, known[0]): []}
+        else:
+            groups = {start: rows for start in known}
+
+        key = self.table.c[self.column].key
+        moves = isinstance(statement, Update) and (
+            any(getattr(column, 'key', column) == key for column in (statement._values or {}))
+            or any(key in row for row in rows))
+        starts = sorted(groups)
+        extra = 0
+        for start in starts[:-1]:
+            extra += conn.execute(self.retarget(statement, start), groups[start] or None).rowcount
+        routed = self.retarget(statement, starts[-1])
+        if extra or moves:
+            conn.info.setdefault(_PENDING, {})[id(routed)] = (routed, self, extra, starts if moves else [])
+        return routed, groups[starts[-1]], {}
+
+    def relocate(self, conn: Connection, periods: Iterable[Date]) -> int:
+        """Move para a tabela certa as linhas cuja data saiu do período da tabela; retorna as movidas"""
+        moved = 0
+        for start in periods:
+            table = self.partition_table(start)
+            pk, column = table.c[self.pk], table.c[self.column]
+            stray = conn.execute(select(pk, column).where(
+                or_(column < start, column >= self.next_period(start)))).all()
+            targets: Dict[Date, List[Any]] = {}
+            for row_id, value in stray:
+                targets.setdefault(self.period(value), []).append(row_id)
+            self.require(conn, targets)
+            for target, ids in targets.items():
+                destination = self.partition_table(target)
+                conn.execute(destination.insert().from_select(
+                    [column.name for column in table.c], select(*table.c).where(pk.in_(ids))))
+                conn.execute(table.delete().where(pk.in_(ids)))
+                moved += len(ids)
+        return moved
+
+    # Leitura (QueryBuilder)
+
+    def source(self, periods: Sequence[Date]) -> Any:
+        """Entidade do modelo sobre as tabelas dos períodos, para o SELECT do SQLite/MySQL"""
+        tables = [self.partition_table(start) for start in periods]
+        if len(tables) == 1:
+            return aliased(self.model, tables[0], adapt_on_names=True)
+        subquery = union_all(*(select(*table.c) for table in tables)).subquery(self.table.name)
+        return aliased(self.model, subquery, adapt_on_names=True)
+
+    # Eventos de DDL
+
+    def _before_create(self, target: Table, connection: Connection, **kw: Any) -> None:
+        if connection.dialect.name in FALLBACK_DIALECTS:
+            sequences_table.create(connection, checkfirst=True)
+            self.create(connection, self.window(), view=False)
+            self._view = sorted(self.partitions(connection))
+
+    def _after_create(self, target: Table, connection: Connection, **kw: Any) -> None:
+        if connection.dialect.name not in FALLBACK_DIALECTS:
+            self.create(connection, self.window())
+
+    def _after_drop(self, target: Table, connection: Connection, **kw: Any) -> None:
+        if connection.dialect.name in FALLBACK_DIALECTS:
+            for start in sorted(self.partitions(connection, refresh=True)):
+                self.partition_table(start).drop(connection, checkfirst=True)
+            if inspect(connection).has_table(sequences_table.name):
+                connection.execute(sequences_table.delete().where(sequences_table.c.name == self.table.fullname))
+        self.forget(connection.engine)
+
+
+@compiles(CreateTable)
+def _create_table(element: CreateTable, compiler: Any, **kw: Any) -> str:
+    """No SQLite/MySQL a tabela particionada é a view das tabelas de período"""
+    partitioning = element.element.info.get('partitioning')
+    if partitioning is None or compiler.dialect.name not in FALLBACK_DIALECTS:
+        return compiler.visit_create_table(element, **kw)
+    return f"CREATE {partitioning.view_sql(compiler.dialect, partitioning._view or partitioning.window())}"
+
+
+@compiles(DropTable)
+def _drop_table(element: DropTable, compiler: Any, **kw: Any) -> str:
+    table = element.element
+    if 'partitioning' not in table.info or compiler.dialect.name not in FALLBACK_DIALECTS:
+        return compiler.visit_drop_table(element, **kw)
+    return f"DROP VIEW {compiler.preparer.format_table(table)}"
+
+
+@compiles(PrimaryKeyConstraint, 'postgresql')
+def _primary_key(constraint: PrimaryKeyConstraint, compiler: Any, **kw: Any) -> str:
+    """O PostgreSQL exige a coluna da partição na chave primária da tabela particionada"""
+    sql = compiler.visit_primary_key_constraint(constraint, **kw)
+    table = constraint.table if isinstance(constraint.table, Table) else None
+    partitioning = table.info.get('partitioning') if table is not None else None
+    if not sql or partitioning is None or partitioning.column in constraint.columns:
+        return sql
+    close = sql.index(')')
+    return f"{sql[:close]}, {compiler.preparer.quote(partitioning.column)}{sql[close:]}"
+
+
+def _target(statement: Any) -> Optional[Partitioning]:
+    if not isinstance(statement, (Insert, Update, Delete)):
+        return None
+    table = statement.table
+    return table.info.get('partitioning') if isinstance(table, Table) else None
+
+
+@event.listens_for(Engine, 'before_execute', retval=True)
+def _before_execute(conn: Connection, clauseelement: Any, multiparams: Any, params: Any,
+                    execution_options: Any) -> Tuple[Any, Any, Any]:
+    """Encaminha as escritas da tabela particionada (e cria as partições que faltam)"""
+    partitioning = _target(clauseelement)
+    if partitioning is None:
+        return clauseelement, multiparams, params
+    rows = list(multiparams) if multiparams else ([params] if params else [])
+    return partitioning.route(conn, clauseelement, rows)
+
+
+@event.listens_for(Engine, 'after_execute')
+def _after_execute(conn: Connection, clauseelement: Any, multiparams: Any, params: Any,
+                   execution_options: Any, result: Any) -> None:
+    pending = conn.info.get(_PENDING)
+    entry = pending.pop(id(clauseelement), None) if pending else None
+    if entry is None:
+        return
+    _, partitioning, extra, moved = entry
+    if extra:
+        # As linhas das outras tabelas de período entram na contagem (o ORM confere o rowcount)
+        result.rowcount = result.rowcount + extra
+    if moved:
+        partitioning.relocate(conn, moved)
+
+
+@event.listens_for(Engine, 'commit')
+def _commit(conn: Connection) -> None:
+    conn.info.pop(_CREATED, None)
+
+
+@event.listens_for(Engine, 'rollback')
+def _rollback(conn: Connection) -> None:
+    """Partições criadas em uma transação desfeita deixam de existir: o cache é relido"""
+    for partitioning in conn.info.pop(_CREATED, ()):
+        partitioning.forget(conn.engine)
+
+
+@event.listens_for(Session, 'before_flush')
+def _assign_ids(session: Session, flush_context: Any, instances: Any) -> None:
+    """No SQLite/MySQL, reserva os ids dos registros novos em um lote só"""
+    pending: Dict[Partitioning, List[Any]] = {}
+    for obj in session.new:
+        partitioning = getattr(type(obj), '__partitioning__', None)
+        if partitioning is not None and partitioning.pk_attr and getattr(obj, partitioning.pk_attr) is None:
+            pending.setdefault(partitioning, []).append(obj)
+    for partitioning, objs in pending.items():
+        conn = session.connection(bind_arguments={'mapper': inspect(partitioning.model)})
+        if conn.dialect.name in FALLBACK_DIALECTS:
+            for obj, new_id in zip(objs, partitioning.next_ids(conn, len(objs))):
+                setattr(obj, partitioning.pk_attr, new_id)
@@ -0,0 +1,256 @@
+"""
+Construtor de consultas do QuentORM
+
+Interface fluente no estilo do Eloquent sobre o `select()` do SQLAlchemy:
+
+    Cliente.where('cpf', '12345678909').first()
+    Lancamento.where('valor', '>', 100).order_by('data', 'desc').limit(10).get()
+
+Em modelos com `__partition_by__`, os filtros da coluna de partição limitam
+os períodos lidos (ver `partitions`):
+
+    Lancamento.where('data', '>=', date(2025, 3, 1)).where('data', '<', date(2025, 4, 1)).partitions()
+    # ['tbl_lancamentos_2025_03']
+
+Com um `AsyncDatabase` configurado, as variantes com prefixo `a` executam a
+consulta na AsyncSession:
+
+    clientes = await Cliente.where('ativo', True).aget()
+    async for lancamento in Lancamento.where('valor', '>', 100).astream():
+        ...
+"""
+
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, func, inspect, or_, select
+from sqlalchemy.sql import Select
+
+from .partitions import FALLBACK_DIALECTS, date_range
+from .reading import read_engine
+
+_MISSING = object()
+
+OPERATORS = {
+    '=': lambda col, value: col == value,
+    '==': lambda col, value: col == value,
+    '!=': lambda col, value: col != value,
+    '<>': lambda col, value: col != value,
+    '<': lambda col, value: col < value,
+    '<=': lambda col, value: col <= value,
+    '>': lambda col, value: col > value,
+    '>=': lambda col, value: col >= value,
+    'like': lambda col, value: col.like(value),
+    'ilike': lambda col, value: col.ilike(value),
+    'in': lambda col, value: col.in_(list(value)),
+    'not in': lambda col, value: col.not_in(list(value)),
+}
+
+# (conjunção, coluna, operador, valor)
+Condition = Tuple[str, str, str, Any]
+
+# Linhas buscadas por vez em stream()
+STREAM_BATCH_SIZE = 1000
+
+
+class QueryBuilder:
+    """Consulta fluente sobre um modelo"""
+
+    def __init__(self, model: type):
+        self.model = model
+        self.wheres: List[Condition] = []
+        self.orders: List[Tuple[str, str]] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._for_update: Optional[dict] = None
+
+    def _column(self, name: str, entity: Any = None) -> Any:
+        try:
+            return getattr(self.model if entity is None else entity, name)
+        except AttributeError:
+            raise ValueError(f"Coluna '{name}' não existe em {self.model.__name__}") from None
+
+    def _add_where(self, boolean: str, column: str, operator: Any, value: Any) -> 'QueryBuilder':
+        if value is _MISSING:
+            operator, value = '=', operator
+        operator = str(operator).lower()
+        if operator not in OPERATORS:
+            raise ValueError(f"Operador não suportado: {operator}")
+        if operator == '=' and value is None:
+            operator = 'is'
+        self.wheres.append((boolean, column, operator, value))
+        return self
+
+    def where(self, column: str, operator: Any = _MISSING, value: Any = _MISSING) -> 'QueryBuilder':
+        """Adiciona um filtro (AND): where('ativo', True) ou where('idade', '>', 18)"""
+        return self._add_where('and', column, operator, value)
+
+    def or_where(self, column: str, operator: Any = _MISSING, value: Any = _MISSING) -> 'QueryBuilder':
+        """Adiciona um filtro (OR)"""
+        return self._add_where('or', column, operator, value)
+
+    def where_in(self, column: str, values: Iterable[Any]) -> 'QueryBuilder':
+        """Filtra a coluna por uma lista de valores"""
+        return self._add_where('and', column, 'in', list(values))
+
+    def where_like(self, column: str, pattern: str) -> 'QueryBuilder':
+        """Filtra a coluna por um padrão LIKE"""
+        return self._add_where('and', column, 'like', pattern)
+
+    def order_by(self, column: str, direction: str = 'asc') -> 'QueryBuilder':
+        """Ordena pela coluna ('asc' ou 'desc')"""
+        self._column(column)
+        self.orders.append((column, direction.lower()))
+        return self
+
+    def limit(self, limit: int) -> 'QueryBuilder':
+        self._limit = limit
+        return self
+
+    def offset(self, offset: int) -> 'QueryBuilder':
+        self._offset = offset
+        return self
+
+    def for_update(self, nowait: bool = False, skip_locked: bool = False) -> 'QueryBuilder':
+        """Trava as linhas selecionadas (SELECT ... FOR UPDATE)"""
+        self._for_update = {'nowait': nowait, 'skip_locked': skip_locked}
+        return self
+
+    def _condition(self, condition: Condition, entity: Any = None) -> Any:
+        _, column, operator, value = condition
+        col = self._column(column, entity)
+        if operator == 'is':
+            return col.is_(None)
+        return OPERATORS[operator](col, value)
+
+    def where_clause(self, entity: Any = None) -> Any:
+        """Combina os filtros: AND tem precedência sobre OR, como no SQL"""
+        groups: List[List[Any]] = []
+        for condition in self.wheres:
+            if condition[0] == 'or' or not groups:
+                groups.append([])
+            groups[-1].append(self._condition(condition, entity))
+        if not groups:
+            return None
+        return or_(*(and_(*group) for group in groups)) if len(groups) > 1 else and_(*groups[0])
+
+    def _bind(self) -> Any:
+        """
+        Engine em que a consulta vai rodar, sem marcar uma escrita na sessão:
+        com réplicas, a réplica fixada na transação, a mesma que executa o SELECT
+        """
+        if self._for_update is not None:
+            return read_engine(self.model, primary=True)
+        return self.session().get_bind(mapper=inspect(self.model), clause=select(self.model))
+
+    def _periods(self, bind: Any) -> Optional[List[Any]]:
+        """Períodos lidos de um modelo particionado (None: sem filtro na coluna de partição)"""
+        partitioning = self.model.__partitioning__
+        low, high = date_range(self.wheres, partitioning.column)
+        if low is None and high is None:
+            return None
+        return partitioning.covering(bind, low, high)
+
+    def partitions(self) -> List[str]:
+        """Partições que a consulta lê (todas, sem filtro na coluna de partição)"""
+        partitioning = getattr(self.model, '__partitioning__', None)
+        if partitioning is None:
+            return []
+        bind = self._bind()
+        periods = self._periods(bind)
+        if periods is None:
+            periods = sorted(partitioning.partitions(bind, refresh=True))
+        return [partitioning.name(start) for start in periods]
+
+    def _source(self, prune: bool = True) -> Any:
+        """
+        De onde o SELECT lê: no SQLite/MySQL, as tabelas dos períodos do filtro
+        em vez da view; no PostgreSQL o próprio planejador descarta as partições
+
+        Com `prune=False` (modo asyncio) lê sempre a view.
+        """
+        partitioning = getattr(self.model, '__partitioning__', None)
+        if partitioning is None or not prune:
+            return self.model
+        bind = self._bind()
+        if bind.dialect.name not in FALLBACK_DIALECTS:
+            return self.model
+        periods = self._periods(bind)
+        if not periods or (self._for_update is not None and len(periods) > 1):
+            return self.model
+        return partitioning.source(periods)
+
+    def to_select(self, *entities: Any, prune: bool = True) -> Select:
+        """Monta o SELECT do SQLAlchemy correspondente à consulta"""
+        source = self._source(prune) if not entities else self.model
+        stmt = select(*(entities or (source,)))
+        clause = self.where_clause(source)
+        if clause is not None:
+            stmt = stmt.where(clause)
+        for column, direction in self.orders:
+            col = self._column(column, source)
+            stmt = stmt.order_by(col.desc() if direction == 'desc' else col.asc())
+        if self._limit is not None:
+            stmt = stmt.limit(self._limit)
+        if self._offset is not None:
+            stmt = stmt.offset(self._offset)
+        if self._for_update is not None:
+            stmt = stmt.with_for_update(**self._for_update)
+        return stmt
+
+    def session(self):
+        return self.model.session()
+
+    def get(self) -> List[Any]:
+        """Executa a consulta e retorna as instâncias"""
+        return self.session().scalars(self.to_select()).all()
+
+    all = get
+
+    def _first_select(self, prune: bool = True) -> Select:
+        previous, self._limit = self._limit, 1
+        try:
+            return self.to_select(prune=prune)
+        finally:
+            self._limit = previous
+
+    def first(self) -> Optional[Any]:
+        """Retorna o primeiro registro ou None"""
+        return self.session().scalars(self._first_select()).first()
+
+    def _count_select(self, prune: bool = True) -> Select:
+        source = self._source(prune)
+        stmt = select(func.count()).select_from(source)
+        clause = self.where_clause(source)
+        if clause is not None:
+            stmt = stmt.where(clause)
+        return stmt
+
+    def count(self) -> int:
+        """Conta os registros que atendem aos filtros"""
+        return self.session().scalar(self._count_select())
+
+    def stream(self, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Any]:
+        """Percorre os registros sem carregar o resultado inteiro em memória"""
+        stmt = self.to_select().execution_options(yield_per=batch_size)
+        return iter(self.session().scalars(stmt))
+
+    async def aget(self) -> List[Any]:
+        """Versão asyncio de `get`"""
+        return (await self.model.async_session().scalars(self.to_select(prune=False))).all()
+
+    aall = aget
+
+    async def afirst(self) -> Optional[Any]:
+        """Versão asyncio de `first`"""
+        return (await self.model.async_session().scalars(self._first_select(prune=False))).first()
+
+    async def acount(self) -> int:
+        """Versão asyncio de `count`"""
+        return await self.model.async_session().scalar(self._count_select(prune=False))
+
+    async def astream(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Any]:
+        """Versão asyncio de `stream`, para `async for`"""
+        stmt = self.to_select(prune=False).execution_options(yield_per=batch_size)
+        result = await self.model.async_session().stream_scalars(stmt)
+        async for obj in result:
+            yield obj
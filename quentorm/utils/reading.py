@@ -0,0 +1,49 @@
+"""
+Leituras em massa fora do ORM sobre a conexão de um modelo
+
+Relatórios, deduplicação e conciliação leem muitas linhas direto de uma
+`Connection`. `read_engine` escolhe a engine de leitura do modelo sem marcar
+uma escrita na sessão: uma réplica, quando há réplicas configuradas, ou o
+primário se a sessão escreveu há pouco (`sticky_window`). `stream` percorre
+o resultado em lotes, sem carregar tudo na memória:
+
+    with connect(Cliente) as conn:
+        for rows in stream(conn, select(Cliente.cpf_cnpj), 50_000, scalars=True):
+            ...
+"""
+
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+
+
+def read_engine(model: Any, primary: bool = False) -> Engine:
+    """Engine para ler os dados do modelo (o primário com `primary=True`), sem efeito na sessão"""
+    session = model.session()
+    mapper = inspect(model)
+    if getattr(session, 'router', None) is not None:
+        return session.router.primary if primary else session.read_bind(mapper)
+    return session.get_bind(mapper=mapper)
+
+
+@contextmanager
+def connect(model: Any, conn: Optional[Connection] = None, primary: bool = False) -> Iterator[Connection]:
+    """
+    `conn`, se informada; senão uma conexão de leitura do modelo (do primário,
+    com `primary=True`), fechada no fim do bloco
+    """
+    if conn is not None:
+        yield conn
+        return
+    with read_engine(model, primary=primary).connect() as connection:
+        yield connection
+
+
+def stream(conn: Connection, query: Any, batch_size: int, scalars: bool = False) -> Iterator[List[Any]]:
+    """Linhas (ou só a primeira coluna, com `scalars`) em lotes de `batch_size`, lidas por streaming"""
+    result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+    if scalars:
+        result = result.scalars()
+    yield from result.partitions(batch_size)
@@ -25,6 +25,7 @@ import re
 import json
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Optional
 
 @dataclass
@@ -215,31 +216,44 @@ class BankValidator(Validator):
         
         return ValidationResult(True, self._get_message('validations.bank.digit.success'), [])
 
-# Instâncias globais para uso direto
-document_validator = DocumentValidator()
-bank_validator = BankValidator()
+# Instâncias globais para uso direto, criadas no primeiro uso (leem o arquivo de mensagens)
+@lru_cache(maxsize=None)
+def get_document_validator() -> DocumentValidator:
+    return DocumentValidator()
+
+@lru_cache(maxsize=None)
+def get_bank_validator() -> BankValidator:
+    return BankValidator()
+
+_SINGLETONS = {'document_validator': get_document_validator, 'bank_validator': get_bank_validator}
+
+def __getattr__(name: str):
+    # `document_validator` e `bank_validator` continuam acessíveis como atributos do módulo
+    if name in _SINGLETONS:
+        return _SINGLETONS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Funções de conveniência
 def validar_cpf(cpf: str) -> ValidationResult:
     """Valida um CPF"""
-    return document_validator.validar_cpf(cpf)
+    return get_document_validator().validar_cpf(cpf)
 
 def validar_cnpj(cnpj: str) -> ValidationResult:
     """Valida um CNPJ"""
-    return document_validator.validar_cnpj(cnpj)
+    return get_document_validator().validar_cnpj(cnpj)
 
 def validar_cpf_cnpj(documento: str) -> ValidationResult:
     """Valida automaticamente um CPF ou CNPJ"""
-    return document_validator.validar_cpf_cnpj(documento)
+    return get_document_validator().validar_cpf_cnpj(documento)
 
 def validar_agencia(agencia: str) -> ValidationResult:
     """Valida um número de agência bancária"""
-    return bank_validator.validar_agencia(agencia)
+    return get_bank_validator().validar_agencia(agencia)
 
 def validar_conta(conta: str) -> ValidationResult:
     """Valida um número de conta bancária"""
-    return bank_validator.validar_conta(conta)
+    return get_bank_validator().validar_conta(conta)
 
 def validar_digito(digito: Optional[str]) -> ValidationResult:
     """Valida um dígito verificador de conta bancária"""
-    return bank_validator.validar_digito(digito) 
\ No newline at end of file
+    return get_bank_validator().validar_digito(digito) 
\ No newline at end of file
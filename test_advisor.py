@@ -0,0 +1,137 @@
+"""
+Testes do db:advise: colunas extraídas das consultas e sugestões de índices
+
+    python -m pytest test_advisor.py
+"""
+from sqlalchemy import Date, create_engine, text
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.monitoring.advisor import _comparable, advise, candidate, predicates, redundant, write_migration
+from quentorm.monitoring.fingerprint import fingerprint
+
+
+class Conta(BaseModel):
+    __tablename__ = 'test_advisor_conta'
+
+    id = Column(Integer, primary_key=True)
+    cliente_id = Column(Integer)
+    status = Column(String(20))
+    vencimento = Column(Date)
+
+
+def colunas(sql):
+    return predicates(fingerprint(sql)[1])
+
+
+def observada(sql, count=10, total=2.0):
+    id, normalized = fingerprint(sql)
+    return {'connection': 'default', 'id': id, 'sql': normalized, 'count': count, 'total': total}
+
+
+def test_igualdade_intervalo_e_ordenacao():
+    found = colunas("SELECT * FROM tbl_contas WHERE status = 'pendente' AND vencimento < '2026-01-01' "
+                    "ORDER BY vencimento")
+    assert found == {'tbl_contas': {'eq': ['status'], 'range': ['vencimento'], 'order': ['vencimento'], 'join': []}}
+    assert candidate(found['tbl_contas']) == ('status', 'vencimento')
+
+
+def test_join_com_apelidos():
+    found = colunas("SELECT c.id FROM tbl_clientes AS c JOIN tbl_contas r ON r.cliente_id = c.id WHERE c.cpf = ?")
+    assert found['tbl_clientes']['eq'] == ['cpf']
+    assert found['tbl_contas']['join'] == ['cliente_id']
+    assert candidate(found['tbl_contas']) == ('cliente_id',)
+
+
+def test_in_is_null_e_ordenacao_depois_das_igualdades():
+    assert colunas("UPDATE t SET x = 1 WHERE id IN (1, 2, 3)")['t']['eq'] == ['id']
+    found = colunas("SELECT * FROM t WHERE a IS NULL ORDER BY b DESC, c LIMIT 10")
+    assert candidate(found['t']) == ('a', 'b', 'c')
+
+
+def test_or_nao_gera_sugestao():
+    assert colunas("SELECT * FROM t WHERE a = 1 OR b = 2") == {}
+
+
+def test_sugere_indice_ausente_e_agrupa_prefixos():
+    advices = advise([
+        observada("SELECT * FROM test_advisor_conta WHERE cliente_id = 1", total=1.0),
+        observada("SELECT * FROM test_advisor_conta WHERE cliente_id = 1 AND status = 'pago'", total=3.0),
+    ])
+    missing = [advice for advice in advices if advice.table == 'test_advisor_conta']
+    assert [(advice.kind, advice.columns) for advice in missing] == [('missing', ('cliente_id', 'status'))]
+    assert missing[0].impact == 4.0 and missing[0].count == 20
+    assert missing[0].statement == 'CREATE INDEX ix_test_advisor_conta_cliente_id_status ' \
+                                   'ON test_advisor_conta (cliente_id, status)'
+
+
+def test_indice_existente_no_banco_atende():
+    engine = create_engine('sqlite://')
+    Conta.__table__.create(engine)
+    consulta = observada("SELECT * FROM test_advisor_conta WHERE cliente_id = 1")
+    assert [advice.kind for advice in advise([consulta], engines={'default': engine})
+            if advice.table == 'test_advisor_conta'] == ['missing']
+    with engine.begin() as conn:
+        conn.execute(text('CREATE INDEX ix_conta_cliente ON test_advisor_conta (cliente_id, vencimento)'))
+    assert [advice for advice in advise([consulta], engines={'default': engine})
+            if advice.table == 'test_advisor_conta'] == []
+
+
+class Titulo(BaseModel):
+    __tablename__ = 'test_advisor_titulo'
+    __indexes__ = [
+        {'columns': ['vencimento'], 'where': "status = 'pendente'", 'include': ['valor']},
+        {'columns': ['numero'], 'unique': True, 'where': "status <> 'cancelado'"},
+    ]
+
+    id = Column(Integer, primary_key=True)
+    numero = Column(String(20))
+    status = Column(String(20))
+    vencimento = Column(Date)
+    valor = Column(Integer)
+
+
+def test_indice_parcial_ou_de_cobertura_nao_cobre_outro():
+    assert redundant([('ix_t_a', ('a',), False), ('ix_t_a_b', ('a', 'b'), True)]) == []
+    assert redundant([('ix_t_a', ('a',), False, {}), ('ix_t_a_b', ('a', 'b'), True, {'where': 'b > 0'})]) == []
+    assert redundant([('ix_t_a', ('a',), False, {}), ('ix_t_a_b', ('a', 'b'), True, {'include': ['c']})]) == []
+    # Um índice único completo (ou a chave primária) atende às mesmas consultas
+    assert redundant([('ix_t_a', ('a',), False, {}), ('uq_t_a_b', ('a', 'b'), True, {'unique': True})]) == \
+        [('ix_t_a', ('a',), 'uq_t_a_b')]
+    assert redundant([('ix_t_a', ('a',), False, {}), ('ix_t_a_b', ('a', 'b'), False, {'using': 'hash'})]) == []
+
+
+def test_pendente_leva_as_opcoes_do_modelo(tmp_path):
+    engine = create_engine('sqlite://')
+    Titulo.__table__.create(engine, checkfirst=False)
+    with engine.begin() as conn:
+        # Mesmas colunas, mas sem o WHERE declarado: não é o índice do modelo
+        for index in list(Titulo.__table__.indexes):
+            conn.execute(text(f"DROP INDEX {index.name}"))
+        conn.execute(text('CREATE INDEX ix_vencimento_completo ON test_advisor_titulo (vencimento)'))
+    pending = sorted((advice for advice in advise([], engines={'default': engine})
+                      if advice.kind == 'pending' and advice.table == 'test_advisor_titulo'),
+                     key=lambda advice: advice.columns)
+    assert [(advice.columns, advice.options) for advice in pending] == [
+        (('numero',), {'unique': True, 'where': "status <> 'cancelado'"}),
+        (('vencimento',), {'where': "status = 'pendente'", 'include': ['valor']}),
+    ]
+    assert pending[0].statement == ("CREATE UNIQUE INDEX ix_test_advisor_titulo_numero ON test_advisor_titulo "
+                                    "(numero) WHERE status <> 'cancelado'")
+    path, = write_migration(pending, directory=str(tmp_path))
+    source = open(path).read()
+    assert ("self.create_index('test_advisor_titulo', ['numero'], name='ix_test_advisor_titulo_numero', "
+            "unique=True, where=\"status <> 'cancelado'\", online=True)") in source
+    assert "include=['valor']" in source
+
+
+def test_indice_do_modelo_presente_nao_fica_pendente():
+    engine = create_engine('sqlite://')
+    Titulo.__table__.create(engine)
+    assert [advice for advice in advise([], engines={'default': engine})
+            if advice.kind == 'pending' and advice.table == 'test_advisor_titulo'] == []
+
+
+def test_opcoes_comparadas_pelo_que_o_dialeto_guarda():
+    # O MySQL não guarda WHERE nem INCLUDE: o índice parcial não único é criado completo
+    assert _comparable({'where': "status = 'pendente'", 'include': ['valor']}, 'mysql') == _comparable({}, 'mysql')
+    assert _comparable({'where': 'x'}, 'sqlite') != _comparable({}, 'sqlite')
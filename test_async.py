@@ -0,0 +1,107 @@
+"""
+Testes da API assíncrona (AsyncDatabase) com aiosqlite
+
+Requer o extra `async` (`pip install -e ".[async]"`); sem aiosqlite e
+greenlet os testes são pulados.
+
+    python -m pytest test_async.py
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('greenlet')
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.async_manager import AsyncDatabase
+from quentorm.database.manager import Database
+
+
+class Conta(BaseModel):
+    __tablename__ = 'test_async_contas'
+    __cache_by_pk__ = True
+
+    id = Column(Integer, primary_key=True)
+    titular = Column(String(50))
+    saldo = Column(Integer, default=0)
+
+
+@pytest.fixture
+def adb(tmp_path):
+    db = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'async.db')}})
+    BaseModel.metadata.create_all(db.engine(), tables=[Conta.__table__])
+    session = db.session()
+    session.add_all([Conta(id=i, titular=f"titular {i}", saldo=i * 10) for i in range(1, 6)])
+    session.commit()
+    db.remove_sessions()
+    database = AsyncDatabase.from_database(db)
+    yield database
+    asyncio.run(database.dispose())
+    BaseModel.set_async_connection_resolver(None)
+    db.dispose()
+
+
+def run(adb, coro_fn):
+    """Executa a corrotina e fecha as sessões da tarefa no mesmo event loop"""
+    async def main():
+        try:
+            return await coro_fn()
+        finally:
+            await adb.remove_sessions()
+    return asyncio.run(main())
+
+
+def test_find_e_find_many(adb):
+    async def main():
+        conta = await Conta.afind(3)
+        contas = await Conta.afind_many([5, 1, 99])
+        return conta.titular, [c.id for c in contas]
+    assert run(adb, main) == ('titular 3', [5, 1])
+
+
+def test_save_e_delete(adb):
+    async def main():
+        conta = await Conta.afind(2)
+        conta.saldo = 999
+        await conta.asave()
+        await Conta(id=6, titular='nova').asave()
+        await (await Conta.afind(1)).adelete()
+        return await Conta.acount()
+    assert run(adb, main) == 5
+
+    async def depois():
+        return (await Conta.afind(2)).saldo, await Conta.afind(1), (await Conta.afind(6)).titular
+    assert run(adb, depois) == (999, None, 'nova')
+
+
+def test_consultas(adb):
+    async def main():
+        primeiros = await Conta.where('saldo', '>', 20).aget()
+        primeira = await Conta.where('titular', 'titular 4').afirst()
+        return [c.id for c in primeiros], primeira.id, await Conta.acount()
+    assert run(adb, main) == ([3, 4, 5], 4, 5)
+
+
+def test_stream(adb):
+    async def main():
+        ids = []
+        async for conta in Conta.where('saldo', '>=', 20).astream(batch_size=2):
+            ids.append(conta.id)
+        return ids
+    assert run(adb, main) == [2, 3, 4, 5]
+
+
+def test_sincrono_fora_do_event_loop(adb):
+    assert isinstance(Conta.count(), int)
+
+
+def test_metodos_sincronos_nao_devolvem_corrotinas_no_event_loop(adb):
+    """Dentro do event loop, find/count/save continuam síncronos"""
+    async def main():
+        conta = Conta.find(3)
+        total = Conta.count()
+        conta.saldo = 123
+        salva = conta.save()
+        return conta.titular, total, salva is conta, Conta.where('saldo', 123).first().id
+    assert asyncio.run(main()) == ('titular 3', 5, True, 3)
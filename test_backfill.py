@@ -0,0 +1,110 @@
+"""
+Testes do backfill em lotes: retomada, ajuste do lote e espera das réplicas
+
+    python -m pytest test_backfill.py
+"""
+import math
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select
+
+from quentorm.database import backfill as backfill_module
+from quentorm.database.backfill import DONE, FAILED, Backfill, backfills
+
+metadata = MetaData()
+itens = Table('test_backfill_itens', metadata,
+              Column('id', Integer, primary_key=True), Column('valor', Integer), Column('dobro', Integer))
+
+# Ids com lacunas: os lotes vão por quantidade de linhas, não por faixa de ids
+IDS = [id for id in range(1, 60) if id % 7]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(itens.insert(), [{'id': id, 'valor': id} for id in IDS])
+    yield engine
+    engine.dispose()
+
+
+def dobros(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(select(itens.c.id, itens.c.dobro)).all())
+
+
+def preenche(engine, **options):
+    return Backfill(engine, itens, {'dobro': 'valor * 2'}, 'teste:itens', **options)
+
+
+def test_preenche_em_lotes_e_nao_repete(engine):
+    assert preenche(engine, batch_size=10, where='dobro IS NULL').run() == len(IDS)
+    assert dobros(engine) == {id: id * 2 for id in IDS}
+    estado, = backfills(engine)
+    assert (estado['status'], estado['last_pk'], estado['percent']) == (DONE, IDS[-1], 100.0)
+    assert estado['batches'] >= 2
+    # Concluído: uma nova execução não faz nada
+    assert preenche(engine, batch_size=10).run() == 0
+
+
+def test_retoma_do_ultimo_id_gravado(engine, monkeypatch):
+    def interrompe(self, size, elapsed):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(Backfill, 'adjust', interrompe)
+    with pytest.raises(KeyboardInterrupt):
+        preenche(engine, batch_size=10).run()
+    estado, = backfills(engine)
+    # O primeiro lote foi confirmado junto com o ponto de retomada
+    assert (estado['status'], estado['last_pk'], estado['rows']) == (FAILED, IDS[9], 10)
+    assert sorted(id for id, dobro in dobros(engine).items() if dobro is not None) == IDS[:10]
+
+    monkeypatch.undo()
+    # Os lotes seguintes só tocam nos ids depois de last_pk; o total inclui o lote já feito
+    with engine.begin() as conn:
+        conn.execute(itens.update().where(itens.c.id <= IDS[9]).values(dobro=-1))
+    assert preenche(engine, batch_size=10).run() == len(IDS)
+    assert dobros(engine) == {id: -1 if id <= IDS[9] else id * 2 for id in IDS}
+    assert backfills(engine)[0]['status'] == DONE
+
+
+def test_adjust_aproxima_o_lote_do_tempo_alvo(engine):
+    backfill = preenche(engine, batch_size=100, target_ms=200)
+    assert backfill.adjust(100, 0.1) == 200
+    assert backfill.adjust(100, 0.05) == 200           # no máximo dobra
+    assert backfill.adjust(100, 0.4) == 50
+    assert backfill.adjust(100, 10) == 50              # no máximo reduz à metade
+    assert backfill.adjust(100, 0) == 200
+    assert backfill.adjust(15, 1) == 10                # mínimo de 1/10 do batch_size
+    assert backfill.adjust(800, 0.01) == 1000          # máximo de 10 vezes o batch_size
+
+
+class Router:
+    """Roteador com os atrasos medidos em sequência, um por chamada de lag()"""
+
+    def __init__(self, *measures):
+        self.replicas = ['replica']
+        self.measures = list(measures)
+
+    def lag(self):
+        return {'replica': self.measures.pop(0)}
+
+
+def test_atraso_desconhecido_espera(engine, monkeypatch):
+    esperas = []
+    monkeypatch.setattr(backfill_module.time, 'sleep', esperas.append)
+    assert preenche(engine, max_replication_lag=5, router=Router(None)).replication_lag() == math.inf
+
+    router = Router(None, 12.0, 1.0)
+    preenche(engine, max_replication_lag=5, router=router).throttle()
+    # Replicação parada (Seconds_Behind_Source nulo) e atraso acima do limite esperam; 1s passa
+    assert esperas == [5.0, 5.0] and router.measures == []
+
+
+def test_sem_replicas_para_observar_nao_espera(engine, monkeypatch):
+    esperas = []
+    monkeypatch.setattr(backfill_module.time, 'sleep', esperas.append)
+    backfill = preenche(engine, max_replication_lag=5)
+    assert backfill.replication_lag() is None
+    assert backfill.run() == len(IDS)
+    assert esperas == []
@@ -0,0 +1,86 @@
+"""
+Testes do decorador @cache
+
+Cada teste usa um MemoryCache próprio na conexão 'default'.
+
+    python -m pytest test_cache.py
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.caching import cache, cache_stats, reset_cache_stats
+from quentorm.caching.backends import MemoryCache, set_cache
+
+
+class Produto(BaseModel):
+    __tablename__ = 'test_cache_produtos'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+
+    @cache('produto_nome', ttl=60)
+    def rotulo(self, sufixo=''):
+        calls.append(self.id)
+        return f"{self.nome}{sufixo}"
+
+
+class Relatorios:
+    """Serviço sem ORM e sem __repr__ próprio"""
+
+    @cache('relatorio_total', ttl=60)
+    def total(self, ano):
+        calls.append(ano)
+        return ano * 2
+
+
+calls = []
+
+
+@cache('dobro', ttl=60)
+def dobro(valor):
+    calls.append(valor)
+    return valor * 2
+
+
+@pytest.fixture(autouse=True)
+def memoria():
+    set_cache('default', MemoryCache())
+    reset_cache_stats()
+    calls.clear()
+    yield
+
+
+def test_funcao_repetida_usa_cache():
+    assert [dobro(21) for _ in range(3)] == [42, 42, 42]
+    assert calls == [21]
+    assert cache_stats()['dobro']['hits'] == 2
+
+
+def test_argumentos_diferentes_nao_colidem():
+    assert (dobro(1), dobro(2), dobro('1')) == (2, 4, '11')
+    assert calls == [1, 2, '1']
+
+
+def test_metodo_de_servico_usa_cache_entre_instancias():
+    assert Relatorios().total(2024) == Relatorios().total(2024) == 4048
+    assert calls == [2024]
+
+
+def test_instancia_mapeada_pela_chave_primaria():
+    engine = create_engine('sqlite://')
+    BaseModel.metadata.create_all(engine, tables=[Produto.__table__])
+    with Session(engine) as session:
+        session.add_all([Produto(id=1, nome='a'), Produto(id=2, nome='b')])
+        session.commit()
+        um, dois = session.get(Produto, 1), session.get(Produto, 2)
+        assert (um.rotulo('!'), dois.rotulo('!'), um.rotulo('!')) == ('a!', 'b!', 'a!')
+    assert calls == [1, 2]
+
+
+def test_instancia_sem_chave_nao_e_cacheada():
+    novo = Produto(nome='c')
+    assert novo.rotulo() == novo.rotulo() == 'c'
+    assert calls == [None, None]
+    assert cache_stats()['produto_nome']['misses'] == 0
@@ -0,0 +1,104 @@
+"""
+Testes da detecção de duplicados antes de importar
+
+    python -m pytest test_dedup.py
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+from quentorm.dedup import BloomFilter, deduplicate, normalize_document
+
+
+class Pessoa(BaseModel):
+    __tablename__ = 'test_dedup_pessoa'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+    documento = Column(String(20))
+
+
+# Os formatos em que um mesmo cadastro aparece gravado
+GRAVADOS = ['529.982.247-25', '1234567890', '111 444 777 35', '11.222.333/0001-81']
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    Pessoa.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Pessoa), [{'nome': f"p{i}", 'documento': doc} for i, doc in enumerate(GRAVADOS)])
+    yield engine
+    engine.dispose()
+
+
+def linhas():
+    return [
+        {'documento': '52998224725'},           # gravado com pontuação
+        {'documento': '01234567890'},           # gravado sem o zero à esquerda
+        {'documento': '11144477735'},           # gravado com espaços
+        {'documento': 11222333000181},          # número da planilha
+        {'documento': '390.533.447-05'},        # novo
+        {'documento': '39053344705'},           # repetido no arquivo
+        {'documento': ''},                      # sem chave
+    ]
+
+
+def test_normalize_document():
+    assert normalize_document(1234567890) == '01234567890'
+    assert normalize_document(1234567890.0) == '01234567890'
+    assert normalize_document('11.222.333/0001-81') == '11222333000181'
+    assert normalize_document(float('nan')) is None
+    assert normalize_document('123456789012345') is None
+
+
+@pytest.mark.parametrize('bloom', [False, True])
+def test_mesmo_resultado_com_e_sem_filtro_de_bloom(engine, bloom):
+    with engine.connect() as conn:
+        grupos = deduplicate(linhas(), Pessoa, 'documento', bloom=bloom, conn=conn)
+    assert grupos.summary() == {'new': 1, 'existing': 4, 'duplicates': 1, 'invalid': 1}
+    assert [chave for chave, _ in grupos.new] == ['39053344705']
+    assert [chave for chave, _ in grupos.existing] == ['52998224725', '01234567890', '11144477735',
+                                                       '11222333000181']
+    assert grupos.false_positives == 0
+
+
+def test_filtro_de_bloom():
+    bloom = BloomFilter(1000, 0.01)
+    chaves = [str(n) for n in range(1000)]
+    for chave in chaves:
+        bloom.add(chave)
+    assert all(chave in bloom for chave in chaves)
+    falsos = sum(str(n) in bloom for n in range(1000, 11000))
+    assert falsos < 300
+    assert len(bloom) == 1000
+
+
+def criar_banco(path, documentos):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE test_dedup_pessoa (id INTEGER PRIMARY KEY, nome VARCHAR(50), documento VARCHAR(20))')
+    conn.executemany('INSERT INTO test_dedup_pessoa (nome, documento) VALUES (?, ?)',
+                     [(doc, doc) for doc in documentos])
+    conn.commit()
+    conn.close()
+
+
+def test_le_do_primario_sem_prender_a_sessao(tmp_path):
+    # Um cadastro recente ainda não chegou à réplica
+    criar_banco(str(tmp_path / 'primario.db'), ['52998224725', '39053344705'])
+    criar_banco(str(tmp_path / 'replica.db'), ['52998224725'])
+    db = Database().config({'default': {
+        'driver': 'sqlite', 'database': str(tmp_path / 'primario.db'),
+        'replicas': [{'database': str(tmp_path / 'replica.db')}],
+    }})
+    try:
+        session = db.session()
+        grupos = deduplicate([{'documento': '39053344705'}], Pessoa, 'documento')
+        assert grupos.summary()['existing'] == 1
+        assert not session.sticky()
+    finally:
+        db.remove_sessions()
+        db.dispose()
@@ -0,0 +1,135 @@
+"""
+Testes da captura de planos (EXPLAIN): limite por fingerprint, full scans
+em tabelas grandes e isolamento da instrumentação
+
+    python -m pytest test_explain.py
+"""
+import logging
+
+import pytest
+from sqlalchemy import select
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+from quentorm.monitoring import explain as explain_module
+from quentorm.monitoring.explain import Explainer, full_scans
+from quentorm.monitoring.instrument import collect, get_query_log
+from quentorm.monitoring.stats import query_stats, reset_query_stats
+
+
+class Pedido(BaseModel):
+    __tablename__ = 'test_explain_pedidos'
+
+    id = Column(Integer, primary_key=True)
+    cliente = Column(String(50))
+
+
+class Engine:
+    """Só o que o Explainer.submit consulta da engine"""
+
+    class dialect:
+        name = 'sqlite'
+
+    class url:
+        database = 'arquivo.db'
+
+
+@pytest.fixture
+def explainer(monkeypatch):
+    explainer = Explainer('test_explain', {'explain_interval': 60}, logging.getLogger(__name__))
+    agendados = []
+    monkeypatch.setattr(explainer, '_explain', lambda engine, id, statement, parameters: agendados.append(id))
+    explainer.agendados = agendados
+    yield explainer
+    explainer.close()
+
+
+def test_um_explain_por_fingerprint_no_intervalo(explainer, monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(explain_module.time, 'monotonic', lambda: agora[0])
+    assert explainer.submit(Engine, 'a', 'SELECT 1', None)
+    assert not explainer.submit(Engine, 'a', 'SELECT 1', None)
+    assert explainer.submit(Engine, 'b', 'SELECT 2', None)
+    agora[0] += 59
+    assert not explainer.submit(Engine, 'a', 'SELECT 1', None)
+    agora[0] += 1
+    assert explainer.submit(Engine, 'a', 'SELECT 1', None)
+    explainer.close()
+    assert explainer.agendados == ['a', 'b', 'a']
+
+
+def test_instrucoes_que_nao_sao_explicadas(explainer):
+    assert not explainer.submit(Engine, 'c', 'INSERT INTO t VALUES (1)', None)
+    assert not explainer.submit(Engine, 'c', 'CREATE INDEX i ON t (a)', None)
+
+    class Memoria(Engine):
+        class url:
+            database = ':memory:'
+
+    class Oracle(Engine):
+        class dialect:
+            name = 'oracle'
+
+    assert not explainer.submit(Memoria, 'c', 'SELECT 1', None)
+    assert not explainer.submit(Oracle, 'c', 'SELECT 1', None)
+    # As ignoradas não consomem o intervalo do fingerprint
+    assert explainer.submit(Engine, 'c', '  with x as (select 1) select * from x', None)
+
+
+def test_full_scans_por_dialeto_e_tabelas_grandes():
+    assert full_scans('sqlite', [{'detail': 'SCAN test_explain_pedidos'}, {'detail': 'SCAN TABLE itens AS i'},
+                                 {'detail': 'SEARCH clientes USING INDEX ix (id=?)'}]) == \
+        [{'table': 'test_explain_pedidos', 'rows': None}, {'table': 'itens', 'rows': None}]
+    plano = [{'QUERY PLAN': 'Hash Join  (cost=1.0..2.0 rows=10 width=8)'},
+             {'QUERY PLAN': '  ->  Seq Scan on public.pedidos p  (cost=0.00..1.0 rows=250000 width=4)'},
+             {'QUERY PLAN': '  ->  Index Scan using ix on clientes  (cost=0.1..8.0 rows=1 width=4)'}]
+    assert full_scans('postgresql', plano) == [{'table': 'public.pedidos', 'rows': 250000}]
+    assert full_scans('mysql', [{'table': 'pedidos', 'type': 'ALL', 'rows': 90},
+                                {'table': 'clientes', 'type': 'eq_ref', 'rows': 1}]) == \
+        [{'table': 'pedidos', 'rows': 90}]
+
+    explainer = Explainer('test_explain', {'large_tables': ['Pedidos'], 'large_table_rows': 1000},
+                          logging.getLogger(__name__))
+    assert explainer.is_large({'table': 'public.pedidos', 'rows': None})
+    assert explainer.is_large({'table': '`pedidos`', 'rows': 10})
+    assert explainer.is_large({'table': 'itens', 'rows': 1000})
+    assert not explainer.is_large({'table': 'itens', 'rows': 999})
+    assert not explainer.is_large({'table': 'itens', 'rows': None})
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'test_explain': {'driver': 'sqlite', 'database': str(tmp_path / 'explain.db')}})
+    Pedido.__table__.create(database.engine('test_explain'))
+    database.logging_config({'test_explain': {
+        'slow_query_threshold': 0, 'log_file': str(tmp_path / 'queries.log'),
+        'explain': True, 'large_tables': ['test_explain_pedidos'],
+    }})
+    reset_query_stats('test_explain')
+    yield database
+    database.logging_config({'test_explain': {'enabled': False}})
+    database.dispose()
+
+
+def test_explain_nao_entra_nas_estatisticas_nem_no_log(db, tmp_path):
+    engine = db.engine('test_explain')
+    with engine.connect() as conn:
+        conn.execute(select(Pedido.id).where(Pedido.cliente == 'Ana'))
+    log = get_query_log('test_explain')
+    # Espera o EXPLAIN da thread de fundo
+    log.explainer.close()
+
+    entradas = query_stats('test_explain')['test_explain']
+    assert [entrada['sql'].split()[0] for entrada in entradas] == ['select']
+    plano = entradas[0]['plan']
+    assert plano['large_full_scans'] == ['test_explain_pedidos'] and 'SCAN test_explain_pedidos' in plano['plan']
+
+    with collect() as registros:
+        log.explainer.explain(engine, 'SELECT id FROM test_explain_pedidos')
+    assert registros == []
+    assert len(query_stats('test_explain')['test_explain']) == 1
+
+    log.close()
+    texto = (tmp_path / 'queries.log').read_text()
+    assert texto.count('Consulta lenta') == 1 and 'EXPLAIN' not in texto
+    assert 'com full scan em tabela grande (test_explain_pedidos)' in texto
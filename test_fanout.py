@@ -0,0 +1,107 @@
+"""
+Testes do fan-out de escritas (`db.fan_out`)
+
+Cada alvo é uma conexão com o seu próprio arquivo SQLite.
+
+    python -m pytest test_fanout.py
+"""
+import sqlite3
+import time
+
+import pytest
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+
+ALVOS = ('norte', 'sul', 'leste')
+
+
+class Registro(BaseModel):
+    __tablename__ = 'test_fanout_registros'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(20))
+
+
+@pytest.fixture
+def db(tmp_path):
+    connections = {}
+    for alvo in ALVOS:
+        path = str(tmp_path / f"{alvo}.db")
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE test_fanout_registros (id INTEGER PRIMARY KEY, nome VARCHAR(20))')
+        conn.close()
+        connections[alvo] = {'driver': 'sqlite', 'database': path}
+    database = Database().config(connections)
+    yield database
+    database.dispose()
+
+
+def nomes(db, alvo):
+    conn = sqlite3.connect(db.connections[alvo]['database'])
+    try:
+        return [nome for (nome,) in conn.execute('SELECT nome FROM test_fanout_registros ORDER BY id')]
+    finally:
+        conn.close()
+
+
+def inserir(nome, atraso=0.0):
+    def work(session):
+        time.sleep(atraso)
+        session.add(Registro(nome=nome))
+        return nome
+    return work
+
+
+def falhar(session):
+    session.add(Registro(nome='parcial'))
+    session.flush()
+    raise ValueError('falha no alvo')
+
+
+def test_confirma_cada_alvo(db):
+    results = db.fan_out({alvo: inserir(alvo) for alvo in ALVOS})
+    assert results.ok and not results.errors
+    assert {alvo: result.value for alvo, result in results.items()} == {alvo: alvo for alvo in ALVOS}
+    assert all(result.status == 'committed' and result.elapsed > 0 for result in results.values())
+    assert all(nomes(db, alvo) == [alvo] for alvo in ALVOS)
+
+
+def test_erro_fica_no_resultado_do_alvo(db):
+    results = db.fan_out({'norte': inserir('n'), 'sul': falhar, 'leste': inserir('l')})
+    assert not results.ok
+    assert list(results.errors) == ['sul'] and isinstance(results.errors['sul'], ValueError)
+    assert results['sul'].status == 'failed'
+    assert results['norte'].status == results['leste'].status == 'committed'
+    assert (nomes(db, 'norte'), nomes(db, 'sul'), nomes(db, 'leste')) == (['n'], [], ['l'])
+
+
+def test_duas_fases_desfaz_todos_os_alvos(db):
+    results = db.fan_out({'norte': inserir('n'), 'sul': falhar, 'leste': inserir('l')}, two_phase=True)
+    assert not results.ok
+    assert results['sul'].status == 'failed'
+    assert results['norte'].status == results['leste'].status == 'rolled_back'
+    assert all(nomes(db, alvo) == [] for alvo in ALVOS)
+
+
+def test_duas_fases_confirma_quando_todos_executam(db):
+    results = db.fan_out({alvo: inserir(alvo) for alvo in ALVOS}, two_phase=True)
+    assert results.ok
+    assert all(nomes(db, alvo) == [alvo] for alvo in ALVOS)
+
+
+def test_alvos_rodam_em_paralelo(db):
+    results = db.fan_out({alvo: inserir(alvo, atraso=0.3) for alvo in ALVOS})
+    assert results.ok
+    # Em sequência seriam 0,9s
+    assert results.elapsed < 0.6
+
+
+def test_max_workers_limita_as_threads(db):
+    results = db.fan_out({alvo: inserir(alvo, atraso=0.2) for alvo in ALVOS}, max_workers=1)
+    assert results.ok and results.elapsed >= 0.6
+
+
+def test_sem_alvos(db):
+    results = db.fan_out({})
+    assert results.ok and dict(results) == {}
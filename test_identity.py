@@ -0,0 +1,165 @@
+"""
+Testes do cache por chave primária (find/find_many com __cache_by_pk__)
+
+Cada teste usa um MemoryCache próprio na conexão 'default' e conta as
+consultas que chegam ao banco.
+
+    python -m pytest test_identity.py
+"""
+import pytest
+from sqlalchemy import delete, event, update
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.caching import identity
+from quentorm.caching.backends import MemoryCache, set_cache
+from quentorm.caching.identity import cache_key
+from quentorm.database.manager import Database
+
+
+class Cliente(BaseModel):
+    __tablename__ = 'test_identity_clientes'
+    __cache_by_pk__ = True
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+
+
+def chave(pk):
+    return cache_key(Cliente.__mapper__, pk)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'identidade.db')}})
+    BaseModel.metadata.create_all(database.engine(), tables=[Cliente.__table__])
+    session = database.session()
+    session.add_all([Cliente(id=id, nome=f"cliente {id}") for id in range(1, 8)])
+    session.commit()
+    database.remove_sessions()
+    set_cache('default', MemoryCache())
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+@pytest.fixture
+def consultas(db):
+    """SELECTs executados no banco"""
+    executadas = []
+
+    def registra(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            executadas.append(statement)
+    event.listen(db.engine(), 'before_cursor_execute', registra)
+    yield executadas
+    event.remove(db.engine(), 'before_cursor_execute', registra)
+
+
+def nova_sessao(db):
+    db.remove_sessions()
+    return db.session()
+
+
+def test_find_usa_o_cache_entre_sessoes(db, consultas):
+    cache = identity.get_cache('default')
+    assert Cliente.find(3).nome == 'cliente 3'
+    assert len(consultas) == 1 and cache.get(chave(3)) is not None
+
+    session = nova_sessao(db)
+    cliente = Cliente.find(3)
+    # Do cache, sem consulta, e persistente na sessão nova
+    assert cliente.nome == 'cliente 3' and len(consultas) == 1
+    assert cliente in session and cliente not in session.dirty
+    # Já no identity map: a mesma instância
+    assert Cliente.find(3) is cliente
+    assert Cliente.find(99) is None and len(consultas) == 2
+    assert cache.get(chave(99)) is None
+
+
+def test_find_many_busca_as_faltas_em_uma_consulta(db, consultas, monkeypatch):
+    Cliente.find(2)
+    nova_sessao(db)
+    consultas.clear()
+    clientes = Cliente.find_many([5, 2, 99, 4, 5])
+    # Ordem dos ids informados, sem repetidos nem inexistentes; só 4 e 5 (e 99) vão ao banco
+    assert [cliente.id for cliente in clientes] == [5, 2, 4]
+    assert len(consultas) == 1
+
+    nova_sessao(db)
+    consultas.clear()
+    assert [cliente.id for cliente in Cliente.find_many([4, 5, 2])] == [4, 5, 2]
+    assert consultas == []
+
+    # Faltas em lotes de IN_CHUNK_SIZE
+    monkeypatch.setattr(identity, 'IN_CHUNK_SIZE', 2)
+    nova_sessao(db)
+    assert [cliente.id for cliente in Cliente.find_many([1, 3, 6, 7, 2])] == [1, 3, 6, 7, 2]
+    assert len(consultas) == 2
+
+
+def test_flush_invalida_e_a_transacao_nao_recoloca_a_linha(db):
+    cache = identity.get_cache('default')
+    session = db.session()
+    cliente = Cliente.find(1)
+    assert cache.get(chave(1)) is not None
+    cliente.nome = 'alterado'
+    session.flush()
+    assert cache.get(chave(1)) is None
+
+    # Lida de novo na transação (valor ainda não confirmado): não volta para o cache
+    Cliente.find_many([1])
+    assert cache.get(chave(1)) is None
+    session.commit()
+    nova_sessao(db)
+    assert Cliente.find(1).nome == 'alterado'
+
+
+def test_commit_repete_a_invalidacao(db):
+    cache = identity.get_cache('default')
+    session = db.session()
+    cliente = Cliente.find(2)
+    cliente.nome = 'novo'
+    session.flush()
+    # Outro worker relê o valor antigo entre o flush e o commit e o recoloca no cache
+    cache.set(chave(2), identity.dump_row(Cliente.__mapper__, Cliente(id=2, nome='cliente 2')))
+    session.commit()
+    assert cache.get(chave(2)) is None
+
+
+def test_remocao_invalida(db):
+    cache = identity.get_cache('default')
+    session = db.session()
+    session.delete(Cliente.find(6))
+    session.commit()
+    assert cache.get(chave(6)) is None
+    nova_sessao(db)
+    assert Cliente.find(6) is None
+
+
+def test_update_e_delete_em_massa_invalidam_o_modelo(db):
+    cache = identity.get_cache('default')
+    Cliente.find_many([1, 2, 3])
+    session = nova_sessao(db)
+    session.execute(update(Cliente).where(Cliente.id <= 2).values(nome='em massa'))
+    assert all(cache.get(chave(id)) is None for id in (1, 2, 3))
+    session.commit()
+    nova_sessao(db)
+    assert [cliente.nome for cliente in Cliente.find_many([1, 3])] == ['em massa', 'cliente 3']
+
+    session = nova_sessao(db)
+    session.execute(delete(Cliente).where(Cliente.id == 3))
+    assert cache.get(chave(3)) is None
+    session.commit()
+    assert Cliente.find(3) is None
+
+
+def test_rollback_descarta_as_invalidacoes_pendentes(db):
+    session = db.session()
+    cliente = Cliente.find(4)
+    cliente.nome = 'desfeito'
+    session.flush()
+    session.rollback()
+    assert identity._INVALIDATED not in session.info
+    nova_sessao(db)
+    assert Cliente.find(4).nome == 'cliente 4'
+    assert identity.get_cache('default').get(chave(4)) is not None
@@ -0,0 +1,68 @@
+"""
+Orçamento de tempo de importação do QuentORM
+
+Executa `python -X importtime` em um processo novo e falha se `import quentorm`
+ou `quentorm --help` passarem a carregar módulos pesados (SQLAlchemy, os
+utilitários de projeto, os módulos dos comandos) ou estourarem o orçamento
+em milissegundos. Os orçamentos podem ser ajustados na CI por
+QUENTORM_IMPORT_BUDGET_MS e QUENTORM_HELP_BUDGET_MS.
+
+    python -m pytest test_import_time.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_BUDGET_MS = float(os.environ.get('QUENTORM_IMPORT_BUDGET_MS', 50))
+HELP_BUDGET_MS = float(os.environ.get('QUENTORM_HELP_BUDGET_MS', 150))
+
+# Módulos que só podem ser carregados quando usados
+HEAVY = ('sqlalchemy', 'subprocess', 'quentorm.utils.models', 'quentorm.utils.project', 'quentorm.commands.new',
+         'quentorm.commands.make', 'quentorm.commands.db', 'quentorm.commands.migrate', 'quentorm.commands.stats',
+         'quentorm.commands.ledger')
+
+
+def import_times(code):
+    """{módulo: tempo cumulativo em ms} da importação feita por `code` em um processo novo"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    env.pop('QUENTORM_METRICS_DIR', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            env=env, cwd=ROOT, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000.0
+    return times
+
+
+def assert_budget(code, module, budget):
+    times = import_times(code)
+    loaded = [name for name in HEAVY if name in times]
+    assert not loaded, f"{code!r} importou módulos pesados: {', '.join(loaded)}"
+    assert times[module] <= budget, f"{code!r} levou {times[module]:.1f}ms (orçamento: {budget:.0f}ms)"
+
+
+def test_import_quentorm():
+    assert_budget('import quentorm', 'quentorm', IMPORT_BUDGET_MS)
+
+
+def test_cli_help():
+    code = ("from quentorm.cli import cli\n"
+            "try:\n    cli(['--help'])\nexcept SystemExit:\n    pass")
+    assert_budget(code, 'quentorm.cli', HELP_BUDGET_MS)
+
+
+def test_lazy_exports():
+    times = import_times('from quentorm import Migration, validar_cpf')
+    assert 'quentorm.utils.project' not in times
+    assert 'quentorm.database.migration' in times
+
+
+if __name__ == '__main__':
+    for name in ('quentorm', 'quentorm.cli'):
+        code = 'import quentorm.cli' if name == 'quentorm.cli' else 'import quentorm'
+        print(f"{name}: {import_times(code)[name]:.1f}ms")
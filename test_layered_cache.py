@@ -0,0 +1,156 @@
+"""
+Testes do cache em duas camadas (L1 em memória, L2 compartilhado) e do
+barramento de invalidação entre workers
+
+    python -m pytest test_layered_cache.py
+"""
+import shutil
+import tempfile
+import time
+
+import pytest
+
+from quentorm.caching.backends import MemoryCache, RedisCache
+from quentorm.caching.bus import UnixSocketBus
+from quentorm.caching.layered import LayeredCache
+
+
+def expira_em(cache, key):
+    """Segundos que restam à entrada do MemoryCache (None: sem expiração)"""
+    expires_at = cache._data[cache.prefix + key][1]
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+def test_leituras_por_camada():
+    cache = LayeredCache(MemoryCache(ttl=60), MemoryCache())
+    cache.set('a', 1)
+    cache.shared.set('b', 2)
+    assert cache.get('a') == 1 and cache.get('b') == 2 and cache.get('c', 'padrao') == 'padrao'
+    assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'b': 2}
+    assert cache.stats == {'l1_hits': 3, 'l2_hits': 1, 'misses': 2}
+    # O valor lido do L2 foi copiado para o L1
+    assert cache.local.get('b') == 2
+
+
+def test_l1_nao_passa_do_tempo_restante_no_l2():
+    cache = LayeredCache(MemoryCache(ttl=60), MemoryCache())
+    cache.shared.set('curta', 'valor', ttl=0.3)
+    cache.shared.set('longa', 'valor', ttl=600)
+    cache.shared.set('eterna', 'valor')
+    time.sleep(0.1)
+    assert cache.get_many(['curta', 'longa', 'eterna']) == dict.fromkeys(['curta', 'longa', 'eterna'], 'valor')
+    assert expira_em(cache.local, 'curta') <= 0.2
+    assert 59 < expira_em(cache.local, 'longa') <= 60
+    assert 59 < expira_em(cache.local, 'eterna') <= 60
+    time.sleep(0.25)
+    # Expirou no L2: o L1 não continua servindo o valor
+    assert cache.get('curta') is None
+
+
+def test_l2_sem_tempo_restante_usa_o_ttl_do_l1():
+    class SemTTL(MemoryCache):
+        """L2 que não informa o tempo restante (como o memcached)"""
+        get_many_with_ttl = None
+
+    cache = LayeredCache(MemoryCache(ttl=30), SemTTL())
+    cache.shared.set('a', 1, ttl=0.5)
+    assert cache.get('a') == 1
+    assert 29 < expira_em(cache.local, 'a') <= 30
+
+
+class Pipeline:
+    def __init__(self, data):
+        self.data = data
+        self.commands = []
+
+    def get(self, key):
+        self.commands.append(self.data.get(key, (None, -2))[0])
+
+    def pttl(self, key):
+        self.commands.append(self.data.get(key, (None, -2))[1])
+
+    def execute(self):
+        return self.commands
+
+
+class Redis:
+    """Cliente com GET e PTTL fixos por chave: {chave: (bytes, pttl)}"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def pipeline(self, transaction=True):
+        return Pipeline(self.data)
+
+
+def test_redis_informa_o_tempo_restante():
+    serializer = RedisCache(client=Redis({})).serializer
+    redis = RedisCache(prefix='p:', client=Redis({
+        'p:a': (serializer.dumps(1), 1500),
+        'p:b': (serializer.dumps(2), -1),
+        'p:c': (serializer.dumps(3), -2),
+    }))
+    assert redis.get_many_with_ttl(['a', 'b', 'c', 'd']) == {'a': (1, 1.5), 'b': (2, None), 'c': (3, 0.0)}
+
+    cache = LayeredCache(MemoryCache(ttl=60), redis)
+    assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'b': 2, 'c': 3}
+    assert expira_em(cache.local, 'a') <= 1.5
+    # Expirou entre o GET e o PTTL: devolvido, mas não guardado no L1
+    assert cache.local.get('c') is None
+
+
+@pytest.fixture
+def workers():
+    """Dois workers com L1 próprios, o mesmo L2 e barramentos no mesmo canal"""
+    directory = tempfile.mkdtemp(prefix='qbus')
+    shared = MemoryCache()
+    buses = [UnixSocketBus(directory=directory, channel='teste:invalidate') for _ in range(2)]
+    caches = [LayeredCache(MemoryCache(ttl=60), shared, bus) for bus in buses]
+    yield caches
+    for bus in buses:
+        bus.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def espera(condicao, timeout=2.0):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_remocao_invalida_o_l1_dos_outros_workers(workers):
+    a, b = workers
+    a.set('pk:tbl:1', 'v1')
+    a.set('pk:tbl:2', 'v2')
+    a.set('outra:1', 'v3')
+    assert b.get_many(['pk:tbl:1', 'pk:tbl:2', 'outra:1']) == {'pk:tbl:1': 'v1', 'pk:tbl:2': 'v2', 'outra:1': 'v3'}
+
+    # Sobrescrito direto no L2: o L1 de b ainda tem o valor antigo até a invalidação
+    a.shared.set('pk:tbl:1', 'novo')
+    assert b.get('pk:tbl:1') == 'v1'
+    a.delete('pk:tbl:1')
+    assert espera(lambda: b.local.get('pk:tbl:1') is None)
+
+    a.delete_prefix('pk:tbl:')
+    assert espera(lambda: b.local.get('pk:tbl:2') is None)
+    assert b.local.get('outra:1') == 'v3'
+
+    b.clear()
+    assert espera(lambda: a.local.get('outra:1') is None and len(a.local) == 0)
+
+
+def test_mensagens_de_outro_canal_sao_ignoradas(workers):
+    a, b = workers
+    b.local.set_many({'x': 1, 'y': 2})
+    outro = UnixSocketBus(directory=a.bus.directory, channel='outro:invalidate')
+    try:
+        outro.publish({'op': 'clear'})
+        a.delete('y')
+        # A remoção de a chega depois da mensagem do outro canal, que não limpou o L1
+        assert espera(lambda: b.local.get('y') is None)
+        assert b.local.get('x') == 1
+    finally:
+        outro.close()
@@ -0,0 +1,172 @@
+"""
+Testes dos saldos diários mantidos incrementalmente (Ledger) no SQLite
+
+Cada teste compara os saldos mantidos pelo flush com os recalculados por
+`rebuild()` a partir dos lançamentos.
+
+    python -m pytest test_ledger.py
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Date, ForeignKey, select
+
+from quentorm import Amount, BaseModel, Column, Integer, Money, String
+from quentorm.database.manager import Database
+from quentorm.ledger import Ledger
+
+
+class Conta(BaseModel):
+    __tablename__ = 'test_ledger_conta'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(20))
+
+
+class Movimento(BaseModel):
+    __tablename__ = 'test_ledger_movimento'
+
+    id = Column(Integer, primary_key=True)
+    conta_id = Column(Integer, ForeignKey('test_ledger_conta.id'))
+    data = Column(Date)
+    valor = Column(Money)
+    tipo = Column(String(10))
+
+
+saldos = Ledger(Movimento, account='conta_id', date='data', amount='valor', kind='tipo',
+                table='test_ledger_saldos')
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'ledger.db')}})
+    BaseModel.metadata.create_all(database.engine(),
+                                  tables=[Conta.__table__, Movimento.__table__, saldos.table])
+    session = database.session()
+    session.add_all([Conta(id=1, nome='corrente'), Conta(id=2, nome='poupança')])
+    session.commit()
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def linhas(db):
+    """Saldos gravados: {(conta, dia): saldo}"""
+    with db.engine().connect() as conn:
+        return {(row.account_id, row.data): row.saldo for row in conn.execute(select(saldos.table))}
+
+
+def confere_rebuild(db):
+    """Os saldos incrementais são iguais aos recalculados do zero"""
+    incremental = linhas(db)
+    saldos.rebuild(db.engine())
+    assert linhas(db) == incremental
+    return incremental
+
+
+def movimento(id, conta_id, dia, valor, tipo='entrada'):
+    return Movimento(id=id, conta_id=conta_id, data=date(2026, 3, dia), valor=Amount(valor), tipo=tipo)
+
+
+def test_insercao(db):
+    session = db.session()
+    session.add_all([movimento(1, 1, 10, '100.50'), movimento(2, 1, 10, '20.25', 'saida'),
+                     movimento(3, 1, 12, '0.10')])
+    session.commit()
+
+    assert confere_rebuild(db) == {
+        (1, date(2026, 3, 10)): Decimal('80.25'),
+        (1, date(2026, 3, 12)): Decimal('80.35'),
+    }
+    assert saldos.balance_at(1, date(2026, 3, 11)) == Decimal('80.25')
+    assert saldos.balance_at(1, date(2026, 3, 9)) == 0
+
+
+def test_insercao_retroativa_atualiza_os_dias_seguintes(db):
+    session = db.session()
+    session.add_all([movimento(1, 1, 10, '100'), movimento(2, 1, 20, '50')])
+    session.commit()
+    session.add(movimento(3, 1, 5, '7.77', 'saida'))
+    session.commit()
+
+    assert confere_rebuild(db) == {
+        (1, date(2026, 3, 5)): Decimal('-7.77'),
+        (1, date(2026, 3, 10)): Decimal('92.23'),
+        (1, date(2026, 3, 20)): Decimal('142.23'),
+    }
+
+
+def test_alteracao_do_valor_e_do_tipo(db):
+    session = db.session()
+    session.add_all([movimento(1, 1, 10, '100'), movimento(2, 1, 15, '30')])
+    session.commit()
+    db.remove_sessions()
+
+    # Instância expirada: o valor antigo vem do banco ao alterar
+    session = db.session()
+    primeiro = session.get(Movimento, 1)
+    session.expire(primeiro)
+    primeiro.valor = Amount('60.01')
+    session.get(Movimento, 2).tipo = 'saida'
+    session.commit()
+
+    assert confere_rebuild(db) == {
+        (1, date(2026, 3, 10)): Decimal('60.01'),
+        (1, date(2026, 3, 15)): Decimal('30.01'),
+    }
+
+
+def test_remocao(db):
+    session = db.session()
+    session.add_all([movimento(1, 1, 10, '100'), movimento(2, 1, 15, '30')])
+    session.commit()
+    db.remove_sessions()
+
+    session = db.session()
+    session.delete(session.get(Movimento, 1))
+    session.commit()
+
+    # O dia sem lançamentos fica com saldo zero; o rebuild não grava o dia
+    assert linhas(db)[(1, date(2026, 3, 10))] == 0
+    assert saldos.balance_at(1, date(2026, 3, 15)) == Decimal('30')
+    saldos.rebuild(db.engine())
+    assert linhas(db) == {(1, date(2026, 3, 15)): Decimal('30')}
+
+
+def test_alteracao_que_move_o_lancamento_para_outra_conta_e_dia(db):
+    session = db.session()
+    session.add_all([movimento(1, 1, 10, '100'), movimento(2, 1, 12, '5'), movimento(3, 2, 1, '1')])
+    session.commit()
+    db.remove_sessions()
+
+    session = db.session()
+    lancamento = session.get(Movimento, 1)
+    session.expire(lancamento)
+    lancamento.conta_id = 2
+    lancamento.data = date(2026, 3, 11)
+    session.commit()
+
+    incremental = linhas(db)
+    assert incremental[(1, date(2026, 3, 10))] == 0
+    assert incremental[(1, date(2026, 3, 12))] == Decimal('5')
+    assert incremental[(2, date(2026, 3, 1))] == Decimal('1')
+    assert incremental[(2, date(2026, 3, 11))] == Decimal('101')
+    saldos.rebuild(db.engine())
+    assert {key: value for key, value in incremental.items() if value} == {
+        key: value for key, value in linhas(db).items() if key != (1, date(2026, 3, 10))}
+    assert saldos.balance_at(1, date(2026, 3, 31)) == Decimal('5')
+    assert saldos.balance_at(2, date(2026, 3, 31)) == Decimal('101')
+
+
+def test_rebuild_em_lotes_igual_ao_incremental(db):
+    session = db.session()
+    for id in range(1, 41):
+        session.add(movimento(id, 1 + id % 2, 1 + id % 28, f"{id}.{id % 100:02d}", 'saida' if id % 3 else 'entrada'))
+        if id % 10 == 0:
+            session.commit()
+    session.commit()
+
+    incremental = linhas(db)
+    assert saldos.rebuild(db.engine(), batch_size=1) == len(incremental)
+    assert linhas(db) == incremental
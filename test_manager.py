@@ -0,0 +1,141 @@
+"""
+Testes do gerenciador de conexões: engines sob demanda, pool instrumentado
+e descarte dos pools herdados após um fork
+
+    python -m pytest test_manager.py
+"""
+import os
+import select
+import signal
+import threading
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.pool import QueuePool
+
+from quentorm.database.manager import Database, build_url, engine_options
+from quentorm.database.pool import InstrumentedQueuePool
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({
+        'default': {'driver': 'sqlite', 'database': str(tmp_path / 'principal.db'),
+                    'options': {'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 0.05}},
+        'outra': {'driver': 'sqlite', 'database': str(tmp_path / 'outra.db')},
+    })
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def test_engine_so_e_criada_no_primeiro_uso(db, tmp_path):
+    assert db._engines == {} and db.pool_stats() == {}
+    engine = db.engine()
+    assert db.engine() is engine and list(db._engines) == ['default']
+    assert db.session().get_bind() is engine
+    with pytest.raises(KeyError, match="'nenhuma' não configurada"):
+        db.engine('nenhuma')
+
+    # Reconfigurar a conexão descarta a engine e as sessões antigas
+    db.config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'nova.db')}})
+    assert 'default' not in db._engines
+    assert db.engine() is not engine and db.engine().url.database.endswith('nova.db')
+
+
+def test_engine_options_separa_pool_e_connect_args():
+    opcoes = engine_options({'driver': 'sqlite', 'database': '/tmp/x.db',
+                             'options': {'pool_size': 3, 'echo': False, 'timeout': 15}})
+    assert opcoes == {'pool_size': 3, 'echo': False, 'connect_args': {'timeout': 15},
+                      'poolclass': InstrumentedQueuePool}
+    # SQLite em memória fica com o pool próprio do dialeto
+    assert engine_options({'driver': 'sqlite', 'options': {'pool_size': 3}}) == {}
+
+    url = build_url({'driver': 'mysql', 'host': 'db', 'database': 'app', 'username': 'u', 'charset': 'utf8mb4'})
+    assert url.render_as_string() == 'mysql+pymysql://u@db/app?charset=utf8mb4'
+    postgres = engine_options({'driver': 'pgsql', 'host': 'db', 'database': 'app', 'schema': 'financeiro'})
+    assert postgres['connect_args'] == {'options': '-csearch_path=financeiro'}
+
+
+def test_pool_instrumentado_conta_esperas_e_timeouts(db):
+    engine = db.engine()
+    assert type(engine.pool) is InstrumentedQueuePool and isinstance(engine.pool, QueuePool)
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+        # pool_size=1 e max_overflow=0: a segunda conexão espera pool_timeout e desiste
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    with engine.connect():
+        pass
+
+    stats = db.pool_stats()
+    assert list(stats) == ['default']
+    default = stats['default']
+    assert (default['pool'], default['size'], default['checked_out']) == ('InstrumentedQueuePool', 1, 0)
+    assert (default['checkouts'], default['timeouts']) == (2, 1)
+    assert default['wait_time_max'] >= 0.05 and default['wait_time_total'] >= default['wait_time_max']
+
+    # As estatísticas sobrevivem à recriação do pool
+    engine.dispose()
+    assert db.pool_stats('default')['default']['checkouts'] == 2
+    db.engine('outra')
+    assert set(db.pool_stats()) == {'default', 'outra'} and list(db.pool_stats('outra')) == ['outra']
+
+
+def test_pid_diferente_descarta_sem_fechar_as_conexoes_herdadas(db):
+    engine = db.engine('outra')
+    session = db.session('outra')
+    session.execute(text('SELECT 1'))
+    with engine.connect() as conn:
+        herdada = conn.connection.dbapi_connection
+    pool = engine.pool
+
+    # Como no filho de um fork sem os.register_at_fork
+    db._pid = -1
+    assert db.engine('outra') is engine
+    assert engine.pool is not pool and db._pid == os.getpid()
+    assert db.session('outra') is not session
+    # A conexão que era do "pai" não foi fechada
+    assert herdada.execute('SELECT 2').fetchone() == (2,)
+    session.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='sem os.fork')
+def test_filho_do_fork_abre_um_pool_novo(db):
+    engine = db.engine()
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE pais (id INTEGER)'))
+    pool = engine.pool
+    session = db.session()
+    # Outra thread segura o lock no momento do fork: o lock herdado ficaria travado no filho
+    segurando, solta = threading.Event(), threading.Event()
+
+    def segura():
+        with db._lock:
+            segurando.set()
+            solta.wait()
+    thread = threading.Thread(target=segura)
+    thread.start()
+    segurando.wait()
+
+    leitura, escrita = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            ok = (db._engines['default'].pool is not pool and db._sessions == {} and db.session() is not session
+                  and db.session().execute(text('SELECT COUNT(*) FROM pais')).scalar() == 0)
+            os.write(escrita, b'1' if ok else b'0')
+        finally:
+            os._exit(0)
+    solta.set()
+    thread.join()
+    os.close(escrita)
+    pronto, _, _ = select.select([leitura], [], [], 5)
+    resultado = os.read(leitura, 1) if pronto else b''
+    os.close(leitura)
+    if not pronto:
+        os.kill(pid, signal.SIGKILL)
+    os.waitpid(pid, 0)
+    assert resultado == b'1'
+    # O pai continua com o pool e a sessão de antes
+    assert engine.pool is pool and db.session() is session
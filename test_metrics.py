@@ -0,0 +1,169 @@
+"""
+Testes das métricas: exposição no formato do Prometheus e agregação entre
+processos
+
+    python -m pytest test_metrics.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import insert
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+from quentorm.monitoring import metrics
+from quentorm.monitoring.metrics import ARCHIVE, MAX, Family, aggregate, collect_metrics, render, render_prometheus
+from quentorm.monitoring.stats import reset_query_stats
+
+
+class Produto(BaseModel):
+    __tablename__ = 'test_metrics_produtos'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+
+
+def amostras(families, name, **labels):
+    """Valores das amostras `name` cujos rótulos contêm `labels`"""
+    return [value for family in families for sample, sample_labels, value in family.samples
+            if sample == name and labels.items() <= sample_labels.items()]
+
+
+def test_render_no_formato_de_texto():
+    contador = Family('teste_total', 'counter', 'Linhas\ncom "aspas"')
+    contador.add({'sql': 'select * from t where a = "x"\\n'}, 3)
+    contador.add({}, 0.25)
+    latencia = Family('teste_seconds', 'histogram', 'Latência')
+    latencia.histogram({'op': 'ler'}, [1, 0, 2] + [0] * (len(metrics.BUCKETS) - 2), 1.5, 3)
+    vazia = Family('teste_vazia', 'gauge', 'Sem amostras')
+
+    linhas = render([contador, vazia, latencia]).splitlines()
+    assert linhas[:4] == [
+        '# HELP teste_total Linhas\\ncom \\"aspas\\"',
+        '# TYPE teste_total counter',
+        'teste_total{sql="select * from t where a = \\"x\\"\\\\n"} 3',
+        'teste_total 0.25',
+    ]
+    assert '# TYPE teste_vazia gauge' not in linhas
+    buckets = [linha for linha in linhas if linha.startswith('teste_seconds_bucket')]
+    # Contagens acumuladas, do menor limite até +Inf
+    assert buckets[0] == f'teste_seconds_bucket{{op="ler",le="{float(metrics.BUCKETS[0])!r}"}} 1'
+    assert buckets[2].endswith(' 3') and buckets[-1] == 'teste_seconds_bucket{op="ler",le="+Inf"} 3'
+    assert linhas[-2:] == ['teste_seconds_sum{op="ler"} 1.5', 'teste_seconds_count{op="ler"} 3']
+    assert render([vazia]) == ''
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'test_metrics': {
+        'driver': 'sqlite', 'database': str(tmp_path / 'metricas.db'),
+        'options': {'pool_size': 2, 'max_overflow': 0},
+    }})
+    engine = database.engine('test_metrics')
+    Produto.__table__.create(engine)
+    reset_query_stats('test_metrics')
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def carrega(db, linhas=3):
+    engine = db.engine('test_metrics')
+    with engine.begin() as conn:
+        conn.execute(insert(Produto.__table__), [{'nome': f"produto {i}"} for i in range(linhas)])
+    db.session('test_metrics').query(Produto).all()
+
+
+def test_metricas_do_processo(db):
+    carrega(db)
+    families = collect_metrics()
+    conexao = {'connection': 'test_metrics'}
+    assert amostras(families, 'quentorm_pool_checkouts_total', mode='sync', **conexao)[0] >= 2
+    assert amostras(families, 'quentorm_pool_size', **conexao) == [2]
+    assert amostras(families, 'quentorm_insert_rows_total', table='test_metrics_produtos', **conexao) == [3]
+    assert amostras(families, 'quentorm_model_query_duration_seconds_count', model='Produto', **conexao) == [2]
+    assert amostras(families, 'quentorm_model_rows_total', model='Produto')[0] >= 3
+    infos = [labels['sql'] for family in families for sample, labels, _ in family.samples
+             if sample == 'quentorm_query_info' and labels['connection'] == 'test_metrics']
+    assert len(infos) == 2 and any(sql.startswith('insert into test_metrics_produtos') for sql in infos)
+
+    texto = render_prometheus()
+    assert 'quentorm_insert_rows_total{connection="test_metrics",table="test_metrics_produtos"} 3' in texto
+    assert 'quentorm_model_query_duration_seconds_bucket{connection="test_metrics",model="Produto",le="+Inf"} 2' \
+        in texto
+
+
+def pid_encerrado():
+    processo = subprocess.Popen([sys.executable, '-c', 'pass'])
+    processo.wait()
+    return processo.pid
+
+
+def grava(directory, pid, families):
+    with open(os.path.join(directory, f"{pid or 'archive'}.json"), 'w', encoding='utf-8') as f:
+        json.dump({'pid': pid, 'families': {family.name: family.as_dict() for family in families}}, f)
+
+
+def familias(checkouts, em_uso, sql='select 1'):
+    contador = Family('quentorm_pool_checkouts_total', 'counter', 'Conexões obtidas do pool')
+    contador.add({'connection': 'default'}, checkouts)
+    gauge = Family('quentorm_pool_checked_out', 'gauge', 'Conexões em uso')
+    gauge.add({'connection': 'default'}, em_uso)
+    info = Family('quentorm_query_info', 'gauge', 'SQL', MAX)
+    info.add({'fingerprint': 'abc', 'sql': sql}, 1)
+    return [contador, gauge, info]
+
+
+def test_agregacao_entre_processos(tmp_path):
+    directory = str(tmp_path)
+    morto = pid_encerrado()
+    grava(directory, os.getpid(), familias(checkouts=5, em_uso=2))
+    grava(directory, morto, familias(checkouts=7, em_uso=4))
+
+    agregadas = aggregate(directory)
+    # Contadores somam todos os processos; gauges só os vivos; MAX não soma
+    assert amostras(agregadas, 'quentorm_pool_checkouts_total') == [12]
+    assert amostras(agregadas, 'quentorm_pool_checked_out') == [2]
+    assert amostras(agregadas, 'quentorm_query_info') == [1]
+    # O arquivo do processo encerrado foi consolidado no arquivo morto
+    assert sorted(name for name in os.listdir(directory) if name.endswith('.json')) == \
+        [f"{os.getpid()}.json", ARCHIVE]
+
+    # Outro processo encerra: soma ao que já estava consolidado, sem contar duas vezes
+    grava(directory, pid_encerrado(), familias(checkouts=1, em_uso=9))
+    assert amostras(aggregate(directory), 'quentorm_pool_checkouts_total') == [13]
+    assert amostras(aggregate(directory), 'quentorm_pool_checkouts_total') == [13]
+    texto = render_prometheus(directory)
+    assert 'quentorm_pool_checkouts_total{connection="default"} 13' in texto
+    assert 'quentorm_pool_checked_out{connection="default"} 2' in texto
+    assert aggregate(str(tmp_path / 'inexistente')) == []
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='sem os.fork')
+def test_processo_filho_grava_as_proprias_metricas(db, tmp_path):
+    directory = str(tmp_path / 'metricas')
+    writer = metrics.enable_multiprocess(directory, interval=60)
+    try:
+        carrega(db, linhas=3)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                # O filho começa do zero (after_fork) e grava o arquivo dele ao sair
+                carrega(db, linhas=4)
+                metrics._writer.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        assert os.path.exists(os.path.join(directory, f"{pid}.json"))
+
+        texto = render_prometheus()
+        assert 'quentorm_insert_rows_total{connection="test_metrics",table="test_metrics_produtos"} 7' in texto
+        # O pool do filho encerrado não conta na ocupação
+        assert 'quentorm_pool_size{connection="test_metrics",mode="sync"} 2' in texto
+        assert os.path.exists(os.path.join(directory, ARCHIVE))
+    finally:
+        writer.close()
+        metrics._writer = None
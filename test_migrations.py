@@ -0,0 +1,191 @@
+"""
+Testes das migrações: create_index online por dialeto e o Migrator (lotes,
+run e rollback)
+
+    python -m pytest test_migrations.py
+"""
+import textwrap
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from quentorm.database.manager import Database
+from quentorm.database.migration import Migration
+from quentorm.database.migrator import Migrator
+
+
+class Banco:
+    """Gerenciador e engine ao mesmo tempo: só o dialeto, sem conexão"""
+
+    def __init__(self, dialect):
+        self.dialect = dialect
+
+    def engine(self, name):
+        return self
+
+    def connect(self):
+        raise RuntimeError('sem banco')
+
+
+class Gravada(Migration):
+    """Migração que guarda o SQL em vez de executá-lo"""
+
+    def __init__(self, dialect, valid=None):
+        super().__init__(Banco(dialect), progress=lambda index, progress: self.andamento.append(progress['phase']))
+        self.valid = valid
+        self.sql = []
+        self.andamento = []
+
+    def execute(self, sql, parameters=None):
+        self.sql.append(sql)
+
+    def execute_autocommit(self, sql):
+        self.sql.append(f"AUTOCOMMIT {sql}")
+
+    def index_valid(self, name, table=None):
+        return self.valid
+
+
+def test_create_index_online_no_postgresql():
+    migration = Gravada(postgresql.dialect())
+    assert migration.create_index('tbl_clientes', ['cpf', '-criado_em'], online=True) == 'ix_tbl_clientes_cpf_criado_em'
+    assert migration.sql == ['AUTOCOMMIT CREATE INDEX CONCURRENTLY ix_tbl_clientes_cpf_criado_em '
+                             'ON tbl_clientes (cpf, criado_em DESC)']
+    assert migration.andamento == ['concluído']
+
+    # Índice inválido de uma construção interrompida: removido e reconstruído
+    migration = Gravada(postgresql.dialect(), valid=False)
+    migration.create_index('financeiro.lancamentos', ['data'], where="tipo = 'saida'", online=True)
+    assert migration.sql == [
+        'AUTOCOMMIT DROP INDEX CONCURRENTLY IF EXISTS financeiro.ix_lancamentos_data',
+        "AUTOCOMMIT CREATE INDEX CONCURRENTLY ix_lancamentos_data ON financeiro.lancamentos (data) "
+        "WHERE tipo = 'saida'",
+    ]
+
+    # Sem online, dentro de transação e sem CONCURRENTLY
+    migration = Gravada(postgresql.dialect())
+    migration.create_index('tbl_clientes', ['cpf'], unique=True)
+    assert migration.sql == ['CREATE UNIQUE INDEX ix_tbl_clientes_cpf ON tbl_clientes (cpf)']
+
+
+def test_create_index_online_no_mysql():
+    migration = Gravada(mysql.dialect())
+    migration.create_index('tbl_clientes', ['cpf'], online=True)
+    migration.drop_index('ix_tbl_clientes_cpf', table='tbl_clientes', online=True)
+    assert migration.sql == [
+        'AUTOCOMMIT CREATE INDEX ix_tbl_clientes_cpf ON tbl_clientes (cpf) ALGORITHM=INPLACE LOCK=NONE',
+        'DROP INDEX ix_tbl_clientes_cpf ON tbl_clientes ALGORITHM=INPLACE LOCK=NONE',
+    ]
+    with pytest.raises(ValueError, match='exige a tabela'):
+        migration.drop_index('ix_tbl_clientes_cpf')
+    # Completo, o índice único recusaria linhas que o parcial aceita
+    with pytest.raises(ValueError, match='índices parciais'):
+        migration.create_index('tbl_clientes', ['cpf'], unique=True, where='ativo', online=True)
+
+
+@pytest.mark.parametrize('dialect', [postgresql.dialect(), mysql.dialect(), sqlite.dialect()],
+                         ids=['postgresql', 'mysql', 'sqlite'])
+def test_indice_valido_existente_e_mantido(dialect):
+    migration = Gravada(dialect, valid=True)
+    assert migration.create_index('tbl_clientes', ['cpf'], name='ix_cpf', online=True) == 'ix_cpf'
+    assert migration.sql == [] and migration.andamento == []
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'migracoes.db')}})
+    with database.engine().begin() as conn:
+        conn.execute(text('CREATE TABLE eventos (id INTEGER PRIMARY KEY, nome VARCHAR(50))'))
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def indices(db, table):
+    return sorted(index['name'] for index in inspect(db.engine()).get_indexes(table))
+
+
+def test_create_index_online_no_sqlite(db):
+    migration = Migration(db)
+    migration.create_table('clientes', ['id INTEGER PRIMARY KEY', 'cpf VARCHAR(14)', 'nome VARCHAR(50)'])
+    assert migration.create_index('clientes', ['cpf'], online=True) == 'ix_clientes_cpf'
+    # Reexecutada, a migração mantém o índice em vez de falhar
+    assert migration.create_index('clientes', ['cpf'], online=True) == 'ix_clientes_cpf'
+    migration.create_index('clientes', ['nome'], where='nome IS NOT NULL')
+    assert indices(db, 'clientes') == ['ix_clientes_cpf', 'ix_clientes_nome']
+    migration.drop_index('ix_clientes_cpf', table='clientes', online=True)
+    assert indices(db, 'clientes') == ['ix_clientes_nome']
+
+
+def escreve(path, nome, up, down='pass'):
+    """Arquivo de migração que registra em `eventos` o que executou"""
+    path.mkdir(exist_ok=True)
+    (path / f"{nome}.py").write_text(textwrap.dedent(f"""
+        from quentorm import Migration
+
+
+        class M{nome.split('_')[0]}(Migration):
+            def up(self):
+                self.execute("INSERT INTO eventos (nome) VALUES ('up {nome}')")
+                {up}
+
+            def down(self):
+                self.execute("INSERT INTO eventos (nome) VALUES ('down {nome}')")
+                {down}
+    """))
+
+
+def eventos(db):
+    with db.engine().connect() as conn:
+        return [nome for nome, in conn.execute(text('SELECT nome FROM eventos ORDER BY id'))]
+
+
+def test_run_e_rollback_por_lote(db, tmp_path):
+    path = tmp_path / 'migrations'
+    escreve(path, '2026_01_01_clientes', "self.create_table('clientes', ['id INTEGER PRIMARY KEY', 'cpf TEXT'])",
+            "self.drop_table('clientes')")
+    escreve(path, '2026_01_02_indice', "self.create_index('clientes', ['cpf'], online=True)",
+            "self.drop_index('ix_clientes_cpf', table='clientes', online=True)")
+    migrator = Migrator(db, path=str(path))
+    assert migrator.pending() == ['2026_01_01_clientes', '2026_01_02_indice']
+    assert migrator.run() == ['2026_01_01_clientes', '2026_01_02_indice']
+    assert migrator.run() == [] and indices(db, 'clientes') == ['ix_clientes_cpf']
+
+    escreve(path, '2026_02_01_nome', "self.execute('ALTER TABLE clientes ADD COLUMN nome TEXT')")
+    escreve(path, '2026_02_02_outra', 'pass')
+    assert migrator.run() == ['2026_02_01_nome', '2026_02_02_outra']
+    assert {name: batch for name, (batch, _) in migrator.applied().items()} == {
+        '2026_01_01_clientes': 1, '2026_01_02_indice': 1, '2026_02_01_nome': 2, '2026_02_02_outra': 2,
+    }
+
+    # Desfaz só o último lote, na ordem inversa
+    assert migrator.rollback() == ['2026_02_02_outra', '2026_02_01_nome']
+    assert migrator.pending() == ['2026_02_01_nome', '2026_02_02_outra']
+    assert migrator.rollback() == ['2026_01_02_indice', '2026_01_01_clientes']
+    assert migrator.rollback() == [] and migrator.applied() == {}
+    assert eventos(db)[-4:] == ['down 2026_02_02_outra', 'down 2026_02_01_nome',
+                                'down 2026_01_02_indice', 'down 2026_01_01_clientes']
+    assert 'clientes' not in inspect(db.engine()).get_table_names()
+
+    # Reaplicadas juntas, voltam em um lote só
+    assert len(migrator.run()) == 4
+    assert {batch for batch, _ in migrator.applied().values()} == {1}
+    assert migrator.rollback(steps=2) == ['2026_02_02_outra', '2026_02_01_nome', '2026_01_02_indice',
+                                          '2026_01_01_clientes']
+
+
+def test_falha_no_meio_do_lote_mantem_as_anteriores(db, tmp_path):
+    path = tmp_path / 'migrations'
+    escreve(path, '2026_03_01_ok', 'pass')
+    escreve(path, '2026_03_02_falha', "raise RuntimeError('falhou')")
+    escreve(path, '2026_03_03_depois', 'pass')
+    migrator = Migrator(db, path=str(path))
+    with pytest.raises(RuntimeError, match='falhou'):
+        migrator.run()
+    assert list(migrator.applied()) == ['2026_03_01_ok']
+    assert eventos(db) == ['up 2026_03_01_ok', 'up 2026_03_02_falha']
+
+    escreve(path, '2026_03_02_falha', 'pass')
+    assert migrator.run() == ['2026_03_02_falha', '2026_03_03_depois']
+    assert migrator.applied()['2026_03_03_depois'][0] == 2
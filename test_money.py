@@ -0,0 +1,113 @@
+"""
+Testes do tipo Money e do valor Amount
+
+    python -m pytest test_money.py
+"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from quentorm import Amount, BaseModel, Column, Integer, Money
+
+
+class Titulo(BaseModel):
+    __tablename__ = 'test_money_titulo'
+
+    id = Column(Integer, primary_key=True)
+    valor = Column(Money)
+
+
+def test_conversoes():
+    assert Amount('10.505').cents == 1051
+    assert Amount(Decimal('-0.005')).cents == -1
+    assert Amount(0.1).cents == 10
+    assert Amount(3).cents == 300
+    assert str(Amount('-1.05')) == '-1.05'
+    assert Amount('1250.9').to_decimal() == Decimal('1250.90')
+    with pytest.raises(ValueError):
+        Amount('dez')
+    with pytest.raises(TypeError):
+        Amount([1])
+
+
+def test_aritmetica():
+    assert Amount('0.10') + Amount('0.20') == Amount('0.30')
+    assert 1 + Amount('0.50') == Amount('1.50')
+    assert 10 - Amount('0.01') == Amount('9.99')
+    assert Amount('100') * Decimal('0.015') == Amount('1.50')
+    assert Amount('0.05') * Decimal('0.5') == Amount('0.03')
+    assert Amount('10') / 3 == Amount('3.33')
+    assert Amount('10') / Amount('4') == Decimal('2.5')
+    assert -Amount('1') == Amount('-1') and abs(Amount('-1')) == Amount('1')
+    with pytest.raises(TypeError):
+        Amount('1') * Amount('1')
+
+
+def test_igualdade_e_hash():
+    assert Amount('10') == 10 == Decimal('10.00') == 10.0
+    assert Amount('10.50') == Decimal('10.5') and Amount('0.50') == 0.5
+    # Como Decimal('0.1') != 0.1: o float 0.1 não vale exatamente 10 centavos
+    assert Amount('0.10') != 0.1
+    assert hash(Amount('10')) == hash(10) == hash(Decimal('10.00'))
+    assert hash(Amount('10.50')) == hash(Decimal('10.50'))
+    assert len({Amount('1'), 1, Decimal('1.00'), Amount('1.01')}) == 2
+    assert Amount('1') < 2 and Amount('1') >= Decimal('1.00') and Amount('0.10') > 0.09
+    with pytest.raises(AttributeError):
+        Amount('1').cents = 5
+
+
+def test_allocate_sem_perder_centavos():
+    assert Amount('100').allocate(1, 1, 1) == [Amount('33.34'), Amount('33.33'), Amount('33.33')]
+    assert Amount('-0.05').allocate(1, 1) == [Amount('-0.03'), Amount('-0.02')]
+    partes = Amount('1000.01').allocate(Decimal('0.7'), Decimal('0.2'), Decimal('0.1'))
+    assert sum(partes, Amount()) == Amount('1000.01')
+    with pytest.raises(ValueError):
+        Amount('1').allocate(0, 0)
+
+
+def test_from_cents_recusa_fracoes():
+    assert Amount.from_cents(Decimal('1050')) == Amount('10.50')
+    with pytest.raises(ValueError):
+        Amount.from_cents(Decimal('100.50'))
+    with pytest.raises(ValueError):
+        Money().process_result_value(Decimal('100.50'), None)
+    with pytest.raises(TypeError):
+        Amount.from_cents('1050')
+
+
+def test_bind_e_resultado():
+    money = Money()
+    assert money.process_bind_param(Amount('12.34'), None) == 1234
+    assert money.process_bind_param(Decimal('12.345'), None) == 1235
+    assert money.process_bind_param(7, None) == 700
+    assert money.process_bind_param(None, None) is None
+    assert money.process_result_value(1234, None) == Amount('12.34')
+    assert money.process_result_value(None, None) is None
+
+
+def test_comparacao_e_aritmetica_no_sql():
+    def sql(stmt):
+        return str(stmt.compile(compile_kwargs={'literal_binds': True}))
+
+    assert sql(select(Titulo.id).where(Titulo.valor > 100)).endswith('valor > 10000')
+    assert sql(select(Titulo.id).where(Titulo.valor == Amount('1.05'))).endswith('valor = 105')
+    # Em `valor * 2` o 2 é um número, não 2 reais; a soma continua em centavos
+    assert '* 2' in sql(select(Titulo.valor * 2))
+    assert isinstance((Titulo.valor + Titulo.valor).type, Money)
+    assert not isinstance((Titulo.valor / Titulo.valor).type, Money)
+
+
+def test_ida_e_volta_no_banco():
+    engine = create_engine('sqlite://')
+    Titulo.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(Titulo.__table__.insert(), [{'valor': Amount('0.10')}, {'valor': Decimal('0.20')},
+                                                 {'valor': None}])
+        assert conn.execute(select(Titulo.valor).order_by(Titulo.id)).scalars().all() == \
+            [Amount('0.10'), Amount('0.20'), None]
+        assert conn.execute(select(func.sum(Titulo.valor))).scalar() == Amount('0.30')
+        assert conn.execute(select(Titulo.id).where(Titulo.valor >= Decimal('0.2'))).scalars().all() == [2]
+        # A razão entre dois valores é um número, não centavos
+        assert conn.execute(select(Titulo.valor / (Titulo.valor * 4)).where(Titulo.id == 1)).scalar() == \
+            Decimal('0.25')
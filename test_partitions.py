@@ -0,0 +1,186 @@
+"""
+Testes do particionamento por data no SQLite (tabelas por período e view)
+
+    python -m pytest test_partitions.py
+"""
+import sqlite3
+from datetime import date
+
+import pytest
+from sqlalchemy import Date, Numeric, insert, select
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+from quentorm.utils.partitions import date_range
+
+
+class Lancamento(BaseModel):
+    __tablename__ = 'test_partitions_lancamento'
+    __partition_by__ = ('range', 'data', 'month')
+
+    id = Column(Integer, primary_key=True)
+    data = Column(Date, nullable=False)
+    valor = Column(Numeric(12, 2))
+    descricao = Column(String(20))
+
+
+particoes = Lancamento.__partitioning__
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'particoes.db')}})
+    engine = database.engine()
+    BaseModel.metadata.create_all(engine, tables=[Lancamento.__table__])
+    particoes.ensure(engine, date(2025, 1, 1), date(2025, 6, 30))
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def ids_por_tabela(db):
+    """{tabela do período: ids}, só das tabelas com linhas"""
+    tabelas = {}
+    with db.engine().connect() as conn:
+        for start in sorted(particoes.partitions(conn, refresh=True)):
+            ids = conn.execute(select(particoes.partition_table(start).c.id)
+                               .order_by(particoes.partition_table(start).c.id)).scalars().all()
+            if ids:
+                tabelas[particoes.name(start)] = ids
+    return tabelas
+
+
+def test_insert_update_e_delete_vao_para_a_tabela_do_periodo(db):
+    session = db.session()
+    session.add_all([
+        Lancamento(data=date(2025, 3, 5), valor=10, descricao='março'),
+        Lancamento(data=date(2025, 4, 9), valor=20, descricao='abril'),
+        # Período sem partição: criada na mesma transação
+        Lancamento(data=date(2024, 12, 31), valor=30, descricao='dezembro'),
+    ])
+    session.commit()
+    marco, abril, dezembro = (Lancamento.where('descricao', nome).first() for nome in ('março', 'abril', 'dezembro'))
+    assert ids_por_tabela(db) == {
+        'test_partitions_lancamento_2024_12': [dezembro.id],
+        'test_partitions_lancamento_2025_03': [marco.id],
+        'test_partitions_lancamento_2025_04': [abril.id],
+    }
+    # Os ids vêm da sequência compartilhada: não se repetem entre os períodos
+    assert len({marco.id, abril.id, dezembro.id}) == 3
+
+    marco.valor = 15
+    session.delete(dezembro)
+    session.commit()
+    assert ids_por_tabela(db) == {
+        'test_partitions_lancamento_2025_03': [marco.id],
+        'test_partitions_lancamento_2025_04': [abril.id],
+    }
+    assert Lancamento.find(marco.id).valor == 15
+
+
+def test_linha_muda_de_tabela_quando_a_data_muda_de_periodo(db):
+    session = db.session()
+    lancamento = Lancamento(data=date(2025, 3, 5), valor=10)
+    session.add(lancamento)
+    session.commit()
+
+    lancamento.data = date(2025, 5, 20)
+    session.commit()
+    assert ids_por_tabela(db) == {'test_partitions_lancamento_2025_05': [lancamento.id]}
+    db.remove_sessions()
+    assert Lancamento.find(lancamento.id).data == date(2025, 5, 20)
+
+
+def test_insert_e_update_em_massa(db):
+    table = Lancamento.__table__
+    with db.engine().begin() as conn:
+        conn.execute(insert(table), [
+            {'data': date(2025, 1, 10), 'valor': 1},
+            {'data': date(2025, 2, 10), 'valor': 2},
+            {'data': date(2025, 2, 11), 'valor': 3},
+        ])
+        # Sem a chave primária no filtro, o UPDATE roda em todas as tabelas e o rowcount soma as linhas
+        assert conn.execute(table.update().where(table.c.valor >= 2).values(descricao='alto')).rowcount == 2
+    assert [len(ids) for ids in ids_por_tabela(db).values()] == [1, 2]
+    assert Lancamento.where('descricao', 'alto').count() == 2
+    with pytest.raises(ValueError):
+        with db.engine().begin() as conn:
+            conn.execute(insert(table).values(data=date(2025, 1, 1), valor=1))
+
+
+def test_date_range_com_grupos_or_where():
+    def faixa(query):
+        return date_range(query.wheres, 'data')
+
+    consulta = Lancamento.where('data', '>=', date(2025, 3, 1)).where('data', '<', date(2025, 4, 1))
+    assert faixa(consulta) == (date(2025, 3, 1), date(2025, 3, 31))
+    consulta = (Lancamento.where('data', date(2025, 1, 15))
+                .or_where('data', '>', date(2025, 5, 1)).where('data', '<=', date(2025, 5, 31)))
+    assert faixa(consulta) == (date(2025, 1, 15), date(2025, 5, 31))
+    # Um grupo sem filtro na coluna de partição deixa o intervalo aberto
+    consulta = Lancamento.where('data', date(2025, 1, 15)).or_where('valor', '>', 10)
+    assert faixa(consulta) == (None, None)
+    consulta = Lancamento.where_in('data', [date(2025, 2, 1), date(2025, 4, 30)])
+    assert faixa(consulta) == (date(2025, 2, 1), date(2025, 4, 30))
+    # data IS NULL não tem linhas possíveis: o grupo não conta
+    consulta = Lancamento.where('data', None).or_where('data', date(2025, 6, 1))
+    assert faixa(consulta) == (date(2025, 6, 1), date(2025, 6, 1))
+    assert faixa(Lancamento.where('data', None)) == (date.max, date.min)
+
+
+def test_poda_pelas_particoes(db):
+    marco = Lancamento.where('data', '>=', date(2025, 3, 1)).where('data', '<', date(2025, 4, 1))
+    assert marco.partitions() == ['test_partitions_lancamento_2025_03']
+    assert 'FROM test_partitions_lancamento_2025_03' in str(marco.to_select())
+
+    dois_grupos = Lancamento.where('data', date(2025, 2, 3)).or_where('data', date(2025, 4, 3))
+    assert dois_grupos.partitions() == ['test_partitions_lancamento_2025_02', 'test_partitions_lancamento_2025_03',
+                                        'test_partitions_lancamento_2025_04']
+    assert Lancamento.where('data', None).partitions() == []
+
+    todas = Lancamento.query().partitions()
+    assert todas[:6] == [f"test_partitions_lancamento_2025_{month:02d}" for month in range(1, 7)]
+    assert 'FROM test_partitions_lancamento ' in str(Lancamento.query().to_select()) + ' '
+
+    session = db.session()
+    session.add_all([Lancamento(data=date(2025, 3, 9), valor=1), Lancamento(data=date(2025, 6, 9), valor=2)])
+    session.commit()
+    assert [lancamento.valor for lancamento in marco.get()] == [1]
+    assert marco.count() == 1
+
+
+def test_poda_le_da_replica_fixada_na_transacao(tmp_path):
+    """
+    Cada réplica tem uma partição diferente: a consulta precisa ler as
+    partições da mesma réplica em que o SELECT roda
+    """
+    for nome, mes in (('primario', 1), ('replica1', 1), ('replica2', 2)):
+        database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / f"{nome}.db")}})
+        particoes.ensure(database.engine(), date(2026, mes, 1), date(2026, mes, 1))
+        database.dispose()
+        conn = sqlite3.connect(str(tmp_path / f"{nome}.db"))
+        conn.execute(f"INSERT INTO test_partitions_lancamento_2026_{mes:02d} (id, data, descricao) "
+                     f"VALUES (1, '2026-{mes:02d}-10', ?)", (nome,))
+        conn.commit()
+        conn.close()
+
+    db = Database().config({'default': {
+        'driver': 'sqlite',
+        'database': str(tmp_path / 'primario.db'),
+        'replicas': [{'database': str(tmp_path / 'replica1.db')}, {'database': str(tmp_path / 'replica2.db')}],
+    }})
+    try:
+        session = db.session()
+        lidas = []
+        for _ in range(4):
+            consulta = Lancamento.where('data', '>=', date(2026, 1, 1))
+            particao = consulta.partitions()
+            linhas = consulta.get()
+            assert len(linhas) == 1 and particao == [f"test_partitions_lancamento_2026_0{linhas[0].data.month}"]
+            lidas.append(linhas[0].descricao)
+            session.commit()
+        assert set(lidas) == {'replica1', 'replica2'}
+        assert not session.sticky()
+    finally:
+        db.remove_sessions()
+        db.dispose()
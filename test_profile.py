@@ -0,0 +1,114 @@
+"""
+Testes do perfil de consultas (db.profile) e de assert_max_queries
+
+    python -m pytest test_profile.py
+"""
+import pytest
+from sqlalchemy import ForeignKey, insert, select, text
+from sqlalchemy.orm import relationship
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+from quentorm.testing import QueryBudgetExceeded, assert_max_queries
+
+
+class Conta(BaseModel):
+    __tablename__ = 'test_profile_contas'
+
+    id = Column(Integer, primary_key=True)
+    cliente_id = Column(Integer, ForeignKey('test_profile_clientes.id'))
+
+
+class Cliente(BaseModel):
+    __tablename__ = 'test_profile_clientes'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+    contas = relationship(Conta, lazy='select')
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({
+        'default': {'driver': 'sqlite', 'database': str(tmp_path / 'perfil.db')},
+        'outra': {'driver': 'sqlite', 'database': str(tmp_path / 'outra.db')},
+    })
+    BaseModel.metadata.create_all(database.engine(), tables=[Cliente.__table__, Conta.__table__])
+    with database.engine().begin() as conn:
+        conn.execute(insert(Cliente.__table__), [{'id': id, 'nome': f"cliente {id}"} for id in range(1, 5)])
+        conn.execute(insert(Conta.__table__), [{'cliente_id': id % 4 + 1} for id in range(8)])
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def contas_por_cliente(db):
+    """Um lazy load por cliente: o N+1"""
+    return {cliente.id: len(cliente.contas) for cliente in db.session().execute(select(Cliente)).scalars()}
+
+
+def test_profile_aponta_o_n_mais_1(db):
+    with db.profile() as p:
+        assert contas_por_cliente(db) == {1: 2, 2: 2, 3: 2, 4: 2}
+    # 1 consulta de clientes + 4 lazy loads; 4 clientes e 8 contas carregados
+    assert p.count == 5 and p.loaded == 12 and p.total > 0
+    grupos = p.by_fingerprint()
+    assert [grupo['count'] for grupo in grupos] == [4, 1]
+    assert grupos[0]['sql'].startswith('select') and 'test_profile_contas' in grupos[0]['sql']
+
+    repetida, = p.repeated()
+    assert repetida['count'] == 4 and repetida['id'] == grupos[0]['id']
+    # O trecho é o do código da aplicação, não o do SQLAlchemy
+    assert repetida['location'].startswith(f"{__file__}:{contas_por_cliente.__code__.co_firstlineno + 2} (")
+    assert p.repeated(threshold=5) == []
+
+    relatorio = p.report()
+    assert relatorio.startswith('5 consulta(s) em ') and '12 registro(s) carregado(s)' in relatorio
+    assert '  5. [default] ' in relatorio and 'Repetida 4x em ' in relatorio
+
+
+def test_profile_por_conexao_e_linhas(db):
+    with db.profile() as todas, db.profile('outra') as outra:
+        with db.engine().begin() as conn:
+            conn.execute(Conta.__table__.update().values(cliente_id=1))
+        with db.engine('outra').connect() as conn:
+            conn.execute(text('SELECT 1'))
+    assert (todas.count, outra.count) == (2, 1)
+    assert todas.rows == 8 and todas.loaded == 0
+    assert [record.connection for record in outra.records] == ['outra']
+    assert outra.records[0].location.startswith(__file__)
+    assert repr(outra).startswith('<QueryProfile(1 consultas, ')
+
+
+def test_assert_max_queries(db):
+    with assert_max_queries(5) as p:
+        contas_por_cliente(db)
+    assert p.count == 5
+
+    with pytest.raises(QueryBudgetExceeded) as erro:
+        with assert_max_queries(3):
+            contas_por_cliente(db)
+    assert isinstance(erro.value, AssertionError)
+    assert (erro.value.limit, erro.value.profile.count) == (3, 5)
+    assert str(erro.value).startswith('5 consultas executadas, o limite é 3\n5 consulta(s) em ')
+    assert 'Repetida 4x' in str(erro.value)
+
+    # Só conta as instruções da conexão indicada
+    with assert_max_queries(0, connection='outra'):
+        contas_por_cliente(db)
+    with assert_max_queries(0, db=db, connection='outra'):
+        contas_por_cliente(db)
+
+
+def test_assert_max_queries_como_decorador(db):
+    @assert_max_queries(1)
+    def um_cliente():
+        return db.session().get(Cliente, 1).nome
+
+    @assert_max_queries(1)
+    def com_contas():
+        return len(db.session().get(Cliente, 2).contas)
+
+    assert um_cliente() == 'cliente 1'
+    with pytest.raises(QueryBudgetExceeded):
+        com_contas()
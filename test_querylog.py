@@ -0,0 +1,59 @@
+"""
+Testes do log de consultas lentas: parâmetros mascarados
+
+    python -m pytest test_querylog.py
+"""
+from sqlalchemy import select
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+from quentorm.monitoring.querylog import REDACTED, redact
+
+
+class Pessoa(BaseModel):
+    __tablename__ = 'test_querylog_pessoa'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+    cpf = Column(String(14))
+
+
+def test_nome_com_sufixo_do_sqlalchemy():
+    assert redact({'cpf_1': '123', 'cpf': '456', 'nome_1': 'Ana'}, ['cpf']) == \
+        {'cpf_1': REDACTED, 'cpf': REDACTED, 'nome_1': 'Ana'}
+    # Outra coluna que só começa com o nome listado continua em claro
+    assert redact({'cpf_cnpj_1': '789'}, ['cpf']) == {'cpf_cnpj_1': '789'}
+
+
+def test_posicionais_pelos_nomes_da_instrucao():
+    assert redact(('Ana', '123'), ['cpf'], names=['nome_1', 'cpf_1']) == ['Ana', REDACTED]
+    assert redact([('Ana', '123'), ('Bia', '456')], ['cpf'], names=['nome', 'cpf']) == \
+        [['Ana', REDACTED], ['Bia', REDACTED]]
+
+
+def test_posicionais_sem_nomes_sao_todos_mascarados():
+    assert redact(('Ana', '123'), ['cpf']) == [REDACTED, REDACTED]
+    assert redact(('Ana', '123', 1), ['cpf'], names=['nome_1', 'cpf_1']) == [REDACTED] * 3
+    # Sem lista de nomes, nada é mascarado
+    assert redact(('Ana', '123')) == ['Ana', '123']
+    assert redact(('Ana', '123'), True) == [REDACTED, REDACTED]
+
+
+def test_log_de_consultas_lentas_no_sqlite(tmp_path):
+    log_file = tmp_path / 'queries.log'
+    db = Database().config({'test_querylog': {'driver': 'sqlite', 'database': str(tmp_path / 'q.db')}})
+    db.logging_config({'test_querylog': {'slow_query_threshold': 0, 'log_file': str(log_file),
+                                          'redact_params': ['cpf']}})
+    try:
+        engine = db.engine('test_querylog')
+        Pessoa.__table__.create(engine)
+        with engine.begin() as conn:
+            conn.execute(Pessoa.__table__.insert().values(nome='Ana', cpf='123.456.789-09'))
+            conn.execute(select(Pessoa.id).where(Pessoa.cpf == '123.456.789-09', Pessoa.nome == 'Ana'))
+            conn.exec_driver_sql('SELECT id FROM test_querylog_pessoa WHERE cpf = ?', ('123.456.789-09',))
+    finally:
+        db.logging_config({'test_querylog': {'enabled': False}})
+        db.dispose()
+    text = log_file.read_text()
+    assert 'Consulta lenta' in text and "'Ana'" in text
+    assert '123.456.789-09' not in text
@@ -0,0 +1,117 @@
+"""
+Testes da conciliação de extratos (casamento e importações repetidas)
+
+    python -m pytest test_reconciliation.py
+"""
+import io
+from datetime import date
+
+import pytest
+from sqlalchemy import Date, ForeignKey
+
+from quentorm import Amount, BaseModel, Column, Integer, Money, String
+from quentorm.database.manager import Database
+from quentorm.reconciliation import (AMBIGUOUS, MATCHED, UNMATCHED, Reconciler, StatementLine, _unique, match,
+                                     read_csv)
+
+DIA = date(2026, 3, 10)
+
+
+def linha(fitid, dias=0, cents=1000):
+    return StatementLine(fitid, date.fromordinal(DIA.toordinal() + dias), cents)
+
+
+def candidato(id, dias=0, cents=1000):
+    return id, DIA.toordinal() + dias, cents
+
+
+def test_mesmo_dia_vence_o_menor_id():
+    resultados = match([linha('a'), linha('b')], [candidato(7), candidato(3), candidato(5, dias=1)])
+    assert resultados == [(MATCHED, 3, 0, 2), (MATCHED, 7, 0, 1)]
+
+
+def test_menor_distancia_primeiro():
+    # 'a' aceitaria o lançamento de amanhã, mas 'b' o tem no mesmo dia
+    resultados = match([linha('a'), linha('b', dias=1)], [candidato(1, dias=1), candidato(2, dias=-3)])
+    assert resultados == [(MATCHED, 2, -3, 1), (MATCHED, 1, 0, 1)]
+    # Depois da tolerância, nada casa; o sinal faz parte do valor
+    assert match([linha('a')], [candidato(1, dias=4), candidato(2, cents=-1000)]) == [(UNMATCHED, None, None, 0)]
+
+
+def test_antes_e_depois_na_mesma_distancia_e_ambiguo():
+    resultados = match([linha('a'), linha('b', cents=500)],
+                       [candidato(1, dias=-2), candidato(2, dias=2), candidato(3, dias=-1, cents=500)])
+    assert resultados == [(AMBIGUOUS, None, 2, 2), (MATCHED, 3, -1, 1)]
+
+
+def test_unique_sufixa_fitids_repetidos():
+    linhas = _unique([linha('x'), linha('x', dias=1), linha('y'), linha('x', dias=2)])
+    assert [item.fitid for item in linhas] == ['x', 'x#2', 'y', 'x#3']
+    assert linhas[1].day == date(2026, 3, 11)
+
+
+def test_read_csv_com_virgula_decimal():
+    arquivo = io.StringIO("data;valor;descricao\n10/03/2026;-1.234,56;Aluguel\n10/03/2026;-1.234,56;Aluguel\n")
+    linhas = list(read_csv(arquivo))
+    assert [(item.day, item.cents, item.description) for item in linhas] == [(DIA, -123456, 'Aluguel')] * 2
+    # Sem FITID no arquivo, a ocorrência distingue as linhas repetidas
+    assert linhas[0].fitid != linhas[1].fitid
+
+
+class Conta(BaseModel):
+    __tablename__ = 'test_reconciliation_conta'
+
+    id = Column(Integer, primary_key=True)
+
+
+class Movimento(BaseModel):
+    __tablename__ = 'test_reconciliation_movimento'
+
+    id = Column(Integer, primary_key=True)
+    conta_id = Column(Integer, ForeignKey('test_reconciliation_conta.id'))
+    data = Column(Date)
+    valor = Column(Money)
+    tipo = Column(String(10))
+
+
+conciliacao = Reconciler(Movimento, account='conta_id', date='data', amount='valor', kind='tipo',
+                         table='test_reconciliation_resultados')
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'conciliacao.db')}})
+    BaseModel.metadata.create_all(database.engine(), tables=[Conta.__table__, Movimento.__table__])
+    session = database.session()
+    session.add_all([
+        Conta(id=1),
+        Movimento(id=1, conta_id=1, data=date(2026, 3, 10), valor=Amount('100.00'), tipo='entrada'),
+        Movimento(id=2, conta_id=1, data=date(2026, 3, 12), valor=Amount('35.90'), tipo='saida'),
+    ])
+    session.commit()
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def test_reimportacao_pula_as_conciliadas_e_refaz_as_demais(db):
+    extrato = [StatementLine('f1', date(2026, 3, 10), 10000), StatementLine('f2', date(2026, 3, 11), -3590),
+               StatementLine('f3', date(2026, 3, 15), -5000)]
+    assert conciliacao.reconcile(1, extrato) == {MATCHED: 2, UNMATCHED: 1, AMBIGUOUS: 0, 'skipped': 0}
+    resultados = {row['fitid']: row for row in conciliacao.results(1)}
+    assert resultados['f1']['entry_id'] == 1 and resultados['f1']['valor'] == Amount('100')
+    assert (resultados['f2']['entry_id'], resultados['f2']['days_apart']) == (2, 1)
+    assert resultados['f3']['status'] == UNMATCHED
+    conciliada_em = resultados['f1']['reconciled_at']
+
+    # O lançamento que faltava é registrado e o mesmo extrato importado de novo
+    session = db.session()
+    session.add(Movimento(id=3, conta_id=1, data=date(2026, 3, 14), valor=Amount('50'), tipo='saida'))
+    session.commit()
+    assert conciliacao.reconcile(1, extrato) == {MATCHED: 1, UNMATCHED: 0, AMBIGUOUS: 0, 'skipped': 2}
+    resultados = {row['fitid']: row for row in conciliacao.results(1)}
+    assert len(resultados) == 3
+    f3 = resultados['f3']
+    assert (f3['status'], f3['entry_id'], f3['days_apart']) == (MATCHED, 3, -1)
+    # As linhas já conciliadas não são regravadas
+    assert resultados['f1']['reconciled_at'] == conciliada_em
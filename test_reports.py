@@ -0,0 +1,154 @@
+"""
+Testes dos relatórios de aging e fluxo de caixa
+
+As estratégias `sql` e `stream` (com e sem NumPy) rodam sobre os mesmos
+títulos e precisam dar as mesmas faixas.
+
+    python -m pytest test_reports.py
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Date, Numeric
+
+from quentorm import Amount, BaseModel, Column, Integer, Money, String
+from quentorm import reports
+from quentorm.database.manager import Database
+from quentorm.reports import aging, cash_flow, net_cash_flow
+
+HOJE = date(2026, 3, 31)
+
+
+class Titulo(BaseModel):
+    __tablename__ = 'test_reports_titulo'
+
+    id = Column(Integer, primary_key=True)
+    fornecedor_id = Column(Integer)
+    data_vencimento = Column(Date)
+    valor = Column(Numeric(12, 2))
+    status = Column(String(20))
+
+
+class TituloCentavos(BaseModel):
+    __tablename__ = 'test_reports_titulo_centavos'
+
+    id = Column(Integer, primary_key=True)
+    fornecedor_id = Column(Integer)
+    data_vencimento = Column(Date)
+    valor = Column(Money)
+    status = Column(String(20))
+
+
+def titulos():
+    """Vencimentos de 120 dias atrás a 40 dias à frente, com valores nulos e títulos pagos"""
+    linhas = []
+    for id in range(1, 161):
+        valor = None if id % 13 == 0 else Decimal(id * 37 % 1000) + Decimal(id % 100) / 100
+        linhas.append({'id': id, 'fornecedor_id': id % 3 or None, 'data_vencimento': HOJE + timedelta(days=40 - id),
+                       'valor': valor, 'status': 'pago' if id % 5 == 0 else 'pendente'})
+    return linhas
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'relatorios.db')}})
+    BaseModel.metadata.create_all(database.engine(), tables=[Titulo.__table__, TituloCentavos.__table__])
+    session = database.session()
+    for linha in titulos():
+        session.add(Titulo(**linha))
+        centavos = dict(linha, valor=None if linha['valor'] is None else Amount(linha['valor']))
+        session.add(TituloCentavos(**centavos))
+    session.commit()
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def acumulador(request, monkeypatch):
+    """A estratégia stream acumulando em Python puro ou com NumPy (se instalado)"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(reports, '_np', None)
+    return request.param
+
+
+def esperado():
+    """Aging calculado à mão sobre os títulos em aberto com valor"""
+    faixas = {}
+    for linha in titulos():
+        if linha['status'] != 'pendente' or linha['valor'] is None:
+            continue
+        atraso = (HOJE - linha['data_vencimento']).days
+        faixa = ('a vencer' if atraso < 0 else '0-30' if atraso <= 30 else '31-60' if atraso <= 60
+                 else '61-90' if atraso <= 90 else '91+')
+        entry = faixas.setdefault(faixa, [0, Decimal(0)])
+        entry[0] += 1
+        entry[1] += linha['valor']
+    return faixas
+
+
+@pytest.mark.parametrize('modelo', [Titulo, TituloCentavos])
+def test_aging_igual_nas_duas_estrategias(db, acumulador, modelo):
+    sql = aging(modelo, as_of=HOJE, strategy='sql')
+    assert sql == aging(modelo, as_of=HOJE, strategy='stream', batch_size=7)
+    assert {linha['bucket']: [linha['count'], linha['total']] for linha in sql} == esperado()
+
+    por_fornecedor = aging(modelo, as_of=HOJE, group_by='fornecedor_id', buckets=(15, 45), strategy='sql')
+    assert por_fornecedor == aging(modelo, as_of=HOJE, group_by='fornecedor_id', buckets=(15, 45),
+                                   strategy='stream', batch_size=7)
+    assert {linha['group'] for linha in por_fornecedor} == {None, 1, 2}
+
+
+@pytest.mark.parametrize('modelo', [Titulo, TituloCentavos])
+def test_fluxo_de_caixa_igual_nas_duas_estrategias(db, acumulador, modelo):
+    for opcoes in ({'days': 30}, {'days': 60, 'period': 'week', 'include_overdue': True},
+                   {'days': 90, 'period': 'month', 'group_by': 'fornecedor_id'}):
+        sql = cash_flow(modelo, start=HOJE, strategy='sql', **opcoes)
+        assert sql == cash_flow(modelo, start=HOJE, strategy='stream', batch_size=11, **opcoes)
+    atrasados = cash_flow(modelo, start=HOJE, days=10, include_overdue=True, strategy='sql')
+    assert atrasados[0]['period'] == HOJE
+    assert sum(linha['count'] for linha in atrasados) == sum(
+        1 for linha in titulos() if linha['status'] == 'pendente' and linha['valor'] is not None
+        and linha['data_vencimento'] < HOJE + timedelta(days=10))
+
+
+def test_saldo_projetado():
+    entradas = [{'period': date(2026, 4, 1), 'total': Decimal('100')},
+                {'period': date(2026, 4, 8), 'total': Decimal('50')}]
+    saidas = [{'period': date(2026, 4, 8), 'total': Decimal('80')}]
+    assert [linha['saldo_projetado'] for linha in net_cash_flow(entradas, saidas, opening_balance='10.5')] == [
+        Decimal('110.5'), Decimal('80.5')]
+
+
+def test_relatorio_le_da_replica_sem_prender_a_sessao(tmp_path):
+    """Só a réplica tem títulos: o relatório vazio viria do primário"""
+    arquivos = {}
+    for nome in ('primario', 'replica'):
+        arquivos[nome] = str(tmp_path / f"{nome}.db")
+        database = Database().config({'default': {'driver': 'sqlite', 'database': arquivos[nome]}})
+        Titulo.__table__.create(database.engine())
+        if nome == 'replica':
+            session = database.session()
+            session.add(Titulo(id=1, data_vencimento=date(2026, 1, 10), valor=100, status='pendente'))
+            session.commit()
+            database.remove_sessions()
+        database.dispose()
+
+    db = Database().config({'default': {'driver': 'sqlite', 'database': arquivos['primario'],
+                                        'replicas': [{'database': arquivos['replica']}]}})
+    try:
+        session = db.session()
+        linhas = aging(Titulo, as_of=date(2026, 1, 20))
+        assert [(linha['bucket'], linha['count']) for linha in linhas] == [('0-30', 1)]
+        assert not session.sticky()
+    finally:
+        db.remove_sessions()
+        db.dispose()
+
+
+def test_estrategia_invalida(db):
+    with pytest.raises(ValueError):
+        aging(Titulo, strategy='pandas')
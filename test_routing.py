@@ -0,0 +1,155 @@
+"""
+Testes da separação de leitura e escrita entre primário e réplicas
+
+O primário e cada réplica são arquivos SQLite distintos com a mesma tabela;
+cada arquivo tem uma linha com o próprio nome, o que mostra de onde veio
+cada leitura.
+
+    python -m pytest test_routing.py
+"""
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy import insert, select
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+
+
+class Origem(BaseModel):
+    __tablename__ = 'test_routing_origem'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(20))
+
+
+def criar_banco(path, nome):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE test_routing_origem (id INTEGER PRIMARY KEY, nome VARCHAR(20))')
+    conn.execute('INSERT INTO test_routing_origem (id, nome) VALUES (1, ?)', (nome,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db(tmp_path):
+    for nome in ('primario', 'replica1', 'replica2'):
+        criar_banco(str(tmp_path / f"{nome}.db"), nome)
+    database = Database().config({'default': {
+        'driver': 'sqlite',
+        'database': str(tmp_path / 'primario.db'),
+        'replicas': [{'database': str(tmp_path / 'replica1.db')}, {'database': str(tmp_path / 'replica2.db')}],
+        'sticky_window': 0.2,
+        'replica_retry_after': 0.2,
+    }})
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def origem(session, for_update=False):
+    """Nome do arquivo que respondeu a leitura, encerrando a transação"""
+    query = select(Origem.nome).where(Origem.id == 1)
+    if for_update:
+        query = query.with_for_update()
+    nome = session.execute(query).scalar()
+    session.rollback()
+    return nome
+
+
+def test_leituras_em_round_robin(db):
+    session = db.session()
+    assert [origem(session) for _ in range(4)] == ['replica1', 'replica2', 'replica1', 'replica2']
+    assert not session.sticky()
+
+
+def test_replica_fixa_durante_a_transacao(db):
+    session = db.session()
+    query = select(Origem.nome).where(Origem.id == 1)
+    assert {session.execute(query).scalar() for _ in range(3)} == {'replica1'}
+    session.rollback()
+    assert origem(session) == 'replica2'
+
+
+def test_for_update_vai_para_o_primario(db):
+    session = db.session()
+    assert origem(session, for_update=True) == 'primario'
+
+
+def test_janela_de_leitura_apos_escrita(db):
+    session = db.session()
+    session.execute(insert(Origem).values(id=2, nome='novo'))
+    session.commit()
+    assert session.sticky()
+    assert session.execute(select(Origem.nome).where(Origem.id == 2)).scalar() == 'novo'
+    assert origem(session) == 'primario'
+    time.sleep(0.25)
+    assert not session.sticky()
+    assert origem(session) in ('replica1', 'replica2')
+
+
+def test_escritas_da_transacao_aberta_leem_do_primario(db):
+    session = db.session()
+    session.add(Origem(id=2, nome='novo'))
+    session.flush()
+    query = select(Origem.nome).where(Origem.id == 2)
+    assert session.execute(query).scalar() == 'novo'
+    # A janela não corre enquanto a transação com escritas está aberta
+    time.sleep(0.3)
+    assert session.execute(query).scalar() == 'novo'
+    session.commit()
+    # ...e começa no commit
+    assert session.execute(query).scalar() == 'novo'
+    session.rollback()
+    time.sleep(0.25)
+    assert session.execute(query).scalar() is None
+
+
+def test_rollback_nao_prende_a_sessao(db):
+    session = db.session()
+    session.add(Origem(id=2, nome='novo'))
+    session.flush()
+    assert session.sticky()
+    session.rollback()
+    assert not session.sticky()
+    assert origem(session) == 'replica1'
+
+
+def test_replica_fora_de_rotacao_e_retorno(db):
+    router = db.router()
+    session = db.session()
+    router.mark_down(router.replicas[0])
+    assert [origem(session) for _ in range(3)] == ['replica2'] * 3
+    time.sleep(0.25)
+    assert {origem(session) for _ in range(4)} == {'replica1', 'replica2'}
+
+
+def test_sem_replicas_saudaveis_le_do_primario(db):
+    router = db.router()
+    for replica in router.replicas:
+        router.mark_down(replica)
+    assert origem(db.session()) == 'primario'
+
+
+def test_check_tira_e_devolve_replica(tmp_path, db):
+    router = db.router()
+    (tmp_path / 'replica1.db').unlink()
+    (tmp_path / 'replica1.db').mkdir()
+    status = router.check()
+    assert list(status.values()) == [False, True]
+    assert router.healthy() == [router.replicas[1]]
+    (tmp_path / 'replica1.db').rmdir()
+    criar_banco(str(tmp_path / 'replica1.db'), 'replica1')
+    assert list(router.check().values()) == [True, True]
+    assert len(router.healthy()) == 2
+
+
+def test_consultas_do_modelo(db):
+    session = db.session()
+    assert Origem.where('id', 1).first().nome == 'replica1'
+    session.rollback()
+    assert not session.sticky()
+    # FOR UPDATE antecede uma escrita: também prende a sessão ao primário
+    assert Origem.where('id', 1).for_update().first().nome == 'primario'
+    assert session.sticky()
@@ -0,0 +1,162 @@
+"""
+Testes dos seeders: grafo de dependências, ordem de execução e parada após
+uma falha
+
+    python -m pytest test_seeder.py
+"""
+import pytest
+from sqlalchemy import ForeignKey, func, select
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.database.manager import Database
+from quentorm.database.seeder import Seeder, SeederRunner, dependencies, execution_order
+
+
+class Empresa(BaseModel):
+    __tablename__ = 'test_seeder_empresas'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+
+
+class Cliente(BaseModel):
+    __tablename__ = 'test_seeder_clientes'
+
+    id = Column(Integer, primary_key=True)
+    empresa_id = Column(Integer, ForeignKey('test_seeder_empresas.id'))
+    nome = Column(String(50))
+
+
+class Pedido(BaseModel):
+    __tablename__ = 'test_seeder_pedidos'
+
+    id = Column(Integer, primary_key=True)
+    cliente_id = Column(Integer, ForeignKey('test_seeder_clientes.id'))
+    empresa_id = Column(Integer, ForeignKey('test_seeder_empresas.id'))
+
+
+class EmpresaSeeder(Seeder):
+    model = Empresa
+
+    def run(self):
+        yield [{'id': id, 'nome': f"empresa {id}"} for id in range(1, 4)]
+
+
+class ClienteSeeder(Seeder):
+    model = Cliente
+    batch_size = 4
+
+    def run(self):
+        for inicio in range(1, 11, self.batch_size):
+            yield [{'id': id, 'empresa_id': id % 3 + 1, 'nome': f"cliente {id}"}
+                   for id in range(inicio, min(inicio + self.batch_size, 11))]
+
+
+class PedidoSeeder(Seeder):
+    model = Pedido
+
+    def run(self):
+        yield [{'id': id, 'cliente_id': id, 'empresa_id': 1} for id in range(1, 6)]
+
+
+class RelatorioSeeder(Seeder):
+    """Sem modelo: grava em outras tabelas e depende de um seeder pelo nome"""
+
+    depends_on = ['PedidoSeeder']
+
+    def run(self):
+        yield Empresa, [{'id': 99, 'nome': 'consolidada'}]
+
+
+class Sem(Seeder):
+    """Sem modelo e sem dependências"""
+
+    def run(self):
+        return None
+
+
+TODOS = [RelatorioSeeder, PedidoSeeder, EmpresaSeeder, ClienteSeeder]
+
+
+def test_dependencias_pelas_chaves_estrangeiras_e_depends_on():
+    assert dependencies(TODOS) == {
+        EmpresaSeeder: set(),
+        ClienteSeeder: {EmpresaSeeder},
+        PedidoSeeder: {ClienteSeeder, EmpresaSeeder},
+        RelatorioSeeder: {PedidoSeeder},
+    }
+    assert execution_order(dependencies(TODOS)) == [[EmpresaSeeder], [ClienteSeeder], [PedidoSeeder],
+                                                    [RelatorioSeeder]]
+    # Tabelas referenciadas sem seeder na execução não são dependências
+    assert dependencies([PedidoSeeder, ClienteSeeder]) == {PedidoSeeder: {ClienteSeeder}, ClienteSeeder: set()}
+    # Independentes ficam no mesmo nível, em ordem de nome
+    assert execution_order(dependencies([ClienteSeeder, PedidoSeeder, EmpresaSeeder, Sem])) == \
+        [[EmpresaSeeder, Sem], [ClienteSeeder], [PedidoSeeder]]
+
+
+def test_depends_on_desconhecido_e_ciclo():
+    with pytest.raises(ValueError, match='RelatorioSeeder depende de PedidoSeeder, que não foi encontrado'):
+        dependencies([RelatorioSeeder])
+
+    class Ovo(Seeder):
+        depends_on = ['Galinha']
+
+    class Galinha(Seeder):
+        depends_on = [Ovo]
+
+    with pytest.raises(ValueError, match='Dependência circular entre os seeders: Galinha, Ovo'):
+        execution_order(dependencies([Ovo, Galinha, EmpresaSeeder]))
+    # O runner recusa o ciclo antes de qualquer gravação
+    with pytest.raises(ValueError, match='circular'):
+        SeederRunner(None, [Ovo, Galinha])
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'seeders.db')}})
+    BaseModel.metadata.create_all(database.engine(),
+                                  tables=[Empresa.__table__, Cliente.__table__, Pedido.__table__])
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def contagem(db, model):
+    with db.engine().connect() as conn:
+        return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+
+def test_executa_em_ordem_de_dependencia(db):
+    terminados = []
+    resultados = SeederRunner(db, TODOS, on_done=terminados.append).run()
+    assert [(r.name, r.rows) for r in resultados] == [('EmpresaSeeder', 3), ('ClienteSeeder', 10),
+                                                      ('PedidoSeeder', 5), ('RelatorioSeeder', 1)]
+    assert terminados == resultados and all(r.seconds > 0 and r.rate > 0 for r in resultados)
+    assert (contagem(db, Empresa), contagem(db, Cliente), contagem(db, Pedido)) == (4, 10, 5)
+
+
+def test_falha_interrompe_os_seeders_seguintes(db):
+    class FalhaSeeder(Seeder):
+        model = Empresa
+
+        def run(self):
+            yield [{'id': 50, 'nome': 'gravada e desfeita'}]
+            raise RuntimeError('falhou')
+
+    class ZSeeder(Seeder):
+        """Independente, mas na fila depois do que falha"""
+        model = Empresa
+
+        def run(self):
+            yield [{'id': 60, 'nome': 'não deveria rodar'}]
+
+    terminados = []
+    runner = SeederRunner(db, [EmpresaSeeder, ClienteSeeder, FalhaSeeder, ZSeeder], on_done=terminados.append)
+    assert runner._workers() == 1
+    with pytest.raises(RuntimeError, match='falhou'):
+        runner.run()
+    # EmpresaSeeder terminou; o lote do que falhou foi desfeito e os seguintes não começaram
+    assert [r.name for r in terminados] == ['EmpresaSeeder']
+    with db.engine().connect() as conn:
+        assert conn.execute(select(Empresa.id).order_by(Empresa.id)).scalars().all() == [1, 2, 3]
+    assert contagem(db, Cliente) == 0
@@ -0,0 +1,128 @@
+"""
+Testes da serialização compacta de linhas para o cache (RowLayout)
+
+    python -m pytest test_serializer.py
+"""
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+from sqlalchemy import JSON, Boolean, Date, DateTime, Float, LargeBinary, Numeric, Text, Time
+from sqlalchemy.orm import declarative_base
+
+from quentorm import Amount, BaseModel, Column, Integer, Money, String
+from quentorm.caching import serializer
+from quentorm.caching.serializer import (CachedResult, dumps_rows, loads_rows, pack_result, row_layout,
+                                         unpack_result)
+
+
+class Item(BaseModel):
+    __tablename__ = 'test_serializer_itens'
+
+    id = Column(Integer, primary_key=True)
+    ativo = Column(Boolean)
+    peso = Column(Float)
+    criado = Column(DateTime)
+    dia = Column(Date)
+    hora = Column(Time)
+    preco = Column(Money)
+    nome = Column(String(50))
+    notas = Column(Text)
+    foto = Column(LargeBinary)
+    taxa = Column(Numeric(10, 4))
+
+
+class Documento(BaseModel):
+    __tablename__ = 'test_serializer_documentos'
+
+    id = Column(Integer, primary_key=True)
+    dados = Column(JSON)
+
+
+# A mesma tabela em um deploy anterior, ainda sem a coluna `taxa`
+ItemAntigo = type('ItemAntigo', (declarative_base(),), {
+    '__tablename__': 'test_serializer_itens',
+    **{key: Column(column.type, primary_key=column.primary_key)
+       for key, column in Item.__table__.columns.items() if key != 'taxa'},
+})
+
+COMPLETA = (7, True, 1.5, datetime(2026, 3, 10, 14, 30, 5, 123456), date(2026, 3, 10), time(9, 15, 0, 42),
+            Amount('1234.56'), 'ação', 'x' * 1000, b'\x00\xff' * 10, Decimal('0.1250'))
+
+
+def test_ida_e_volta_no_layout_compacto():
+    layout = row_layout(Item.__mapper__)
+    data = layout.encode(COMPLETA)
+    assert data[0] == serializer._ROW_COMPACT
+    assert layout.decode(data) == COMPLETA
+    assert type(layout.decode(data)[6]) is Amount
+    # Textos vazios não são nulos
+    vazios = (1, False, 0.0, None, None, None, Amount('0'), '', '', b'', Decimal('0'))
+    assert layout.decode(layout.encode(vazios)) == vazios
+
+
+def test_nulos_no_bitmap():
+    layout = row_layout(Item.__mapper__)
+    nulos = (1,) + (None,) * 10
+    assert layout.decode(layout.encode(nulos)) == nulos
+    # Nulos intercalados entre colunas fixas e variáveis, passando do primeiro byte do bitmap
+    intercalados = tuple(None if index % 2 else value for index, value in enumerate(COMPLETA))
+    assert layout.bitmap_size == 2
+    assert layout.decode(layout.encode(intercalados)) == intercalados
+
+
+def test_valores_fora_do_layout_usam_pickle():
+    layout = row_layout(Item.__mapper__)
+    fora = [
+        (2 ** 70,) + COMPLETA[1:],                                          # não cabe em 'q'
+        COMPLETA[:3] + (datetime(2026, 3, 10, tzinfo=timezone.utc),) + COMPLETA[4:],
+        COMPLETA[:7] + (42,) + COMPLETA[8:],                                # int em coluna de texto
+    ]
+    for row in fora:
+        data = layout.encode(row)
+        assert data[0] == serializer._ROW_GENERIC
+        assert layout.decode(data) == row
+
+    # Coluna sem layout compacto (JSON): sempre pickle
+    documentos = row_layout(Documento.__mapper__)
+    assert documentos.generic_only
+    row = (1, {'a': [1, 2]})
+    assert documentos.encode(row)[0] == serializer._ROW_GENERIC
+    assert documentos.decode(documentos.encode(row)) == row
+
+
+def test_esquema_diferente_nao_e_lido():
+    antigo = row_layout(ItemAntigo.__mapper__)
+    atual = row_layout(Item.__mapper__)
+    assert antigo.schema_hash != atual.schema_hash
+    assert row_layout(Item.__mapper__) is atual and len(atual.schema_hash) == 16
+
+    data = dumps_rows(ItemAntigo.__mapper__, [COMPLETA[:-1]])
+    assert loads_rows(ItemAntigo.__mapper__, data) == [COMPLETA[:-1]]
+    assert loads_rows(Item.__mapper__, data) is None
+    assert unpack_result(CachedResult(Item, data)) is None
+
+
+def test_pack_result_devolve_instancias_ou_registros(monkeypatch):
+    keys = row_layout(Item.__mapper__).keys
+    itens = [Item(**dict(zip(keys, COMPLETA))), Item(**dict(dict.fromkeys(keys), id=8, nome='outro'))]
+    packed = pack_result(itens)
+    assert isinstance(packed, CachedResult)
+
+    instancias = unpack_result(packed)
+    assert [(item.id, item.nome, item.preco) for item in instancias] == [(7, 'ação', Amount('1234.56')),
+                                                                         (8, 'outro', None)]
+    registros = unpack_result(packed, as_records=True)
+    assert registros[0].taxa == Decimal('0.1250') and registros[1].foto is None
+
+    # Instâncias com colunas não carregadas, listas mistas ou que não são de modelos ficam como estão
+    assert not isinstance(pack_result([Item(id=1)]), CachedResult)
+    assert pack_result([Item(id=1), Documento(id=1)])[1].id == 1
+    assert pack_result([1, 2]) == [1, 2] and pack_result([]) == []
+
+    # Acima do limite, o corpo é comprimido quando há um compressor instalado
+    monkeypatch.setattr(serializer, 'COMPRESS_THRESHOLD', 10)
+    comprimido = pack_result(itens)
+    metodo = comprimido.data[2]
+    assert metodo == (serializer._COMPRESS_ZSTD if serializer._zstd else
+                      serializer._COMPRESS_LZ4 if serializer._lz4 else serializer._COMPRESS_NONE)
+    assert [item.notas for item in unpack_result(comprimido)] == ['x' * 1000, None]
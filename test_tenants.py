@@ -0,0 +1,158 @@
+"""
+Testes dos schemas por tenant (db.tenant) sobre o pool único da conexão
+
+No SQLite, cada schema é um banco anexado com ATTACH DATABASE em todas as
+conexões do pool.
+
+    python -m pytest test_tenants.py
+"""
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import event, select
+
+from quentorm import BaseModel, Column, Integer, String
+from quentorm.caching.backends import MemoryCache, set_cache
+from quentorm.caching.identity import TENANT
+from quentorm.context import current_tenant
+from quentorm.database.manager import Database
+
+TENANTS = ('loja_a', 'loja_b')
+
+
+class Cliente(BaseModel):
+    __tablename__ = 'test_tenants_clientes'
+    __cache_by_pk__ = True
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(50))
+
+
+def anexa(engine, prefixo):
+    """Anexa os bancos dos tenants em cada conexão nova da engine"""
+    def conecta(dbapi_connection, record):
+        for tenant in TENANTS:
+            dbapi_connection.execute(f"ATTACH DATABASE '{prefixo}_{tenant}.db' AS {tenant}")
+    event.listen(engine, 'connect', conecta)
+
+
+def clientes_em(arquivo):
+    conn = sqlite3.connect(str(arquivo))
+    try:
+        return [nome for nome, in conn.execute('SELECT nome FROM test_tenants_clientes ORDER BY id')]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database().config({'default': {'driver': 'sqlite', 'database': str(tmp_path / 'principal.db')}})
+    anexa(database.engine(), tmp_path / 'principal')
+    BaseModel.metadata.create_all(database.engine(), tables=[Cliente.__table__])
+    for tenant in TENANTS:
+        with database.tenant(tenant):
+            BaseModel.metadata.create_all(database.engine(), tables=[Cliente.__table__])
+    set_cache('default', MemoryCache())
+    yield database
+    database.remove_sessions()
+    database.dispose()
+
+
+def test_consultas_vao_para_o_schema_do_tenant(db, tmp_path):
+    executadas = []
+    event.listen(db.engine(), 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: executadas.append(statement))
+    for tenant in TENANTS:
+        with db.tenant(tenant):
+            db.session().add(Cliente(id=1, nome=f"cliente de {tenant}"))
+            db.session().commit()
+    db.session().add(Cliente(id=1, nome='sem tenant'))
+    db.session().commit()
+
+    assert clientes_em(tmp_path / 'principal_loja_a.db') == ['cliente de loja_a']
+    assert clientes_em(tmp_path / 'principal_loja_b.db') == ['cliente de loja_b']
+    assert clientes_em(tmp_path / 'principal.db') == ['sem tenant']
+    assert any('INSERT INTO loja_a.test_tenants_clientes' in sql for sql in executadas)
+
+    with db.tenant('loja_b'):
+        assert Cliente.where('id', 1).first().nome == 'cliente de loja_b'
+        with db.tenant('loja_a'):
+            assert Cliente.query().count() == 1 and Cliente.query().first().nome == 'cliente de loja_a'
+        # Aninhado: ao sair, volta o tenant de fora
+        assert current_tenant.get() == 'loja_b'
+        with db.engine().connect() as conn:
+            assert conn.execute(select(Cliente.nome)).scalar() == 'cliente de loja_b'
+    assert current_tenant.get() is None and Cliente.query().first().nome == 'sem tenant'
+
+
+def test_tenants_compartilham_o_pool_da_conexao(db):
+    base = db.engine()
+    with db.tenant('loja_a'):
+        engine = db.engine()
+        assert engine is not base and engine.pool is base.pool
+        assert db.engine() is engine
+    with db.tenant('loja_b'):
+        assert db.engine().pool is base.pool
+    assert list(db.pool_stats()) == ['default']
+
+
+def test_sessoes_e_identity_maps_separados_por_tenant(db):
+    for tenant in TENANTS:
+        with db.tenant(tenant):
+            db.session().add(Cliente(id=1, nome=tenant))
+            db.session().commit()
+
+    sessao = db.session()
+    with db.tenant('loja_a'):
+        sessao_a = db.session()
+        a = Cliente.find(1)
+    with db.tenant('loja_b'):
+        sessao_b = db.session()
+        b = Cliente.find(1)
+    assert len({sessao, sessao_a, sessao_b}) == 3
+    # Mesma chave primária, instâncias e valores distintos (inclusive no cache por chave primária)
+    assert (a.nome, b.nome) == ('loja_a', 'loja_b') and a is not b
+    assert a in sessao_a and a not in sessao_b
+    db.remove_sessions()
+    with db.tenant('loja_b'):
+        assert Cliente.find(1).nome == 'loja_b'
+    assert Cliente.find(1) is None
+
+    # Outra thread não herda o tenant: a sessão dela é a da conexão, sem schema
+    vistos = []
+    with db.tenant('loja_a'):
+        thread = threading.Thread(target=lambda: vistos.append((current_tenant.get(), db.session().info.get(TENANT))))
+        thread.start()
+        thread.join()
+    assert vistos == [(None, None)]
+
+
+def test_tenant_com_replicas_le_da_replica_no_mesmo_schema(tmp_path):
+    arquivos = {nome: tmp_path / f"{nome}.db" for nome in ('principal', 'replica')}
+    for nome, arquivo in arquivos.items():
+        for tenant in TENANTS:
+            conn = sqlite3.connect(f"{arquivo.with_suffix('')}_{tenant}.db")
+            conn.execute('CREATE TABLE test_tenants_clientes (id INTEGER PRIMARY KEY, nome VARCHAR(50))')
+            conn.execute('INSERT INTO test_tenants_clientes VALUES (1, ?)', (f"{nome} {tenant}",))
+            conn.commit()
+            conn.close()
+
+    db = Database().config({'default': {
+        'driver': 'sqlite', 'database': str(arquivos['principal']),
+        'replicas': [{'database': str(arquivos['replica'])}],
+    }})
+    router = db.router()
+    anexa(router.primary, tmp_path / 'principal')
+    anexa(router.replicas[0], tmp_path / 'replica')
+    try:
+        with db.tenant('loja_b'):
+            assert db.session().execute(select(Cliente.nome)).scalar() == 'replica loja_b'
+            assert Cliente.where('id', 1).for_update().first().nome == 'principal loja_b'
+            db.session().commit()
+            # A visão do tenant compartilha o estado de saúde das réplicas
+            router.mark_down(router.replicas[0])
+            assert db.session().execute(select(Cliente.nome)).scalar() == 'principal loja_b'
+    finally:
+        db.remove_sessions()
+        db.dispose()